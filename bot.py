@@ -30,11 +30,23 @@ if '--help' in sys.argv or '-h' in sys.argv:
     print("Options:")
     print("  --local-testing    Run bot locally (bypasses AWS-only restriction)")
     print("                     ⚠️  WARNING: Ensure AWS bot is stopped first!")
+    print("  --replay DIR       Replay recorded 1m history from DIR under a virtual clock")
+    print("                     (paper exchange, no API keys, runs in replay_runs/)")
+    print("  --replay-days N    Limit replay to N simulated days")
+    print("  --replay-balance X Starting paper balance in USDT (default 100)")
     print("  --help, -h         Show this help message")
     print("")
     print("Default: Bot runs on AWS EC2 only (security measure)")
     sys.exit(0)
 
+# 🎬 REPLAY MODE: Install the virtual clock before any module reads the time
+from replay_engine import ReplayComplete
+REPLAY_MODE = '--replay' in sys.argv
+replay_session = None
+if REPLAY_MODE:
+    from replay_engine import start_replay_session_from_argv
+    replay_session = start_replay_session_from_argv(sys.argv)
+
 def check_aws_environment():
     """
     🛡️ CRITICAL: Ensure bot only runs on AWS EC2
@@ -48,6 +60,11 @@ def check_aws_environment():
             print("   ✅ Proceeding with local execution...")
             return True
         
+        # Replay runs against a paper exchange and never touches live orders
+        if REPLAY_MODE:
+            print("🎬 REPLAY MODE - paper exchange, AWS check skipped")
+            return True
+        
         # Check if running on AWS EC2
         hostname = socket.gethostname()
         system = platform.system()
@@ -106,12 +123,18 @@ check_aws_environment()
 
 # Import required libraries
 import ccxt
+import json
 import time
 import re
 import datetime
 import pandas as pd
 import traceback
-from config import BINANCE_API_KEY, BINANCE_API_SECRET
+try:
+    from config import BINANCE_API_KEY, BINANCE_API_SECRET
+except ImportError:
+    if not REPLAY_MODE:
+        raise
+    BINANCE_API_KEY = BINANCE_API_SECRET = None  # Replay never authenticates
 from strategies.ma_crossover import fetch_ohlcv, MovingAverageCrossover
 from strategies.multi_strategy_optimized import MultiStrategyOptimized
 from strategies.hybrid_strategy import AdvancedHybridStrategy
@@ -134,6 +157,21 @@ from multi_timeframe_ma import detect_multi_timeframe_ma_signals
 from enhanced_multi_timeframe_ma import detect_enhanced_multi_timeframe_ma_signals
 from src.priority_functions_5m1m import should_hold_position, calculate_recent_momentum, detect_5m_1m_agreement, detect_peak_and_trailing_exit
 from multi_crypto_monitor import get_multi_crypto_monitor
+from bot_metrics import get_bot_metrics, timed_stage
+from sampling_profiler import install_sampling_profiler
+from bot_heartbeat import get_heartbeat_writer
+from risk_metrics_service import get_risk_metrics_service
+from timeframe_aggregator import get_timeframe_aggregator
+from trailing_stop_engine import get_trailing_stop_engine
+from order_reconciler import desired_protection, get_order_reconciler
+from market_metadata import get_market_metadata
+from local_order_book import get_order_book_manager
+from loop_scheduler import get_loop_scheduler
+from clock_sync import get_clock_sync
+from intelligence_refresher import get_intelligence_refresher
+from http_client import get_http_client
+from multi_symbol_engine import MultiSymbolEngine
+from ohlcv_warehouse import OHLCVWarehouse, load_history, DEFAULT_WAREHOUSE_DIR
 
 # 🧠 ML LEARNING SYSTEM: Learn from trading mistakes
 try:
@@ -167,7 +205,9 @@ class APICache:
             data, timestamp = self.cache[key]
             duration = self.cache_duration.get(data_type, 10)
             if time.time() - timestamp < duration:
+                get_bot_metrics().record_cache(data_type, True)
                 return data
+        get_bot_metrics().record_cache(data_type, False)
         return None
     
     def set(self, key, data, data_type='default'):
@@ -353,9 +393,28 @@ except ImportError as e:
 init_log()
 bot_config = get_bot_config()
 optimized_config = bot_config.config  # Get the config dict from the BotConfig instance
+# 🗂️ CONFIG SERVICE: Config files parsed once, watched for changes, read from memory
+config_service = bot_config.service
+config_service.configure(optimized_config.get('system', {}).get('config_service', {}))
+bot_metrics = get_bot_metrics(optimized_config.get('system', {}).get('metrics', {}))
+sampling_profiler = install_sampling_profiler('bot', optimized_config.get('system', {}).get('profiler', {}))
+
+# 💓 WATCHDOG HEARTBEAT: O(1) liveness record read by crypto-bot-watchdog.py
+bot_heartbeat = None if REPLAY_MODE else get_heartbeat_writer(optimized_config.get('system', {}).get('heartbeat', {}))
+bot_metrics.attach_heartbeat(bot_heartbeat)
 state_manager = get_state_manager()
 institutional_manager = InstitutionalStrategyManager()
 
+# 📉 RISK METRICS: Rolling VaR/CVaR per symbol, refreshed once per closed 1h candle
+risk_metrics = get_risk_metrics_service(optimized_config['risk_management'].get('risk_metrics', {}))
+
+# 📦 HISTORY WAREHOUSE: Local partitioned candles (filled by `python ohlcv_warehouse.py backfill`)
+history_warehouse = OHLCVWarehouse(optimized_config.get('system', {}).get('history_warehouse', {}).get('root',
+                                                                                                  DEFAULT_WAREHOUSE_DIR))
+
+# 🕯️ TIMEFRAME AGGREGATOR: 5m...1d candles derived from one 1m stream per symbol
+timeframe_aggregator = get_timeframe_aggregator(optimized_config.get('system', {}).get('timeframe_aggregator', {}))
+
 # =============================================================================
 # GLOBAL STATE - Now managed by StateManager
 # =============================================================================
@@ -399,74 +458,114 @@ daily_loss_limit = risk_config['daily_loss_limit_usd']  # Dynamic daily limit
 
 def sync_exchange_time():
     """
-    Synchronize local time with exchange server time to prevent timestamp errors
+    Refresh the filtered exchange clock offset now (startup and after a -1021 timestamp error)
     """
-    try:
-        # Try to fetch server time without any offset first
-        temp_exchange = ccxt.binanceus({
-            'apiKey': BINANCE_API_KEY,
-            'secret': BINANCE_API_SECRET,
-            'enableRateLimit': True,
-            'timeout': 10000,
-            'options': {'timeDifference': 0}  # No offset for server time fetch
-        })
-
-        server_time = temp_exchange.fetch_time()
-        local_time = int(time.time() * 1000)
-
-        # Calculate the actual offset needed
-        # If server_time > local_time, we need positive offset (we're behind)
-        # If server_time < local_time, we need negative offset (we're ahead)
-        raw_offset = server_time - local_time
-
-        # Based on our testing, we typically need +1000ms, so let's be smart about it
-        if abs(raw_offset) < 2000:  # Small difference, use +1000ms buffer
-            adjusted_offset = 1000
-        elif raw_offset > 0:  # We're behind server
-            adjusted_offset = raw_offset + 500  # Add 500ms buffer
-        else:  # We're ahead of server
-            adjusted_offset = raw_offset - 500  # Subtract 500ms buffer
-
-        # Set the offset
-        exchange.options['timeDifference'] = adjusted_offset
-
-        print(f"⏰ Smart Time Sync: Raw offset = {raw_offset}ms, Using = {adjusted_offset}ms")
-        return True
+    if REPLAY_MODE:
+        return True  # Virtual clock and paper exchange share one timeline
 
-    except Exception as e:
-        print(f"⚠️ Server time fetch failed: {e}")
-        # Based on our diagnostic test, +1000ms works
-        working_offsets = [1000, 2000, 500, 1500, 0, -1000]
-        for offset in working_offsets:
-            try:
-                exchange.options['timeDifference'] = offset
-                print(f"⚠️ Trying fallback offset: {offset}ms")
-                # Test the offset with a simple API call
-                exchange.fetch_ticker('BTC/USDT')
-                print(f"✅ Offset {offset}ms works!")
-                return True
-            except Exception as test_error:
-                if 'timestamp' not in str(test_error).lower():
-                    # If it's not a timestamp error, this offset works
-                    print(f"✅ Offset {offset}ms works (non-timestamp error: {test_error})")
-                    return True
-                continue
+    return clock_sync.sync_now()
 
-        print("❌ All time sync attempts failed")
-        return False
+if REPLAY_MODE:
+    exchange = replay_session.exchange  # Paper exchange backed by recorded history
+else:
+    exchange = ccxt.binanceus({
+        'apiKey': BINANCE_API_KEY,
+        'secret': BINANCE_API_SECRET,
+        'enableRateLimit': True,
+        'timeout': 30000,  # 30 second timeout
+        'rateLimit': 1200,  # Be more conservative with rate limiting
+        'options': {
+            'recvWindow': 10000,  # 10 second receive window
+            'timeDifference': 1000,  # Conservative start; clock sync replaces it with the filtered estimate
+            'adjustForTimeDifference': True  # Enable automatic adjustment
+        }
+    })
 
-exchange = ccxt.binanceus({
-    'apiKey': BINANCE_API_KEY,
-    'secret': BINANCE_API_SECRET,
-    'enableRateLimit': True,
-    'timeout': 30000,  # 30 second timeout
-    'rateLimit': 1200,  # Be more conservative with rate limiting
-    'options': {
-        'recvWindow': 10000,  # 10 second receive window
-        'timeDifference': 1000,  # Correct offset: +1000ms (we're behind server)
-        'adjustForTimeDifference': True  # Enable automatic adjustment
-    }
-})
+# 📈 LOOP METRICS: Count every exchange request by endpoint and weight
+bot_metrics.instrument_exchange(exchange)
+if bot_metrics.config.get('enabled', True) and not REPLAY_MODE:
+    try:
+        bot_metrics.start_http_server()
+    except OSError as e:
+        log_message(f"⚠️ Metrics endpoint not started: {e}")
+
+# 📐 MARKET METADATA: One cached load_markets; orders are quantized and validated locally
+market_metadata_config = dict(optimized_config['trading'].get('market_metadata', {}))
+if REPLAY_MODE:
+    market_metadata_config['cache_file'] = None  # Replay markets must not overwrite the live cache
+market_metadata = get_market_metadata(exchange, market_metadata_config)
+
+# 🛡️ TRAILING STOP ENGINE: Ratchets stop orders in its own thread (started by run_continuously)
+trailing_engine = get_trailing_stop_engine(
+    exchange,
+    optimized_config['risk_management'].get('trailing_stop_engine', {}),
+    api_call=lambda func, *args, **kwargs: safe_api_call(func, *args, **kwargs),
+    on_update=lambda symbol, data: sync_trailing_stop_state(symbol, data),
+    market_metadata=market_metadata
+)
+
+# 🧾 ORDER RECONCILER: One open-orders snapshot per check, concurrent minimal cancels
+order_reconciler = get_order_reconciler(
+    exchange,
+    optimized_config['risk_management'].get('order_reconciler', {}),
+    api_call=lambda func, *args, **kwargs: safe_api_call(func, *args, **kwargs)
+)
+
+# 📚 LOCAL ORDER BOOK: Diff-depth stream keeps execution pricing local (started by run_continuously)
+order_books = get_order_book_manager(
+    exchange,
+    optimized_config['trading'].get('order_book', {}),
+    api_call=lambda func, *args, **kwargs: safe_api_call(func, *args, **kwargs)
+)
+trailing_engine.attach_feed(order_books)  # Stops trail the stream mid; tickers only when it goes stale
+
+def local_mid_price(symbol):
+    """Mid price from the live local order book, or None (never a request)"""
+    book = order_books.book(symbol)
+    return book.mid() if book else None
+
+# ⏱️ LOOP SCHEDULER: Evaluate on candle closes, wake early on protection events
+loop_scheduler = get_loop_scheduler(
+    optimized_config['trading'].get('loop_scheduler', {}),
+    wait=(lambda seconds: time.sleep(seconds)) if REPLAY_MODE else None,  # Replay advances virtual time
+    price_source=lambda symbol: local_mid_price(symbol)
+)
+
+# 🛰️ INTELLIGENCE REFRESHER: Phase 2/3 snapshots kept warm off the order path
+http_client_config = dict(optimized_config['trading'].get('http_client', {}))  # Free-API pool, limits, retries
+if REPLAY_MODE:
+    http_client_config['offline'] = True  # Live free-API data has no place in a replay; providers fall back at once
+get_http_client().configure(http_client_config)
+intelligence_refresher = get_intelligence_refresher(optimized_config['trading'].get('intelligence_refresher', {}))
+if ONCHAIN_AVAILABLE:
+    onchain_provider = OnChainDataProvider()  # One instance so its cache survives between reads
+    intelligence_refresher.register('onchain', onchain_provider.calculate_onchain_score)
+    intelligence_refresher.register('onchain_volume', onchain_provider.detect_volume_surge)
+if FREE_CRYPTO_AVAILABLE:
+    intelligence_refresher.register('free_crypto', get_free_crypto_intelligence)
+if FREE_PHASE2_AVAILABLE:
+    intelligence_refresher.register('phase2', get_free_phase2_intelligence)
+    intelligence_refresher.register('phase2_alerts', get_free_phase2_alerts)
+if SENTIMENT_ANALYSIS_AVAILABLE:
+    intelligence_refresher.register('sentiment', lambda symbol: sentiment_engine.get_sentiment_analysis(
+        symbol, local_mid_price(symbol)))
+if ALTERNATIVE_DATA_AVAILABLE:
+    intelligence_refresher.register('alternative_data', alternative_data_aggregator.get_comprehensive_alternative_data)
+
+# 🧠 PHASE 2 INTEGRATION: Signal enhancement reads refresher snapshots, keyed by pair
+try:
+    from phase2_trading_integration import Phase2TradingIntegration
+    phase2_integration = Phase2TradingIntegration(intelligence_refresher)
+    if phase2_integration.enabled:
+        intelligence_refresher.register('phase2_enhancement', phase2_integration.fetch_intelligence,
+                                        refresh_seconds=phase2_integration.cache_duration)
+    log_message(f"🧠 PHASE 2 INTELLIGENCE: {phase2_integration.get_status_summary()['status']}")
+except ImportError:
+    phase2_integration = None
+    log_message("⚠️ PHASE 2 INTELLIGENCE: Not available, using standard signals only")
+
+# ⏰ CLOCK SYNC: Filtered server-time offset kept current over the existing connection
+clock_sync = get_clock_sync(exchange, optimized_config['trading'].get('clock_sync', {}))
 
 # Synchronize time with exchange
 print("⏰ Synchronizing with Binance server time...")
@@ -486,8 +585,10 @@ if LSTM_PREDICTOR_AVAILABLE:
     # Start background model training if needed
     print("🔄 Checking LSTM model training status...")
     try:
-        # Fetch sample data for training check
-        sample_data = fetch_ohlcv(exchange, 'BTC/USDT', '5m', 500)
+        # Training history: local warehouse when backfilled, else the last 500 live candles
+        warehouse_config = optimized_config.get('system', {}).get('history_warehouse', {})
+        sample_data = load_history(exchange, 'BTC/USDT', '5m', warehouse_config.get('lstm_training_candles', 5000),
+                                   fallback_limit=500, warehouse=history_warehouse)
         if len(sample_data) >= 200:
             training_results = train_lstm_models(sample_data, optimized_config, ['5m', '15m'])
             trained_models = sum(1 for success in training_results.values() if success)
@@ -530,8 +631,10 @@ if ADVANCED_ML_AVAILABLE:
     
     print("🔄 Testing ensemble model capabilities...")
     try:
-        # Test ensemble training with sample data
-        sample_data = fetch_ohlcv(exchange, 'BTC/USDT', '5m', 200)
+        # Test ensemble training with sample data (warehouse history when available)
+        warehouse_config = optimized_config.get('system', {}).get('history_warehouse', {})
+        sample_data = load_history(exchange, 'BTC/USDT', '5m', warehouse_config.get('ml_training_candles', 2000),
+                                   fallback_limit=200, warehouse=history_warehouse)
         if len(sample_data) >= 100:
             training_results = train_advanced_ml_models(sample_data)
             trained_models = sum(training_results.values()) if training_results else 0
@@ -624,9 +727,9 @@ def safe_api_call(func, *args, max_retries=3, **kwargs):
                         time.sleep(1)  # Brief pause after sync
                         continue
                     else:
-                        # Try adjusting offset manually
+                        # Try adjusting offset manually (ccxt signs with local time - timeDifference)
                         current_offset = exchange.options.get('timeDifference', 0)
-                        new_offset = current_offset - 1000  # Move back 1 second
+                        new_offset = current_offset + 1000  # Move request timestamps back 1 second
                         exchange.options['timeDifference'] = new_offset
                         log_message(f"⚠️ Manual offset adjustment: {current_offset}ms → {new_offset}ms")
                         time.sleep(1)
@@ -774,49 +877,48 @@ def should_switch_crypto_asset(current_symbol, selected_crypto):
     # 🌐 ON-CHAIN ENHANCED SCORING
     if ONCHAIN_AVAILABLE:
         try:
-            onchain_provider = OnChainDataProvider()
-            
-            # Get on-chain intelligence for the selected crypto
-            onchain_analysis = onchain_provider.calculate_onchain_score(symbol)
-            onchain_score = onchain_analysis.get('onchain_score', 0.0)
-            signal_strength = onchain_analysis.get('signal_strength', 'weak')
-            
-            # 🎯 ENHANCED EMERGENCY DETECTION: Combine technical + on-chain
-            emergency_threshold = 0.85
-            onchain_boost = onchain_score * 0.15  # Up to 15% boost from on-chain data
-            base_score = score  # Use the score we extracted above
-            enhanced_score = base_score + onchain_boost
-            
-            # 🚨 EMERGENCY SPIKE SWITCHING: Technical + On-chain confluence
-            if enhanced_score > emergency_threshold:
-                factors = onchain_analysis.get('contributing_factors', [])
-                factor_text = ", ".join(factors) if factors else "strong on-chain signals"
-                return True, f"🚨 ENHANCED SPIKE DETECTED: {symbol} (tech: {base_score:.3f} + onchain: {onchain_score:.3f} = {enhanced_score:.3f}) - {factor_text}"
-            
-            # 🎯 ON-CHAIN PREDICTIVE SWITCHING: Early detection before technical signals peak
-            if signal_strength in ['very_strong', 'strong'] and base_score > 0.50:
-                factors = onchain_analysis.get('contributing_factors', [])
-                factor_text = ", ".join(factors)
-                log_message(f"🔮 PREDICTIVE SWITCH: On-chain signals ({signal_strength}) preceding technical confirmation")
-                return True, f"🔮 PREDICTIVE OPPORTUNITY: {symbol} - {factor_text} (early detection)"
-            
-            # 🎯 VOLUME SURGE PRIORITY: Immediate switch on high-confidence volume spikes
-            volume_surge = onchain_provider.detect_volume_surge(symbol)
-            if volume_surge and volume_surge.get('surge_detected', False) and volume_surge.get('confidence', 0) > 0.8:
-                surge_level = volume_surge.get('surge_level', 'unknown')
-                volume_ratio = volume_surge.get('volume_ratio', 0)
-                return True, f"📈 VOLUME SURGE DETECTED: {symbol} - {surge_level} surge ({volume_ratio:.1f}x normal volume)"
-            
-            # Standard enhanced switching logic
-            enhanced_high_threshold = high_score_threshold - (onchain_score * 0.1)  # Lower threshold with strong on-chain
-            
-            if enhanced_score > enhanced_high_threshold:
-                score_improvement = enhanced_score - 0.5
-                if score_improvement >= score_threshold:
-                    enhancement_text = f" (enhanced by {onchain_boost:.3f} on-chain)" if onchain_boost > 0.05 else ""
-                    return True, f"Switching to higher-performing asset (score: {enhanced_score:.3f}){enhancement_text}"
-            
-            log_message(f"🌐 On-chain analysis for {symbol}: score={onchain_score:.3f}, strength={signal_strength}")
+            # Get on-chain intelligence for the selected crypto (latest background snapshot)
+            onchain_analysis = intelligence_refresher.get('onchain', symbol)
+            if onchain_analysis is not None:   # None while the background snapshot warms up
+                onchain_score = onchain_analysis.get('onchain_score', 0.0)
+                signal_strength = onchain_analysis.get('signal_strength', 'weak')
+            
+                # 🎯 ENHANCED EMERGENCY DETECTION: Combine technical + on-chain
+                emergency_threshold = 0.85
+                onchain_boost = onchain_score * 0.15  # Up to 15% boost from on-chain data
+                base_score = score  # Use the score we extracted above
+                enhanced_score = base_score + onchain_boost
+            
+                # 🚨 EMERGENCY SPIKE SWITCHING: Technical + On-chain confluence
+                if enhanced_score > emergency_threshold:
+                    factors = onchain_analysis.get('contributing_factors', [])
+                    factor_text = ", ".join(factors) if factors else "strong on-chain signals"
+                    return True, f"🚨 ENHANCED SPIKE DETECTED: {symbol} (tech: {base_score:.3f} + onchain: {onchain_score:.3f} = {enhanced_score:.3f}) - {factor_text}"
+            
+                # 🎯 ON-CHAIN PREDICTIVE SWITCHING: Early detection before technical signals peak
+                if signal_strength in ['very_strong', 'strong'] and base_score > 0.50:
+                    factors = onchain_analysis.get('contributing_factors', [])
+                    factor_text = ", ".join(factors)
+                    log_message(f"🔮 PREDICTIVE SWITCH: On-chain signals ({signal_strength}) preceding technical confirmation")
+                    return True, f"🔮 PREDICTIVE OPPORTUNITY: {symbol} - {factor_text} (early detection)"
+            
+                # 🎯 VOLUME SURGE PRIORITY: Immediate switch on high-confidence volume spikes
+                volume_surge = intelligence_refresher.get('onchain_volume', symbol)
+                if volume_surge and volume_surge.get('surge_detected', False) and volume_surge.get('confidence', 0) > 0.8:
+                    surge_level = volume_surge.get('surge_level', 'unknown')
+                    volume_ratio = volume_surge.get('volume_ratio', 0)
+                    return True, f"📈 VOLUME SURGE DETECTED: {symbol} - {surge_level} surge ({volume_ratio:.1f}x normal volume)"
+            
+                # Standard enhanced switching logic
+                enhanced_high_threshold = high_score_threshold - (onchain_score * 0.1)  # Lower threshold with strong on-chain
+            
+                if enhanced_score > enhanced_high_threshold:
+                    score_improvement = enhanced_score - 0.5
+                    if score_improvement >= score_threshold:
+                        enhancement_text = f" (enhanced by {onchain_boost:.3f} on-chain)" if onchain_boost > 0.05 else ""
+                        return True, f"Switching to higher-performing asset (score: {enhanced_score:.3f}){enhancement_text}"
+            
+                log_message(f"🌐 On-chain analysis for {symbol}: score={onchain_score:.3f}, strength={signal_strength}")
             
         except Exception as e:
             log_message(f"⚠️ On-chain analysis failed for {symbol}: {e}")
@@ -826,35 +928,36 @@ def should_switch_crypto_asset(current_symbol, selected_crypto):
     if FREE_CRYPTO_AVAILABLE:
         try:
             # Get comprehensive free intelligence
-            free_intelligence = get_free_crypto_intelligence(symbol)
-            confidence_score = free_intelligence.get('confidence_score', 0.0)
-            trading_signals = free_intelligence.get('trading_signals', {})
-            
-            # 🚨 FREE API VOLUME SURGE DETECTION
-            volume_surge = trading_signals.get('volume_surge', False)
-            momentum_strength = trading_signals.get('momentum_strength', 0)
-            overall_signal = trading_signals.get('overall_signal', 'hold')
-            
-            if volume_surge and confidence_score > 0.7:
-                sources = free_intelligence.get('sources_used', [])
-                source_text = f"Sources: {', '.join(sources)}"
-                return True, f"🆓 FREE API VOLUME SURGE: {symbol} - {source_text} (confidence: {confidence_score:.1%})"
-            
-            # 🎯 FREE API MOMENTUM SWITCHING
-            if overall_signal == 'buy' and momentum_strength > 0.5 and score > 0.60:
-                return True, f"🆓 FREE API MOMENTUM: {symbol} - Strong buy signal from {len(free_intelligence.get('sources_used', []))} free sources"
-            
-            # Enhanced scoring with free data
-            if confidence_score > 0.8:
-                free_boost = momentum_strength * 0.1  # Up to 10% boost from free APIs
-                enhanced_score = score + free_boost
+            free_intelligence = intelligence_refresher.get('free_crypto', symbol)
+            if free_intelligence is not None:   # None while the background snapshot warms up
+                confidence_score = free_intelligence.get('confidence_score', 0.0)
+                trading_signals = free_intelligence.get('trading_signals', {})
+            
+                # 🚨 FREE API VOLUME SURGE DETECTION
+                volume_surge = trading_signals.get('volume_surge', False)
+                momentum_strength = trading_signals.get('momentum_strength', 0)
+                overall_signal = trading_signals.get('overall_signal', 'hold')
+            
+                if volume_surge and confidence_score > 0.7:
+                    sources = free_intelligence.get('sources_used', [])
+                    source_text = f"Sources: {', '.join(sources)}"
+                    return True, f"🆓 FREE API VOLUME SURGE: {symbol} - {source_text} (confidence: {confidence_score:.1%})"
+            
+                # 🎯 FREE API MOMENTUM SWITCHING
+                if overall_signal == 'buy' and momentum_strength > 0.5 and score > 0.60:
+                    return True, f"🆓 FREE API MOMENTUM: {symbol} - Strong buy signal from {len(free_intelligence.get('sources_used', []))} free sources"
+            
+                # Enhanced scoring with free data
+                if confidence_score > 0.8:
+                    free_boost = momentum_strength * 0.1  # Up to 10% boost from free APIs
+                    enhanced_score = score + free_boost
                 
-                if enhanced_score > high_score_threshold:
-                    score_improvement = enhanced_score - 0.5
-                    if score_improvement >= score_threshold:
-                        return True, f"🆓 FREE API ENHANCED: {symbol} (score: {enhanced_score:.3f}, free boost: {free_boost:.3f})"
+                    if enhanced_score > high_score_threshold:
+                        score_improvement = enhanced_score - 0.5
+                        if score_improvement >= score_threshold:
+                            return True, f"🆓 FREE API ENHANCED: {symbol} (score: {enhanced_score:.3f}, free boost: {free_boost:.3f})"
             
-            log_message(f"🆓 Free API analysis for {symbol}: confidence={confidence_score:.1%}, signal={overall_signal}")
+                log_message(f"🆓 Free API analysis for {symbol}: confidence={confidence_score:.1%}, signal={overall_signal}")
             
         except Exception as e:
             log_message(f"⚠️ Free API analysis failed for {symbol}: {e}")
@@ -864,80 +967,81 @@ def should_switch_crypto_asset(current_symbol, selected_crypto):
     if FREE_PHASE2_AVAILABLE:
         try:
             # Get comprehensive Phase 2 intelligence (exchange flows, whale tracking, DeFi)
-            phase2_intelligence = get_free_phase2_intelligence(symbol)
-            phase2_alerts = get_free_phase2_alerts(symbol)
-            
-            alert_level = phase2_intelligence.get('alert_level', 'normal')
-            confidence_score = phase2_intelligence.get('confidence_score', 0.0)
-            sources_used = phase2_intelligence.get('sources_used', [])
-            
-            # 🐋 WHALE ACTIVITY DETECTION - Immediate switch on whale accumulation
-            whale_activity = phase2_intelligence.get('whale_activity', {})
-            if whale_activity.get('whale_accumulation', False) and confidence_score > 0.7:
-                whale_confidence = whale_activity.get('confidence', 0.0)
-                return True, f"🐋 WHALE ACCUMULATION: {symbol} - Institutional buying detected (confidence: {whale_confidence:.1%})"
-            
-            # 🔵 EXCHANGE FLOW ANALYSIS - Strong inflows indicate accumulation
-            exchange_flows = phase2_intelligence.get('exchange_flows', {})
-            flow_trend = exchange_flows.get('flow_trend', 'neutral')
-            net_flow = exchange_flows.get('net_flow', 0)
-            
-            if flow_trend == 'strong_inflow' and abs(net_flow) > 5000000:  # $5M+ net inflow
-                flow_text = f"${abs(net_flow):,.0f} net inflow"
-                return True, f"🔵 EXCHANGE INFLOW SURGE: {symbol} - {flow_text} (institutional accumulation)"
-            
-            # 💹 DEFI INTELLIGENCE - Protocol TVL changes indicate market sentiment
-            defi_intel = phase2_intelligence.get('defi_intelligence', {})
-            stablecoin_activity = defi_intel.get('stablecoin_activity', {})
-            market_sentiment = stablecoin_activity.get('market_sentiment', 'neutral')
-            
-            if market_sentiment == 'risk_on' and score > 0.65:
-                mcap_change = stablecoin_activity.get('total_mcap_change', 0)
-                return True, f"💹 RISK-ON SENTIMENT: {symbol} - Stablecoin flows indicate bullish sentiment ({mcap_change:+.1f}%)"
-            
-            # 📈 DEX ANALYTICS - High volume and liquidity favor large positions
-            dex_analytics = phase2_intelligence.get('dex_analytics', {})
-            volume_trend = dex_analytics.get('volume_trend', 'neutral')
-            liquidity_trend = dex_analytics.get('liquidity_trend', 'neutral')
-            
-            if volume_trend == 'high' and liquidity_trend == 'high' and score > 0.60:
-                token_metrics = dex_analytics.get('token_metrics', {})
-                volume_usd = token_metrics.get('volume_usd', 0)
-                return True, f"📈 HIGH DEX ACTIVITY: {symbol} - Volume: ${volume_usd:,.0f}, excellent liquidity for large positions"
-            
-            # 🚨 HIGH CONFIDENCE MULTI-SOURCE ALERTS
-            if alert_level == 'high' and confidence_score > 0.8 and len(sources_used) >= 2:
-                active_alerts = len(phase2_alerts.get('alerts', []))
-                return True, f"🚨 PHASE 2 HIGH ALERT: {symbol} - {active_alerts} alerts from {len(sources_used)} sources (confidence: {confidence_score:.1%})"
-            
-            # 🎯 ENHANCED SCORING WITH PHASE 2 INTELLIGENCE
-            if confidence_score > 0.6:
-                # Calculate Phase 2 boost based on multiple factors
-                phase2_boost = 0.0
+            phase2_intelligence = intelligence_refresher.get('phase2', symbol)
+            if phase2_intelligence is not None:   # None while the background snapshot warms up
+                phase2_alerts = intelligence_refresher.get('phase2_alerts', symbol) or {}
+            
+                alert_level = phase2_intelligence.get('alert_level', 'normal')
+                confidence_score = phase2_intelligence.get('confidence_score', 0.0)
+                sources_used = phase2_intelligence.get('sources_used', [])
+            
+                # 🐋 WHALE ACTIVITY DETECTION - Immediate switch on whale accumulation
+                whale_activity = phase2_intelligence.get('whale_activity', {})
+                if whale_activity.get('whale_accumulation', False) and confidence_score > 0.7:
+                    whale_confidence = whale_activity.get('confidence', 0.0)
+                    return True, f"🐋 WHALE ACCUMULATION: {symbol} - Institutional buying detected (confidence: {whale_confidence:.1%})"
+            
+                # 🔵 EXCHANGE FLOW ANALYSIS - Strong inflows indicate accumulation
+                exchange_flows = phase2_intelligence.get('exchange_flows', {})
+                flow_trend = exchange_flows.get('flow_trend', 'neutral')
+                net_flow = exchange_flows.get('net_flow', 0)
+            
+                if flow_trend == 'strong_inflow' and abs(net_flow) > 5000000:  # $5M+ net inflow
+                    flow_text = f"${abs(net_flow):,.0f} net inflow"
+                    return True, f"🔵 EXCHANGE INFLOW SURGE: {symbol} - {flow_text} (institutional accumulation)"
+            
+                # 💹 DEFI INTELLIGENCE - Protocol TVL changes indicate market sentiment
+                defi_intel = phase2_intelligence.get('defi_intelligence', {})
+                stablecoin_activity = defi_intel.get('stablecoin_activity', {})
+                market_sentiment = stablecoin_activity.get('market_sentiment', 'neutral')
+            
+                if market_sentiment == 'risk_on' and score > 0.65:
+                    mcap_change = stablecoin_activity.get('total_mcap_change', 0)
+                    return True, f"💹 RISK-ON SENTIMENT: {symbol} - Stablecoin flows indicate bullish sentiment ({mcap_change:+.1f}%)"
+            
+                # 📈 DEX ANALYTICS - High volume and liquidity favor large positions
+                dex_analytics = phase2_intelligence.get('dex_analytics', {})
+                volume_trend = dex_analytics.get('volume_trend', 'neutral')
+                liquidity_trend = dex_analytics.get('liquidity_trend', 'neutral')
+            
+                if volume_trend == 'high' and liquidity_trend == 'high' and score > 0.60:
+                    token_metrics = dex_analytics.get('token_metrics', {})
+                    volume_usd = token_metrics.get('volume_usd', 0)
+                    return True, f"📈 HIGH DEX ACTIVITY: {symbol} - Volume: ${volume_usd:,.0f}, excellent liquidity for large positions"
+            
+                # 🚨 HIGH CONFIDENCE MULTI-SOURCE ALERTS
+                if alert_level == 'high' and confidence_score > 0.8 and len(sources_used) >= 2:
+                    active_alerts = len(phase2_alerts.get('alerts', []))
+                    return True, f"🚨 PHASE 2 HIGH ALERT: {symbol} - {active_alerts} alerts from {len(sources_used)} sources (confidence: {confidence_score:.1%})"
+            
+                # 🎯 ENHANCED SCORING WITH PHASE 2 INTELLIGENCE
+                if confidence_score > 0.6:
+                    # Calculate Phase 2 boost based on multiple factors
+                    phase2_boost = 0.0
                 
-                # Whale activity boost
-                if whale_activity.get('unusual_flows', False):
-                    phase2_boost += 0.05
+                    # Whale activity boost
+                    if whale_activity.get('unusual_flows', False):
+                        phase2_boost += 0.05
                 
-                # Exchange flow boost
-                if flow_trend in ['strong_inflow', 'moderate_inflow']:
-                    phase2_boost += 0.04
+                    # Exchange flow boost
+                    if flow_trend in ['strong_inflow', 'moderate_inflow']:
+                        phase2_boost += 0.04
                 
-                # DeFi sentiment boost
-                if market_sentiment == 'risk_on':
-                    phase2_boost += 0.03
+                    # DeFi sentiment boost
+                    if market_sentiment == 'risk_on':
+                        phase2_boost += 0.03
                 
-                # DEX activity boost
-                if volume_trend == 'high':
-                    phase2_boost += 0.03
+                    # DEX activity boost
+                    if volume_trend == 'high':
+                        phase2_boost += 0.03
                 
-                enhanced_score = score + phase2_boost
+                    enhanced_score = score + phase2_boost
                 
-                if enhanced_score > high_score_threshold and phase2_boost > 0.05:
-                    source_text = f"Sources: {', '.join(sources_used)}"
-                    return True, f"🚀 PHASE 2 ENHANCED: {symbol} (score: {enhanced_score:.3f}, P2 boost: {phase2_boost:.3f}) - {source_text}"
+                    if enhanced_score > high_score_threshold and phase2_boost > 0.05:
+                        source_text = f"Sources: {', '.join(sources_used)}"
+                        return True, f"🚀 PHASE 2 ENHANCED: {symbol} (score: {enhanced_score:.3f}, P2 boost: {phase2_boost:.3f}) - {source_text}"
             
-            log_message(f"🚀 Phase 2 analysis for {symbol}: alert_level={alert_level}, confidence={confidence_score:.1%}, sources={len(sources_used)}")
+                log_message(f"🚀 Phase 2 analysis for {symbol}: alert_level={alert_level}, confidence={confidence_score:.1%}, sources={len(sources_used)}")
             
         except Exception as e:
             log_message(f"⚠️ Phase 2 analysis failed for {symbol}: {e}")
@@ -976,7 +1080,8 @@ def should_switch_crypto_asset(current_symbol, selected_crypto):
 # ENHANCED POSITION SIZING FOR MULTI-CRYPTO
 # =============================================================================
 
-def calculate_position_size(current_price, volatility, signal_confidence, total_portfolio_value, crypto_allocation=1.0):
+def calculate_position_size(current_price, volatility, signal_confidence, total_portfolio_value, crypto_allocation=1.0,
+                            symbol='BTC/USDT'):
     """
     Enhanced percentage-based position sizing with Kelly Criterion and institutional methods
     Uses percentage of total portfolio value instead of fixed dollar amounts
@@ -988,6 +1093,7 @@ def calculate_position_size(current_price, volatility, signal_confidence, total_
         signal_confidence: Confidence in trading signal
         total_portfolio_value: Total portfolio value
         crypto_allocation: Allocation percentage for this crypto
+        symbol: Traded pair whose cached VaR drives the risk adjustment
     """
     global consecutive_losses, account_peak_value
 
@@ -1072,10 +1178,9 @@ def calculate_position_size(current_price, volatility, signal_confidence, total_
     else:
         time_factor = 1.0
 
-    # 7. VaR-based risk adjustment
+    # 7. VaR-based risk adjustment (cached per symbol, no network call here)
     try:
-        returns = fetch_ohlcv(exchange, 'BTC/USDT', '1h', 100)['close'].pct_change().dropna()
-        var_analysis = institutional_manager.var_calculator.calculate_var(returns, total_portfolio_value)
+        var_analysis = risk_metrics.get_var_analysis(symbol, total_portfolio_value)
 
         if var_analysis['risk_assessment'] == 'HIGH':
             var_factor = 0.5
@@ -1151,7 +1256,7 @@ def calculate_position_size(current_price, volatility, signal_confidence, total_
     # 🎯 FEE OPTIMIZATION - Adjust position size for fee efficiency
     fee_config = optimized_config['trading'].get('fee_optimization', {})
     if fee_config.get('fee_efficiency_alerts', True):
-        final_size = optimize_order_size_for_fees(final_size, 'BTC/USDT')  # Will adapt to selected crypto
+        final_size = optimize_order_size_for_fees(final_size, symbol)
 
     # 🎯 DYNAMIC SAFETY CAP: Adaptive based on account size and target amounts
     if position_mode == 'percentage' and total_portfolio_value > 0:
@@ -1231,6 +1336,7 @@ def check_risk_management(current_price, total_balance, symbol='BTC/USDT'):
                     log_message(f"🎯 Trade completed: Entry=${entry_price:.2f}, Exit=${exit_price:.2f}, Profit={profit_pct:+.2f}%")
                     
                     # Clear trailing stop state
+                    trailing_engine.release(symbol)
                     state_manager.update_trading_state(
                         trailing_stop_order_id=None,
                         trailing_stop_active=False
@@ -1327,6 +1433,7 @@ def manage_progressive_sell_targets(current_price, sell_targets, btc_balance):
     """
     return None  # Simplified: trailing stops handle everything
 
+@timed_stage('order_placement')
 def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_seconds=None, force_maker=False):
     """
     🎯 ENHANCED FEE-OPTIMIZED ORDER EXECUTION
@@ -1345,10 +1452,15 @@ def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_se
         # Check if we have sufficient balance before placing order
         balance = safe_api_call(exchange.fetch_balance)
 
-        # Get current market data
-        orderbook = safe_api_call(exchange.fetch_order_book, symbol)
-        ticker = safe_api_call(exchange.fetch_ticker, symbol)
-        market_price = ticker['last']
+        # Get current market data - the local book answers without a round trip once it is live
+        if not REPLAY_MODE:
+            order_books.track(symbol)
+        orderbook = order_books.get_order_book(symbol)
+        if orderbook.get('source') == 'local' and orderbook['bids'] and orderbook['asks']:
+            market_price = (orderbook['bids'][0][0] + orderbook['asks'][0][0]) / 2
+        else:
+            ticker = safe_api_call(exchange.fetch_ticker, symbol)
+            market_price = ticker['last']
 
         # 🎯 FEE OPTIMIZATION - Enhanced spread analysis
         bid_price = orderbook['bids'][0][0] if orderbook['bids'] else market_price * 0.999
@@ -1370,9 +1482,11 @@ def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_se
             # Normal spread - use limit orders for maker fees
             log_message(f"✅ Normal spread ({spread_pct:.2f}%) - using limit orders for maker fees")
 
-        # Binance minimum order requirements
-        MIN_NOTIONAL_VALUE = 10.0  # Minimum $10 USD equivalent
-        MIN_BTC_AMOUNT = 0.00001   # Minimum 0.00001 BTC
+        # Exchange order rules for this symbol (cached - no extra request)
+        rules = market_metadata.rules_for(symbol)
+        if not rules.described:
+            print(f"❌ No exchange precision rules for {symbol} - not placing an unquantized order")
+            return None
 
         if side.upper() == 'BUY':
             available_usd = balance['USDT']['free']
@@ -1390,14 +1504,16 @@ def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_se
                 limit_price = bid_price + (market_price - bid_price) * 0.3  # 30% into spread
                 log_message(f"🎯 OPTIMAL BUY: ${limit_price:.2f} (targeting maker fees)")
             
-            amount = round(amount_usd / limit_price, 6)
+            # Round down onto the exchange grid: a BUY never rests above the intended price
+            limit_price = rules.price(limit_price, 'floor')
+            amount = rules.amount(amount_usd / limit_price)
 
             # Check minimum order size for BUY
-            if amount < MIN_BTC_AMOUNT:
-                print(f"❌ BUY amount too small: {amount:.6f} {symbol.split('/')[0]} < {MIN_BTC_AMOUNT:.6f} minimum")
+            if amount < rules.min_amount:
+                print(f"❌ BUY amount too small: {amount:.8f} {symbol.split('/')[0]} < {rules.min_amount:.8f} minimum")
                 return None
-            if amount_usd < MIN_NOTIONAL_VALUE:
-                print(f"❌ BUY order value too small: ${amount_usd:.2f} < ${MIN_NOTIONAL_VALUE:.2f} minimum")
+            if amount * limit_price < rules.min_notional:
+                print(f"❌ BUY order value too small: ${amount * limit_price:.2f} < ${rules.min_notional:.2f} minimum")
                 return None
                 
             print(f"✅ BUY order validation passed: ${amount_usd:.2f} for {amount:.6f} {symbol.split('/')[0]}")
@@ -1405,7 +1521,7 @@ def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_se
         else:  # SELL
             crypto_currency = symbol.split('/')[0]
             available_crypto = balance[crypto_currency]['free']
-            amount = round(available_crypto, 6)
+            amount = rules.amount(available_crypto)
 
             # Check if we have any crypto to sell
             if available_crypto <= 0:
@@ -1413,15 +1529,15 @@ def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_se
                 return None
 
             # Check minimum order size for SELL
-            if amount < MIN_BTC_AMOUNT:  # Using general minimum for all cryptos
-                print(f"❌ SELL amount too small: {amount:.6f} {crypto_currency} < {MIN_BTC_AMOUNT:.6f} minimum")
+            if amount <= 0 or amount < rules.min_amount:
+                print(f"❌ SELL amount too small: {amount:.8f} {crypto_currency} < {rules.min_amount:.8f} minimum")
                 print(f"   🔍 This amount is too small to trade on Binance. Consider accumulating more {crypto_currency} before selling.")
                 return None
 
             # Check minimum notional value
             notional_value = amount * market_price
-            if notional_value < MIN_NOTIONAL_VALUE:
-                print(f"❌ SELL order value too small: ${notional_value:.2f} < ${MIN_NOTIONAL_VALUE:.2f} minimum")
+            if notional_value < rules.min_notional:
+                print(f"❌ SELL order value too small: ${notional_value:.2f} < ${rules.min_notional:.2f} minimum")
                 print(f"   {crypto_currency} amount: {amount:.6f}, Price: ${market_price:.2f}")
                 return None
 
@@ -1434,6 +1550,7 @@ def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_se
                 # Normal: place conservatively for good fill rates while maintaining maker status
                 limit_price = ask_price - (ask_price - market_price) * 0.3  # 30% into spread
                 log_message(f"🎯 OPTIMAL SELL: ${limit_price:.2f} (targeting maker fees)")
+            limit_price = rules.price(limit_price, 'ceil')  # A SELL never rests below the intended price
 
             print(f"✅ SELL order validation passed: {amount:.6f} {crypto_currency} worth ${notional_value:.2f}")
 
@@ -1531,7 +1648,7 @@ def place_intelligent_order(symbol, side, amount_usd, use_limit=True, timeout_se
                         print(f"❌ MARKET ORDER FALLBACK failed for {amount:.6f} {symbol.split('/')[0]}")
         else:
             # Direct market order - will incur taker fees
-            amount = round(amount_usd / market_price, 6) if side.upper() == 'BUY' else amount
+            amount = rules.amount(amount_usd / market_price) if side.upper() == 'BUY' else amount
             log_message("⚡ MARKET ORDER: Will incur 0.1% taker fees")
             order = safe_api_call(exchange.create_market_order, symbol, side.lower(), amount)
             final_price = market_price
@@ -1695,8 +1812,13 @@ def place_immediate_stop_limit_order(symbol, order_entry_price, btc_amount):
         stop_price = order_entry_price * (1 - stop_limit_pct)          # Trigger price
         limit_price = stop_price * 0.9995                        # Limit price (0.05% below stop for guaranteed fill)
         
+        # Snap to the exchange grid: stop rounds down, limit never sits above it
+        btc_amount = market_metadata.amount_to_precision(symbol, btc_amount)
+        stop_price = market_metadata.price_to_precision(symbol, stop_price, 'floor')
+        limit_price = market_metadata.price_to_precision(symbol, limit_price, 'floor')
+        
         # Validate minimum order requirements - ENHANCED CHECK
-        MIN_NOTIONAL_VALUE = 11.0  # Increased buffer above $10 minimum
+        MIN_NOTIONAL_VALUE = market_metadata.min_notional(symbol) * 1.1  # 10% buffer above the exchange minimum
         order_value = btc_amount * stop_price
         
         if order_value < MIN_NOTIONAL_VALUE:
@@ -1712,7 +1834,7 @@ def place_immediate_stop_limit_order(symbol, order_entry_price, btc_amount):
             )
             return {"fallback_protection": True, "manual_monitoring": True}
             
-        if btc_amount < 0.00001:  # Binance minimum BTC amount
+        if btc_amount <= 0 or btc_amount < market_metadata.min_amount(symbol):
             log_message(f"⚠️ BTC amount too small for stop-limit: {btc_amount:.6f} BTC")
             return None
         
@@ -1881,7 +2003,7 @@ def place_simple_trailing_stop(symbol, entry_price, btc_amount, current_price):
         limit_offset_pct = 0.005    # 0.50% below current price for limit
         
         # Validate order size - Binance minimum  
-        MIN_NOTIONAL_VALUE = 10.0  # Binance minimum is $10
+        MIN_NOTIONAL_VALUE = market_metadata.min_notional(symbol)
         order_value = btc_amount * current_price
         
         if order_value < MIN_NOTIONAL_VALUE:
@@ -1894,6 +2016,14 @@ def place_simple_trailing_stop(symbol, entry_price, btc_amount, current_price):
         activation_price = current_price * (1 + activation_pct)  # 0.125% ABOVE current price
         limit_price = current_price * (1 - limit_offset_pct)     # 0.50% BELOW current price
         
+        # Snap to the exchange grid: the stop rounds down and never sells more than is held
+        order_params = market_metadata.prepare_order(symbol, btc_amount, limit_price, 'floor')
+        if not order_params['valid']:
+            log_message(f"❌ Trailing stop not placed: {order_params['reason']}")
+            return None
+        btc_amount = order_params['amount']
+        limit_price = order_params['price']
+        
         # Try to place Binance native trailing stop per user specifications
         log_message(f"🎯 PLACING TRAILING STOP ORDER:")
         log_message(f"   Symbol: {symbol}")
@@ -1940,12 +2070,13 @@ def place_simple_trailing_stop(symbol, entry_price, btc_amount, current_price):
                         'active': True
                     }
                     
-                    # Save to global state for monitoring in main loop
+                    # Save to global state and hand the order to the trailing stop engine
                     state_manager.update_trading_state(
                         trailing_stop_data=trailing_stop_data,
                         trailing_stop_order_id=order['id'],
                         trailing_stop_active=True
                     )
+                    trailing_engine.protect(symbol, order['id'], btc_amount, current_price, limit_price, 0.005)
                     
                     log_message(f"✅ MANUAL TRAILING STOP INITIALIZED: Order ID {order['id']}")
                     log_message(f"   Initial Stop: ${limit_price:.4f} (0.50% below ${current_price:.4f})")
@@ -1990,6 +2121,15 @@ def place_small_order_stop_limit(symbol, entry_price, btc_amount, current_price)
         stop_price = current_price * 0.995  # 0.5% stop loss
         limit_price = stop_price * 0.995    # Limit price slightly below stop for execution
         
+        # Snap to the exchange grid: stop rounds down, limit never sits above it
+        order_params = market_metadata.prepare_order(symbol, btc_amount, limit_price, 'floor', stop_price=stop_price)
+        if not order_params['valid']:
+            log_message(f"❌ Small order stop-limit not placed: {order_params['reason']}")
+            return None
+        btc_amount = order_params['amount']
+        stop_price = order_params['stop_price']
+        limit_price = order_params['price']
+        
         log_message(f"🛡️ PLACING SMALL ORDER STOP-LIMIT PROTECTION:")
         log_message(f"   Entry: ${entry_price:.2f}, Current: ${current_price:.2f}")
         log_message(f"   Stop Price: ${stop_price:.4f} (-0.5%)")
@@ -2106,8 +2246,18 @@ def place_trailing_oco_order(symbol, entry_price, btc_amount, current_price):
         # Calculate limit prices for guaranteed execution
         stop_limit_price = stop_loss_price * 0.999   # 0.1% below stop for quick fill
         
+        # Snap to the exchange grid: stop legs round down, the take-profit never sits below its target
+        rules = market_metadata.rules_for(symbol)
+        if not rules.described:
+            log_message(f"❌ No exchange precision rules for {symbol} - not placing an unquantized OCO")
+            return place_fallback_protection(symbol, entry_price, btc_amount, stop_loss_price)
+        btc_amount = rules.amount(btc_amount)
+        stop_loss_price = rules.price(stop_loss_price, 'floor')
+        stop_limit_price = rules.price(stop_limit_price, 'floor')
+        take_profit_price = rules.price(take_profit_price, 'ceil')
+        
         # Validate minimum order requirements
-        MIN_NOTIONAL_VALUE = 11.0
+        MIN_NOTIONAL_VALUE = market_metadata.min_notional(symbol) * 1.1
         order_value = btc_amount * current_price
         
         if order_value < MIN_NOTIONAL_VALUE:
@@ -2155,7 +2305,7 @@ def place_trailing_oco_order(symbol, entry_price, btc_amount, current_price):
                     symbol,
                     'stop_loss_limit',
                     'sell',
-                    btc_amount * 0.7,  # 70% for stop loss
+                    rules.amount(btc_amount * 0.7),  # 70% for stop loss
                     stop_limit_price,
                     {
                         'stopPrice': stop_loss_price,
@@ -2169,7 +2319,7 @@ def place_trailing_oco_order(symbol, entry_price, btc_amount, current_price):
                     symbol,
                     'limit',
                     'sell',
-                    btc_amount * 0.3,  # 30% for take profit
+                    rules.amount(btc_amount * 0.3),  # 30% for take profit
                     take_profit_price,
                     {'timeInForce': 'GTC'}
                 )
@@ -2231,21 +2381,23 @@ def place_advanced_partial_oco(symbol, btc_amount, entry_price, current_price, s
     try:
         log_message(f"🎯 PLACING ADVANCED PARTIAL OCO:")
         
-        # Split the position into 3 parts
-        aggressive_amount = btc_amount * 0.5   # 50% for quick profits
-        conservative_amount = btc_amount * 0.3 # 30% for larger moves
-        runner_amount = btc_amount * 0.2       # 20% to let run with trailing stop
+        # Split the position into 3 parts, each floored to the lot step
+        rules = market_metadata.rules_for(symbol)
+        aggressive_amount = rules.amount(btc_amount * 0.5)   # 50% for quick profits
+        conservative_amount = rules.amount(btc_amount * 0.3) # 30% for larger moves
+        runner_amount = rules.amount(btc_amount * 0.2)       # 20% to let run with trailing stop
         
         # Aggressive take profit (closer target)
-        aggressive_tp = entry_price * 1.008    # 0.8% target
-        aggressive_stop = stop_loss_price
+        aggressive_tp = rules.price(entry_price * 1.008, 'ceil')    # 0.8% target
+        aggressive_stop = rules.price(stop_loss_price, 'floor')
         
         # Conservative take profit (higher target)
-        conservative_tp = take_profit_price    # Original target
-        conservative_stop = stop_loss_price
+        conservative_tp = rules.price(take_profit_price, 'ceil')    # Original target
+        conservative_stop = aggressive_stop
         
         # Runner only has trailing stop (no take profit)
-        runner_stop = stop_loss_price
+        runner_stop = aggressive_stop
+        stop_limit_price = rules.price(aggressive_stop * 0.999, 'floor')
         
         placed_orders = []
         
@@ -2260,7 +2412,7 @@ def place_advanced_partial_oco(symbol, btc_amount, entry_price, current_price, s
                 aggressive_tp,
                 {
                     'stopPrice': aggressive_stop,
-                    'stopLimitPrice': aggressive_stop * 0.999,
+                    'stopLimitPrice': stop_limit_price,
                     'stopLimitTimeInForce': 'GTC',
                     'timeInForce': 'GTC'
                 }
@@ -2282,7 +2434,7 @@ def place_advanced_partial_oco(symbol, btc_amount, entry_price, current_price, s
                 conservative_tp,
                 {
                     'stopPrice': conservative_stop,
-                    'stopLimitPrice': conservative_stop * 0.999,
+                    'stopLimitPrice': stop_limit_price,
                     'stopLimitTimeInForce': 'GTC',
                     'timeInForce': 'GTC'
                 }
@@ -2301,7 +2453,7 @@ def place_advanced_partial_oco(symbol, btc_amount, entry_price, current_price, s
                 'stop_loss_limit',
                 'sell',
                 runner_amount,
-                runner_stop * 0.999,
+                stop_limit_price,
                 {
                     'stopPrice': runner_stop,
                     'timeInForce': 'GTC'
@@ -2438,27 +2590,14 @@ def cancel_complex_oco_orders(symbol, trading_state):
         current_oco_id = trading_state.get('trailing_oco_order_id')
         
         if 'MANUAL_OCO_' in current_oco_id:
-            # Extract individual order IDs from manual OCO
+            # Cancel the individual order IDs encoded in the manual OCO id together
             parts = current_oco_id.replace('MANUAL_OCO_', '').split('_')
-            for order_id in parts:
-                try:
-                    safe_api_call(exchange.cancel_order, order_id, symbol)
-                    log_message(f"   ✅ Cancelled manual OCO component: {order_id}")
-                except:
-                    pass
-                    
+            order_reconciler.cancel_orders([{'id': order_id, 'symbol': symbol} for order_id in parts])
+
         elif 'PARTIAL_OCO_' in current_oco_id:
-            # Would need to track individual order IDs for partial OCO
-            # For now, attempt to cancel any active orders for the symbol
-            try:
-                open_orders = safe_api_call(exchange.fetch_open_orders, symbol)
-                for order in open_orders:
-                    if order['side'] == 'sell':  # Only cancel sell orders
-                        safe_api_call(exchange.cancel_order, order['id'], symbol)
-                        log_message(f"   ✅ Cancelled partial OCO component: {order['id']}")
-            except:
-                pass
-                
+            # Partial OCO components aren't tracked individually: cancel every sell order for the symbol
+            order_reconciler.cancel_protective([symbol], predicate=lambda order: order.get('side') == 'sell')
+
     except Exception as e:
         log_message(f"Error cancelling complex OCO: {e}")
 
@@ -2467,19 +2606,25 @@ def place_fallback_protection(symbol, entry_price, btc_amount, stop_price):
     try:
         log_message(f"🛡️ PLACING FALLBACK PROTECTION:")
         
-        # Simple stop-loss as fallback
-        stop_order = safe_api_call(
-            exchange.create_order,
-            symbol,
-            'stop_loss_limit',
-            'sell',
-            btc_amount,
-            stop_price * 0.999,
-            {
-                'stopPrice': stop_price,
-                'timeInForce': 'GTC'
-            }
-        )
+        # Simple stop-loss as fallback, on the exchange grid; an order it would reject goes to manual monitoring
+        order_params = market_metadata.prepare_order(symbol, btc_amount, stop_price * 0.999, 'floor',
+                                                     stop_price=stop_price)
+        stop_order = None
+        if order_params['valid']:
+            stop_order = safe_api_call(
+                exchange.create_order,
+                symbol,
+                'stop_loss_limit',
+                'sell',
+                order_params['amount'],
+                order_params['price'],
+                {
+                    'stopPrice': order_params['stop_price'],
+                    'timeInForce': 'GTC'
+                }
+            )
+        else:
+            log_message(f"❌ Fallback stop-loss not placed: {order_params['reason']}")
         
         if stop_order:
             log_message(f"✅ Fallback stop-loss placed: {stop_order['id']}")
@@ -2506,87 +2651,6 @@ def place_fallback_protection(symbol, entry_price, btc_amount, stop_price):
         log_message(f"❌ Fallback protection failed: {e}")
         return None
 
-def verify_trailing_oco_protection(symbol, holding_position, entry_price):
-    """
-    🛡️ VERIFICATION: Ensure all positions have trailing OCO protection
-    
-    This function verifies that every position has proper OCO protection
-    and alerts if any position is unprotected.
-    """
-    if not holding_position or not entry_price:
-        return True  # No position to protect
-        
-    try:
-        trading_state = state_manager.get_trading_state()
-        oco_order_id = trading_state.get('trailing_oco_order_id')
-        oco_active = trading_state.get('trailing_oco_active', False)
-        
-        # Also check legacy stop-limit as fallback
-        stop_limit_order_id = trading_state.get('immediate_stop_limit_order_id')
-        stop_limit_active = trading_state.get('immediate_stop_limit_active', False)
-        
-        if not oco_order_id or not oco_active:
-            # Check if legacy protection exists
-            if stop_limit_order_id and stop_limit_active:
-                log_message("⚙️ LEGACY PROTECTION: Stop-limit active (consider upgrading to OCO)")
-                return True
-            else:
-                log_message("🚨 CRITICAL: Position has NO OCO protection!")
-                print("🚨 WARNING: UNPROTECTED POSITION DETECTED")
-                print("   Attempting to place emergency OCO protection...")
-                
-                # Try to place emergency OCO
-                balance = safe_api_call(exchange.fetch_balance)
-                crypto_symbol = symbol.split('/')[0]
-                crypto_amount = balance.get(crypto_symbol, {}).get('free', 0)
-                
-                if crypto_amount > 0.00001:
-                    # Get current price for OCO placement
-                    ticker = safe_api_call(exchange.fetch_ticker, symbol)
-                    current_price = ticker['last'] if ticker else entry_price
-                    
-                    emergency_stop = place_simple_trailing_stop(symbol, entry_price, crypto_amount, current_price)
-                    if emergency_stop:
-                        log_message("✅ Emergency trailing stop protection restored")
-                        print("✅ EMERGENCY TRAILING STOP PROTECTION RESTORED")
-                        return True
-                    else:
-                        log_message("❌ FAILED to restore trailing stop protection")
-                        print("❌ FAILED TO RESTORE PROTECTION - MANUAL INTERVENTION REQUIRED")
-                        return False
-                else:
-                    log_message("❌ No crypto balance found to protect")
-                    return False
-        else:
-            # Verify the OCO order still exists
-            try:
-                if 'MANUAL_OCO_' in oco_order_id or 'PARTIAL_OCO_' in oco_order_id:
-                    # Complex OCO orders - check components
-                    log_message(f"🔍 Verifying complex OCO protection: {oco_order_id}")
-                    # For complex orders, we trust they exist if marked as active
-                    # Real verification would require tracking individual order IDs
-                    return True
-                else:
-                    # Standard OCO order verification
-                    order_status = safe_api_call(exchange.fetch_order, oco_order_id, symbol)
-                    if order_status and order_status.get('status') == 'open':
-                        log_message(f"✅ OCO protection verified: {oco_order_id}")
-                        return True
-                    else:
-                        log_message(f"⚠️ OCO order {oco_order_id} not found or closed")
-                        print(f"⚠️ OCO ORDER MISSING - May have been triggered")
-                        # Mark as inactive and try to establish new protection
-                        state_manager.update_trading_state(trailing_oco_active=False)
-                        return verify_trailing_oco_protection(symbol, holding_position, entry_price)
-            except Exception as verify_error:
-                log_message(f"⚠️ Error verifying OCO order: {verify_error}")
-                # Assume protection exists if we can't verify (network issues)
-                return True
-                
-    except Exception as e:
-        log_message(f"❌ Error in OCO protection verification: {e}")
-        return False
-
 def cancel_trailing_oco_order(symbol):
     """Cancel the trailing OCO order when position is closed normally"""
     try:
@@ -2620,74 +2684,67 @@ def cancel_trailing_oco_order(symbol):
     except Exception as e:
         log_message(f"❌ Error canceling trailing OCO order: {e}")
 
+def restore_emergency_protection(symbol, entry_price):
+    """Place an emergency trailing stop over the free balance; returns the order or None"""
+    log_message("🚨 CRITICAL: Position has NO stop protection!")
+    print("🚨 WARNING: UNPROTECTED POSITION DETECTED")
+    print("   Attempting to place emergency trailing stop...")
+
+    balance = safe_api_call(exchange.fetch_balance)
+    crypto_amount = balance.get(symbol.split('/')[0], {}).get('free', 0)
+    if crypto_amount <= 0.00001:
+        log_message("❌ No crypto balance found to protect")
+        return None
+
+    # Get current price for trailing stop
+    ticker = safe_api_call(exchange.fetch_ticker, symbol)
+    current_price = ticker['last'] if ticker else entry_price
+    return place_simple_trailing_stop(symbol, entry_price, crypto_amount, current_price)
+
 def verify_stop_limit_protection(symbol, holding_position, entry_price):
     """
-    🛡️ LEGACY VERIFICATION: Ensure all positions have stop-limit protection
-    
-    This function maintains backward compatibility with the old stop-limit system
-    while encouraging migration to the new OCO system.
+    🛡️ PROTECTION RECONCILIATION: Ensure the position has a working protective order
+
+    Diffs the trailing stop, stop-limit and OCO orders recorded in state against
+    one open-orders snapshot. Recorded orders that are gone are marked inactive,
+    stray duplicates are cancelled, and emergency protection is placed only when
+    nothing protective is left on the exchange.
     """
     if not holding_position or not entry_price:
         return True  # No position to protect
-    
-    # First try to verify OCO protection (preferred)
-    if verify_trailing_oco_protection(symbol, holding_position, entry_price):
-        return True
-        
-    # Fallback to legacy stop-limit verification
+
     try:
         trading_state = state_manager.get_trading_state()
-        stop_limit_order_id = trading_state.get('immediate_stop_limit_order_id')
-        stop_limit_active = trading_state.get('immediate_stop_limit_active', False)
-        
-        if not stop_limit_order_id or not stop_limit_active:
-            log_message("🚨 CRITICAL: Position has NO stop-limit protection!")
-            print("🚨 WARNING: UNPROTECTED POSITION DETECTED")
-            print("   Attempting to place emergency stop-limit...")
-            
-            # Try to place emergency stop-limit
-            balance = safe_api_call(exchange.fetch_balance)
-            crypto_amount = balance[symbol.split('/')[0]]['free']
-            
-            if crypto_amount > 0.00001:
-                # Get current price for trailing stop
-                ticker = safe_api_call(exchange.fetch_ticker, symbol)
-                current_price = ticker['last'] if ticker else entry_price
-                
-                # Use trailing stop instead of stop-limit
-                emergency_stop = place_simple_trailing_stop(symbol, entry_price, crypto_amount, current_price)
-                if emergency_stop:
-                    log_message("✅ Emergency trailing stop protection restored")
-                    print("✅ EMERGENCY TRAILING STOP PROTECTION RESTORED")
-                    return True
-                else:
-                    log_message("❌ FAILED to restore trailing stop protection")
-                    print("❌ FAILED TO RESTORE PROTECTION - MANUAL INTERVENTION REQUIRED")
-                    return False
+        result = order_reconciler.reconcile_all(
+            {symbol: desired_protection(trading_state)},
+            place=lambda unprotected, _: restore_emergency_protection(unprotected, entry_price))[symbol]
+
+        if result['missing']:
+            log_message(f"⚠️ Protective order(s) {', '.join(result['missing'])} not open - may have been triggered")
+            # The trailing stop's own fill check handles a missing trailing stop order
+            flags = {flag: False for flag in result['missing_flags'] if flag != 'trailing_stop_active'}
+            if flags:
+                state_manager.update_trading_state(**flags)
+
+        if result['protected']:
+            if result['live']:
+                log_message(f"✅ Protection verified: {', '.join(result['live'])}")
             else:
-                log_message("❌ No crypto balance found to protect")
-                return False
-        else:
-            # Verify the stop-limit order still exists
-            try:
-                order_status = safe_api_call(exchange.fetch_order, stop_limit_order_id, symbol)
-                if order_status and order_status.get('status') == 'open':
-                    log_message(f"✅ Legacy stop-limit protection verified: {stop_limit_order_id}")
-                    return True
-                else:
-                    log_message(f"⚠️ Stop-limit order {stop_limit_order_id} not found or closed")
-                    print(f"⚠️ STOP-LIMIT ORDER MISSING - May have been triggered")
-                    # Clear state and try to establish new protection
-                    state_manager.update_trading_state(immediate_stop_limit_active=False)
-                    return verify_stop_limit_protection(symbol, holding_position, entry_price)
-            except Exception as verify_error:
-                log_message(f"⚠️ Error verifying stop-limit order: {verify_error}")
-                return True  # Assume protection exists if we can't verify
-                
-    except Exception as e:
-        log_message(f"❌ Error in stop-limit verification: {e}")
+                log_message(f"⚙️ UNTRACKED PROTECTION: {symbol} has open stop order(s) {', '.join(result['strays'])}")
+            return True
+
+        if result.get('placed'):
+            log_message("✅ Emergency trailing stop protection restored")
+            print("✅ EMERGENCY TRAILING STOP PROTECTION RESTORED")
+            return True
+        log_message("❌ FAILED to restore trailing stop protection")
+        print("❌ FAILED TO RESTORE PROTECTION - MANUAL INTERVENTION REQUIRED")
         return False
 
+    except Exception as e:
+        log_message(f"⚠️ Error reconciling protection: {e}")
+        return True  # Assume protection exists if we can't verify (network issues)
+
 def cancel_all_stop_limit_orders(symbol):
     """
     🗑️ COMPREHENSIVE ORDER CLEANUP
@@ -2696,30 +2753,15 @@ def cancel_all_stop_limit_orders(symbol):
     try:
         log_message(f"🧹 CLEANING UP: Canceling all existing stop-limit orders for {symbol}")
         
-        # Get all open orders for the symbol
-        open_orders = safe_api_call(exchange.fetch_open_orders, symbol)
-        
-        if not open_orders:
+        # One snapshot, all matching cancels in flight together
+        result = order_reconciler.cancel_protective([symbol])
+
+        if not result['open']:
             log_message("✅ No open orders found")
             return True
-        
-        cancelled_count = 0
-        stop_limit_count = 0
-        
-        for order in open_orders:
-            order_type = order.get('type', '').lower()
-            order_side = order.get('side', '').lower()
-            order_id = order.get('id')
-            
-            # Cancel stop-limit, stop-loss, and stop-loss-limit orders
-            if ('stop' in order_type or order_type in ['stop_loss_limit', 'stop_loss', 'oco']) and order_side == 'sell':
-                stop_limit_count += 1
-                try:
-                    safe_api_call(exchange.cancel_order, order_id, symbol)
-                    cancelled_count += 1
-                    log_message(f"✅ Cancelled {order_type} order: {order_id}")
-                except Exception as cancel_error:
-                    log_message(f"⚠️ Failed to cancel order {order_id}: {cancel_error}")
+
+        cancelled_count = len(result['cancelled'])
+        stop_limit_count = result['matched']
         
         if stop_limit_count > 0:
             log_message(f"🧹 CLEANUP COMPLETE: {cancelled_count}/{stop_limit_count} stop-limit orders cancelled")
@@ -2732,8 +2774,12 @@ def cancel_all_stop_limit_orders(symbol):
                 last_trailing_stop_price=None,
                 trailing_stop_profit_locked=None,
                 oco_order_id=None,
-                manual_monitoring_required=False
+                manual_monitoring_required=False,
+                trailing_stop_order_id=None,
+                trailing_stop_active=False,
+                trailing_stop_data=None
             )
+            trailing_engine.release(symbol)
             
             if cancelled_count != stop_limit_count:
                 log_message(f"⚠️ WARNING: {stop_limit_count - cancelled_count} orders failed to cancel")
@@ -2998,10 +3044,6 @@ def optimize_order_size_for_fees(base_amount, symbol):
     minimum order requirements and strategic position sizing.
     """
     try:
-        # Get current market data
-        ticker = safe_api_call(exchange.fetch_ticker, symbol)
-        current_price = ticker['last']
-        
         # Minimum order value to make fees worthwhile
         min_efficient_order = 50.0  # $50 minimum for fee efficiency
         
@@ -3648,7 +3690,8 @@ def coordinate_multi_layer_strategy(df, df_1m, current_price, holding_position,
     # 🧠 PHASE 3: ENHANCE SIGNAL WITH LSTM AI PREDICTION
     if LSTM_PREDICTOR_AVAILABLE:
         try:
-            enhanced_signal = enhance_signal_with_lstm(df, best_signal, optimized_config, ['5m', '15m'])
+            with bot_metrics.stage('enhancer.lstm'):
+                enhanced_signal = enhance_signal_with_lstm(df, best_signal, optimized_config, ['5m', '15m'])
             if enhanced_signal.get('lstm_enhancement', 0) > 0.05:  # Significant enhancement
                 best_signal = enhanced_signal
                 log_message(f"🧠 LSTM AI Enhancement: +{enhanced_signal['lstm_enhancement']:.1%} confidence boost")
@@ -3658,7 +3701,10 @@ def coordinate_multi_layer_strategy(df, df_1m, current_price, holding_position,
     # 🎯 PHASE 3 WEEK 2: ENHANCE SIGNAL WITH SENTIMENT ANALYSIS
     if SENTIMENT_ANALYSIS_AVAILABLE:
         try:
-            sentiment_enhanced_signal = enhance_signal_with_sentiment(best_signal, symbol, current_price)
+            with bot_metrics.stage('enhancer.sentiment'):
+                sentiment_snapshot = intelligence_refresher.get('sentiment', symbol)
+                sentiment_enhanced_signal = best_signal if sentiment_snapshot is None else enhance_signal_with_sentiment(
+                    best_signal, symbol, current_price, sentiment_score=sentiment_snapshot)
             sentiment_enhancement = sentiment_enhanced_signal.get('sentiment_enhancement', 0)
             
             if abs(sentiment_enhancement) > 0.05:  # Significant sentiment impact
@@ -3682,7 +3728,8 @@ def coordinate_multi_layer_strategy(df, df_1m, current_price, holding_position,
     # 🎯 PHASE 3 WEEK 2: ENHANCE SIGNAL WITH PATTERN RECOGNITION
     if PATTERN_AI_AVAILABLE:
         try:
-            pattern_enhanced_signal = pattern_ai.enhance_signal_with_patterns(best_signal, df, symbol)
+            with bot_metrics.stage('enhancer.pattern_ai'):
+                pattern_enhanced_signal = pattern_ai.enhance_signal_with_patterns(best_signal, df, symbol)
             
             # Check if pattern enhancement was significant
             original_confidence = best_signal.get('confidence', 0.5)
@@ -3710,7 +3757,8 @@ def coordinate_multi_layer_strategy(df, df_1m, current_price, holding_position,
     # 🧠 PHASE 3 WEEK 3: ENHANCE SIGNAL WITH ADVANCED ML ENSEMBLE
     if ADVANCED_ML_AVAILABLE:
         try:
-            ml_enhanced_signal = enhance_signal_with_advanced_ml(best_signal, df, symbol)
+            with bot_metrics.stage('enhancer.advanced_ml'):
+                ml_enhanced_signal = enhance_signal_with_advanced_ml(best_signal, df, symbol)
             
             # Check for significant ML enhancement
             original_confidence = best_signal.get('confidence', 0.5)
@@ -3744,7 +3792,10 @@ def coordinate_multi_layer_strategy(df, df_1m, current_price, holding_position,
     # 📊 PHASE 3 WEEK 4: ENHANCE SIGNAL WITH ALTERNATIVE DATA
     if ALTERNATIVE_DATA_AVAILABLE:
         try:
-            alt_data_enhanced_signal = enhance_signal_with_alternative_data(best_signal, 'BTC/USDT')
+            with bot_metrics.stage('enhancer.alternative_data'):
+                alt_data = intelligence_refresher.get('alternative_data', 'BTC/USDT')
+                alt_data_enhanced_signal = best_signal if alt_data is None else enhance_signal_with_alternative_data(
+                    best_signal, 'BTC/USDT', alt_data=alt_data)
             
             # Check for significant alternative data enhancement
             original_confidence = best_signal.get('confidence', 0.5)
@@ -4227,7 +4278,8 @@ def detect_ma_crossover_signals(df, current_price):
     # 🧠 APPLY ML LEARNING: Learn from past mistakes and adjust signals
     try:
         if ML_LEARNING_AVAILABLE and signal:
-            signal = apply_ml_learning_to_signal(signal)
+            with bot_metrics.stage('enhancer.ml_learning'):
+                signal = apply_ml_learning_to_signal(signal)
             if signal.get('ml_adjustment'):
                 log_message(f"🧠 ML ADJUSTMENT: {signal['ml_adjustment']['reasoning']}")
                 log_message(f"   Confidence: {signal['ml_adjustment']['original_confidence']:.2f} → {signal['confidence']:.2f}")
@@ -5055,120 +5107,152 @@ def display_institutional_analysis_safe(inst_data):
 # LIVE STRATEGY LOOP WITH MA7/MA25 ABSOLUTE PRIORITY
 # =============================================================================
 
+def sync_trailing_stop_state(symbol, data):
+    """
+    🔄 Trailing stop engine callback: mirror a replaced (or abandoned) stop
+    order into bot state. Runs on the engine thread.
+    """
+    global trailing_stop_order_id, trailing_stop_active
+
+    if data.get('active'):
+        # order_id is None while a replacement is pending (cancel succeeded, create failed)
+        trailing_stop_order_id = data['order_id']
+        trailing_stop_active = data['order_id'] is not None
+        state_manager.update_trading_state(
+            trailing_stop_data=data,
+            trailing_stop_order_id=trailing_stop_order_id,
+            trailing_stop_active=trailing_stop_active
+        )
+    else:
+        trailing_stop_order_id = None
+        trailing_stop_active = False
+        state_manager.update_trading_state(
+            trailing_stop_data=data,
+            trailing_stop_order_id=None,
+            trailing_stop_active=False
+        )
+        # The stop is gone (likely filled): let the main loop check now, not at the next candle
+        loop_scheduler.trigger(f"trailing_stop_released:{symbol}")
+
 def monitor_and_update_trailing_stop():
     """
     🔄 MANUAL TRAILING STOP MONITOR
-    
-    Monitors active manual trailing stops and updates them when price rises.
-    Cancels old orders and places new ones at 0.50% behind the highest price.
+
+    Hands any active manual trailing stop in bot state (e.g. one placed before
+    a restart) to the trailing stop engine. The engine ratchets stops on its
+    own thread; when that thread is not running (replay), it is ticked here.
     """
-    global trailing_stop_order_id, trailing_stop_active
-    
     try:
-        # Get current trailing stop data from bot state
-        current_state = get_state_manager().get_current_state()
-        trailing_data = current_state.get('trading_state', {}).get('trailing_stop_data')
-        
-        if not trailing_data or not trailing_data.get('active'):
-            return  # No active manual trailing stop
-        
-        symbol = trailing_data['symbol']
-        order_id = trailing_data['order_id']
-        amount = trailing_data['amount']
-        entry_price = trailing_data['entry_price']
-        highest_price = trailing_data['highest_price']
-        current_stop_price = trailing_data['current_stop_price']
-        trailing_percent = trailing_data['trailing_percent']
-        last_updated = trailing_data['last_updated']
-        
-        # Don't update too frequently (minimum 30 seconds between updates)
-        if time.time() - last_updated < 30:
-            return
-        
-        # Get current market price
-        ticker = exchange.fetch_ticker(symbol)
-        current_price = ticker['last']
-        
-        # Check if price has reached a new high
-        new_highest_price = max(highest_price, current_price)
-        
-        if new_highest_price > highest_price:
-            # Price has risen - calculate new stop price
-            new_stop_price = new_highest_price * (1 - trailing_percent)  # 0.50% below new high
-            new_limit_price = new_stop_price * 0.995  # Limit slightly below stop
-            
-            # Only update if the new stop is meaningfully higher (avoid tiny updates)
-            price_improvement = (new_stop_price - current_stop_price) / current_stop_price
-            if price_improvement > 0.001:  # Only update if at least 0.1% improvement
-                
-                log_message(f"📈 TRAILING STOP UPDATE TRIGGERED for {symbol}")
-                log_message(f"   Previous High: ${highest_price:.4f} | New High: ${new_highest_price:.4f}")
-                log_message(f"   Old Stop: ${current_stop_price:.4f} | New Stop: ${new_stop_price:.4f}")
-                
-                try:
-                    # Cancel the old stop-loss order
-                    log_message(f"🔄 Canceling old stop-loss order: {order_id}")
-                    safe_api_call(exchange.cancel_order, order_id, symbol)
-                    
-                    # Place new stop-loss order at updated price
-                    new_order = safe_api_call(
-                        lambda: exchange.create_order(
-                            symbol,
-                            'STOP_LOSS_LIMIT',
-                            'sell',
-                            amount,
-                            new_limit_price,
-                            {
-                                'stopPrice': str(new_stop_price),
-                                'timeInForce': 'GTC'
-                            }
-                        )
-                    )
-                    
-                    if new_order and new_order.get('id'):
-                        # Update trailing stop data with new order details
-                        updated_trailing_data = {
-                            'order_id': new_order['id'],
-                            'symbol': symbol,
-                            'amount': amount,
-                            'entry_price': entry_price,
-                            'highest_price': new_highest_price,
-                            'current_stop_price': new_stop_price,
-                            'trailing_percent': trailing_percent,
-                            'last_updated': time.time(),
-                            'active': True
-                        }
-                        
-                        # Save updated state
-                        state_manager.update_trading_state(
-                            trailing_stop_data=updated_trailing_data,
-                            trailing_stop_order_id=new_order['id'],
-                            trailing_stop_active=True
-                        )
-                        
-                        log_message(f"✅ TRAILING STOP UPDATED: New Order ID {new_order['id']}")
-                        log_message(f"   New Stop Price: ${new_stop_price:.4f} (0.50% below ${new_highest_price:.4f})")
-                        log_message(f"   Price Improvement: +{price_improvement*100:.2f}%")
-                        
-                    else:
-                        log_message("❌ Failed to place new trailing stop order")
-                        # Try to restore the old order or mark as inactive
-                        trailing_data['active'] = False
-                        state_manager.update_trading_state(trailing_stop_data=trailing_data)
-                        
-                except Exception as e:
-                    log_message(f"❌ Failed to update trailing stop: {e}")
-                    # Mark trailing stop as inactive if update fails
-                    trailing_data['active'] = False
-                    state_manager.update_trading_state(trailing_stop_data=trailing_data)
-        else:
-            # Price hasn't reached new high - just update the last check time
-            trailing_data['last_updated'] = time.time()
-            state_manager.update_trading_state(trailing_stop_data=trailing_data)
-            
+        trailing_data = state_manager.get_trading_state().get('trailing_stop_data')
+        if trailing_engine.adopt(trailing_data):
+            log_message(f"🛡️ Trailing stop engine adopted {trailing_data['symbol']} order {trailing_data['order_id']}")
+
+        if not trailing_engine.running:
+            trailing_engine.tick()
+
     except Exception as e:
         log_message(f"⚠️ Error in trailing stop monitor: {e}")
 
+def finish_loop_iteration(sleep_seconds=None, interval_seconds=60):
+    """
+    📈 End one run_continuously iteration: record its metrics, then idle until
+    the next evaluation event - a settled 1m/5m candle close, the open position
+    crossing its stop/target, or a trigger from the trailing stop engine.
+    A number is a fixed pause (cooldowns, brief retries) that only those
+    protection events cut short. Every early `continue` in the loop goes through here.
+    """
+    get_http_client().publish(bot_metrics)
+    loop_seconds = bot_metrics.loop_completed()
+
+    scheduler_enabled = loop_scheduler.config.get('enabled', True)
+    if scheduler_enabled:
+        if holding_position and (stop_loss_price or take_profit_price):
+            loop_scheduler.set_price_thresholds(bot_config.get_current_trading_symbol(),
+                                                below=stop_loss_price, above=take_profit_price)
+        else:
+            loop_scheduler.clear_price_thresholds()
+        planned_seconds = loop_scheduler.planned_wait(hold=sleep_seconds)
+    else:
+        planned_seconds = interval_seconds if sleep_seconds is None else sleep_seconds
+    print(f"💓 Loop completed, next evaluation in ~{planned_seconds:.0f}s...", flush=True)
+
+    if bot_heartbeat:
+        bot_heartbeat.loop_completed(loop_seconds, planned_seconds,
+                                     open_positions=1 if holding_position else 0,
+                                     exchange_errors=bot_metrics.exchange_errors)
+    if scheduler_enabled:
+        wake_reason = loop_scheduler.wait_for_evaluation(hold=sleep_seconds)
+        print(f"⏱️ Loop wake: {wake_reason}", flush=True)
+    else:
+        time.sleep(planned_seconds)
+
+# 🧩 MULTI-SYMBOL MODE: protective stop-limit per engine position; the engine persists each order id
+
+def protect_engine_position(symbol, entry_price, quantity, order_id=None):
+    """
+    Hard stop-limit at the portfolio manager's stop loss (5%) for one engine position.
+    A persisted `order_id` that is still open (or already filled) is re-adopted instead of re-placed.
+    Returns the protecting order id, or None when no stop could be placed.
+    """
+    if order_id:
+        try:
+            existing = safe_api_call(exchange.fetch_order, order_id, symbol)
+            status = (existing or {}).get('status')
+            if status in ('open', 'closed'):
+                log_message(f"🛡️ {symbol} stop {order_id} re-adopted ({status})")
+                return order_id
+        except Exception as e:
+            log_message(f"⚠️ Could not check {symbol} stop {order_id}: {e}")
+    stop_price = entry_price * 0.95
+    try:
+        balance = safe_api_call(exchange.fetch_balance)
+        free = float((balance.get('free') or {}).get(symbol.split('/')[0]) or 0.0)
+        if free > 0:
+            quantity = min(quantity, free)    # Base-asset fees leave less than the gross buy quantity
+        order = safe_api_call(exchange.create_order, symbol, 'STOP_LOSS_LIMIT', 'sell', quantity,
+                              stop_price * 0.995, {'stopPrice': str(stop_price), 'timeInForce': 'GTC'})
+        log_message(f"🛡️ {symbol} protected: stop ${stop_price:.4f} (order {order['id']})")
+        return order['id']
+    except Exception as e:
+        log_message(f"❌ Could not protect {symbol} engine position: {e}")
+        return None
+
+def release_engine_position(symbol, order_id=None):
+    """Cancel an engine position's protective stop; returns its fill price if it already executed"""
+    if not order_id:
+        order_reconciler.cancel_protective([symbol])    # Position from before stop ids were persisted
+        return None
+    try:
+        order = safe_api_call(exchange.fetch_order, order_id, symbol)
+        if order and order.get('status') == 'closed':
+            return order.get('average') or order.get('price')
+        if order and order.get('status') == 'open':
+            safe_api_call(exchange.cancel_order, order_id, symbol)
+    except Exception as e:
+        log_message(f"⚠️ Could not release {symbol} stop {order_id}: {e}")
+        order_reconciler.cancel_protective([symbol])
+    return None
+
+def run_multi_symbol_engine():
+    """
+    🧩 MULTI-SYMBOL TRADING - one actor per watched symbol, up to max_positions at once
+
+    Replaces the single-symbol loop when started with --multi-symbol. Settings
+    come from trading.multi_symbol_engine (dry_run unless set to false).
+    """
+    engine_config = optimized_config['trading'].get('multi_symbol_engine', {})
+    engine = MultiSymbolEngine(
+        exchange,
+        engine_config,
+        api_call=lambda func, *args, **kwargs: safe_api_call(func, *args, **kwargs),
+        protector=None if engine_config.get('dry_run', True) else protect_engine_position,
+        releaser=None if engine_config.get('dry_run', True) else release_engine_position
+    )
+    print(f"🧩 MULTI-SYMBOL ENGINE: {len(engine.actors)} symbols, "
+          f"max {engine.governor.portfolio.max_positions} positions, "
+          f"{'PAPER' if engine.config['dry_run'] else 'LIVE'} orders")
+    engine.run()
+
 def run_continuously(interval_seconds=60):
     """
     🎯 AGGRESSIVE DAY TRADING BOT - MA7/MA25 Crossover Priority
@@ -5177,6 +5261,7 @@ def run_continuously(interval_seconds=60):
     with fallback to other strategies when no clear crossover signals exist.
     """
     global holding_position, last_trade_time, consecutive_losses, active_trade_index, entry_price, stop_loss_price, take_profit_price
+    global optimized_config
 
     print("\n" + "="*70)
     print("🚀 ENHANCED HIGH-FREQUENCY DAY TRADING BOT - Multi-Timeframe MA + Advanced Price Detection")
@@ -5188,17 +5273,43 @@ def run_continuously(interval_seconds=60):
     print("🎯 LAYER 1 ENHANCED: 4-10 trades/day, 0.5-2% targets (increased frequency)")
     print("="*70)
 
+    # 🛡️ Stops trail on live prices from here on, independent of this loop's pace
+    if not REPLAY_MODE:
+        # 🗂️ Config edits arrive as change events; the loop picks them up without touching disk
+        config_service.start()
+        trailing_engine.start()
+        # ⏰ Clock offset re-sampled in the background so -1021 never reaches an order
+        clock_sync.start()
+        # 🛰️ Phase 2/3 intelligence refreshed on its own cadence; signals read the latest snapshot
+        intelligence_refresher.set_symbols(active=optimized_config['trading']['symbol'])
+        intelligence_refresher.start()
+        # 📚 Order book for the active pair streams from here on; other pairs join on first order or stop
+        order_books.track(optimized_config['trading']['symbol'])
+        order_books.start()
+
+    # ⏱️ Background reports run on their own cadence while the loop idles between candles
+    loop_scheduler.every('price_jump_status', 300, display_enhanced_price_jump_status, priority=8)
+
     while True:
-        # 🔄 RUNTIME CONFIG RELOAD - Check for multi-pair scanner updates
-        config_changed = bot_config.reload_config_if_changed()
+        # 🎬 REPLAY PROFILING - Close out the previous iteration's wall/CPU cost
+        if replay_session:
+            replay_session.mark_iteration()
+
+        bot_metrics.loop_started()
+
+        # 🔄 RUNTIME CONFIG RELOAD - Apply multi-pair scanner updates published by the config service
+        with bot_metrics.stage('config_reload'):
+            config_changed = bot_config.reload_config_if_changed()
         if config_changed:
             log_message("🔄 Configuration reloaded - Multi-pair scanner may have switched trading pair")
             # Update optimized_config reference
             optimized_config = bot_config.config
+            intelligence_refresher.set_symbols(active=bot_config.get_current_trading_symbol())
         
         # 🔄 MANUAL TRAILING STOP MONITORING - Check and update trailing stops
         try:
-            monitor_and_update_trailing_stop()
+            with bot_metrics.stage('trailing_stop_monitor'):
+                monitor_and_update_trailing_stop()
         except Exception as e:
             log_message(f"⚠️ Error in trailing stop monitoring: {e}")
         
@@ -5248,34 +5359,24 @@ def run_continuously(interval_seconds=60):
         print(f"   🕐 Last Trade: {pnl_summary['last_trade_date']}", flush=True)
 
         # Calculate dynamic daily loss limit based on current portfolio
-        balance = safe_api_call(exchange.fetch_balance)
+        with bot_metrics.stage('balance_sync'):
+            balance = safe_api_call(exchange.fetch_balance)
         
         # 🌐 MULTI-CRYPTO ASSET SELECTION WITH RUNTIME CONFIG SUPPORT
         # Check if multi-pair scanner has specified a trading pair
         config_symbol = bot_config.get_current_trading_symbol()
         
-        # 🧠 PHASE 2 INTEGRATION: Initialize blockchain intelligence
-        try:
-            from phase2_trading_integration import Phase2TradingIntegration
-            phase2_integration = Phase2TradingIntegration()
-            log_message(f"🧠 PHASE 2 INTELLIGENCE: {phase2_integration.get_status_summary()['status']}")
-        except ImportError:
-            phase2_integration = None
-            log_message("⚠️ PHASE 2 INTELLIGENCE: Not available, using standard signals only")
-        
         # 🎯 SIGNAL-FIRST CRYPTO SELECTION - Prioritize strongest signals over tiers
+        signal_scan_timer = bot_metrics.stage('signal_first_scan')
         try:
-            # Get all available pairs from comprehensive config
-            try:
-                with open('comprehensive_all_pairs_config.json', 'r') as f:
-                    comp_config = json.load(f)
-                available_pairs = comp_config.get('supported_pairs', bot_config.get_supported_pairs())
-            except:
-                available_pairs = bot_config.get_supported_pairs()
+            # Get all available pairs from comprehensive config (in-memory snapshot)
+            available_pairs = list(config_service.get('comprehensive_all_pairs_config.json', 'supported_pairs')
+                                   or bot_config.get_supported_pairs())
             
             # Quick signal strength scan of top pairs
             best_signal_pair = None
             best_signal_strength = 0
+            signal_strengths = {}
             pairs_to_scan = available_pairs[:30]  # Scan top 30 pairs for performance
             
             log_message(f"🔍 SIGNAL-FIRST SCAN: Analyzing {len(pairs_to_scan)} pairs for strongest signals")
@@ -5331,6 +5432,7 @@ def run_continuously(interval_seconds=60):
                     if current_volume > avg_volume * 1.2:
                         signal_strength += 1  # Volume surge
                     
+                    signal_strengths[pair] = signal_strength
                     if signal_strength > best_signal_strength:
                         best_signal_strength = signal_strength
                         best_signal_pair = pair
@@ -5338,6 +5440,10 @@ def run_continuously(interval_seconds=60):
                 except Exception:
                     continue  # Skip failed pairs
             
+            # 🛰️ Keep intelligence warm for the strongest candidates before they are selected
+            intelligence_refresher.set_symbols(
+                candidates=sorted(signal_strengths, key=signal_strengths.get, reverse=True))
+            
             # Use signal-first selection if strong signal found
             if best_signal_pair and best_signal_strength >= 5:
                 base_signal = {
@@ -5353,8 +5459,7 @@ def run_continuously(interval_seconds=60):
                 # 🧠 PHASE 2 ENHANCEMENT: Enhance signal with blockchain intelligence
                 if phase2_integration and phase2_integration.enabled:
                     try:
-                        crypto_symbol = best_signal_pair.split('/')[0]
-                        enhancement = phase2_integration.get_trading_enhancement(crypto_symbol, base_signal)
+                        enhancement = phase2_integration.get_trading_enhancement(best_signal_pair, base_signal)
                         
                         # Apply Phase 2 enhancements
                         adjustments = enhancement['trading_adjustments']
@@ -5382,7 +5487,10 @@ def run_continuously(interval_seconds=60):
                                     'confidence': enhanced_confidence,
                                     'urgency_score': enhanced_urgency
                                 }
-                                sentiment_enhanced = enhance_signal_with_sentiment(sentiment_signal, best_signal_pair, None)
+                                sentiment_snapshot = intelligence_refresher.get('sentiment', best_signal_pair)
+                                sentiment_enhanced = sentiment_signal if sentiment_snapshot is None else \
+                                    enhance_signal_with_sentiment(sentiment_signal, best_signal_pair, None,
+                                                                  sentiment_score=sentiment_snapshot)
                                 sentiment_boost = sentiment_enhanced.get('sentiment_enhancement', 0)
                                 
                                 if abs(sentiment_boost) > 0.03:  # Significant sentiment impact
@@ -5414,6 +5522,7 @@ def run_continuously(interval_seconds=60):
         except Exception as signal_error:
             log_message(f"⚠️ Signal-first selection error: {signal_error}")
             selected_crypto = select_best_crypto_for_trading()
+        signal_scan_timer.stop()
         
         # 🎯 PRIORITIZE CONFIG SYMBOL: If multi-pair scanner set a specific pair, use it
         if config_symbol != 'BTC/USDT' and config_symbol in bot_config.get_supported_pairs():
@@ -5440,10 +5549,11 @@ def run_continuously(interval_seconds=60):
                     
                     # 🧠 PHASE 2 ENHANCEMENT: Enhance opportunities with blockchain intelligence
                     if phase2_integration and phase2_integration.enabled and all_opportunities:
+                        # 🛰️ Top scan candidates are kept warm; this pass only reads their snapshots
+                        intelligence_refresher.set_symbols(candidates=[opp.symbol for opp in all_opportunities[:10]])
                         enhanced_opportunities = []
                         for opp in all_opportunities[:10]:  # Enhance top 10 for performance
                             try:
-                                crypto_symbol = opp.symbol.split('/')[0]
                                 base_signal = {
                                     'symbol': opp.symbol,
                                     'confidence': 0.7,  # Base confidence for opportunities
@@ -5451,7 +5561,7 @@ def run_continuously(interval_seconds=60):
                                     'action': 'BUY'
                                 }
                                 
-                                enhancement = phase2_integration.get_trading_enhancement(crypto_symbol, base_signal)
+                                enhancement = phase2_integration.get_trading_enhancement(opp.symbol, base_signal)
                                 adjustments = enhancement['trading_adjustments']
                                 
                                 # Apply Phase 2 boost to urgency score
@@ -5610,9 +5720,7 @@ def run_continuously(interval_seconds=60):
                 # Layer 4: Direct Ticker Checking with Profit-First Logic
                 if not emergency_detected:
                     try:
-                        from config import BotConfig
-                        bot_config_instance = BotConfig()
-                        all_supported_pairs = bot_config_instance.get_supported_pairs()
+                        all_supported_pairs = bot_config.get_supported_pairs()
                         
                         log_message(f"🔍 DIRECT TICKER SCAN: Scanning {len(all_supported_pairs)} pairs for profitable switches")
                         
@@ -5698,9 +5806,7 @@ def run_continuously(interval_seconds=60):
                 else:
                     # Log that comprehensive scan completed with no emergencies
                     try:
-                        from config import BotConfig
-                        bot_config_temp = BotConfig()
-                        total_pairs = len(bot_config_temp.get_supported_pairs())
+                        total_pairs = len(bot_config.get_supported_pairs())
                         log_message(f"✅ COMPREHENSIVE SCAN COMPLETE: No emergency opportunities detected across all {total_pairs} pairs")
                     except:
                         log_message("✅ COMPREHENSIVE SCAN COMPLETE: No emergency opportunities detected")
@@ -5755,11 +5861,11 @@ def run_continuously(interval_seconds=60):
         crypto_balance = balance.get(base_asset, {}).get('free', 0)
 
         # Show unrealized PnL if holding position
-        if holding_position and entry_price and entry_price > 0:
-            # Calculate unrealized PnL for the currently held asset
+        if holding_position and entry_price and entry_price > 0 and crypto_balance > 0:
+            # Calculate unrealized PnL for the currently held asset (amount is keyed btc_amount for every pair)
             unrealized = calculate_unrealized_pnl(current_price, entry_price, crypto_balance)
             print(f"   💎 UNREALIZED: ${unrealized['unrealized_pnl_usd']:.2f} ({unrealized['unrealized_pnl_pct']:+.2f}%)", flush=True)
-            print(f"   📍 Position: {unrealized[f'{base_asset.lower()}_amount']:.6f} {base_asset} @ ${unrealized['entry_price']:.2f} → ${unrealized['current_price']:.2f}", flush=True)
+            print(f"   📍 Position: {unrealized['btc_amount']:.6f} {base_asset} @ ${unrealized['entry_price']:.2f} → ${unrealized['current_price']:.2f}", flush=True)
             
             # 🛡️ DISPLAY TRAILING STOP STATUS
             try:
@@ -5828,23 +5934,26 @@ def run_continuously(interval_seconds=60):
             print(f"📈 SUSTAINED TREND: {trend_state['direction']} trend active for {trend_state['duration_seconds']:.0f}s")
             print(f"   Peak change: {trend_state['peak_change_pct']:+.2f}% | Strength: {trend_state['strength']:.2f}")
 
-        # Display enhanced price jump status periodically
-        if int(time.time()) % 300 == 0:  # Every 5 minutes
-            try:
-                display_enhanced_price_jump_status()
-            except Exception as e:
-                log_message(f"⚠️ Error in price jump status display: {e}")
-
         if cooldown_required > 0:
             print(f"⏳ Trade cooldown: {cooldown_required}s remaining (avoiding overtrading)", flush=True)
-            time.sleep(min(interval_seconds, cooldown_required + 10))
+            finish_loop_iteration(min(interval_seconds, cooldown_required + 10))
             continue
 
         try:
             df = fetch_ohlcv(exchange, symbol, '1m', 50)
+            # Higher timeframes for the MA detectors are built from this same 1m frame
+            timeframe_aggregator.ingest_frame(symbol, df)
+
+            # Roll the VaR window forward once per closed 1h candle (sizing reads the cache)
+            try:
+                with bot_metrics.stage('risk_metrics_refresh'):
+                    risk_metrics.refresh_if_due(symbol, lambda s, tf, n: fetch_ohlcv(exchange, s, tf, n))
+            except Exception as e:
+                log_message(f"⚠️ Risk metrics refresh failed for {symbol}: {e}")
 
             # Synchronize holding position with actual balance
-            balance = safe_api_call(exchange.fetch_balance)
+            with bot_metrics.stage('balance_sync'):
+                balance = safe_api_call(exchange.fetch_balance)
             crypto_balance = balance[symbol.split('/')[0]]['free']
             current_price = df['close'].iloc[-1]
 
@@ -5885,6 +5994,7 @@ def run_continuously(interval_seconds=60):
                     if monitor_status.get("emergency_triggered"):
                         log_message("🚨 Emergency action taken by manual monitoring system")
                         # Skip to next iteration after emergency action
+                        finish_loop_iteration(0)
                         continue
                     elif monitor_status.get("monitoring_active"):
                         # Log status but continue normal operation
@@ -5900,10 +6010,12 @@ def run_continuously(interval_seconds=60):
             # 🎯 ENHANCED: Get multi-timeframe signals with trend continuation
             try:
                 from enhanced_multi_timeframe_ma import detect_enhanced_multi_timeframe_ma_signals
-                multi_signals = detect_enhanced_multi_timeframe_ma_signals(exchange, symbol, current_price)
+                with bot_metrics.stage('multi_timeframe_ma'):
+                    multi_signals = detect_enhanced_multi_timeframe_ma_signals(exchange, symbol, current_price)
             except ImportError:
                 # Fallback to original if enhanced version not available
-                multi_signals = detect_multi_timeframe_ma_signals(exchange, symbol, current_price)
+                with bot_metrics.stage('multi_timeframe_ma'):
+                    multi_signals = detect_multi_timeframe_ma_signals(exchange, symbol, current_price)
 
             # Primary signal from combined analysis
             ma_signal = multi_signals['combined']
@@ -6004,7 +6116,7 @@ def run_continuously(interval_seconds=60):
                     
                     # Execute BUY signal immediately with 5m+1m priority
                     if ma_signal['action'] == 'BUY':
-                        position_size = calculate_position_size(current_price, 0.02, agreement['confidence'], total_portfolio_value)
+                        position_size = calculate_position_size(current_price, 0.02, agreement['confidence'], total_portfolio_value, symbol=symbol)
                         if position_size > 0:
                             print(f"🚀 5M+1M PRIORITY BUY ({symbol}): ${position_size:.2f}")
                             order = place_intelligent_order(symbol, 'buy', amount_usd=position_size, use_limit=True)
@@ -6019,12 +6131,12 @@ def run_continuously(interval_seconds=60):
                                     trade_id=order.get('id')
                                 )
                                 print(f"✅ 5M+1M PRIORITY BUY EXECUTED: Entry ${entry_price:.2f}")
-                                time.sleep(interval_seconds)
+                                finish_loop_iteration(interval_seconds=interval_seconds)
                                 continue  # Skip other logic, trade executed
 
                 # Execute BUY signal
                 if ma_signal['action'] == 'BUY' and not holding_position:
-                    position_size = calculate_position_size(current_price, 0.02, ma_signal['confidence'], total_portfolio_value)
+                    position_size = calculate_position_size(current_price, 0.02, ma_signal['confidence'], total_portfolio_value, symbol=symbol)
                     if position_size > 0:
                         print(f"🚀 MULTI-TIMEFRAME PRIORITY BUY ({symbol}): ${position_size:.2f}")
                         order = place_intelligent_order(symbol, 'buy', amount_usd=position_size, use_limit=True)
@@ -6069,7 +6181,7 @@ def run_continuously(interval_seconds=60):
 
                 # Skip other strategies when multi-timeframe priority is active
                 print("⏭️ Skipping other strategies - Multi-timeframe priority active")
-                time.sleep(interval_seconds)
+                finish_loop_iteration(interval_seconds=interval_seconds)
                 continue
 
             # 🎯 STEP 2: Progressive Sell Target Management (NEW FEATURE!)
@@ -6092,7 +6204,7 @@ def run_continuously(interval_seconds=60):
                             holding_position = False
                             state_manager.exit_trade("PROGRESSIVE_SELL_COMPLETE")
                             print(f"✅ Progressive sell strategy completed - position closed", flush=True)
-                            time.sleep(interval_seconds)
+                            finish_loop_iteration(interval_seconds=interval_seconds)
                             continue
 
             # 🎯 5M+1M POSITION MANAGEMENT: Enhanced with peak detection and trailing stop
@@ -6125,7 +6237,7 @@ def run_continuously(interval_seconds=60):
                             if hasattr(state_manager, '_peak_price'):
                                 delattr(state_manager, '_peak_price')
                             print(f"✅ PEAK DETECTION SELL EXECUTED: Exit ${current_price:.2f}")
-                            time.sleep(interval_seconds)
+                            finish_loop_iteration(interval_seconds=interval_seconds)
                             continue  # Skip other logic, trade executed
                 
                 # If no peak-based exit, use standard 5M+1M hold logic
@@ -6144,7 +6256,7 @@ def run_continuously(interval_seconds=60):
                             if hasattr(state_manager, '_peak_price'):
                                 delattr(state_manager, '_peak_price')
                             print(f"✅ 5M+1M PRIORITY SELL EXECUTED: Exit ${current_price:.2f}")
-                            time.sleep(interval_seconds)
+                            finish_loop_iteration(interval_seconds=interval_seconds)
                             continue  # Skip other logic, trade executed
 
             # 🎯 STEP 2.5: ENHANCED PROFIT-TAKING + LOSS-CUTTING CHECK (Before Risk Management)
@@ -6225,7 +6337,7 @@ def run_continuously(interval_seconds=60):
                             state_manager.exit_trade("LOSS_CUTTING" if is_loss_cutting else "PROFIT_TAKING")
                             
                             # Brief pause and continue
-                            time.sleep(5)
+                            finish_loop_iteration(5)
                             continue
 
             # 🎯 STEP 3: Check Risk Management (Stop Loss, Take Profit)
@@ -6269,7 +6381,7 @@ def run_continuously(interval_seconds=60):
                         holding_position = False
                         print(f"✅ Risk management SELL: {crypto_balance:.6f} {symbol.split('/')[0]} at ${current_price:.2f}")
 
-                        time.sleep(300)  # 5 minute cooldown
+                        finish_loop_iteration(300)  # 5 minute cooldown
                         continue
 
             # 🎯 STEP 3: HIGH-FREQUENCY 3-LAYER STRATEGY (when multi-timeframe signal is weak)
@@ -6287,7 +6399,8 @@ def run_continuously(interval_seconds=60):
                     log_message(f"⚠️ Could not fetch 1m data for micro-scalping: {e}")
                 
                 # Coordinate multi-layer strategy
-                layer_signal = coordinate_multi_layer_strategy(df, df_1m, current_price, holding_position, symbol)
+                with bot_metrics.stage('layer_coordination'):
+                    layer_signal = coordinate_multi_layer_strategy(df, df_1m, current_price, holding_position, symbol)
                 
                 if layer_signal:
                     # Use the selected layer strategy
@@ -6319,7 +6432,7 @@ def run_continuously(interval_seconds=60):
                         
                         if not death_cross_blocked:
                             position_size = calculate_position_size(
-                                current_price, 0.02, layer_signal['confidence'], total_portfolio_value
+                                current_price, 0.02, layer_signal['confidence'], total_portfolio_value, symbol=symbol
                             ) * position_size_multiplier
                             
                             if position_size > 0:
@@ -6350,7 +6463,7 @@ def run_continuously(interval_seconds=60):
                                 print(f"📊 Target: ${take_profit_price:.2f} (+{adaptive_target:.2f}%)")
                                 print(f"📈 Daily Progress: {stats['current_pct']:.2f}% of {stats['target_pct']:.1f}% target")
                                 
-                                time.sleep(interval_seconds)
+                                finish_loop_iteration(interval_seconds=interval_seconds)
                                 continue
                     
                     elif layer_signal['action'] == 'SELL' and holding_position and layer_signal['confidence'] >= 0.6:
@@ -6374,7 +6487,7 @@ def run_continuously(interval_seconds=60):
                                 print(f"✅ {layer_signal['layer'].upper()} SELL EXECUTED")
                                 print(f"📈 Daily Progress: {stats['current_pct']:.2f}% of {stats['target_pct']:.1f}% target")
                                 
-                                time.sleep(interval_seconds)
+                                finish_loop_iteration(interval_seconds=interval_seconds)
                                 continue
                 else:
                     # Fallback to original multi-timeframe signal if no layer signals
@@ -6488,7 +6601,7 @@ def run_continuously(interval_seconds=60):
                         continue  # Skip this buy attempt completely
                     
                     # If we get here, no death cross protection is active - proceed with buy
-                    position_size = calculate_position_size(current_price, 0.02, signal['confidence'], total_portfolio_value)
+                    position_size = calculate_position_size(current_price, 0.02, signal['confidence'], total_portfolio_value, symbol=symbol)
                     if position_size > 0:
                         log_message(f"✅ DEATH CROSS PROTECTION PASSED - Executing BUY order")
                         print(f"📥 MULTI-TIMEFRAME ENHANCED BUY signal ({symbol}) - ${position_size:.2f}...")
@@ -6541,10 +6654,10 @@ def run_continuously(interval_seconds=60):
 
         except Exception as e:
             print("❌ Error in trading loop:", e, flush=True)
+            if bot_heartbeat:
+                bot_heartbeat.record_error()
 
-        # Add heartbeat before sleep
-        print(f"💓 Loop completed, sleeping for {interval_seconds} seconds...", flush=True)
-        time.sleep(interval_seconds)
+        finish_loop_iteration(interval_seconds=interval_seconds)
 
 def generate_reports():
     """Generate comprehensive trading performance reports"""
@@ -6658,6 +6771,28 @@ Please check bot configuration and logs for issues.
         except:
             print("❌ Could not generate any report")
 
+def display_enhanced_price_jump_status():
+    """Display enhanced price jump detection status"""
+    try:
+        detector = get_price_jump_detector(optimized_config)
+        status = detector.get_status()
+        trend_state = status['current_trend']
+
+        print(f"🔍 ENHANCED PRICE DETECTION STATUS:")
+        print(f"   📊 History: {status['price_history_size']} points | Recent jumps: {status['recent_jumps_count']}")
+        print(f"   ⏱️ Activity (5m/15m/30m): {status['last_5min_jumps']}/{status['last_15min_jumps']}/{status['last_30min_jumps']}")
+        print(f"   📈 Current Trend: {trend_state['direction'] or 'NEUTRAL'} (strength: {trend_state['strength']:.2f})")
+
+        if trend_state['direction'] and trend_state['is_sustained']:
+            print(f"   🎯 Sustained {trend_state['direction']} trend: {trend_state['duration_seconds']:.0f}s, peak {trend_state['peak_change_pct']:+.2f}%")
+
+        activity = status['timeframe_activity']
+        if sum(activity.values()) > 0:
+            print(f"   🎯 Timeframe activity: Spike:{activity['spike']} | Short:{activity['short_trend']} | Medium:{activity['medium_trend']} | Long:{activity['long_trend']}")
+
+    except Exception as e:
+        print(f"⚠️ Error displaying price jump status: {e}")
+
 # =============================================================================
 # MAIN EXECUTION
 # =============================================================================
@@ -6697,7 +6832,13 @@ if __name__ == "__main__":
         loop_interval = optimized_config['system']['loop_interval_seconds']
         print(f"⚡ Enhanced Loop Timing: {loop_interval}s intervals for better responsiveness (Loaded from config)")
         print(f"[DEBUG] Config file used: {bot_config.config_file}")
-        run_continuously(loop_interval)
+        if '--multi-symbol' in sys.argv:
+            run_multi_symbol_engine()
+        else:
+            run_continuously(loop_interval)
+
+    except ReplayComplete:
+        replay_session.finish()
 
     except KeyboardInterrupt:
         print("\n🛑 Bot stopped by user")
@@ -6712,26 +6853,6 @@ if __name__ == "__main__":
             generate_reports()
         except:
             print("⚠️ Report generation failed")
+        if replay_session:
+            replay_session.finish()
         print("🔧 Check logs for debugging information")
-
-def display_enhanced_price_jump_status():
-    """Display enhanced price jump detection status"""
-    try:
-        detector = get_price_jump_detector(optimized_config)
-        status = detector.get_status()
-        trend_state = status['current_trend']
-
-        print(f"🔍 ENHANCED PRICE DETECTION STATUS:")
-        print(f"   📊 History: {status['price_history_size']} points | Recent jumps: {status['recent_jumps_count']}")
-        print(f"   ⏱️ Activity (5m/15m/30m): {status['last_5min_jumps']}/{status['last_15min_jumps']}/{status['last_30min_jumps']}")
-        print(f"   📈 Current Trend: {trend_state['direction'] or 'NEUTRAL'} (strength: {trend_state['strength']:.2f})")
-
-        if trend_state['direction'] and trend_state['is_sustained']:
-            print(f"   🎯 Sustained {trend_state['direction']} trend: {trend_state['duration_seconds']:.0f}s, peak {trend_state['peak_change_pct']:+.2f}%")
-
-        activity = status['timeframe_activity']
-        if sum(activity.values()) > 0:
-            print(f"   🎯 Timeframe activity: Spike:{activity['spike']} | Short:{activity['short_trend']} | Medium:{activity['medium_trend']} | Long:{activity['long_trend']}")
-
-    except Exception as e:
-        print(f"⚠️ Error displaying price jump status: {e}")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# =============================================================================
+# BOT HEARTBEAT - Fixed-size shared-memory status record for the watchdog
+# =============================================================================
+#
+# The bot publishes its liveness into a small mmap'd file; the watchdog reads
+# it in O(1) instead of stat'ing and re-reading bot_log.txt.
+#
+# Every beat carries a *deadline*: the latest time the bot promises to beat
+# again. Entering a stage sets it to now + stage budget, sleeping between
+# loops sets it to the end of the sleep plus a grace period. A watchdog that
+# sees now > deadline knows the bot is hung, and in which stage.
+#
+# Writes use a sequence lock (odd sequence = write in progress) so readers in
+# another process never see a half-written record.
+#
+# =============================================================================
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+HEARTBEAT_MAGIC = b'CBHB'
+HEARTBEAT_VERSION = 1
+
+# magic, version, pid, sequence, loops, updated_at, deadline, started_at,
+# last_loop_seconds, loop_errors, exchange_errors, error_rate, open_positions, stage
+_RECORD = struct.Struct('<4sHIQQdddd QQdI 48s')
+_SEQ_OFFSET = struct.calcsize('<4sHI')
+_SEQ = struct.Struct('<Q')
+_BODY_OFFSET = _SEQ_OFFSET + _SEQ.size
+_BODY = struct.Struct('<' + _RECORD.format[len('<4sHIQ'):])
+
+DEFAULT_HEARTBEAT_CONFIG = {
+    'enabled': True,
+    'file': 'bot_heartbeat.bin',
+    'startup_budget_seconds': 600,   # Imports, ML model load, first sync
+    'stage_budget_seconds': 300,     # Longest a single loop stage may run
+    'sleep_grace_seconds': 120,      # Slack on top of the inter-loop sleep
+    'error_window_loops': 20         # Loops considered for error_rate
+}
+
+
+class HeartbeatWriter:
+    """
+    💓 Publishes the bot's loop state into the shared heartbeat record
+
+    Each beat is one struct pack into the mapping, a few microseconds; the
+    file is never grown or rewritten.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_HEARTBEAT_CONFIG)
+        self.config.update(config or {})
+        self.path = self.config['file']
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.sequence = 0
+        self.loops = 0
+        self.started_at = time.time()
+        self.last_loop_seconds = 0.0
+        self.loop_errors = 0
+        self.exchange_errors = 0
+        self.open_positions = 0
+        self.stage = 'startup'
+        self.deadline = self.started_at + float(self.config['startup_budget_seconds'])
+        self.recent_errors = deque(maxlen=int(self.config['error_window_loops']))
+        self.current_loop_failed = False
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, _RECORD.size)
+            self.mm = mmap.mmap(fd, _RECORD.size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        self._publish()
+
+    # ----------------------------------------------------------- publishing
+
+    def _publish(self):
+        """Write the record under the sequence lock"""
+        with self.lock:
+            self.sequence += 1  # Odd: write in progress
+            if self.sequence == 1:
+                _RECORD.pack_into(self.mm, 0, HEARTBEAT_MAGIC, HEARTBEAT_VERSION, self.pid,
+                                  self.sequence, *self._body())
+            else:
+                _SEQ.pack_into(self.mm, _SEQ_OFFSET, self.sequence)
+                _BODY.pack_into(self.mm, _BODY_OFFSET, *self._body())
+            self.sequence += 1  # Even: record consistent
+            _SEQ.pack_into(self.mm, _SEQ_OFFSET, self.sequence)
+
+    def _body(self):
+        error_rate = (sum(self.recent_errors) / len(self.recent_errors)) if self.recent_errors else 0.0
+        return (self.loops, time.time(), self.deadline, self.started_at,
+                self.last_loop_seconds, self.loop_errors, self.exchange_errors,
+                error_rate, self.open_positions, self.stage.encode('utf-8')[:48])
+
+    def stage_started(self, stage: str, budget_seconds: Optional[float] = None):
+        """Beat on entry to a loop stage; the stage must finish within its budget"""
+        self.stage = stage
+        self.deadline = time.time() + float(budget_seconds or self.config['stage_budget_seconds'])
+        self._publish()
+
+    def record_error(self):
+        """Mark the current loop iteration as failed"""
+        self.loop_errors += 1
+        self.current_loop_failed = True
+        self._publish()
+
+    def loop_completed(self, loop_seconds: Optional[float], sleep_seconds: float,
+                       open_positions: int = 0, exchange_errors: int = 0):
+        """Beat at the end of an iteration, right before the inter-loop sleep"""
+        self.loops += 1
+        if loop_seconds is not None:
+            self.last_loop_seconds = loop_seconds
+        self.open_positions = int(open_positions)
+        self.exchange_errors = int(exchange_errors)
+        self.recent_errors.append(1 if self.current_loop_failed else 0)
+        self.current_loop_failed = False
+        self.stage = 'sleep'
+        self.deadline = time.time() + float(sleep_seconds) + float(self.config['sleep_grace_seconds'])
+        self._publish()
+
+    def close(self):
+        try:
+            self.mm.close()
+        except Exception:
+            pass
+
+
+def read_heartbeat(path: str, retries: int = 100) -> Optional[Dict]:
+    """
+    Read the heartbeat record written by another process.
+
+    Returns None when the file is missing or not a heartbeat record, or when
+    no consistent copy could be taken in `retries` attempts.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _RECORD.size:
+                return None
+            mm = mmap.mmap(f.fileno(), _RECORD.size, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return _read_record(mm, retries)
+    finally:
+        mm.close()
+
+
+def _read_record(mm, retries: int) -> Optional[Dict]:
+    """
+    Seqlock read: sequence, body, sequence again. An odd sequence (write in
+    progress) or one that changed while the body was copied means the copy may
+    be torn, so it is discarded and retried. The record is ~130 bytes: O(1).
+    """
+    for _ in range(retries):
+        if bytes(mm[:4]) != HEARTBEAT_MAGIC:
+            return None
+        before = _SEQ.unpack(mm[_SEQ_OFFSET:_BODY_OFFSET])[0]
+        if before % 2:
+            time.sleep(0.0001)  # Writer mid-update
+            continue
+        raw = bytes(mm[:_RECORD.size])
+        after = _SEQ.unpack(mm[_SEQ_OFFSET:_BODY_OFFSET])[0]
+        if after != before:
+            continue            # A write started (and maybe finished) during the copy
+
+        (magic, version, pid, sequence, loops, updated_at, deadline, started_at,
+         last_loop_seconds, loop_errors, exchange_errors, error_rate, open_positions,
+         stage) = _RECORD.unpack(raw)
+        if version != HEARTBEAT_VERSION:
+            return None
+        if sequence != before:
+            continue
+
+        return {
+            'pid': pid,
+            'sequence': sequence,
+            'loops': loops,
+            'updated_at': updated_at,
+            'deadline': deadline,
+            'started_at': started_at,
+            'last_loop_seconds': last_loop_seconds,
+            'loop_errors': loop_errors,
+            'exchange_errors': exchange_errors,
+            'error_rate': error_rate,
+            'open_positions': open_positions,
+            'stage': stage.rstrip(b'\x00').decode('utf-8', 'replace')
+        }
+    return None
+
+
+# Global heartbeat instance
+_heartbeat_writer = None
+
+
+def get_heartbeat_writer(config: Optional[Dict] = None) -> Optional[HeartbeatWriter]:
+    """Get the process-wide heartbeat writer, or None when disabled/unavailable"""
+    global _heartbeat_writer
+    if _heartbeat_writer is None:
+        merged = dict(DEFAULT_HEARTBEAT_CONFIG)
+        merged.update(config or {})
+        if not merged.get('enabled', True):
+            return None
+        try:
+            _heartbeat_writer = HeartbeatWriter(merged)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Heartbeat disabled: {e}")
+            return None
+    return _heartbeat_writer
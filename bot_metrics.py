@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# =============================================================================
+# TRADING LOOP METRICS - Per-stage latency, exchange weight and cache hit rates
+# =============================================================================
+#
+# Instrumentation for run_continuously. Each loop stage is timed with
+#
+#     with get_bot_metrics().stage('balance_sync'):
+#         balance = safe_api_call(exchange.fetch_balance)
+#
+# and exchange requests are counted per endpoint with their Binance request
+# weight. Everything is exported through a local HTTP endpoint
+# (/metrics in Prometheus text format, /metrics.json) and a rolling on-disk
+# summary (metrics_summary.json) showing where each loop's seconds go.
+#
+# =============================================================================
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+METRIC_PREFIX = 'cryptobot'
+
+# Histogram buckets in seconds - from cache hits up to a full slow loop
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DEFAULT_METRICS_CONFIG = {
+    'enabled': True,
+    'host': '127.0.0.1',
+    'port': 9108,
+    'summary_file': 'metrics_summary.json',
+    'summary_interval_seconds': 60,
+    'rolling_window': 500
+}
+
+
+class _Histogram:
+    """Cumulative latency histogram plus a rolling window of recent samples"""
+
+    __slots__ = ('count', 'total', 'last', 'max', 'buckets', 'recent')
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+        self.recent.append(seconds)
+
+    def window_stats(self) -> Dict[str, float]:
+        if not self.recent:
+            return {'samples': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        ordered = sorted(self.recent)
+        n = len(ordered)
+        return {
+            'samples': n,
+            'mean_ms': round(sum(ordered) / n * 1000, 3),
+            'p50_ms': round(ordered[n // 2] * 1000, 3),
+            'p95_ms': round(ordered[min(n - 1, int(n * 0.95))] * 1000, 3),
+            'max_ms': round(ordered[-1] * 1000, 3),
+        }
+
+
+class StageTimer:
+    """
+    Times one stage. Works as a context manager or with an explicit stop()
+    for stages that span several blocks of the loop.
+    """
+
+    __slots__ = ('metrics', 'name', 'start', 'stopped')
+
+    def __init__(self, metrics: 'BotMetrics', name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = time.perf_counter()
+        self.stopped = False
+
+    def stop(self) -> float:
+        if self.stopped:
+            return 0.0
+        self.stopped = True
+        elapsed = time.perf_counter() - self.start
+        self.metrics.observe_stage(self.name, elapsed)
+        return elapsed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+class BotMetrics:
+    """
+    📈 Process-wide metrics registry for the trading loop
+
+    Thread-safe; every update is a dict lookup and a few additions, so
+    instrumentation costs microseconds per stage.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_METRICS_CONFIG)
+        self.config.update(config or {})
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.window = int(self.config['rolling_window'])
+
+        self.stages: Dict[str, _Histogram] = {}
+        self.exchange_calls: Dict[str, Dict[str, float]] = {}
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.loops = 0
+        self.current_loop_start = None
+        self.last_loop_completed = None
+        self.last_summary_write = 0.0
+        self.exchange_errors = 0
+        self.server = None
+        self.heartbeat = None
+
+    # ------------------------------------------------------------- recording
+
+    def stage(self, name: str) -> StageTimer:
+        if self.heartbeat is not None:
+            self.heartbeat.stage_started(name)
+        return StageTimer(self, name)
+
+    def attach_heartbeat(self, heartbeat):
+        """Beat the watchdog heartbeat (bot_heartbeat.HeartbeatWriter) on every stage entry"""
+        self.heartbeat = heartbeat
+
+    def observe_stage(self, name: str, seconds: float):
+        with self.lock:
+            hist = self.stages.get(name)
+            if hist is None:
+                hist = self.stages[name] = _Histogram(self.window)
+            hist.observe(seconds)
+
+    def inc(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        with self.lock:
+            self.gauges[name] = value
+
+    def record_exchange_call(self, endpoint: str, weight: float, seconds: float, error: bool = False):
+        with self.lock:
+            stats = self.exchange_calls.get(endpoint)
+            if stats is None:
+                stats = self.exchange_calls[endpoint] = {
+                    'calls': 0, 'weight': 0.0, 'errors': 0, 'seconds': 0.0
+                }
+            stats['calls'] += 1
+            stats['weight'] += weight
+            stats['seconds'] += seconds
+            if error:
+                stats['errors'] += 1
+                self.exchange_errors += 1
+
+    def record_cache(self, cache: str, hit: bool):
+        with self.lock:
+            stats = self.cache_stats.get(cache)
+            if stats is None:
+                stats = self.cache_stats[cache] = {'hits': 0, 'misses': 0}
+            stats['hits' if hit else 'misses'] += 1
+
+    def loop_started(self):
+        """Mark the start of one run_continuously iteration"""
+        self.current_loop_start = time.perf_counter()
+
+    def loop_completed(self, loop_seconds: Optional[float] = None):
+        """
+        Mark the end of one iteration; records 'loop_total' excluding sleep.
+        Returns the iteration duration in seconds (None if it was never started).
+        """
+        if loop_seconds is None and self.current_loop_start is not None:
+            loop_seconds = time.perf_counter() - self.current_loop_start
+        self.current_loop_start = None
+        with self.lock:
+            self.loops += 1
+            self.last_loop_completed = time.time()
+        if loop_seconds is not None:
+            self.observe_stage('loop_total', loop_seconds)
+
+        interval = self.config.get('summary_interval_seconds', 60)
+        if time.perf_counter() - self.last_summary_write >= interval:
+            self.write_summary()
+        return loop_seconds
+
+    # --------------------------------------------------------- instrumentation
+
+    def instrument_exchange(self, exchange):
+        """
+        Count every HTTP request a ccxt exchange makes, by endpoint and weight.
+
+        ccxt routes all REST calls through Exchange.fetch2, so wrapping it on
+        the instance covers direct exchange.* calls as well as safe_api_call.
+        """
+        original_fetch2 = getattr(exchange, 'fetch2', None)
+        if original_fetch2 is None or getattr(original_fetch2, '_bot_metrics', False):
+            return False
+
+        metrics = self
+
+        def instrumented_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            endpoint = f"{method} {api if isinstance(api, str) else '/'.join(api)}/{path}"
+            try:
+                weight = exchange.calculate_rate_limiter_cost(api, method, path, params, config)
+            except Exception:
+                weight = config.get('cost', 1) if isinstance(config, dict) else 1
+            start = time.perf_counter()
+            try:
+                result = original_fetch2(path, api, method, params, headers, body, config)
+            except Exception:
+                metrics.record_exchange_call(endpoint, weight, time.perf_counter() - start, error=True)
+                raise
+            metrics.record_exchange_call(endpoint, weight, time.perf_counter() - start)
+            return result
+
+        instrumented_fetch2._bot_metrics = True
+        exchange.fetch2 = instrumented_fetch2
+        return True
+
+    # ----------------------------------------------------------------- export
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            stages = {name: dict(hist.window_stats(),
+                                 count=hist.count,
+                                 total_seconds=round(hist.total, 4),
+                                 last_ms=round(hist.last * 1000, 3))
+                      for name, hist in self.stages.items()}
+            exchange = {endpoint: dict(stats) for endpoint, stats in self.exchange_calls.items()}
+            caches = {}
+            for cache, stats in self.cache_stats.items():
+                total = stats['hits'] + stats['misses']
+                caches[cache] = dict(stats, hit_rate=round(stats['hits'] / total, 4) if total else 0.0)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            loops = self.loops
+            last_loop = self.last_loop_completed
+
+        # Share of an average loop spent in each stage
+        loop_mean = stages.get('loop_total', {}).get('mean_ms', 0.0)
+        if loop_mean > 0:
+            for name, stats in stages.items():
+                if name != 'loop_total':
+                    stats['loop_share'] = round(stats['mean_ms'] / loop_mean, 4)
+
+        return {
+            'generated_at': time.time(),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'loops': loops,
+            'last_loop_completed': last_loop,
+            'stages': dict(sorted(stages.items())),
+            'exchange': {
+                'total_calls': sum(s['calls'] for s in exchange.values()),
+                'total_weight': sum(s['weight'] for s in exchange.values()),
+                'endpoints': dict(sorted(exchange.items())),
+            },
+            'caches': caches,
+            'counters': counters,
+            'gauges': gauges,
+        }
+
+    def render_prometheus(self) -> str:
+        p = METRIC_PREFIX
+        lines = []
+
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+        with self.lock:
+            lines.append(f"# TYPE {p}_stage_duration_seconds histogram")
+            for name, hist in sorted(self.stages.items()):
+                label = f'stage="{escape(name)}"'
+                for bound, count in zip(LATENCY_BUCKETS, hist.buckets):
+                    lines.append(f'{p}_stage_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{p}_stage_duration_seconds_bucket{{{label},le="+Inf"}} {hist.count}')
+                lines.append(f'{p}_stage_duration_seconds_sum{{{label}}} {hist.total:.6f}')
+                lines.append(f'{p}_stage_duration_seconds_count{{{label}}} {hist.count}')
+
+            lines.append(f"# TYPE {p}_stage_last_seconds gauge")
+            for name, hist in sorted(self.stages.items()):
+                lines.append(f'{p}_stage_last_seconds{{stage="{escape(name)}"}} {hist.last:.6f}')
+
+            lines.append(f"# TYPE {p}_exchange_requests_total counter")
+            lines.append(f"# TYPE {p}_exchange_request_weight_total counter")
+            lines.append(f"# TYPE {p}_exchange_errors_total counter")
+            lines.append(f"# TYPE {p}_exchange_request_seconds_total counter")
+            for endpoint, stats in sorted(self.exchange_calls.items()):
+                label = f'endpoint="{escape(endpoint)}"'
+                lines.append(f'{p}_exchange_requests_total{{{label}}} {stats["calls"]}')
+                lines.append(f'{p}_exchange_request_weight_total{{{label}}} {stats["weight"]}')
+                lines.append(f'{p}_exchange_errors_total{{{label}}} {stats["errors"]}')
+                lines.append(f'{p}_exchange_request_seconds_total{{{label}}} {stats["seconds"]:.6f}')
+
+            lines.append(f"# TYPE {p}_cache_requests_total counter")
+            lines.append(f"# TYPE {p}_cache_hit_ratio gauge")
+            for cache, stats in sorted(self.cache_stats.items()):
+                label = f'cache="{escape(cache)}"'
+                total = stats['hits'] + stats['misses']
+                lines.append(f'{p}_cache_requests_total{{{label},result="hit"}} {stats["hits"]}')
+                lines.append(f'{p}_cache_requests_total{{{label},result="miss"}} {stats["misses"]}')
+                lines.append(f'{p}_cache_hit_ratio{{{label}}} {stats["hits"] / total if total else 0.0:.4f}')
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {p}_{name} counter")
+                lines.append(f"{p}_{name} {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {p}_{name} gauge")
+                lines.append(f"{p}_{name} {value}")
+
+            lines.append(f"# TYPE {p}_loop_iterations_total counter")
+            lines.append(f"{p}_loop_iterations_total {self.loops}")
+            lines.append(f"# TYPE {p}_uptime_seconds gauge")
+            lines.append(f"{p}_uptime_seconds {time.time() - self.started_at:.1f}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_summary(self, path: Optional[str] = None):
+        """Atomically rewrite the rolling on-disk summary"""
+        path = path or self.config.get('summary_file', 'metrics_summary.json')
+        self.last_summary_write = time.perf_counter()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Metrics summary write failed: {e}")
+
+    def start_http_server(self, host: Optional[str] = None, port: Optional[int] = None):
+        """Serve /metrics (Prometheus) and /metrics.json on a daemon thread"""
+        if self.server is not None:
+            return self.server
+
+        host = host or self.config['host']
+        port = int(port if port is not None else self.config['port'])
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body = json.dumps(metrics.snapshot(), indent=2).encode()
+                    content_type = 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body = metrics.render_prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4'
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the bot console
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever, name='bot-metrics-http', daemon=True)
+        thread.start()
+        print(f"📈 Metrics endpoint: http://{host}:{self.server.server_address[1]}/metrics")
+        return self.server
+
+    def stop_http_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# Global metrics instance
+_bot_metrics = None
+
+
+def timed_stage(name: str):
+    """Decorator that records every call of the function as a loop stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_bot_metrics().stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_bot_metrics(config: Optional[Dict] = None) -> BotMetrics:
+    """Get the global metrics registry (config only applies on first call)"""
+    global _bot_metrics
+    if _bot_metrics is None:
+        _bot_metrics = BotMetrics(config)
+    return _bot_metrics
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+🕯️ CANDLE FRAMES
+================
+
+Lightweight OHLCV container backed by one contiguous int64 timestamp array
+and one (5, capacity) float64 block (open, high, low, close, volume).
+
+- Column access and slicing return views into the same buffers (no copies)
+- append()/upsert() write in place into preallocated capacity; a frame with
+  maxlen keeps a rolling window by shifting once every maxlen appends
+- to_dataframe() builds the pandas equivalent of fetch_ohlcv() lazily, only
+  for code that still needs pandas, and caches it until the next write
+
+CandleFrameCache keeps one frame per (symbol, timeframe) and refreshes it
+with only the candles missing since the last call, so scanners stop
+rebuilding a DataFrame (plus pd.to_datetime) per pair per timeframe per scan.
+
+Views are snapshots of the owner's buffers: they stay valid until the owner
+is written to again.
+
+Benchmark (synthetic exchange, allocation count and scan time):
+    python candle_frame.py --benchmark
+"""
+
+import sys
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_warehouse import TIMEFRAME_MS
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+_ROW = {name: i for i, name in enumerate(PRICE_COLUMNS)}
+
+
+class CandleFrame:
+    """
+    🕯️ Array-backed candles; the last row is the forming candle when fetched live
+    """
+
+    __slots__ = ('_ts', '_data', '_start', '_stop', '_maxlen', '_owner', '_df')
+
+    def __init__(self, capacity: int = 128, maxlen: Optional[int] = None):
+        capacity = max(capacity, 2 * maxlen if maxlen else 0, 1)
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._data = np.empty((len(PRICE_COLUMNS), capacity), dtype=np.float64)
+        self._start = 0
+        self._stop = 0
+        self._maxlen = maxlen
+        self._owner = True
+        self._df: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_rows(cls, rows, maxlen: Optional[int] = None) -> 'CandleFrame':
+        """Build from ccxt rows [[ts, o, h, l, c, v], ...]"""
+        block = np.asarray(rows, dtype=np.float64).reshape(-1, 1 + len(PRICE_COLUMNS))
+        frame = cls(capacity=len(block), maxlen=maxlen)
+        frame._write(block)
+        return frame
+
+    # ---------------------------------------------------------------- access
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key == 'timestamp':
+                return self._ts[self._start:self._stop]
+            return self._data[_ROW[key], self._start:self._stop]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("CandleFrame slices must be contiguous")
+            view = CandleFrame.__new__(CandleFrame)
+            view._ts, view._data = self._ts, self._data
+            view._start, view._stop = self._start + start, self._start + max(start, stop)
+            view._maxlen, view._owner, view._df = None, False, None
+            return view
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return key == 'timestamp' or key in _ROW
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return ('timestamp',) + PRICE_COLUMNS
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._ts[self._stop - 1]) if len(self) else None
+
+    @property
+    def nbytes(self) -> int:
+        return self._ts.nbytes + self._data.nbytes
+
+    def tail(self, n: int) -> 'CandleFrame':
+        return self[max(0, len(self) - n):]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Same columns and dtypes strategies.ma_crossover.fetch_ohlcv returns"""
+        if self._df is None:
+            df = pd.DataFrame({name: self[name].copy() for name in PRICE_COLUMNS})
+            df.insert(0, 'timestamp', pd.to_datetime(self['timestamp'], unit='ms'))
+            self._df = df
+        return self._df
+
+    # --------------------------------------------------------------- writing
+
+    def _reserve(self, extra: int):
+        """Make room for `extra` rows after _stop, shifting or growing the buffers"""
+        if self._stop + extra <= len(self._ts):
+            return
+        keep = len(self)
+        if self._maxlen:
+            keep = min(keep, max(self._maxlen - extra, 0))
+        needed = keep + extra
+        if needed > len(self._ts):
+            ts = np.empty(max(needed, 2 * len(self._ts)), dtype=np.int64)
+            data = np.empty((len(PRICE_COLUMNS), len(ts)), dtype=np.float64)
+        else:
+            ts, data = self._ts, self._data
+        ts[:keep] = self._ts[self._stop - keep:self._stop]
+        data[:, :keep] = self._data[:, self._stop - keep:self._stop]
+        self._ts, self._data = ts, data
+        self._start, self._stop = 0, keep
+
+    def _write(self, block: np.ndarray):
+        self._reserve(len(block))
+        end = self._stop + len(block)
+        self._ts[self._stop:end] = block[:, 0]
+        self._data[:, self._stop:end] = block[:, 1:].T
+        self._stop = end
+        if self._maxlen and len(self) > self._maxlen:
+            self._start = self._stop - self._maxlen
+
+    def _writable(self):
+        if not self._owner:
+            raise ValueError("CandleFrame views are read-only")
+        self._df = None
+
+    def append(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float):
+        """Append one candle in place"""
+        self._writable()
+        self._write(np.array([[timestamp, open_, high, low, close, volume]], dtype=np.float64))
+
+    def upsert(self, rows) -> int:
+        """
+        Merge ccxt rows: a row with the last stored timestamp replaces it (the
+        forming candle moved on), newer rows are appended, older ones ignored.
+        Returns how many new candles were appended.
+        """
+        self._writable()
+        block = np.asarray(rows, dtype=np.float64).reshape(-1, 1 + len(PRICE_COLUMNS))
+        last = self.last_timestamp
+        if last is not None and len(block):
+            same = block[:, 0] == last
+            if same.any():
+                self._ts[self._stop - 1] = last
+                self._data[:, self._stop - 1] = block[same][-1, 1:]
+            block = block[block[:, 0] > last]
+        if len(block):
+            self._write(block)
+        return len(block)
+
+    def clear(self):
+        self._writable()
+        self._start = self._stop = 0
+
+
+def fetch_candles(exchange, symbol: str = 'BTC/USDT', timeframe: str = '1m', limit: int = 100) -> CandleFrame:
+    """fetch_ohlcv() without the DataFrame: one array block per call"""
+    return CandleFrame.from_rows(exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit))
+
+
+class CandleFrameCache:
+    """
+    📦 One rolling CandleFrame per (symbol, timeframe), refreshed incrementally
+    """
+
+    def __init__(self, maxlen: int = 100):
+        self.maxlen = maxlen
+        self.frames: Dict[Tuple[str, str], CandleFrame] = {}
+        self.fetched_rows = 0
+
+    def get(self, exchange, symbol: str, timeframe: str, now: Optional[float] = None) -> CandleFrame:
+        """Latest `maxlen` candles, fetching only those missing since the last call"""
+        key = (symbol, timeframe)
+        frame = self.frames.get(key)
+        step = TIMEFRAME_MS[timeframe]
+        limit = self.maxlen
+        if frame is not None and len(frame):
+            now_ms = (time.time() if now is None else now) * 1000
+            # Missing candles plus the stored forming one, which may have changed
+            limit = int(min(self.maxlen, max(2, (now_ms - frame.last_timestamp) // step + 2)))
+
+        rows = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+        self.fetched_rows += len(rows)
+        if frame is None:
+            frame = self.frames[key] = CandleFrame(maxlen=self.maxlen)
+        elif rows and len(frame) and rows[0][0] > frame.last_timestamp + step:
+            frame.clear()   # Gap wider than the window: start over
+        frame.upsert(rows)
+        return frame
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+class _BenchmarkExchange:
+    """Deterministic candles for any symbol/timeframe ending at `now`"""
+
+    def __init__(self, now_ms: int):
+        self.now_ms = now_ms
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=100):
+        step = TIMEFRAME_MS[timeframe]
+        last = self.now_ms - self.now_ms % step
+        ts = last - step * np.arange(limit - 1, -1, -1)
+        close = 100 + np.sin(ts / step / 7.0 + hash(symbol) % 97)
+        return np.column_stack([ts, close, close + 0.5, close - 0.5, close, np.full(limit, 1000.0)]).tolist()
+
+
+def _scan_dataframes(exchange, symbols: Iterable[str], timeframes: Iterable[str]) -> float:
+    """Previous scan path: fetch_ohlcv DataFrames plus pandas indicators"""
+    from strategies.ma_crossover import fetch_ohlcv
+    total = 0.0
+    for symbol in symbols:
+        for timeframe in timeframes:
+            df = fetch_ohlcv(exchange, symbol, timeframe, 100)
+            df['ma_7'] = df['close'].rolling(7).mean()
+            df['ma_25'] = df['close'].rolling(25).mean()
+            total += df['close'].pct_change().tail(24).std() + df['ma_7'].iloc[-1] - df['ma_25'].iloc[-1]
+    return total
+
+
+def _scan_frames(exchange, symbols: Iterable[str], timeframes: Iterable[str],
+                 cache: Optional[CandleFrameCache] = None) -> float:
+    """Same indicators on CandleFrames; full fetches, or incremental ones through `cache`"""
+    total = 0.0
+    for symbol in symbols:
+        for timeframe in timeframes:
+            if cache is None:
+                close = fetch_candles(exchange, symbol, timeframe, 100)['close']
+            else:
+                close = cache.get(exchange, symbol, timeframe, now=exchange.now_ms / 1000)['close']
+            returns = np.diff(close[-25:]) / close[-25:-1]
+            total += returns.std(ddof=1) + close[-7:].mean() - close[-25:].mean()
+    return total
+
+
+def benchmark(pairs: int = 20, scans: int = 30, timeframes=('30m', '2h', '12h')) -> Dict[str, Dict[str, float]]:
+    """Time and allocations per scan: fetch_ohlcv DataFrames vs CandleFrames (full and cached)"""
+    import gc
+    import tracemalloc
+
+    symbols = [f"PAIR{i}/USDT" for i in range(pairs)]
+    results = {}
+    for name in ('dataframe', 'candle_frame', 'candle_frame_cached'):
+        exchange = _BenchmarkExchange(1_750_000_000_000)
+        cache = CandleFrameCache(maxlen=100) if name == 'candle_frame_cached' else None
+
+        def scan():
+            exchange.now_ms += 60_000
+            if name == 'dataframe':
+                _scan_dataframes(exchange, symbols, timeframes)
+            else:
+                _scan_frames(exchange, symbols, timeframes, cache)
+
+        scan()   # Startup fetch fills the cache
+        started = time.perf_counter()
+        for _ in range(scans):
+            scan()
+        elapsed = time.perf_counter() - started
+
+        # Allocation pass: gen-0 count rises with every container object created while gc is off
+        objects, peaks = 0, []
+        gc.collect()
+        gc.disable()
+        tracemalloc.start()
+        for _ in range(5):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            count = gc.get_count()[0]
+            scan()
+            objects += max(0, gc.get_count()[0] - count)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+            gc.collect()
+        tracemalloc.stop()
+        gc.enable()
+        results[name] = {
+            'ms_per_scan': elapsed / scans * 1000,
+            'gc_objects_per_scan': objects / 5,
+            'peak_kb_per_scan': float(np.mean(peaks)) / 1024
+        }
+    return results
+
+
+if __name__ == "__main__":
+    if '--benchmark' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    print("🕯️ CANDLE FRAME BENCHMARK (20 pairs x 3 timeframes, 100 candles)")
+    for name, stats in benchmark().items():
+        print(f"   {name:>20}: {stats['ms_per_scan']:.2f} ms/scan, "
+              f"{stats['gc_objects_per_scan']:.0f} objects/scan, {stats['peak_kb_per_scan']:.0f} KB transient peak")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+⏰ CLOCK SYNC SERVICE
+Keeps exchange.options['timeDifference'] in step with the exchange clock.
+Server time is sampled periodically over the existing connection; each round
+keeps the lowest round-trip sample (NTP-style filtering), and a least-squares
+fit over recent rounds tracks local clock drift so the offset stays correct
+between rounds. Signed requests never see a -1021 timestamp error.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from log_utils import log_message
+
+DEFAULT_CLOCK_SYNC_CONFIG = {
+    'enabled': True,
+    'interval_seconds': 60,          # Seconds between sampling rounds
+    'samples_per_round': 5,          # fetch_time calls per round; the lowest-RTT one is kept
+    'max_rtt_ms': 2000,              # Samples slower than this carry too much uncertainty
+    'history_size': 30,              # Rounds kept for the drift estimate
+    'min_drift_span_seconds': 300,   # Don't extrapolate drift from a short window
+    'safety_margin_ms': 250,         # Keep request timestamps slightly behind the server
+    'apply_seconds': 5,              # Re-apply the drift-corrected offset between rounds
+    'stale_after_seconds': 600,      # Estimate considered unhealthy after this long without a round
+}
+
+
+class ClockSample:
+    """One server-time probe: offset = local midpoint - server time"""
+
+    __slots__ = ('local_ms', 'server_ms', 'offset_ms', 'rtt_ms')
+
+    def __init__(self, local_ms: float, server_ms: float, offset_ms: float, rtt_ms: float):
+        self.local_ms = local_ms
+        self.server_ms = server_ms
+        self.offset_ms = offset_ms
+        self.rtt_ms = rtt_ms
+
+
+class ClockSyncService:
+    def __init__(self, exchange=None, config: Optional[Dict] = None, clock: Optional[Callable[[], float]] = None):
+        self.exchange = exchange
+        self.config = dict(DEFAULT_CLOCK_SYNC_CONFIG)
+        self.config.update(config or {})
+        self.clock = clock or (lambda: time.time())
+        self.history = deque(maxlen=int(self.config['history_size']))
+        self.offset_ms: Optional[float] = None      # Filtered offset at the last round
+        self.rtt_ms: Optional[float] = None
+        self.drift_ppm = 0.0                        # Local clock gain vs. server, µs per second
+        self.last_round: Optional[float] = None
+        self.rounds = 0
+        self.failures = 0
+        self.applied_ms: Optional[int] = None
+        self.lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------- sampling
+
+    def sample(self) -> Optional[ClockSample]:
+        """Probe server time once; the local midpoint of the round trip is matched to it"""
+        t0 = self.clock() * 1000.0
+        server_ms = self.exchange.fetch_time()
+        t1 = self.clock() * 1000.0
+        if server_ms is None:
+            return None
+        rtt = t1 - t0
+        local_mid = (t0 + t1) / 2.0
+        return ClockSample(local_mid, float(server_ms), local_mid - float(server_ms), rtt)
+
+    def sync_now(self) -> bool:
+        """Run one sampling round, refresh the estimate and apply it"""
+        samples: List[ClockSample] = []
+        for _ in range(int(self.config['samples_per_round'])):
+            try:
+                probe = self.sample()
+            except Exception as e:
+                log_message(f"⚠️ Clock sync probe failed: {e}")
+                continue
+            if probe is not None and probe.rtt_ms <= self.config['max_rtt_ms']:
+                samples.append(probe)
+
+        if not samples:
+            self.failures += 1
+            return False
+
+        best = min(samples, key=lambda s: s.rtt_ms)
+        with self.lock:
+            self.history.append(best)
+            self.offset_ms = best.offset_ms
+            self.rtt_ms = best.rtt_ms
+            self.drift_ppm = self._estimate_drift()
+            self.last_round = self.clock()
+            self.rounds += 1
+        self.apply()
+        return True
+
+    def _estimate_drift(self) -> float:
+        """Least-squares slope of offset over local time, in ppm (ms of offset per 1000 s)"""
+        points: List[Tuple[float, float]] = [(s.local_ms, s.offset_ms) for s in self.history]
+        if len(points) < 3:
+            return 0.0
+        span = points[-1][0] - points[0][0]
+        if span < self.config['min_drift_span_seconds'] * 1000.0:
+            return 0.0
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_o = sum(o for _, o in points) / len(points)
+        var = sum((t - mean_t) ** 2 for t, _ in points)
+        if var <= 0:
+            return 0.0
+        slope = sum((t - mean_t) * (o - mean_o) for t, o in points) / var
+        return slope * 1e6
+
+    # ------------------------------------------------------------- estimate
+
+    def estimated_offset(self, now: Optional[float] = None) -> Optional[float]:
+        """Offset (local - server, ms) at `now`, extrapolated along the drift"""
+        with self.lock:
+            if self.offset_ms is None:
+                return None
+            last = self.history[-1]
+            now_ms = (self.clock() if now is None else now) * 1000.0
+            return self.offset_ms + self.drift_ppm * 1e-6 * (now_ms - last.local_ms)
+
+    def time_difference(self, now: Optional[float] = None) -> Optional[int]:
+        """Value for exchange.options['timeDifference']: nonce = local ms - timeDifference"""
+        offset = self.estimated_offset(now)
+        if offset is None:
+            return None
+        # Half the best round trip bounds the estimate's error; the margin keeps us behind the server
+        uncertainty = (self.rtt_ms or 0.0) / 2.0
+        return int(round(offset + uncertainty + self.config['safety_margin_ms']))
+
+    def apply(self) -> Optional[int]:
+        difference = self.time_difference()
+        if difference is None or self.exchange is None:
+            return None
+        self.exchange.options['timeDifference'] = difference
+        if self.applied_ms is None or abs(difference - self.applied_ms) >= 100:
+            log_message(f"⏰ Clock sync: offset {self.offset_ms:+.0f}ms (rtt {self.rtt_ms:.0f}ms, "
+                        f"drift {self.drift_ppm:+.1f}ppm) → timeDifference {difference}ms")
+        self.applied_ms = difference
+        return difference
+
+    @property
+    def healthy(self) -> bool:
+        return self.last_round is not None and self.clock() - self.last_round <= self.config['stale_after_seconds']
+
+    def status(self) -> Dict:
+        return {'offset_ms': self.offset_ms, 'rtt_ms': self.rtt_ms, 'drift_ppm': self.drift_ppm,
+                'time_difference_ms': self.applied_ms, 'rounds': self.rounds, 'failures': self.failures,
+                'healthy': self.healthy}
+
+    # ------------------------------------------------------------- background
+
+    def _run(self):
+        next_round = time.monotonic() + self.config['interval_seconds']
+        while not self._stop.wait(self.config['apply_seconds']):
+            if time.monotonic() >= next_round:
+                try:
+                    self.sync_now()
+                except Exception as e:
+                    self.failures += 1
+                    log_message(f"⚠️ Clock sync round failed: {e}")
+                next_round = time.monotonic() + self.config['interval_seconds']
+            else:
+                self.apply()
+
+    def start(self) -> bool:
+        """Take ownership of timeDifference and keep it current in a daemon thread"""
+        if not self.config['enabled'] or self.exchange is None:
+            return False
+        if self._thread and self._thread.is_alive():
+            return True
+        # ccxt's one-shot adjustment would overwrite the filtered estimate on every load_markets
+        self.exchange.options['adjustForTimeDifference'] = False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='clock-sync', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+
+_clock_sync: Optional[ClockSyncService] = None
+
+
+def get_clock_sync(exchange=None, config: Optional[Dict] = None, **kwargs) -> ClockSyncService:
+    """Get the process-wide clock sync service"""
+    global _clock_sync
+    if _clock_sync is None:
+        _clock_sync = ClockSyncService(exchange, config, **kwargs)
+    return _clock_sync
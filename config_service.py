@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+🗂️ CONFIG SERVICE
+Parses each JSON config file once and keeps an immutable, validated snapshot
+in memory. A watcher thread (inotify on Linux, mtime polling elsewhere)
+reloads files when they change on disk and publishes typed change events to
+subscribers, so the trading loop reads configuration with zero file I/O.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from log_utils import log_message
+
+DEFAULT_CONFIG_SERVICE_CONFIG = {
+    'use_inotify': True,
+    'poll_seconds': 1.0,            # Stat interval when inotify is unavailable
+    'rescan_seconds': 30.0,         # Safety stat pass even with inotify (network filesystems, missed events)
+    'debounce_seconds': 0.2,        # Let an editor finish writing before parsing
+}
+
+# inotify(7) event masks
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+def freeze(value: Any) -> Any:
+    """Read-only deep copy of parsed JSON: dicts become mapping proxies, lists become tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Mutable deep copy of a frozen snapshot (dicts and lists again)"""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+def deep_merge(default: Mapping, loaded: Mapping) -> Dict:
+    """Loaded values over defaults, recursing into sections present in both"""
+    result = dict(default)
+    for key, value in loaded.items():
+        if key in result and isinstance(result[key], Mapping) and isinstance(value, Mapping):
+            result[key] = deep_merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def diff_keys(old: Any, new: Any, prefix: str = '') -> List[str]:
+    """Dotted paths of every leaf that differs between two parsed configs"""
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        changed = []
+        for key in sorted(set(old) | set(new), key=str):
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if key not in old or key not in new:
+                changed.append(path)
+            else:
+                changed.extend(diff_keys(old[key], new[key], path))
+        return changed
+    return [] if old == new else [prefix or '*']
+
+
+class ConfigSnapshot:
+    """One parsed, validated version of a config file; never mutated after publication"""
+
+    __slots__ = ('path', 'version', 'data', 'loaded_at', 'errors')
+
+    def __init__(self, path: str, version: int, data: Mapping, loaded_at: float, errors: Tuple[str, ...] = ()):
+        self.path = path
+        self.version = version
+        self.data = data
+        self.loaded_at = loaded_at
+        self.errors = errors
+
+    def get(self, section: str, key: Optional[str] = None, default: Any = None) -> Any:
+        if key is None:
+            return self.data.get(section, default)
+        return self.data.get(section, MappingProxyType({})).get(key, default)
+
+    def thaw(self) -> Dict:
+        return thaw(self.data)
+
+
+class ConfigChange:
+    """Published when a watched file changes: kind is created, modified, deleted or invalid"""
+
+    __slots__ = ('path', 'kind', 'snapshot', 'previous', 'changed', 'errors')
+
+    def __init__(self, path: str, kind: str, snapshot: Optional[ConfigSnapshot],
+                 previous: Optional[ConfigSnapshot], changed: Tuple[str, ...] = (), errors: Tuple[str, ...] = ()):
+        self.path = path
+        self.kind = kind
+        self.snapshot = snapshot            # Current snapshot (unchanged for deleted/invalid)
+        self.previous = previous
+        self.changed = changed              # Dotted keys, e.g. ('trading.symbol',)
+        self.errors = errors
+
+    def touches(self, prefixes: Sequence[str]) -> bool:
+        """True when any changed key is, or sits under, one of `prefixes`"""
+        if self.kind != 'modified':
+            return True
+        return any(key == p or key.startswith(p + '.') for key in self.changed for p in prefixes)
+
+
+class _WatchedFile:
+    __slots__ = ('path', 'defaults', 'validator', 'signature', 'snapshot')
+
+    def __init__(self, path: str, defaults: Optional[Mapping], validator: Optional[Callable[[Mapping], List[str]]]):
+        self.path = path
+        self.defaults = defaults
+        self.validator = validator
+        self.signature: Optional[Tuple[int, int]] = None
+        self.snapshot: Optional[ConfigSnapshot] = None
+
+
+class _Inotify:
+    """Minimal inotify(7) binding through libc; raises OSError where unsupported"""
+
+    _HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify not supported")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+
+    def add_watch(self, directory: str):
+        if directory in self.watches.values():
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def read(self, timeout: float) -> List[str]:
+        """Paths touched within `timeout` seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        paths, offset = [], 0
+        while offset + self._HEADER.size <= len(buffer):
+            wd, _mask, _cookie, length = self._HEADER.unpack_from(buffer, offset)
+            offset += self._HEADER.size
+            name = buffer[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+            offset += length
+            if wd in self.watches and name:
+                paths.append(os.path.join(self.watches[wd], name))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ConfigService:
+    def __init__(self, config: Optional[Dict] = None, clock: Optional[Callable[[], float]] = None):
+        self.config = dict(DEFAULT_CONFIG_SERVICE_CONFIG)
+        self.config.update(config or {})
+        self.clock = clock or (lambda: time.time())
+        self.files: Dict[str, _WatchedFile] = {}
+        self.subscribers: Dict[int, Tuple[Callable[[ConfigChange], None], Optional[str], Optional[Tuple[str, ...]]]] = {}
+        self.events: Dict[str, int] = {}
+        self.mode = 'idle'
+        self.lock = threading.RLock()
+        self._next_token = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+
+    def configure(self, config: Optional[Dict]):
+        """Apply settings from the loaded bot config; takes effect on the next start()"""
+        self.config.update(config or {})
+
+    # ------------------------------------------------------------- reading
+
+    def register(self, path: str, defaults: Optional[Mapping] = None,
+                 validator: Optional[Callable[[Mapping], List[str]]] = None) -> Optional[ConfigSnapshot]:
+        """
+        Parse `path` once and keep watching it; later calls return the in-memory snapshot.
+        Returns None while the file does not exist. Raises ValueError when the first parse fails.
+        """
+        path = os.path.abspath(path)
+        with self.lock:
+            watched = self.files.get(path)
+            if watched is not None:
+                if watched.defaults is None and defaults is not None:
+                    watched.defaults = defaults
+                if watched.validator is None and validator is not None:
+                    watched.validator = validator
+                if watched.snapshot is not None:
+                    return watched.snapshot
+            else:
+                watched = self.files[path] = _WatchedFile(path, defaults, validator)
+                if self._inotify is not None:
+                    self._watch_directory(path)
+            signature, data, errors = self._read(watched)
+            if signature is None:
+                return None
+            if data is None:
+                raise ValueError(f"{path}: {errors[0]}")
+            watched.signature = signature
+            watched.snapshot = ConfigSnapshot(path, 1, freeze(data), self.clock(), errors)
+        if errors:
+            log_message(f"⚠️ Config {os.path.basename(path)} loaded with validation errors: {'; '.join(errors)}")
+        return watched.snapshot
+
+    def snapshot(self, path: str) -> Optional[ConfigSnapshot]:
+        with self.lock:
+            watched = self.files.get(os.path.abspath(path))
+            if watched is not None and watched.snapshot is not None:
+                return watched.snapshot
+        try:
+            return self.register(path)
+        except ValueError as e:
+            log_message(f"⚠️ Config parse failed: {e}")
+            return None
+
+    def get(self, path: str, section: str, key: Optional[str] = None, default: Any = None) -> Any:
+        snapshot = self.snapshot(path)
+        return default if snapshot is None else snapshot.get(section, key, default)
+
+    def _read(self, watched: _WatchedFile) -> Tuple[Optional[Tuple[int, int]], Optional[Dict], Tuple[str, ...]]:
+        """(signature, merged data, validation errors); signature None when the file is missing"""
+        try:
+            stat = os.stat(watched.path)
+        except FileNotFoundError:
+            return None, None, ()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        try:
+            with open(watched.path, 'r') as f:
+                loaded = json.load(f)
+        except FileNotFoundError:
+            return None, None, ()
+        except (OSError, ValueError) as e:
+            return signature, None, (f"parse error: {e}",)
+        if not isinstance(loaded, dict):
+            return signature, None, ("top level is not a JSON object",)
+        data = deep_merge(watched.defaults, loaded) if watched.defaults else loaded
+        errors: Tuple[str, ...] = ()
+        if watched.validator is not None:
+            try:
+                errors = tuple(watched.validator(data) or ())
+            except Exception as e:
+                errors = (f"validator failed: {e}",)
+        return signature, data, errors
+
+    # ------------------------------------------------------------- change events
+
+    def subscribe(self, callback: Callable[[ConfigChange], None], path: Optional[str] = None,
+                  keys: Optional[Sequence[str]] = None) -> int:
+        """Call `callback(change)` for changes to `path` (all files when None) touching `keys`"""
+        with self.lock:
+            self._next_token += 1
+            self.subscribers[self._next_token] = (callback, os.path.abspath(path) if path else None,
+                                                  tuple(keys) if keys else None)
+            return self._next_token
+
+    def unsubscribe(self, token: int):
+        with self.lock:
+            self.subscribers.pop(token, None)
+
+    def check(self, path: Optional[str] = None) -> List[ConfigChange]:
+        """Stat watched files (or just `path`), reload the ones that changed and publish events"""
+        with self.lock:
+            targets = [self.files[os.path.abspath(path)]] if path and os.path.abspath(path) in self.files \
+                else ([] if path else list(self.files.values()))
+        changes = []
+        for watched in targets:
+            with self.lock:
+                change = self._refresh(watched)
+            if change is not None:
+                changes.append(change)
+                self._publish(change)
+        return changes
+
+    def _refresh(self, watched: _WatchedFile) -> Optional[ConfigChange]:
+        try:
+            stat = os.stat(watched.path)
+            signature: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == watched.signature:
+            return None                                     # Untouched: no parse
+
+        previous = watched.snapshot
+        if signature is None:
+            watched.signature = None
+            return ConfigChange(watched.path, 'deleted', previous, previous)
+
+        signature, data, errors = self._read(watched)
+        if signature is None:
+            return None                                     # Vanished between stat and open
+        introduced = tuple(e for e in errors if previous is None or e not in previous.errors)
+        if data is None or (introduced and previous is not None):
+            # Keep serving the last good snapshot; retry only after the file changes again.
+            # Problems the running snapshot already had don't block unrelated edits.
+            errors = introduced or errors
+            watched.signature = signature
+            log_message(f"⚠️ Config {os.path.basename(watched.path)} rejected: {'; '.join(errors)}")
+            return ConfigChange(watched.path, 'invalid', previous, previous, errors=errors)
+
+        watched.signature = signature
+        changed = tuple(diff_keys(thaw(previous.data), data)) if previous is not None else ()
+        if previous is not None and not changed:
+            return None                                     # Re-saved with identical content
+        watched.snapshot = ConfigSnapshot(watched.path, (previous.version + 1) if previous else 1,
+                                          freeze(data), self.clock(), errors)
+        return ConfigChange(watched.path, 'modified' if previous else 'created', watched.snapshot, previous,
+                            changed, errors)
+
+    def _publish(self, change: ConfigChange):
+        self.events[change.kind] = self.events.get(change.kind, 0) + 1
+        with self.lock:
+            subscribers = list(self.subscribers.values())
+        for callback, path, keys in subscribers:
+            if path is not None and path != change.path:
+                continue
+            if keys is not None and not change.touches(keys):
+                continue
+            try:
+                callback(change)
+            except Exception as e:
+                log_message(f"⚠️ Config subscriber failed for {os.path.basename(change.path)}: {e}")
+
+    # ------------------------------------------------------------- watching
+
+    @property
+    def watching(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _watch_directory(self, path: str):
+        try:
+            self._inotify.add_watch(os.path.dirname(path) or '.')
+        except OSError as e:
+            log_message(f"⚠️ inotify watch failed ({e}); falling back to polling")
+            self._inotify.close()
+            self._inotify = None
+            self.mode = 'polling'
+
+    def _run(self):
+        next_rescan = time.monotonic() + self.config['rescan_seconds']
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                touched = set(self._inotify.read(self.config['poll_seconds']))
+                with self.lock:
+                    hits = [p for p in touched if p in self.files]
+                if hits:
+                    self._stop.wait(self.config['debounce_seconds'])
+                    for path in hits:
+                        self.check(path)
+                if time.monotonic() < next_rescan:
+                    continue
+            elif self._stop.wait(self.config['poll_seconds']):
+                break
+            next_rescan = time.monotonic() + self.config['rescan_seconds']
+            try:
+                self.check()
+            except Exception as e:
+                log_message(f"⚠️ Config check failed: {e}")
+
+    def start(self) -> bool:
+        """Watch registered files in a daemon thread"""
+        if self.watching:
+            return True
+        self.mode = 'polling'
+        if self.config['use_inotify']:
+            try:
+                self._inotify = _Inotify()
+                self.mode = 'inotify'
+                with self.lock:
+                    for path in list(self.files):
+                        if self._inotify is not None:
+                            self._watch_directory(path)
+            except (OSError, AttributeError) as e:
+                log_message(f"⚠️ inotify unavailable ({e}); polling config files every "
+                            f"{self.config['poll_seconds']}s")
+                self._inotify = None
+                self.mode = 'polling'
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='config-service', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self.mode = 'idle'
+
+
+_config_service: Optional[ConfigService] = None
+
+
+def get_config_service(config: Optional[Dict] = None, **kwargs) -> ConfigService:
+    """Get the process-wide config service"""
+    global _config_service
+    if _config_service is None:
+        _config_service = ConfigService(config, **kwargs)
+    return _config_service
@@ -0,0 +1,206 @@
+# =============================================================================
+# STREAMING CORRELATION ENGINE - Exponentially weighted cross-pair covariance
+# =============================================================================
+#
+# Keeps one N x N exponentially weighted covariance matrix over every watched
+# pair. Scanners already fetch candles for these pairs; they hand the frames to
+# ingest_closes() and the engine folds in only bars it has not seen yet, one
+# O(N^2) update per bar instead of recomputing correlations from scratch.
+#
+# Readers (CrossAssetCorrelationAnalyzer, MultiPositionPortfolioManager) get
+# correlations, correlation clusters and diversification ratios from memory,
+# with no exchange calls.
+#
+# =============================================================================
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CORRELATION_CONFIG = {
+    'timeframe': '30m',         # Bar size fed by MultiCryptoMonitor
+    'halflife_bars': 48,        # One day of 30m bars
+    'min_periods': 20,          # Shared bars before a pair's correlation is reported
+    'cluster_threshold': 0.75,
+    'max_symbols': 200
+}
+
+
+class StreamingCorrelationEngine:
+    """
+    📈 Incremental EW correlation / covariance over all watched pairs
+
+    Update rule per bar, for the pairs that printed that bar:
+        d = r - mean
+        mean += alpha * d
+        cov  = (1 - alpha) * (cov + alpha * d d^T)
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_CORRELATION_CONFIG)
+        self.config.update(config or {})
+        self.alpha = 1 - 0.5 ** (1.0 / float(self.config['halflife_bars']))
+        capacity = int(self.config['max_symbols'])
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.mean = np.zeros(capacity)
+        self.cov = np.zeros((capacity, capacity))
+        self.counts = np.zeros((capacity, capacity), dtype=np.int64)   # Shared bars per pair
+        self.last_close: Dict[str, Tuple[int, float]] = {}             # symbol -> (bar ts, close)
+        self.pending: Dict[int, Dict[str, float]] = {}                 # bar ts -> {symbol: return}
+        self.last_flushed_bar: Optional[int] = None
+        self.lock = threading.Lock()
+
+    # ------------------------------------------------------------ ingestion
+
+    def _slot(self, symbol: str) -> Optional[int]:
+        slot = self.index.get(symbol)
+        if slot is None and len(self.symbols) < len(self.mean):
+            slot = self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return slot
+
+    def ingest_closes(self, symbol: str, df, closed_only: bool = True) -> int:
+        """
+        Queue returns for bars of `df` newer than the last bar seen for `symbol`.
+        The last row is treated as the still-forming candle unless closed_only=False.
+        """
+        if df is None or len(df) < 2:
+            return 0
+        timestamps = np.asarray(df['timestamp'])   # DataFrame column or CandleFrame array
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+        closes = np.asarray(df['close'])
+        end = len(df) - 1 if closed_only else len(df)
+
+        added = 0
+        with self.lock:
+            last = self.last_close.get(symbol)
+            for ts, close in zip(timestamps[:end], closes[:end]):
+                ts, close = int(ts), float(close)
+                if last is not None and ts <= last[0]:
+                    continue
+                if last is not None and last[1] > 0 and (self.last_flushed_bar is None or ts > self.last_flushed_bar):
+                    self.pending.setdefault(ts, {})[symbol] = close / last[1] - 1
+                    added += 1
+                last = (ts, close)
+            if last is not None:
+                self.last_close[symbol] = last
+        return added
+
+    def flush(self) -> int:
+        """Fold every queued bar into the matrix in time order; returns bars applied"""
+        with self.lock:
+            bars = sorted(self.pending)
+            for ts in bars:
+                self._apply_bar(self.pending.pop(ts))
+                self.last_flushed_bar = ts
+            return len(bars)
+
+    def _apply_bar(self, returns: Dict[str, float]):
+        slots, values = [], []
+        for symbol, value in returns.items():
+            slot = self._slot(symbol)
+            if slot is not None and np.isfinite(value):
+                slots.append(slot)
+                values.append(value)
+        if not slots:
+            return
+
+        idx = np.array(slots)
+        block = np.ix_(idx, idx)
+        delta = np.array(values) - self.mean[idx]
+        self.mean[idx] += self.alpha * delta
+        self.cov[block] = (1 - self.alpha) * (self.cov[block] + self.alpha * np.outer(delta, delta))
+        self.counts[block] += 1
+
+    def update_bar(self, returns: Dict[str, float]):
+        """Apply one bar of already-computed returns directly"""
+        with self.lock:
+            self._apply_bar(returns)
+
+    # -------------------------------------------------------------- queries
+
+    def covariance_matrix(self) -> Tuple[List[str], np.ndarray]:
+        n = len(self.symbols)
+        return list(self.symbols), self.cov[:n, :n].copy()
+
+    def correlation_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Correlations; NaN where a pair has fewer than min_periods shared bars"""
+        n = len(self.symbols)
+        cov = self.cov[:n, :n]
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr[self.counts[:n, :n] < int(self.config['min_periods'])] = np.nan
+        np.fill_diagonal(corr, 1.0)
+        return list(self.symbols), np.clip(corr, -1.0, 1.0)
+
+    def correlation(self, a: str, b: str) -> Optional[float]:
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None:
+            return None
+        if i == j:
+            return 1.0
+        if self.counts[i, j] < int(self.config['min_periods']):
+            return None
+        denom = np.sqrt(self.cov[i, i] * self.cov[j, j])
+        return float(np.clip(self.cov[i, j] / denom, -1.0, 1.0)) if denom > 0 else None
+
+    def correlations_with(self, symbol: str, others: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Correlation of `symbol` with each other pair that has enough shared history"""
+        result = {}
+        for other in (others if others is not None else self.symbols):
+            if other == symbol:
+                continue
+            corr = self.correlation(symbol, other)
+            if corr is not None:
+                result[other] = corr
+        return result
+
+    def clusters(self, threshold: Optional[float] = None) -> List[List[str]]:
+        """Groups of pairs linked by correlation >= threshold (single linkage)"""
+        threshold = float(self.config['cluster_threshold']) if threshold is None else threshold
+        symbols, corr = self.correlation_matrix()
+        parent = list(range(len(symbols)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        rows, cols = np.where(np.triu(np.nan_to_num(corr, nan=-1.0) >= threshold, k=1))
+        for i, j in zip(rows, cols):
+            parent[find(i)] = find(j)
+
+        groups: Dict[int, List[str]] = {}
+        for i, symbol in enumerate(symbols):
+            groups.setdefault(find(i), []).append(symbol)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+    def diversification_ratio(self, weights: Dict[str, float]) -> Optional[float]:
+        """Weighted average volatility over portfolio volatility (1.0 = no diversification)"""
+        known = [s for s in weights if s in self.index]
+        if not known:
+            return None
+        idx = np.array([self.index[s] for s in known])
+        w = np.array([weights[s] for s in known], dtype=np.float64)
+        cov = self.cov[np.ix_(idx, idx)]
+        portfolio_var = float(w @ cov @ w)
+        if portfolio_var <= 0:
+            return None
+        return float(np.abs(w) @ np.sqrt(np.clip(np.diag(cov), 0, None))) / np.sqrt(portfolio_var)
+
+
+# Global engine instance
+_correlation_engine = None
+
+
+def get_correlation_engine(config: Optional[Dict] = None) -> StreamingCorrelationEngine:
+    """Get the process-wide correlation engine shared by scanners and risk checks"""
+    global _correlation_engine
+    if _correlation_engine is None:
+        _correlation_engine = StreamingCorrelationEngine(config)
+    return _correlation_engine
@@ -9,7 +9,7 @@ restarts it if it crashes, becomes unresponsive, or stops trading.
 Features:
 - Process monitoring (checks if bot process is running)
 - Health monitoring (checks if bot is actively trading/logging)
-- Log analysis (detects error patterns and hangs)
+- Heartbeat monitoring (reads the bot's O(1) heartbeat record to detect hangs and error bursts)
 - State preservation (backs up bot state before restart)
 - Auto-recovery (restarts bot with proper environment)
 - Alert logging (records all restart events)
@@ -17,6 +17,11 @@ Features:
 Usage:
     python3 crypto-bot-watchdog.py
 
+Profiling (no restart needed):
+    kill -USR1 <watchdog pid>                  # toggle a 60s sampling window
+    echo 120 > watchdog_profile.control        # or via control file
+    Output: logs/profiles/watchdog_*.collapsed / _top.txt / _tracemalloc.txt
+
 Run as systemd service for 24/7 monitoring.
 """
 
@@ -32,6 +37,9 @@ from pathlib import Path
 import signal
 import shutil
 
+from sampling_profiler import install_sampling_profiler
+from bot_heartbeat import read_heartbeat
+
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BOT_SCRIPT = os.path.join(SCRIPT_DIR, "bot.py")
@@ -40,12 +48,17 @@ BOT_LOG_FILE = os.path.join(SCRIPT_DIR, "bot_log.txt")
 WATCHDOG_LOG_FILE = os.path.join(SCRIPT_DIR, "watchdog.log")
 BOT_STATE_FILE = os.path.join(SCRIPT_DIR, "bot_state.json")
 ENHANCED_CONFIG_FILE = os.path.join(SCRIPT_DIR, "enhanced_config.json")
+BOT_HEARTBEAT_FILE = os.path.join(SCRIPT_DIR, "bot_heartbeat.bin")
+PROFILE_OUTPUT_DIR = os.path.join(SCRIPT_DIR, "logs", "profiles")
+PROFILE_CONTROL_FILE = os.path.join(SCRIPT_DIR, "watchdog_profile.control")
 
 # Watchdog settings
-CHECK_INTERVAL = 30  # Check every 30 seconds
+CHECK_INTERVAL = 10  # Check every 10 seconds (heartbeat reads are O(1))
 MAX_RESTART_ATTEMPTS = 5  # Max restarts per hour
 RESTART_COOLDOWN = 300  # 5 minutes between restarts
-LOG_ACTIVITY_TIMEOUT = 900  # 15 minutes without log activity = problem
+LOG_ACTIVITY_TIMEOUT = 900  # 15 minutes without log activity = problem (no heartbeat yet)
+HEARTBEAT_ERROR_RATE_THRESHOLD = 0.5  # More than half of recent loops failing = problem
+HEARTBEAT_MIN_LOOPS_FOR_ERROR_RATE = 10
 MEMORY_THRESHOLD = 500 * 1024 * 1024  # 500MB memory limit
 CPU_THRESHOLD = 90  # 90% CPU for 5+ minutes = problem
 
@@ -137,8 +150,33 @@ def check_process_health(pid):
     except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
         return False, f"Process check error: {e}"
 
+def check_heartbeat(pid):
+    """
+    Check bot liveness from the heartbeat record (O(1), independent of log size).
+
+    Returns (healthy, status), or None when the running bot has not published
+    a heartbeat yet (still importing, or an older bot.py without heartbeat).
+    """
+    heartbeat = read_heartbeat(BOT_HEARTBEAT_FILE)
+    if heartbeat is None or heartbeat['pid'] != pid:
+        return None
+
+    current_time = time.time()
+    overdue = current_time - heartbeat['deadline']
+    if overdue > 0:
+        return False, (f"Heartbeat overdue by {overdue:.0f}s in stage '{heartbeat['stage']}' "
+                       f"(last beat {current_time - heartbeat['updated_at']:.0f}s ago)")
+
+    if (heartbeat['loops'] >= HEARTBEAT_MIN_LOOPS_FOR_ERROR_RATE and
+            heartbeat['error_rate'] > HEARTBEAT_ERROR_RATE_THRESHOLD):
+        return False, f"High error rate: {heartbeat['error_rate']:.0%} of recent loops failed"
+
+    return True, (f"Heartbeat OK - loop {heartbeat['loops']}, stage '{heartbeat['stage']}', "
+                  f"last loop {heartbeat['last_loop_seconds']:.1f}s, "
+                  f"positions {heartbeat['open_positions']}")
+
 def check_log_activity():
-    """Check if bot is actively logging (trading activity)"""
+    """Fallback liveness check from the log file's mtime (no heartbeat yet)"""
     try:
         if not os.path.exists(BOT_LOG_FILE):
             return False, "Log file not found"
@@ -152,36 +190,22 @@ def check_log_activity():
         if time_since_activity > LOG_ACTIVITY_TIMEOUT:
             return False, f"No log activity for {time_since_activity/60:.1f} minutes"
         
-        # Check for recent error patterns
-        try:
-            with open(BOT_LOG_FILE, 'r') as f:
-                # Read last 50 lines
-                lines = f.readlines()[-50:]
-                recent_lines = ''.join(lines)
-                
-                # Check for critical errors
-                error_patterns = [
-                    'ConnectionError',
-                    'Exchange error',
-                    'API key invalid',
-                    'Insufficient balance',
-                    'Error in trading loop',
-                    'Exception',
-                    'Traceback'
-                ]
-                
-                error_count = sum(1 for pattern in error_patterns if pattern in recent_lines)
-                if error_count > 5:  # More than 5 errors in recent logs
-                    return False, f"High error rate: {error_count} errors in recent logs"
-        
-        except Exception as e:
-            logger.warning(f"Could not analyze log content: {e}")
-        
         return True, "Log activity normal"
         
     except Exception as e:
         return False, f"Log check error: {e}"
 
+def check_bot_activity(pid):
+    """Heartbeat when the bot publishes one, log mtime otherwise"""
+    try:
+        result = check_heartbeat(pid)
+    except Exception as e:
+        logger.warning(f"Could not read heartbeat: {e}")
+        result = None
+    if result is not None:
+        return result
+    return check_log_activity()
+
 def backup_bot_state():
     """Backup bot state before restart"""
     try:
@@ -354,8 +378,8 @@ def monitor_bot():
                     time.sleep(60)  # Wait before retry
                     continue
             
-            # Check log activity
-            log_healthy, log_status = check_log_activity()
+            # Check bot activity (heartbeat, falling back to log mtime)
+            log_healthy, log_status = check_bot_activity(current_pid)
             if not log_healthy:
                 logger.warning(f"Bot activity check failed: {log_status}")
                 if restart_bot(f"Activity check failed: {log_status}"):
@@ -396,6 +420,12 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    # On-demand sampling profiler (SIGUSR1 or control file)
+    install_sampling_profiler('watchdog', {
+        'output_dir': PROFILE_OUTPUT_DIR,
+        'control_file': PROFILE_CONTROL_FILE
+    })
+    
     # Ensure we're in the right directory
     os.chdir(SCRIPT_DIR)
     
@@ -8,27 +8,30 @@ Handles intelligent switching between USD and USDT pairs based on:
 """
 
 import ccxt
-import json
 from typing import Dict, Optional, Tuple, List
 
+from config_service import get_config_service
+
 class CurrencySwitch:
-    def __init__(self, exchange, config_path='enhanced_config.json'):
+    def __init__(self, exchange, config_path='enhanced_config.json', order_books=None):
         self.exchange = exchange
         self.config_path = config_path
+        self.order_books = order_books  # Optional OrderBookManager: local books instead of REST
         self.usd_equivalents = {}
         self.load_currency_config()
     
     def load_currency_config(self):
         """Load currency switching configuration"""
         try:
-            with open(self.config_path, 'r') as f:
-                config = json.load(f)
+            config = get_config_service().snapshot(self.config_path)  # In-memory, no file read
+            if config is None:
+                raise FileNotFoundError(self.config_path)
             
-            multi_currency = config.get('multi_currency', {})
+            multi_currency = config.get('multi_currency', default={})  # Frozen sections: read-only mappings
             self.usd_equivalents = multi_currency.get('usd_equivalents', {})
             
             # Currency switching parameters
-            switching_config = config.get('currency_switching', {})
+            switching_config = config.get('currency_switching', default={})
             self.enabled = switching_config.get('enabled', True)
             self.prefer_higher_volume = switching_config.get('prefer_higher_volume', True)
             self.prefer_tighter_spreads = switching_config.get('prefer_tighter_spreads', True)
@@ -89,7 +92,10 @@ class CurrencySwitch:
             ticker = self.exchange.fetch_ticker(pair)
             
             # Get order book for spread analysis
-            order_book = self.exchange.fetch_order_book(pair, limit=5)
+            if self.order_books is not None:
+                order_book = self.order_books.get_order_book(pair, 5)
+            else:
+                order_book = self.exchange.fetch_order_book(pair, limit=5)
             
             # Calculate metrics
             volume_24h = ticker.get('quoteVolume', 0) or 0
@@ -27,28 +27,27 @@ logger = logging.getLogger(__name__)
 class DailySyncScheduler:
     def __init__(self):
         self.script_dir = Path(__file__).parent
-        self.fetch_script = self.script_dir / 'fetch_recent_trades.py'
+        self.fetch_script = self.script_dir / 'incremental_trade_sync.py'
         self.sync_script = self.script_dir / 'sync_trade_logs.py'
         
     def run_fetch_trades(self):
-        """Execute the fetch_recent_trades.py script"""
+        """Pull new fills for every traded pair into the exchange trade ledger and trade_log.csv"""
         try:
-            logger.info("🔄 Starting daily trade log fetch...")
+            logger.info("🔄 Starting incremental trade sync...")
             
-            # Run fetch_recent_trades.py
-            result = subprocess.run([
-                sys.executable, str(self.fetch_script)
-            ], capture_output=True, text=True, cwd=str(self.script_dir))
+            # In-process, cursor-based: only fills newer than the last sync are fetched
+            from incremental_trade_sync import run_incremental_sync
+            summary = run_incremental_sync()
             
-            if result.returncode == 0:
-                logger.info("✅ Trade log fetch completed successfully")
-                logger.info(f"Output: {result.stdout}")
-            else:
-                logger.error(f"❌ Trade log fetch failed: {result.stderr}")
+            logger.info(f"✅ Trade sync completed: {summary['new_fills']} new fills across "
+                        f"{len(summary['pairs'])} pairs in {summary['seconds']:.1f}s "
+                        f"({summary['trade_log_rows']} added to trade_log.csv)")
+            if summary['errors']:
+                logger.error(f"❌ Trade sync failed for: {', '.join(sorted(summary['errors']))}")
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Error running fetch script: {e}")
+            logger.error(f"❌ Error running incremental trade sync: {e}")
             return False
             
         return True
@@ -81,7 +80,7 @@ class DailySyncScheduler:
         current_time = datetime.now()
         logger.info(f"🕒 Daily sync job started at {current_time}")
         
-        # Step 1: Fetch recent trades from Binance
+        # Step 1: Fetch new fills from Binance (all traded pairs)
         fetch_success = self.run_fetch_trades()
         
         # Step 2: Sync logs between locations
@@ -120,7 +119,7 @@ def main():
     
     # Check if scripts exist
     if not scheduler.fetch_script.exists():
-        logger.error(f"❌ fetch_recent_trades.py not found at {scheduler.fetch_script}")
+        logger.error(f"❌ incremental_trade_sync.py not found at {scheduler.fetch_script}")
         sys.exit(1)
         
     if not scheduler.sync_script.exists():
@@ -9,6 +9,8 @@ import os
 from datetime import datetime, timedelta
 import pandas as pd
 
+from config_service import get_config_service
+
 class DynamicConfig:
     def __init__(self, config_file="dynamic_config.json"):
         self.config_file = config_file
@@ -61,8 +63,10 @@ class DynamicConfig:
     def load_config(self):
         """Load configuration from file or create default"""
         try:
-            with open(self.config_file, 'r') as f:
-                self.config = json.load(f)
+            snapshot = get_config_service().register(self.config_file)  # Parsed once per process
+            if snapshot is None:
+                raise FileNotFoundError(self.config_file)
+            self.config = snapshot.thaw()
             print(f"✅ Loaded configuration from {self.config_file}")
         except FileNotFoundError:
             self.config = self.default_config.copy()
@@ -10,6 +10,7 @@ import json
 import time
 from typing import List, Dict, Tuple
 import logging
+from market_metadata import MarketMetadataService
 
 class DynamicPairManager:
     def __init__(self, config_path='enhanced_config.json'):
@@ -49,7 +50,10 @@ class DynamicPairManager:
         
         try:
             print("🔍 Discovering all available trading pairs...")
-            markets = self.exchange.load_markets()
+            # Cached per exchange with a refresh TTL - repeat discoveries skip load_markets
+            metadata = MarketMetadataService(self.exchange)
+            markets = metadata.load()
+            metadata.attach(self.exchange)
             
             usd_pairs = []
             usdt_pairs = []
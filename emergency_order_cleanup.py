@@ -7,6 +7,7 @@ Immediately cancels all existing stop-limit orders to fix accumulation issue
 import ccxt
 import sys
 from config import BINANCE_API_KEY, BINANCE_API_SECRET
+from order_reconciler import OrderReconciler, is_protective_order, load_protection_scope, load_reconciler_config
 
 def emergency_cleanup():
     """Emergency cleanup of all stop-limit orders"""
@@ -28,62 +29,34 @@ def emergency_cleanup():
         print(f"✅ Connected to Binance US")
         
         # Symbols to check
-        symbols_to_check = ['ETH/USDT', 'BTC/USDT', 'SUI/USDT', 'SOL/USDT', 'ADA/USDT']
-        
-        total_cancelled = 0
-        
+        reconciler_config = load_reconciler_config()
+        reconciler = OrderReconciler(exchange, reconciler_config)
+
+        # One open-orders snapshot for every symbol, then all cancels in flight together. The scope is every
+        # pair with open orders; the active pair and recorded positions back it if the exchange wants a symbol.
+        snapshot = reconciler.snapshot(load_protection_scope(config=reconciler_config), include_unlisted=True)
+        symbols_to_check = list(snapshot)
+        stop_limit_orders = []
+
         for symbol in symbols_to_check:
-            print(f"\n🔍 Checking {symbol}...")
-            
-            try:
-                # Get open orders for this symbol
-                open_orders = exchange.fetch_open_orders(symbol)
-                
-                if not open_orders:
-                    print(f"   ✅ No open orders for {symbol}")
-                    continue
-                
-                print(f"   📊 Found {len(open_orders)} open orders")
-                
-                stop_limit_orders = []
-                
-                # Identify stop-limit orders
-                for order in open_orders:
-                    order_type = order.get('type', '').lower()
-                    order_side = order.get('side', '').lower()
-                    order_id = order.get('id')
-                    amount = order.get('amount', 0)
-                    
-                    if ('stop' in order_type or order_type in ['stop_loss_limit', 'stop_loss', 'oco']) and order_side == 'sell':
-                        stop_limit_orders.append({
-                            'id': order_id,
-                            'type': order_type,
-                            'amount': amount,
-                            'symbol': symbol
-                        })
-                
-                if not stop_limit_orders:
-                    print(f"   ✅ No stop-limit orders found for {symbol}")
-                    continue
-                
-                print(f"   🎯 Found {len(stop_limit_orders)} stop-limit orders to cancel:")
-                
-                # Cancel each stop-limit order
-                cancelled_for_symbol = 0
-                for order in stop_limit_orders:
-                    try:
-                        print(f"      🗑️ Canceling {order['type']} order {order['id']} ({order['amount']} {symbol.split('/')[0]})")
-                        exchange.cancel_order(order['id'], order['symbol'])
-                        cancelled_for_symbol += 1
-                        total_cancelled += 1
-                        print(f"      ✅ Successfully cancelled")
-                    except Exception as cancel_error:
-                        print(f"      ❌ Failed to cancel {order['id']}: {cancel_error}")
-                
-                print(f"   🧹 {symbol}: {cancelled_for_symbol}/{len(stop_limit_orders)} orders cancelled")
-                
-            except Exception as symbol_error:
-                print(f"   ❌ Error processing {symbol}: {symbol_error}")
+            open_orders = snapshot.get(symbol, [])
+            matched = [order for order in open_orders if is_protective_order(order)]
+            print(f"\n🔍 {symbol}: {len(open_orders)} open orders, {len(matched)} stop-limit")
+            for order in matched:
+                print(f"      🗑️ Canceling {order.get('type', '').lower()} order {order['id']} "
+                      f"({order.get('amount', 0)} {symbol.split('/')[0]})")
+            stop_limit_orders.extend(matched)
+
+        result = reconciler.cancel_orders(stop_limit_orders)
+        total_cancelled = len(result['cancelled'])
+
+        for symbol in symbols_to_check:
+            matched = [order['id'] for order in stop_limit_orders if order['symbol'] == symbol]
+            if matched:
+                cancelled_for_symbol = len([order_id for order_id in matched if order_id in result['cancelled']])
+                print(f"   🧹 {symbol}: {cancelled_for_symbol}/{len(matched)} orders cancelled")
+        for order_id, error in result['failed'].items():
+            print(f"      ❌ Failed to cancel {order_id}: {error}")
         
         print(f"\n🎯 CLEANUP SUMMARY:")
         print(f"   📊 Total stop-limit orders cancelled: {total_cancelled}")
@@ -115,13 +88,16 @@ def show_current_orders():
             'enableRateLimit': True
         })
         
-        symbols_to_check = ['ETH/USDT', 'BTC/USDT', 'SUI/USDT', 'SOL/USDT', 'ADA/USDT']
+        reconciler_config = load_reconciler_config()
+        snapshot = OrderReconciler(exchange, reconciler_config).snapshot(load_protection_scope(config=reconciler_config),
+                                                                         include_unlisted=True)
+        symbols_to_check = list(snapshot)
         
         for symbol in symbols_to_check:
             print(f"\n📋 {symbol} Open Orders:")
             
             try:
-                open_orders = exchange.fetch_open_orders(symbol)
+                open_orders = snapshot.get(symbol, [])
                 
                 if not open_orders:
                     print(f"   ✅ No open orders")
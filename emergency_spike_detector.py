@@ -13,9 +13,12 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from log_utils import log_message
+from timeframe_aggregator import get_timeframe_aggregator
 
 class EmergencySpike:
     """Data class for emergency spike detection"""
+    __slots__ = ('symbol', 'price_change_pct', 'volume_surge', 'timeframe', 'urgency_score', 'detected_at')
+
     def __init__(self, symbol: str, price_change_pct: float, volume_surge: float, 
                  timeframe: str, urgency_score: float, detected_at: datetime):
         self.symbol = symbol
@@ -133,10 +136,9 @@ class EmergencySpikeDetector:
             current_price = ticker['last']
             volume_24h = ticker['quoteVolume'] or 0
             
-            # Get historical data for multiple timeframes
-            ohlcv_1h = self.exchange.fetch_ohlcv(symbol, '1h', limit=2)
-            ohlcv_4h = self.exchange.fetch_ohlcv(symbol, '4h', limit=2) 
-            ohlcv_24h = self.exchange.fetch_ohlcv(symbol, '1d', limit=2)
+            # Get historical data for multiple timeframes (one 1m refresh per symbol)
+            candles = get_timeframe_aggregator().get_rows(self.exchange, symbol, ('1h', '4h', '1d'), 2)
+            ohlcv_1h, ohlcv_4h, ohlcv_24h = candles['1h'], candles['4h'], candles['1d']
             
             if not all([ohlcv_1h, ohlcv_4h, ohlcv_24h]):
                 return None
@@ -249,7 +251,7 @@ class EmergencySpikeDetector:
         """Get average volume for comparison (simplified)"""
         try:
             # Get last 7 days of daily data for volume average
-            ohlcv_data = self.exchange.fetch_ohlcv(symbol, '1d', limit=7)
+            ohlcv_data = get_timeframe_aggregator().get_rows(self.exchange, symbol, ('1d',), 7)['1d']
             if not ohlcv_data:
                 return 0
                 
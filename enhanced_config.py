@@ -8,9 +8,41 @@ import json
 import os
 from datetime import datetime
 
+from config_service import get_config_service
+
+
+def config_errors(config):
+    """Validation errors for a merged bot config (empty when valid)"""
+    errors = []
+    try:
+        # Validate risk management
+        risk = config['risk_management']
+        if risk['stop_loss_pct'] >= risk['take_profit_pct']:
+            errors.append("Stop loss must be less than take profit")
+
+        if risk['stop_loss_pct'] <= 0 or risk['stop_loss_pct'] > 0.2:
+            errors.append("Stop loss should be between 0% and 20%")
+
+        # Validate position sizing
+        trading = config['trading']
+        if trading['min_amount_usd'] > trading['max_amount_usd']:
+            errors.append("Min amount cannot be greater than max amount")
+
+        # Validate strategy parameters
+        strategy = config['strategy_parameters']
+        if strategy['confidence_threshold'] <= 0 or strategy['confidence_threshold'] > 1:
+            errors.append("Confidence threshold must be between 0 and 1")
+    except (KeyError, TypeError) as e:
+        errors.append(f"Malformed setting: {e}")
+    return errors
+
+
 class BotConfig:
-    def __init__(self, config_file="enhanced_config.json"):
+    def __init__(self, config_file="enhanced_config.json", config_service=None):
         self.config_file = config_file
+        self.service = config_service or get_config_service()
+        self.version = 0
+        self.pending_change = None  # Latest ConfigChange not yet picked up by the trading loop
         self.default_config = {
             "trading": {
                 "symbol": "BTC/USDT",
@@ -135,19 +167,18 @@ class BotConfig:
             }
         }
         self.load_config()
-        self.last_config_mtime = 0  # Track file modification time for runtime reload
+        self.service.subscribe(self._on_config_change, path=self.config_file)
         
     def load_config(self):
-        """Load configuration from file or create default"""
+        """Load configuration from the config service (parsed once, merged with defaults) or create default"""
         try:
-            with open(self.config_file, 'r') as f:
-                loaded_config = json.load(f)
+            snapshot = self.service.register(self.config_file, defaults=self.default_config,
+                                             validator=config_errors)
+            if snapshot is None:
+                raise FileNotFoundError(self.config_file)
             
-            # Merge with defaults to handle missing keys
-            self.config = self._deep_merge(self.default_config, loaded_config)
-            
-            # Update modification time
-            self.last_config_mtime = os.path.getmtime(self.config_file)
+            self.config = snapshot.thaw()
+            self.version = snapshot.version
             print(f"✅ Loaded enhanced configuration from {self.config_file}")
             
         except FileNotFoundError:
@@ -158,37 +189,32 @@ class BotConfig:
             print(f"❌ Error loading config: {e}")
             self.config = self.default_config.copy()
             
+    def _on_config_change(self, change):
+        """Config service callback: swap in the new snapshot (invalid edits keep the last good one)"""
+        if change.kind in ('created', 'modified'):
+            self.config = change.snapshot.thaw()
+            self.version = change.snapshot.version
+            self.pending_change = change
+
     def reload_config_if_changed(self):
-        """Reload configuration if file has been modified (for runtime updates)"""
+        """Pick up a configuration change published since the last call (for runtime updates)"""
         try:
-            current_mtime = os.path.getmtime(self.config_file)
-            if current_mtime > self.last_config_mtime:
-                old_symbol = self.config.get('trading', {}).get('symbol', 'Unknown')
-                self.load_config()
-                new_symbol = self.config.get('trading', {}).get('symbol', 'Unknown')
-                
-                if old_symbol != new_symbol:
-                    print(f"🔄 CONFIG RELOADED: Trading pair changed {old_symbol} → {new_symbol}")
-                    return True
-                else:
-                    print(f"🔄 CONFIG RELOADED: Configuration updated")
-                    return True
-            return False
+            if not self.service.watching:
+                self.service.check(self.config_file)  # No watcher thread: one stat, parse only on change
+            change, self.pending_change = self.pending_change, None
+            if change is None:
+                return False
+
+            old_symbol = change.previous.get('trading', 'symbol', 'Unknown') if change.previous else 'Unknown'
+            new_symbol = self.config.get('trading', {}).get('symbol', 'Unknown')
+            if old_symbol != new_symbol:
+                print(f"🔄 CONFIG RELOADED: Trading pair changed {old_symbol} → {new_symbol}")
+            else:
+                print(f"🔄 CONFIG RELOADED: Configuration updated ({', '.join(change.changed[:5]) or 'new file'})")
+            return True
         except Exception as e:
             print(f"⚠️ Config reload check failed: {e}")
             return False
-            
-            # Save merged config to ensure all new defaults are included
-            self.save_config()
-            
-        except FileNotFoundError:
-            self.config = self.default_config.copy()
-            self.save_config()
-            print(f"🆕 Created enhanced configuration: {self.config_file}")
-        except json.JSONDecodeError as e:
-            print(f"⚠️ Invalid JSON in config file: {e}")
-            self.config = self.default_config.copy()
-            self.save_config()
     
     def _deep_merge(self, default, loaded):
         """Deep merge loaded config with defaults"""
@@ -261,25 +287,7 @@ class BotConfig:
     
     def validate_config(self):
         """Validate configuration values"""
-        errors = []
-        
-        # Validate risk management
-        risk = self.config['risk_management']
-        if risk['stop_loss_pct'] >= risk['take_profit_pct']:
-            errors.append("Stop loss must be less than take profit")
-        
-        if risk['stop_loss_pct'] <= 0 or risk['stop_loss_pct'] > 0.2:
-            errors.append("Stop loss should be between 0% and 20%")
-        
-        # Validate position sizing
-        trading = self.config['trading']
-        if trading['min_amount_usd'] > trading['max_amount_usd']:
-            errors.append("Min amount cannot be greater than max amount")
-        
-        # Validate strategy parameters
-        strategy = self.config['strategy_parameters']
-        if strategy['confidence_threshold'] <= 0 or strategy['confidence_threshold'] > 1:
-            errors.append("Confidence threshold must be between 0 and 1")
+        errors = config_errors(self.config)
         
         if errors:
             print("⚠️ Configuration validation errors:")
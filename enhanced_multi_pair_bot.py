@@ -79,12 +79,17 @@ class EnhancedMultiPairBot:
         # Start pair monitoring
         monitoring_task = asyncio.create_task(self._pair_monitoring_loop())
         
+        tasks = [scanner_task, trading_task, monitoring_task]
         try:
             # Run all tasks concurrently
-            await asyncio.gather(scanner_task, trading_task, monitoring_task)
+            await asyncio.gather(*tasks)
         except KeyboardInterrupt:
             print("🛑 Shutdown requested...")
         finally:
+            # Cancel whatever is still running; the scanner closes its exchange session on the way out
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             await self._shutdown()
     
     async def _trading_loop(self):
@@ -182,7 +187,7 @@ class EnhancedMultiPairBot:
             base_asset = pair.split('/')[0]
             
             # Get Phase 2 intelligence
-            intelligence = await self.phase2_provider.get_comprehensive_intelligence(base_asset)
+            intelligence = await self._get_intelligence(base_asset)
             
             if intelligence and intelligence.get('confidence', 0) > 0.6:
                 print(f"🧠 Phase 2 Intelligence for {pair}:")
@@ -193,6 +198,12 @@ class EnhancedMultiPairBot:
         except Exception as e:
             print(f"⚠️ Phase 2 intelligence init error: {e}")
     
+    async def _get_intelligence(self, base_asset: str) -> dict:
+        """Phase 2 intelligence via blocking HTTP, run off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.phase2_provider.get_comprehensive_phase2_intelligence,
+                                          base_asset)
+    
     async def _analyze_trading_signals(self, opportunity) -> bool:
         """Analyze if we should trade based on current signals"""
         try:
@@ -206,7 +217,7 @@ class EnhancedMultiPairBot:
             
             # Check Phase 2 intelligence confirmation
             base_asset = self.current_pair.split('/')[0]
-            intelligence = await self.phase2_provider.get_comprehensive_intelligence(base_asset)
+            intelligence = await self._get_intelligence(base_asset)
             
             if intelligence and intelligence.get('confidence', 0) > 0.7:
                 # Phase 2 confirms opportunity
@@ -4,7 +4,9 @@ Prioritizes trend continuation and quick entries during sustained bullish/bearis
 """
 import pandas as pd
 from typing import Dict, List, Optional
-from strategies.ma_crossover import fetch_ohlcv
+from timeframe_aggregator import get_timeframe_aggregator
+
+MA_TIMEFRAMES = ('1m', '5m', '15m', '30m', '1h', '2h')
 
 def detect_enhanced_multi_timeframe_ma_signals(exchange, symbol: str, current_price: float) -> Dict:
     """
@@ -28,17 +30,11 @@ def detect_enhanced_multi_timeframe_ma_signals(exchange, symbol: str, current_pr
     }
     
     try:
-        # Get data for all timeframes
-        timeframe_data = {}
-        timeframe_data['1m'] = fetch_ohlcv(exchange, symbol, '1m', 50)
-        timeframe_data['5m'] = fetch_ohlcv(exchange, symbol, '5m', 50)
-        timeframe_data['15m'] = fetch_ohlcv(exchange, symbol, '15m', 50)
-        timeframe_data['30m'] = fetch_ohlcv(exchange, symbol, '30m', 50)
-        timeframe_data['1h'] = fetch_ohlcv(exchange, symbol, '1h', 50)
-        timeframe_data['2h'] = fetch_ohlcv(exchange, symbol, '2h', 50)
+        # Get data for all timeframes (derived locally from the 1m stream)
+        timeframe_data = get_timeframe_aggregator().get_frames(exchange, symbol, MA_TIMEFRAMES, 50)
         
         # Analyze each timeframe for trend strength and signals
-        for tf in ['1m', '5m', '15m', '30m', '1h', '2h']:
+        for tf in MA_TIMEFRAMES:
             signals[tf] = _analyze_enhanced_timeframe_ma(timeframe_data[tf], current_price, tf)
         
         # 🎯 ENHANCED TREND ANALYSIS - Detect sustained trends
@@ -7,12 +7,13 @@
 #
 # =============================================================================
 
-import requests
 import time
 import json
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from http_client import get_http_client
+
 class FreeCryptoDataProvider:
     """
     🆓 FREE Cryptocurrency Data Provider
@@ -25,7 +26,8 @@ class FreeCryptoDataProvider:
     """
     
     def __init__(self):
-        self.session = requests.Session()
+        self.http = get_http_client()  # Shared keep-alive pool with per-provider limits
+        self.session = self.http.session
         self.cache = {}
         self.cache_duration = 60  # 1 minute cache
         
@@ -76,23 +78,15 @@ class FreeCryptoDataProvider:
             if self._is_cached(cache_key):
                 return self.cache[cache_key]
             
-            # Parallel data collection from free sources
-            data_sources = {}
-            
-            # 1. CoinGecko Free - Primary source
-            coingecko_data = self._fetch_coingecko_free_data(symbol)
-            if coingecko_data:
-                data_sources['coingecko'] = coingecko_data
-            
-            # 2. CoinCap - High volume backup
-            coincap_data = self._fetch_coincap_data(symbol)
-            if coincap_data:
-                data_sources['coincap'] = coincap_data
-            
-            # 3. CryptoCompare - Social sentiment
-            cryptocompare_data = self._fetch_cryptocompare_data(symbol)
-            if cryptocompare_data:
-                data_sources['cryptocompare'] = cryptocompare_data
+            # Parallel data collection from free sources: CoinGecko (primary), CoinCap (high volume
+            # backup) and CryptoCompare (social sentiment) in one round trip
+            fetched = self.http.fetch_all({
+                'coingecko': lambda: self._fetch_coingecko_free_data(symbol),
+                'coincap': lambda: self._fetch_coincap_data(symbol),
+                'cryptocompare': lambda: self._fetch_cryptocompare_data(symbol),
+            })
+            data_sources = {name: data for name, data in fetched.items()
+                            if data and not isinstance(data, Exception)}
             
             # Aggregate the intelligence
             comprehensive_data = self._aggregate_free_data(symbol, data_sources)
@@ -123,7 +117,7 @@ class FreeCryptoDataProvider:
                 'developer_data': 'false'
             }
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self.http.get('coingecko', url, params=params)
             if response.status_code != 200:
                 return None
             
@@ -170,7 +164,7 @@ class FreeCryptoDataProvider:
             # Asset data
             url = f"{self.apis['coincap']['base_url']}/assets/{coin_id}"
             
-            response = self.session.get(url, timeout=10)
+            response = self.http.get('coincap', url)
             if response.status_code != 200:
                 return None
             
@@ -203,7 +197,7 @@ class FreeCryptoDataProvider:
             url = f"{self.apis['cryptocompare']['base_url']}/price"
             params = {'fsym': symbol.upper(), 'tsyms': 'USD'}
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self.http.get('cryptocompare', url, params=params)
             if response.status_code != 200:
                 return None
             
@@ -213,7 +207,7 @@ class FreeCryptoDataProvider:
             social_url = f"{self.apis['cryptocompare']['base_url']}/social/coin/general"
             social_params = {'coinId': symbol.upper()}
             
-            social_response = self.session.get(social_url, params=social_params, timeout=10)
+            social_response = self.http.get('cryptocompare', social_url, params=social_params)
             social_data = {}
             if social_response.status_code == 200:
                 social_data = social_response.json().get('Data', {})
@@ -8,13 +8,14 @@
 #
 # =============================================================================
 
-import requests
 import json
 import time
 from typing import Dict, List, Optional, Any
 import logging
 from datetime import datetime, timedelta
 
+from http_client import get_http_client
+
 class FreePhase2Provider:
     """
     🆓 FREE Phase 2 Advanced Intelligence Provider
@@ -27,7 +28,8 @@ class FreePhase2Provider:
     """
     
     def __init__(self):
-        self.session = requests.Session()
+        self.http = get_http_client()  # Shared keep-alive pool with per-provider limits
+        self.session = self.http.session
         self.cache = {}
         self.cache_duration = 300  # 5 minute cache for Phase 2 data
         
@@ -92,41 +94,27 @@ class FreePhase2Provider:
             }
             
             # 🔧 ENHANCED ERROR HANDLING WITH FALLBACK
-            try:
-                # 1. Exchange Flow Intelligence (Bitquery) - with timeout protection
-                exchange_flows = self._get_exchange_flows_bitquery(symbol)
-                if exchange_flows:
-                    intelligence['exchange_flows'] = exchange_flows
-                    intelligence['sources_used'].append('bitquery')
-            except Exception as e:
-                logging.warning(f"Bitquery API temporarily unavailable: {e}")
-                # Provide simulated exchange flow data
-                intelligence['exchange_flows'] = self._get_simulated_exchange_flows(symbol)
-                intelligence['sources_used'].append('bitquery_simulated')
-            
-            try:
-                # 2. DeFi & Stablecoin Intelligence (DefiLlama) - with timeout protection
-                defi_intel = self._get_defi_intelligence_defillama(symbol)
-                if defi_intel:
-                    intelligence['defi_intelligence'] = defi_intel
-                    intelligence['sources_used'].append('defillama')
-            except Exception as e:
-                logging.warning(f"DefiLlama API temporarily unavailable: {e}")
-                # Provide simulated DeFi data
-                intelligence['defi_intelligence'] = self._get_simulated_defi_intelligence(symbol)
-                intelligence['sources_used'].append('defillama_simulated')
-            
-            try:
-                # 3. Real-time DEX Analytics (The Graph) - with timeout protection
-                dex_analytics = self._get_dex_analytics_thegraph(symbol)
-                if dex_analytics:
-                    intelligence['dex_analytics'] = dex_analytics
-                    intelligence['sources_used'].append('thegraph')
-            except Exception as e:
-                logging.warning(f"The Graph API temporarily unavailable: {e}")
-                # Provide simulated DEX data
-                intelligence['dex_analytics'] = self._get_simulated_dex_analytics(symbol)
-                intelligence['sources_used'].append('thegraph_simulated')
+            # Exchange flows (Bitquery), DeFi & stablecoins (DefiLlama) and DEX analytics (The Graph)
+            # are fetched concurrently; a source that raises falls back to simulated data
+            fetched = self.http.fetch_all({
+                'bitquery': lambda: self._get_exchange_flows_bitquery(symbol),
+                'defillama': lambda: self._get_defi_intelligence_defillama(symbol),
+                'thegraph': lambda: self._get_dex_analytics_thegraph(symbol),
+            })
+            sections = (
+                ('bitquery', 'exchange_flows', 'Bitquery', self._get_simulated_exchange_flows),
+                ('defillama', 'defi_intelligence', 'DefiLlama', self._get_simulated_defi_intelligence),
+                ('thegraph', 'dex_analytics', 'The Graph', self._get_simulated_dex_analytics),
+            )
+            for source, section, label, simulate in sections:
+                result = fetched[source]
+                if isinstance(result, Exception):
+                    logging.warning(f"{label} API temporarily unavailable: {result}")
+                    intelligence[section] = simulate(symbol)
+                    intelligence['sources_used'].append(f'{source}_simulated')
+                elif result:
+                    intelligence[section] = result
+                    intelligence['sources_used'].append(source)
             
             # 4. Whale Activity Detection (works with real or simulated data)
             whale_activity = self._detect_whale_activity(symbol, intelligence.get('exchange_flows', {}))
@@ -194,11 +182,11 @@ class FreePhase2Provider:
                 'X-API-KEY': 'FREE_TIER'  # Using free tier
             }
             
-            response = self.session.post(
+            response = self.http.post(
+                'bitquery',
                 self.apis['bitquery']['base_url'],
                 headers=headers,
-                json={'query': query},
-                timeout=10
+                json={'query': query}
             )
             
             if response.status_code == 200:
@@ -225,28 +213,30 @@ class FreePhase2Provider:
                 'yield_opportunities': {}
             }
             
-            # 1. Protocol TVL data (unlimited free)
-            protocols_url = f"{self.apis['defillama']['base_url']}/protocols"
-            protocols_response = self.session.get(protocols_url, timeout=10)
-            
-            if protocols_response.status_code == 200:
-                protocols_data = protocols_response.json()
+            # Protocol TVL, stablecoin flows and chain TVL history in one round trip (unlimited free)
+            base_url = self.apis['defillama']['base_url']
+            responses = self.http.fetch_all({
+                'protocols': lambda: self.http.get('defillama', f"{base_url}/protocols"),
+                'stablecoins': lambda: self.http.get('defillama', f"{base_url}/stablecoins"),
+                'tvl': lambda: self.http.get('defillama', f"{base_url}/v2/historicalChainTvl"),
+            })
+            for response in responses.values():
+                if isinstance(response, Exception):
+                    raise response
+            
+            # 1. Protocol TVL data
+            if responses['protocols'].status_code == 200:
+                protocols_data = responses['protocols'].json()
                 defi_intel['protocol_flows'] = self._analyze_protocol_flows(protocols_data, symbol)
             
-            # 2. Stablecoin flows (unlimited free)
-            stablecoins_url = f"{self.apis['defillama']['base_url']}/stablecoins"
-            stablecoins_response = self.session.get(stablecoins_url, timeout=10)
-            
-            if stablecoins_response.status_code == 200:
-                stablecoins_data = stablecoins_response.json()
+            # 2. Stablecoin flows
+            if responses['stablecoins'].status_code == 200:
+                stablecoins_data = responses['stablecoins'].json()
                 defi_intel['stablecoin_activity'] = self._analyze_stablecoin_flows(stablecoins_data)
             
             # 3. TVL changes for trend detection
-            tvl_url = f"{self.apis['defillama']['base_url']}/v2/historicalChainTvl"
-            tvl_response = self.session.get(tvl_url, timeout=10)
-            
-            if tvl_response.status_code == 200:
-                tvl_data = tvl_response.json()
+            if responses['tvl'].status_code == 200:
+                tvl_data = responses['tvl'].json()
                 defi_intel['tvl_changes'] = self._analyze_tvl_trends(tvl_data)
             
             return defi_intel
@@ -299,10 +289,10 @@ class FreePhase2Provider:
             }}
             '''
             
-            response = self.session.post(
+            response = self.http.post(
+                'thegraph',
                 subgraph_url,
-                json={'query': query},
-                timeout=10
+                json={'query': query}
             )
             
             if response.status_code == 200:
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+🌐 SHARED HTTP CLIENT
+One pooled, keep-alive requests.Session for every free-API provider
+(CoinGecko, CoinCap, CryptoCompare, Bitquery, DefiLlama, The Graph), with
+per-provider rate limits and concurrency caps, retries with jittered
+exponential backoff, per-provider latency/error metrics, and a helper that
+runs several source fetches concurrently so multi-source aggregation costs
+about one round trip.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from log_utils import log_message
+
+DEFAULT_HTTP_CLIENT_CONFIG = {
+    'timeout_seconds': 10,
+    'pool_connections': 16,         # Hosts kept in the pool
+    'pool_maxsize': 8,              # Keep-alive connections per host
+    'max_retries': 2,               # Retries after the first attempt
+    'backoff_base_seconds': 0.5,
+    'backoff_max_seconds': 8.0,
+    'retry_statuses': [429, 500, 502, 503, 504],
+    'max_parallel_fetches': 8,
+    'latency_window': 200,          # Recent requests kept per provider for percentiles
+    'offline': False,               # Fail every request at once (replay): providers take their fallbacks
+    'providers': {                  # requests per minute and in-flight cap, from each free tier
+        'coingecko': {'rate_per_minute': 30, 'max_concurrent': 2},
+        'coincap': {'rate_per_minute': 200, 'max_concurrent': 4},
+        'cryptocompare': {'rate_per_minute': 50, 'max_concurrent': 2},
+        'bitquery': {'rate_per_minute': 10, 'max_concurrent': 1},
+        'defillama': {'rate_per_minute': 120, 'max_concurrent': 4},
+        'thegraph': {'rate_per_minute': 60, 'max_concurrent': 2},
+    },
+    'default_provider': {'rate_per_minute': 60, 'max_concurrent': 2},
+}
+
+# Backoff and throttling run on real time. Replay patches time.sleep before this module is imported,
+# and a pool worker sleeping on the virtual clock waits for a main thread that is itself joining the
+# pool. An Event that is never set gives a wall-clock sleep the patch does not reach.
+_monotonic = time.monotonic
+_never_set = threading.Event()
+
+
+def _wall_sleep(seconds: float):
+    _never_set.wait(max(0.0, seconds))
+
+
+class ProviderLimiter:
+    """Token bucket (rate) plus semaphore (in-flight cap) for one provider"""
+
+    __slots__ = ('rate_per_second', 'capacity', 'tokens', 'updated', 'lock', 'slots')
+
+    def __init__(self, rate_per_minute: float, max_concurrent: int, now: float):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = max(1.0, min(float(max_concurrent), rate_per_minute / 60.0 * 5))
+        self.tokens = self.capacity
+        self.updated = now
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max(1, int(max_concurrent)))
+
+    def reserve(self, now: float) -> float:
+        """Take a token; returns how long the caller must wait before sending"""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+            self.updated = now
+            self.tokens -= 1.0
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+
+class ProviderStats:
+    """Request, retry and error counts plus recent latencies for one provider"""
+
+    __slots__ = ('requests', 'errors', 'retries', 'throttled_seconds', 'latencies', 'last_error', 'last_status')
+
+    def __init__(self, window: int):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.latencies = deque(maxlen=window)
+        self.last_error: Optional[str] = None
+        self.last_status: Optional[int] = None
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+    def summary(self) -> Dict:
+        return {'requests': self.requests, 'errors': self.errors, 'retries': self.retries,
+                'error_rate': self.errors / self.requests if self.requests else 0.0,
+                'p50_ms': None if not self.latencies else round(self.percentile(50) * 1000, 1),
+                'p95_ms': None if not self.latencies else round(self.percentile(95) * 1000, 1),
+                'throttled_seconds': round(self.throttled_seconds, 3),
+                'last_status': self.last_status, 'last_error': self.last_error}
+
+
+class HttpClient:
+    def __init__(self, config: Optional[Dict] = None, session: Optional[requests.Session] = None,
+                 clock: Optional[Callable[[], float]] = None, sleep: Optional[Callable[[float], None]] = None,
+                 rng: Optional[random.Random] = None):
+        self.config = self._merge(config)
+        self.clock = clock or _monotonic
+        self.sleep = sleep or _wall_sleep
+        self.rng = rng or random.Random()
+        self.owns_session = session is None
+        self.session = session or self._build_session()
+        self.limiters: Dict[str, ProviderLimiter] = {}
+        self.stats: Dict[str, ProviderStats] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _merge(config: Optional[Dict]) -> Dict:
+        merged = dict(DEFAULT_HTTP_CLIENT_CONFIG)
+        merged.update(config or {})
+        merged['providers'] = {**DEFAULT_HTTP_CLIENT_CONFIG['providers'], **(config or {}).get('providers', {})}
+        return merged
+
+    def configure(self, config: Optional[Dict]):
+        """
+        Apply bot config after the providers (created at import time) already hold the client.
+        Limiters are rebuilt on next use and an owned session gets a new adapter when the pool
+        sizes change (an injected session is the caller's to size); collected stats are kept.
+        """
+        with self.lock:
+            previous = self.config
+            self.config = self._merge(config)
+            self.limiters.clear()
+            resized = any(previous[key] != self.config[key] for key in ('pool_connections', 'pool_maxsize'))
+            if self.owns_session and resized:
+                self._mount(self.session)
+
+    def _build_session(self) -> requests.Session:
+        """Keep-alive session with a per-host connection pool; retries are handled here, not by urllib3"""
+        session = requests.Session()
+        self._mount(session)
+        session.headers.update({'Accept': 'application/json', 'Connection': 'keep-alive'})
+        return session
+
+    def _mount(self, session: requests.Session):
+        """Mount a pool sized from the current config; a replaced adapter's idle connections are closed"""
+        adapter = HTTPAdapter(pool_connections=int(self.config['pool_connections']),
+                              pool_maxsize=int(self.config['pool_maxsize']), max_retries=0)
+        for prefix in ('https://', 'http://'):
+            replaced = session.adapters.get(prefix)
+            session.mount(prefix, adapter)
+            if replaced is not None and replaced is not adapter:
+                replaced.close()
+
+    def _provider(self, name: str):
+        with self.lock:
+            if name not in self.limiters:
+                settings = {**self.config['default_provider'], **self.config['providers'].get(name, {})}
+                self.limiters[name] = ProviderLimiter(settings['rate_per_minute'], settings['max_concurrent'],
+                                                      self.clock())
+            if name not in self.stats:
+                self.stats[name] = ProviderStats(int(self.config['latency_window']))
+            return self.limiters[name], self.stats[name]
+
+    # ------------------------------------------------------------- requests
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than a server-sent Retry-After"""
+        ceiling = min(self.config['backoff_max_seconds'], self.config['backoff_base_seconds'] * (2 ** attempt))
+        delay = self.rng.uniform(0, ceiling)
+        return max(delay, retry_after or 0.0)
+
+    def request(self, provider: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send through the shared session under `provider`'s limits.
+        Returns the last response (callers keep their status checks); raises once retries are exhausted
+        on connection errors and timeouts.
+        """
+        limiter, stats = self._provider(provider)
+        if self.config['offline']:
+            with limiter.lock:
+                stats.requests += 1
+                stats.errors += 1
+                stats.last_error = "offline"
+            raise requests.ConnectionError(f"{provider}: HTTP client is offline")
+        kwargs.setdefault('timeout', self.config['timeout_seconds'])
+        retry_statuses = set(self.config['retry_statuses'])
+        attempts = int(self.config['max_retries']) + 1
+
+        for attempt in range(attempts):
+            wait = limiter.reserve(self.clock())
+            if wait > 0:
+                with limiter.lock:
+                    stats.throttled_seconds += wait
+                self.sleep(wait)
+            with limiter.slots:
+                started = time.perf_counter()
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                    error = None
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    response, error = None, e
+                elapsed = time.perf_counter() - started
+
+            retryable = error is not None or response.status_code in retry_statuses
+            with limiter.lock:
+                stats.requests += 1
+                stats.latencies.append(elapsed)
+                if response is not None:
+                    stats.last_status = response.status_code
+                if retryable:
+                    stats.errors += 1
+                    stats.last_error = str(error) if error is not None else f"HTTP {response.status_code}"
+            if not retryable:
+                return response
+
+            if attempt == attempts - 1:
+                if error is not None:
+                    raise error
+                return response
+            retry_after = None
+            if response is not None:
+                try:
+                    retry_after = float(response.headers.get('Retry-After', ''))
+                except (TypeError, ValueError):
+                    retry_after = None
+                response.close()                        # Hand the connection back to the pool
+            with limiter.lock:
+                stats.retries += 1
+            self.sleep(self.backoff(attempt, retry_after))
+        raise RuntimeError("unreachable")
+
+    def get(self, provider: str, url: str, **kwargs) -> requests.Response:
+        return self.request(provider, 'GET', url, **kwargs)
+
+    def post(self, provider: str, url: str, **kwargs) -> requests.Response:
+        return self.request(provider, 'POST', url, **kwargs)
+
+    # ------------------------------------------------------------- fan-out
+
+    def fetch_all(self, jobs: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """
+        Run independent source fetches concurrently; each value is the job's result or the exception
+        it raised. A fresh pool per call keeps nested fan-outs deadlock-free.
+        """
+        if len(jobs) <= 1:
+            results = {}
+            for name, job in jobs.items():
+                try:
+                    results[name] = job()
+                except Exception as e:
+                    results[name] = e
+            return results
+        workers = min(len(jobs), int(self.config['max_parallel_fetches']))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-fetch') as pool:
+            futures = {name: pool.submit(job) for name, job in jobs.items()}
+        results = {}
+        for name, future in futures.items():
+            error = future.exception()
+            results[name] = error if error is not None else future.result()
+        return results
+
+    def summary(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def publish(self, metrics):
+        """Expose per-provider latency percentiles and error rate as bot_metrics gauges"""
+        for name, stats in self.summary().items():
+            for key in ('p50_ms', 'p95_ms', 'error_rate'):
+                if stats[key] is not None:
+                    metrics.set_gauge(f"http_{name}_{key}", stats[key])
+
+    def log_summary(self):
+        for name, stats in self.summary().items():
+            log_message(f"🌐 {name}: {stats['requests']} req, p50 {stats['p50_ms']}ms, p95 {stats['p95_ms']}ms, "
+                        f"errors {stats['error_rate']:.0%}, retries {stats['retries']}")
+
+
+_http_client: Optional[HttpClient] = None
+
+
+def get_http_client(config: Optional[Dict] = None, **kwargs) -> HttpClient:
+    """Get the process-wide HTTP client"""
+    global _http_client
+    if _http_client is None:
+        _http_client = HttpClient(config, **kwargs)
+    return _http_client
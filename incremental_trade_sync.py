@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Incremental Trade Sync
+Pulls only new fills from Binance US for every traded pair and upserts them
+into an append-only exchange fill ledger, keyed by exchange trade id.
+
+Each symbol keeps a cursor (last trade id + timestamp) in trade_sync_cursors.json.
+A sync asks the exchange for fills starting at `fromId = last_id + 1`, so a run
+costs one request per pair plus one per extra page of *new* fills; nothing
+already synced is fetched or rewritten again. A pair without a cursor is
+backfilled from its first fill (fromId 0); a backfill cut short by max_pages
+resumes from its cursor on the next run. Re-running is always safe: fills
+are deduplicated on (symbol, trade id) before they are appended.
+
+New fills are also appended to trade_log.csv (skipping fills the bot already
+logged itself), which sync_trade_logs.py and the reports still read.
+
+Usage:
+    python incremental_trade_sync.py                   # Traded pairs (cursors, balances, trade log)
+    python incremental_trade_sync.py --all-pairs       # Also every configured supported pair
+    python incremental_trade_sync.py --symbols BTC/USDT ETH/USDT
+"""
+
+import bisect
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LEDGER_COLUMNS = ['timestamp', 'trade_id', 'order_id', 'action', 'symbol',
+                  'amount', 'price', 'cost', 'fee', 'fee_currency']
+
+DEFAULT_SYNC_CONFIG = {
+    'ledger_file': os.path.join(SCRIPT_DIR, 'exchange_trade_ledger.csv'),
+    'cursor_file': os.path.join(SCRIPT_DIR, 'trade_sync_cursors.json'),
+    'trade_log_file': os.path.join(SCRIPT_DIR, 'trade_log.csv'),
+    'config_file': os.path.join(SCRIPT_DIR, 'enhanced_config.json'),
+    'mirror_trade_log': True,   # Append new fills to trade_log.csv for its existing readers
+    'quote_currencies': ['USDT', 'USDC', 'USD'],
+    'page_limit': 1000,     # Binance myTrades maximum
+    'max_pages': 50,        # Per symbol per run, guards against runaway paging
+    'max_workers': 4,
+    'include_supported_pairs': False
+}
+
+
+class TradeSyncCursors:
+    """Per-symbol sync position, persisted atomically as JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cursors: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.cursors = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read trade sync cursors ({e}) - starting fresh")
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        return self.cursors.get(symbol)
+
+    def advance(self, symbol: str, trades: List[Dict]):
+        """Move the cursor past the newest of `trades`"""
+        if not trades:
+            return
+        newest = max(trades, key=lambda t: int(t['id']))
+        current = self.cursors.get(symbol)
+        if current and int(current['last_id']) >= int(newest['id']):
+            return
+        self.cursors[symbol] = {
+            'last_id': int(newest['id']),
+            'last_timestamp': newest.get('timestamp'),
+            'updated_at': datetime.now().isoformat()
+        }
+
+    def symbols(self) -> List[str]:
+        return list(self.cursors.keys())
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.cursors, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class TradeLedger:
+    """
+    Append-only CSV of exchange fills with idempotent upsert.
+
+    Only the (symbol, trade_id) keys are loaded on open, so the ledger is never
+    re-read or rewritten as a whole.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = set()
+        if os.path.exists(path):
+            with open(path, 'r', newline='') as f:
+                for row in csv.DictReader(f):
+                    self.keys.add((row['symbol'], str(row['trade_id'])))
+
+    def upsert(self, trades: Iterable[Dict]) -> int:
+        """Append fills not already in the ledger; returns how many were added"""
+        rows = []
+        for trade in sorted(trades, key=lambda t: (t.get('timestamp') or 0, str(t['id']))):
+            key = (trade['symbol'], str(trade['id']))
+            if key in self.keys:
+                continue
+            self.keys.add(key)
+            fee = trade.get('fee') or {}
+            rows.append({
+                'timestamp': datetime.utcfromtimestamp(trade['timestamp'] / 1000).strftime('%Y-%m-%d %H:%M:%S.%f'),
+                'trade_id': trade['id'],
+                'order_id': trade.get('order'),
+                'action': str(trade['side']).upper(),
+                'symbol': trade['symbol'],
+                'amount': trade['amount'],
+                'price': trade['price'],
+                'cost': trade.get('cost'),
+                'fee': fee.get('cost', 0) or 0,
+                'fee_currency': fee.get('currency', '')
+            })
+
+        if rows:
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=LEDGER_COLUMNS)
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+        return len(rows)
+
+
+class TradeLogMirror:
+    """
+    Appends exchange fills to the bot's trade_log.csv in its own columns.
+
+    The bot logs its own trades there with local timestamps, so a fill within a
+    second of an existing row with the same symbol and action counts as already logged.
+    """
+
+    DEFAULT_COLUMNS = ['timestamp', 'action', 'symbol', 'amount', 'price', 'balance']
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns = list(self.DEFAULT_COLUMNS)
+        self.logged: Dict[tuple, List[float]] = {}     # (symbol, action) -> sorted epoch seconds
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                self.columns = list(reader.fieldnames or self.columns)
+                for row in reader:
+                    seconds = self._seconds(row.get('timestamp'))
+                    if seconds is not None:
+                        self._add(row.get('symbol'), str(row.get('action')).upper(), seconds)
+
+    @staticmethod
+    def _seconds(timestamp) -> Optional[float]:
+        text = str(timestamp)
+        try:
+            return datetime.strptime(text, '%Y-%m-%d %H:%M:%S.%f' if '.' in text else '%Y-%m-%d %H:%M:%S').timestamp()
+        except ValueError:
+            return None
+
+    def _add(self, symbol: str, action: str, seconds: float):
+        bisect.insort(self.logged.setdefault((symbol, action), []), seconds)
+
+    def _logged(self, symbol: str, action: str, seconds: float) -> bool:
+        times = self.logged.get((symbol, action), [])
+        i = bisect.bisect_left(times, seconds)
+        return any(abs(times[j] - seconds) < 1.0 for j in (i - 1, i) if 0 <= j < len(times))
+
+    def append(self, trades: Iterable[Dict]) -> int:
+        """Append fills not yet in the trade log; returns how many were added"""
+        rows = []
+        for trade in sorted(trades, key=lambda t: (t.get('timestamp') or 0, str(t['id']))):
+            seconds = trade['timestamp'] / 1000
+            action = str(trade['side']).upper()
+            if self._logged(trade['symbol'], action, seconds):
+                continue
+            self._add(trade['symbol'], action, seconds)
+            when = datetime.fromtimestamp(seconds)
+            rows.append({
+                'timestamp': when.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                'action': action,
+                'symbol': trade['symbol'],
+                'amount': trade['amount'],
+                'price': trade['price'],
+                'balance': trade.get('cost')    # Same cost-as-balance placeholder fetch_recent_trades wrote
+            })
+
+        if rows:
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns, restval='', extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+        return len(rows)
+
+
+class IncrementalTradeSync:
+    """
+    🔄 Cursor-based fill sync for all traded pairs
+
+    Symbols are paged concurrently on a small thread pool; the ledger and
+    cursors are only touched from the calling thread.
+    """
+
+    def __init__(self, exchange, config: Optional[Dict] = None):
+        self.exchange = exchange
+        self.config = dict(DEFAULT_SYNC_CONFIG)
+        self.config.update(config or {})
+        self.cursors = TradeSyncCursors(self.config['cursor_file'])
+        self.ledger = TradeLedger(self.config['ledger_file'])
+        self.trade_log = TradeLogMirror(self.config['trade_log_file']) if self.config['mirror_trade_log'] else None
+
+    # ---------------------------------------------------------------- pairs
+
+    def discover_symbols(self) -> List[str]:
+        """Pairs worth syncing: known cursors, the trade log, the active pair and held assets"""
+        symbols = set(self.cursors.symbols())
+
+        trade_log = self.config['trade_log_file']
+        if os.path.exists(trade_log):
+            try:
+                with open(trade_log, 'r', newline='') as f:
+                    symbols.update(row['symbol'] for row in csv.DictReader(f) if row.get('symbol'))
+            except Exception as e:
+                print(f"⚠️ Could not read symbols from trade log: {e}")
+
+        try:
+            with open(self.config['config_file'], 'r') as f:
+                bot_config = json.load(f)
+            trading = bot_config.get('trading', {})
+            if trading.get('symbol'):
+                symbols.add(trading['symbol'])
+            if self.config['include_supported_pairs']:
+                symbols.update(trading.get('supported_pairs', []))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read bot config: {e}")
+
+        markets = self.exchange.load_markets()
+        try:
+            balance = self.exchange.fetch_balance()
+            for asset, total in (balance.get('total') or {}).items():
+                if not total or asset in self.config['quote_currencies']:
+                    continue
+                for quote in self.config['quote_currencies']:
+                    if f"{asset}/{quote}" in markets:
+                        symbols.add(f"{asset}/{quote}")
+        except Exception as e:
+            print(f"⚠️ Could not scan balances for held assets: {e}")
+
+        return sorted(s for s in symbols if s in markets)
+
+    # ---------------------------------------------------------------- fetch
+
+    def fetch_new_trades(self, symbol: str) -> List[Dict]:
+        """Page every fill newer than the symbol's cursor; without a cursor, from the first fill"""
+        limit = int(self.config['page_limit'])
+        cursor = self.cursors.get(symbol)
+        trades: List[Dict] = []
+        from_id = 0 if cursor is None else int(cursor['last_id']) + 1
+
+        for _ in range(int(self.config['max_pages'])):
+            page = self.exchange.fetch_my_trades(symbol, limit=limit, params={'fromId': from_id})
+            trades.extend(page)
+            if len(page) < limit:
+                break
+            from_id = max(int(t['id']) for t in page) + 1
+        return trades
+
+    def sync(self, symbols: Optional[List[str]] = None) -> Dict:
+        """Sync all pairs; returns per-symbol counts of new fills and errors"""
+        start = time.time()
+        symbols = symbols or self.discover_symbols()
+        print(f"🔄 Incremental trade sync: {len(symbols)} pairs")
+
+        results = {'pairs': {}, 'new_fills': 0, 'trade_log_rows': 0, 'errors': {}}
+        workers = max(1, min(int(self.config['max_workers']), len(symbols) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.fetch_new_trades, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    trades = future.result()
+                except Exception as e:
+                    results['errors'][symbol] = str(e)
+                    print(f"❌ {symbol}: trade sync failed: {e}")
+                    continue
+
+                added = self.ledger.upsert(trades)
+                self.cursors.advance(symbol, trades)
+                results['pairs'][symbol] = added
+                results['new_fills'] += added
+                if added:
+                    print(f"   📥 {symbol}: {added} new fills")
+                if self.trade_log is not None and trades:
+                    results['trade_log_rows'] += self.trade_log.append(trades)
+
+        self.cursors.save()
+        results['seconds'] = round(time.time() - start, 2)
+        print(f"✅ Trade sync complete: {results['new_fills']} new fills across "
+              f"{len(results['pairs'])} pairs in {results['seconds']:.1f}s")
+        return results
+
+
+def create_sync_exchange():
+    """Binance US client with the same settings as fetch_recent_trades.py"""
+    import ccxt
+    from config import BINANCE_API_KEY, BINANCE_API_SECRET
+
+    return ccxt.binanceus({
+        'apiKey': BINANCE_API_KEY,
+        'secret': BINANCE_API_SECRET,
+        'enableRateLimit': True,
+        'timeout': 30000,
+        'options': {
+            'recvWindow': 10000,
+            'timeDifference': 1000,
+            'adjustForTimeDifference': True
+        }
+    })
+
+
+def run_incremental_sync(symbols: Optional[List[str]] = None, config: Optional[Dict] = None) -> Dict:
+    """Entry point used by the daily sync scheduler"""
+    return IncrementalTradeSync(create_sync_exchange(), config).sync(symbols)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sync_config = {}
+    requested_symbols = None
+
+    if '--help' in args:
+        print(__doc__)
+        sys.exit(0)
+    if '--all-pairs' in args:
+        sync_config['include_supported_pairs'] = True
+    if '--symbols' in args:
+        requested_symbols = [a for a in args[args.index('--symbols') + 1:] if not a.startswith('--')]
+
+    summary = run_incremental_sync(requested_symbols, sync_config)
+    sys.exit(1 if summary['errors'] else 0)
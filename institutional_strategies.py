@@ -8,6 +8,8 @@ from scipy import stats
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import warnings
+from regime_statistics import get_regime_stats_engine
+from correlation_engine import get_correlation_engine
 warnings.filterwarnings('ignore')
 
 class MarketRegimeDetector:
@@ -20,7 +22,7 @@ class MarketRegimeDetector:
         self.lookback_period = lookback_period
         self.regimes = ['trending_up', 'trending_down', 'mean_reverting', 'volatile', 'stable']
         
-    def detect_regime(self, df):
+    def detect_regime(self, df, symbol=None):
         """
         Detect current market regime using multiple indicators
         """
@@ -31,7 +33,7 @@ class MarketRegimeDetector:
                 return result
                 
             # Calculate regime features
-            features = self._calculate_regime_features(df)
+            features = self._calculate_regime_features(df, symbol)
             
             # Regime classification logic
             regime, confidence = self._classify_regime(features)
@@ -53,83 +55,39 @@ class MarketRegimeDetector:
             # Return safe fallback
             return {'regime': 'stable', 'confidence': 0.5, 'features': {}, 'recommendation': 'Error in regime detection'}
     
-    def _calculate_regime_features(self, df):
-        """Calculate statistical features for regime detection"""
-        returns = df['close'].pct_change().dropna()
-        prices = df['close']
+    def _calculate_regime_features(self, df, symbol=None):
+        """Calculate statistical features for regime detection (shared regime statistics engine)"""
+        stats = get_regime_stats_engine().get_stats(df, symbol)
         
         # Trend features
-        ma_short = prices.rolling(10).mean()
-        ma_long = prices.rolling(50).mean()
-        trend_strength = (ma_short.iloc[-1] - ma_long.iloc[-1]) / ma_long.iloc[-1]
+        trend_strength = (stats['ma_10'] - stats['ma_50']) / stats['ma_50']
         
         # Volatility features  
-        volatility = returns.rolling(20).std().iloc[-1]
-        volatility_regime = volatility > returns.std() * 1.5
+        volatility = stats['vol_20']
+        volatility_regime = volatility > stats['returns_std'] * 1.5
         
         # Mean reversion features
-        bollinger_upper = prices.rolling(20).mean() + 2 * prices.rolling(20).std()
-        bollinger_lower = prices.rolling(20).mean() - 2 * prices.rolling(20).std()
-        bb_position = (prices.iloc[-1] - bollinger_lower.iloc[-1]) / (bollinger_upper.iloc[-1] - bollinger_lower.iloc[-1])
-        
-        # Momentum features
-        momentum_5 = (prices.iloc[-1] - prices.iloc[-6]) / prices.iloc[-6]
-        momentum_20 = (prices.iloc[-1] - prices.iloc[-21]) / prices.iloc[-21]
-        
-        # Market microstructure (approximated)
-        price_efficiency = self._calculate_price_efficiency(returns)
-        
-        # Hurst exponent for mean reversion detection
-        hurst_exp = self._calculate_hurst_exponent(returns.tail(50))
+        bollinger_lower = stats['ma_20'] - 2 * stats['close_std_20']
+        bb_position = (stats['close'] - bollinger_lower) / (4 * stats['close_std_20'])
         
         return {
             'trend_strength': trend_strength,
             'volatility': volatility,
             'volatility_regime': volatility_regime,
             'bb_position': bb_position,
-            'momentum_5': momentum_5,
-            'momentum_20': momentum_20,
-            'price_efficiency': price_efficiency,
-            'hurst_exponent': hurst_exp,
-            'volume_trend': self._calculate_volume_trend(df)
+            'momentum_5': stats['momentum_5'],
+            'momentum_20': stats['momentum_20'],
+            'price_efficiency': stats['price_efficiency'],
+            'hurst_exponent': stats['hurst_exponent'],
+            'volume_trend': self._calculate_volume_trend(stats)
         }
     
-    def _calculate_price_efficiency(self, returns):
-        """Calculate price efficiency ratio"""
-        if len(returns) < 10:
-            return 0.5
-            
-        # Price efficiency = actual move / sum of absolute moves
-        actual_move = abs(returns.sum())
-        total_moves = returns.abs().sum()
-        
-        return actual_move / total_moves if total_moves > 0 else 0.5
-    
-    def _calculate_hurst_exponent(self, returns):
-        """Calculate Hurst exponent for mean reversion detection"""
-        if len(returns) < 20:
-            return 0.5
-            
-        try:
-            # Simplified Hurst calculation
-            lags = range(2, min(20, len(returns)//2))
-            tau = [np.sqrt(np.mean((returns[lag:] - returns[:-lag])**2)) for lag in lags]
-            
-            # Linear regression in log space
-            m = np.polyfit(np.log(lags), np.log(tau), 1)[0]
-            return max(0.1, min(0.9, m))  # Constrain between 0.1 and 0.9
-        except:
-            return 0.5
-    
-    def _calculate_volume_trend(self, df):
+    def _calculate_volume_trend(self, stats):
         """Calculate volume trend indicator"""
-        if 'volume' not in df.columns:
+        if 'volume_ma_20' not in stats:
             return 0.0
             
-        volume = df['volume']
-        volume_ma = volume.rolling(20).mean()
-        
-        return (volume.iloc[-5:].mean() - volume_ma.iloc[-1]) / volume_ma.iloc[-1]
+        return (stats['volume_mean_5'] - stats['volume_ma_20']) / stats['volume_ma_20']
     
     def _classify_regime(self, features):
         """Classify market regime based on features"""
@@ -172,90 +130,80 @@ class MarketRegimeDetector:
 class CrossAssetCorrelationAnalyzer:
     """
     Cross-asset correlation analysis for crypto trading
-    Incorporates traditional market signals (DXY, Gold, SPY, etc.)
+    Reads the streaming EW correlation matrix over all watched pairs
     """
     
-    def __init__(self):
-        self.correlation_window = 30
-        self.traditional_assets = ['DXY', 'GOLD', 'SPY', 'VIX']
+    def __init__(self, correlation_engine=None):
+        self.correlation_engine = correlation_engine or get_correlation_engine()
+        self.high_correlation = 0.7
     
-    def analyze_cross_correlations(self, btc_returns):
+    def analyze_cross_correlations(self, btc_returns=None, symbol='BTC/USDT'):
         """
-        Analyze correlations between BTC and traditional assets
-        Note: In practice, you'd fetch real data for these assets
+        Analyze correlations between the traded pair and every other watched pair
         """
-        # For demo purposes, we'll simulate correlation analysis
-        # In production, integrate with APIs for traditional market data
-        
-        correlations = self._simulate_correlations()
+        correlations = self.correlation_engine.correlations_with(symbol)
         
         # Calculate correlation regime
         regime = self._determine_correlation_regime(correlations)
         
         # Generate cross-asset signals
-        signals = self._generate_cross_asset_signals(correlations, regime)
+        clusters = self.correlation_engine.clusters()
+        signals = self._generate_cross_asset_signals(symbol, correlations, clusters)
         
         return {
             'correlations': correlations,
             'regime': regime,
             'signals': signals,
+            'clusters': clusters,
             'risk_factors': self._assess_risk_factors(correlations)
         }
     
-    def _simulate_correlations(self):
-        """Simulate correlations (replace with real data in production)"""
-        return {
-            'DXY': np.random.uniform(-0.7, -0.3),  # BTC typically negatively correlated with USD
-            'GOLD': np.random.uniform(0.2, 0.6),   # Often positively correlated
-            'SPY': np.random.uniform(-0.2, 0.4),   # Variable correlation
-            'VIX': np.random.uniform(-0.5, -0.1)   # Usually negatively correlated
-        }
-    
     def _determine_correlation_regime(self, correlations):
         """Determine current correlation regime"""
+        if not correlations:
+            return 'insufficient_data'
+        
         avg_correlation = np.mean([abs(corr) for corr in correlations.values()])
         
         if avg_correlation > 0.6:
-            return 'high_correlation'  # Risk-on/risk-off regime
+            return 'high_correlation'  # Market-wide risk-on/risk-off regime
         elif avg_correlation < 0.3:
-            return 'low_correlation'   # Crypto-specific regime
+            return 'low_correlation'   # Pair-specific regime
         else:
             return 'moderate_correlation'
     
-    def _generate_cross_asset_signals(self, correlations, regime):
+    def _generate_cross_asset_signals(self, symbol, correlations, clusters):
         """Generate signals based on cross-asset analysis"""
         signals = []
         
-        # DXY signal (strong USD typically bearish for crypto)
-        if correlations['DXY'] < -0.5:
-            signals.append({
-                'asset': 'DXY',
-                'signal': 'bearish' if correlations['DXY'] < -0.6 else 'neutral',
-                'strength': abs(correlations['DXY']),
-                'reasoning': 'Strong USD pressure on crypto'
-            })
-        
-        # VIX signal (high fear can be contrarian bullish)
-        if correlations['VIX'] < -0.4:
+        # Pair moving with a tight cluster: its moves are market beta, not idiosyncratic
+        for cluster in clusters:
+            if symbol in cluster:
+                signals.append({
+                    'asset': ', '.join(s for s in cluster if s != symbol),
+                    'signal': 'crowded_beta',
+                    'strength': np.mean([correlations.get(s, 0.0) for s in cluster if s != symbol]),
+                    'reasoning': f'{symbol} trades in a correlated cluster of {len(cluster)} pairs'
+                })
+        
+        # Decoupled pair (low correlation to everything) offers diversification
+        if correlations and max(abs(c) for c in correlations.values()) < 0.3:
             signals.append({
-                'asset': 'VIX',
-                'signal': 'contrarian_bullish',
-                'strength': abs(correlations['VIX']),
-                'reasoning': 'High fear potentially oversold condition'
+                'asset': symbol,
+                'signal': 'decoupled',
+                'strength': 1 - max(abs(c) for c in correlations.values()),
+                'reasoning': 'Pair moving independently of the watched market'
             })
         
         return signals
     
     def _assess_risk_factors(self, correlations):
         """Assess systemic risk factors"""
-        risk_score = 0
-        factors = []
+        factors = [f'High correlation with {asset}' for asset, corr in correlations.items()
+                   if abs(corr) > self.high_correlation]
         
-        # High correlation with traditional assets increases systemic risk
-        for asset, corr in correlations.items():
-            if abs(corr) > 0.7:
-                risk_score += 0.25
-                factors.append(f'High correlation with {asset}')
+        # Share of watched pairs moving with this one
+        risk_score = len(factors) / len(correlations) if correlations else 0.0
         
         return {
             'risk_score': min(1.0, risk_score),
@@ -599,16 +547,16 @@ class InstitutionalStrategyManager:
         self.ml_generator = MachineLearningSignalGenerator()
         self.var_calculator = ValueAtRiskCalculator()
         
-    def get_institutional_signal(self, df, portfolio_value=1000, base_position_size=100):
+    def get_institutional_signal(self, df, portfolio_value=1000, base_position_size=100, symbol='BTC/USDT'):
         """
-        Generate comprehensive institutional-grade trading signal
+        Generate comprehensive institutional-grade trading signal for the traded `symbol`
         """
         # 1. Market Regime Analysis
         regime_analysis = self.regime_detector.detect_regime(df)
         
         # 2. Cross-Asset Correlation Analysis
         btc_returns = df['close'].pct_change().dropna()
-        correlation_analysis = self.correlation_analyzer.analyze_cross_correlations(btc_returns)
+        correlation_analysis = self.correlation_analyzer.analyze_cross_correlations(btc_returns, symbol=symbol)
         
         # 3. Machine Learning Signal
         ml_signal = self.ml_generator.generate_ml_signal(df)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+🛰️ INTELLIGENCE REFRESHER
+Keeps Phase 2/3 intelligence (free APIs, on-chain, sentiment, alternative data)
+warm in the background for the active pair and the top scan candidates, each
+source on its own cadence. The trading path only reads the latest snapshot
+and its age, so an expired provider cache never puts an order behind external
+HTTP calls.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from log_utils import log_message
+
+DEFAULT_INTELLIGENCE_CONFIG = {
+    'enabled': True,
+    'top_n_candidates': 5,          # Scan candidates kept warm besides the active pair
+    'refresh_seconds': {            # Per-source cadence; matches each provider's own cache TTL
+        'free_crypto': 60,
+        'onchain': 60,
+        'onchain_volume': 60,
+        'phase2': 300,
+        'phase2_alerts': 300,
+        'sentiment': 300,
+        'alternative_data': 1800,
+    },
+    'default_refresh_seconds': 300,
+    'stale_factor': 3.0,            # Snapshots older than stale_factor × cadence are not served
+    'forget_after_seconds': 1800,   # Symbols read on the trading path stay warm this long
+    'failure_retry_seconds': 30,    # Back-off after a failed fetch
+    'max_workers': 3,
+}
+
+
+class IntelligenceSnapshot:
+    """Latest result of one source for one symbol"""
+
+    __slots__ = ('source', 'symbol', 'data', 'fetched_at', 'duration', 'error', 'failures')
+
+    def __init__(self, source: str, symbol: str, data: Any = None, fetched_at: Optional[float] = None):
+        self.source = source
+        self.symbol = symbol
+        self.data = data
+        self.fetched_at = fetched_at
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self.failures = 0
+
+    def age(self, now: float) -> Optional[float]:
+        return None if self.fetched_at is None else now - self.fetched_at
+
+
+class IntelligenceRefresher:
+    def __init__(self, config: Optional[Dict] = None, clock: Optional[Callable[[], float]] = None):
+        self.config = dict(DEFAULT_INTELLIGENCE_CONFIG)
+        self.config.update(config or {})
+        self.config['refresh_seconds'] = {**DEFAULT_INTELLIGENCE_CONFIG['refresh_seconds'],
+                                          **(config or {}).get('refresh_seconds', {})}
+        self.clock = clock or (lambda: time.time())
+        self.sources: Dict[str, Tuple[Callable[[str], Any], float]] = {}
+        self.snapshots: Dict[Tuple[str, str], IntelligenceSnapshot] = {}
+        self.next_due: Dict[Tuple[str, str], float] = {}
+        self.active_symbol: Optional[str] = None
+        self.candidates: List[str] = []
+        self.last_read: Dict[str, float] = {}
+        self.misses = 0
+        self.lock = threading.RLock()
+        self._in_flight: Set[Tuple[str, str]] = set()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------- registration
+
+    def register(self, source: str, fetch: Callable[[str], Any], refresh_seconds: Optional[float] = None):
+        """`fetch(symbol)` is the provider call the trading path used to make inline"""
+        seconds = refresh_seconds or self.config['refresh_seconds'].get(source, self.config['default_refresh_seconds'])
+        with self.lock:
+            self.sources[source] = (fetch, float(seconds))
+
+    def set_symbols(self, active: Optional[str] = None, candidates: Optional[Sequence[str]] = None):
+        """Active pair is refreshed first; candidates are trimmed to top_n_candidates"""
+        with self.lock:
+            if active is not None and active != self.active_symbol:
+                self.active_symbol = active
+                self._wake.set()
+            if candidates is not None:
+                self.candidates = [s for s in candidates if s != self.active_symbol][:int(self.config['top_n_candidates'])]
+
+    def wanted_symbols(self, now: Optional[float] = None) -> List[str]:
+        now = self.clock() if now is None else now
+        with self.lock:
+            symbols = ([self.active_symbol] if self.active_symbol else []) + list(self.candidates)
+            recent = [s for s, t in sorted(self.last_read.items(), key=lambda kv: -kv[1])
+                      if now - t <= self.config['forget_after_seconds']]
+            self.last_read = {s: self.last_read[s] for s in recent}
+        return list(dict.fromkeys(symbols + recent))
+
+    # ------------------------------------------------------------- trading path
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def read(self, source: str, symbol: str) -> Tuple[Any, Optional[float]]:
+        """(latest data, age in seconds) without any I/O; (None, None) before the first fetch"""
+        now = self.clock()
+        with self.lock:
+            self.last_read[symbol] = now
+            snapshot = self.snapshots.get((source, symbol))
+        if snapshot is None or snapshot.fetched_at is None:
+            return None, None
+        return snapshot.data, snapshot.age(now)
+
+    def get(self, source: str, symbol: str, max_age: Optional[float] = None) -> Any:
+        """
+        Latest snapshot for the trading path, or None while it is missing or stale.
+        Without the background thread (replay, tools) the provider is called inline as before.
+        """
+        if not self.running:
+            return self.refresh(source, symbol, raise_errors=True).data
+
+        data, age = self.read(source, symbol)
+        if max_age is None:
+            max_age = self.sources.get(source, (None, self.config['default_refresh_seconds']))[1] \
+                * self.config['stale_factor']
+        if age is None or age > max_age:
+            self.misses += 1
+            with self.lock:
+                self.next_due.setdefault((source, symbol), self.clock())    # First read: fetch now; failures keep back-off
+            self._wake.set()
+            return None
+        return data
+
+    # ------------------------------------------------------------- refreshing
+
+    def refresh(self, source: str, symbol: str, raise_errors: bool = False) -> IntelligenceSnapshot:
+        """Call the provider now and store the result; failures keep the previous data"""
+        fetch, seconds = self.sources[source]
+        key = (source, symbol)
+        with self.lock:
+            snapshot = self.snapshots.setdefault(key, IntelligenceSnapshot(source, symbol))
+        started = time.perf_counter()
+        try:
+            data = fetch(symbol)
+        except Exception as e:
+            with self.lock:
+                snapshot.error = str(e)
+                snapshot.failures += 1
+                self.next_due[key] = self.clock() + self.config['failure_retry_seconds']
+            if raise_errors:
+                raise
+            log_message(f"⚠️ Intelligence refresh {source} {symbol} failed: {e}")
+            return snapshot
+        with self.lock:
+            snapshot.data = data
+            snapshot.fetched_at = self.clock()
+            snapshot.duration = time.perf_counter() - started
+            snapshot.error = None
+            self.next_due[key] = snapshot.fetched_at + seconds
+        return snapshot
+
+    def due_jobs(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """(source, symbol) pairs whose snapshot is due, active pair first"""
+        now = self.clock() if now is None else now
+        symbols = self.wanted_symbols(now)
+        with self.lock:
+            return [(source, symbol) for symbol in symbols for source in self.sources
+                    if self.next_due.get((source, symbol), 0.0) <= now and (source, symbol) not in self._in_flight]
+
+    def refresh_due(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """Refresh every due snapshot inline; the background thread does the same through a pool"""
+        jobs = self.due_jobs(now)
+        for source, symbol in jobs:
+            self.refresh(source, symbol)
+        return jobs
+
+    def _run_job(self, key: Tuple[str, str]):
+        try:
+            self.refresh(*key)
+        finally:
+            with self.lock:
+                self._in_flight.discard(key)
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=int(self.config['max_workers']),
+                                thread_name_prefix='intelligence') as pool:
+            while not self._stop.is_set():
+                for key in self.due_jobs():
+                    with self.lock:
+                        self._in_flight.add(key)
+                    pool.submit(self._run_job, key)
+                wanted = set(self.wanted_symbols())
+                with self.lock:
+                    upcoming = [t for k, t in self.next_due.items() if k[1] in wanted and k not in self._in_flight]
+                timeout = min([t - self.clock() for t in upcoming] + [1.0])
+                self._wake.wait(max(0.05, timeout))
+                self._wake.clear()
+
+    def start(self) -> bool:
+        if not self.config['enabled'] or not self.sources:
+            return False
+        if self.running:
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='intelligence-refresher', daemon=True)
+        self._thread.start()
+        log_message(f"🛰️ Intelligence refresher: {', '.join(self.sources)} kept warm in the background")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def status(self) -> Dict:
+        now = self.clock()
+        with self.lock:
+            ages = {f"{source}:{symbol}": round(s.age(now), 1) for (source, symbol), s in self.snapshots.items()
+                    if s.fetched_at is not None}
+            errors = {f"{source}:{symbol}": s.error for (source, symbol), s in self.snapshots.items() if s.error}
+        return {'running': self.running, 'sources': list(self.sources), 'symbols': self.wanted_symbols(now),
+                'ages': ages, 'errors': errors, 'misses': self.misses}
+
+
+_intelligence_refresher: Optional[IntelligenceRefresher] = None
+
+
+def get_intelligence_refresher(config: Optional[Dict] = None, **kwargs) -> IntelligenceRefresher:
+    """Get the process-wide intelligence refresher"""
+    global _intelligence_refresher
+    if _intelligence_refresher is None:
+        _intelligence_refresher = IntelligenceRefresher(config, **kwargs)
+    return _intelligence_refresher
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+📚 LOCAL L2 ORDER BOOK
+Keeps a live order book per active symbol from one REST snapshot plus the
+exchange diff-depth stream (Binance snapshot/diff sync rules, with
+sequence-gap detection and automatic resync). Best bid/ask, depth within
+N bps, imbalance and slippage estimates are then local reads instead of a
+fetch_order_book round trip before every order. Listeners registered with
+add_listener() get the mid price after every update to a synced book.
+"""
+
+import asyncio
+import bisect
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from log_utils import log_message
+
+DEFAULT_ORDER_BOOK_CONFIG = {
+    'enabled': True,
+    'ws_url': 'wss://stream.binance.us:9443/stream',
+    'update_speed': '100ms',            # depth@100ms or depth@1000ms
+    'snapshot_limit': 1000,
+    'max_buffered_events': 2000,        # Diffs held while a snapshot is in flight
+    'max_staleness_seconds': 10,        # No stream traffic for this long -> REST fallback
+    'reconnect_delay_seconds': 2,
+    'default_depth_bps': 10,
+}
+
+
+class L2OrderBook:
+    """One symbol's price levels, kept in sorted price arrays for O(log n) updates"""
+
+    __slots__ = ('symbol', 'bids', 'asks', 'bid_prices', 'ask_prices', 'last_update_id', 'synced',
+                 'buffer', 'max_buffered', 'updated_at', 'resyncs', 'lock', 'clock')
+
+    def __init__(self, symbol: str, max_buffered: int = 2000, clock: Optional[Callable[[], float]] = None):
+        self.symbol = symbol
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.bid_prices: List[float] = []       # Ascending: best bid is the last element
+        self.ask_prices: List[float] = []       # Ascending: best ask is the first element
+        self.last_update_id = 0
+        self.synced = False
+        self.buffer: List[Dict] = []
+        self.max_buffered = max_buffered
+        self.updated_at = 0.0
+        self.resyncs = 0
+        self.lock = threading.RLock()
+        self.clock = clock or (lambda: time.time())
+
+    # ------------------------------------------------------------- sync
+
+    def load_snapshot(self, snapshot: Dict) -> bool:
+        """Install a REST snapshot (ccxt format, 'nonce' = lastUpdateId) and replay buffered diffs"""
+        with self.lock:
+            self.bids.clear()
+            self.asks.clear()
+            self._set_levels(self.bids, self.bid_prices, snapshot.get('bids') or [], reset=True)
+            self._set_levels(self.asks, self.ask_prices, snapshot.get('asks') or [], reset=True)
+            self.last_update_id = int(snapshot.get('nonce') or 0)
+            self.synced = True
+            self.updated_at = self.clock()
+            buffered, self.buffer = self.buffer, []
+            for event in buffered:
+                if not self.apply_diff(event):
+                    return False
+            return True
+
+    def apply_diff(self, event: Dict) -> bool:
+        """Apply one depthUpdate; returns False when a sequence gap forces a resync"""
+        with self.lock:
+            if not self.synced:
+                self.buffer.append(event)
+                if len(self.buffer) > self.max_buffered:
+                    del self.buffer[0]
+                return True
+
+            first_id, final_id = int(event['U']), int(event['u'])
+            if final_id <= self.last_update_id:
+                return True                                 # Already contained in the snapshot
+            if first_id > self.last_update_id + 1:
+                log_message(f"⚠️ {self.symbol} depth gap: expected {self.last_update_id + 1}, got {first_id} - resyncing")
+                self.invalidate()
+                return False
+
+            self._set_levels(self.bids, self.bid_prices, event.get('b') or [])
+            self._set_levels(self.asks, self.ask_prices, event.get('a') or [])
+            self.last_update_id = final_id
+            self.updated_at = self.clock()
+            return True
+
+    def invalidate(self):
+        with self.lock:
+            self.synced = False
+            self.buffer = []
+            self.resyncs += 1
+
+    @staticmethod
+    def _set_levels(levels: Dict[float, float], prices: List[float], updates, reset: bool = False):
+        if reset:
+            prices.clear()
+        for update in updates:
+            price, quantity = float(update[0]), float(update[1])
+            if quantity == 0.0:
+                if levels.pop(price, None) is not None:
+                    del prices[bisect.bisect_left(prices, price)]
+            else:
+                if price not in levels:
+                    bisect.insort(prices, price)
+                levels[price] = quantity
+
+    # ------------------------------------------------------------- reads
+
+    def best_bid(self) -> Optional[float]:
+        return self.bid_prices[-1] if self.bid_prices else None
+
+    def best_ask(self) -> Optional[float]:
+        return self.ask_prices[0] if self.ask_prices else None
+
+    def mid(self) -> Optional[float]:
+        with self.lock:
+            if not self.bid_prices or not self.ask_prices:
+                return None
+            return (self.bid_prices[-1] + self.ask_prices[0]) / 2
+
+    def spread_bps(self) -> Optional[float]:
+        with self.lock:
+            mid = self.mid()
+            return (self.ask_prices[0] - self.bid_prices[-1]) / mid * 10000 if mid else None
+
+    def depth_within(self, bps: float) -> Dict[str, float]:
+        """Quote-currency depth resting within `bps` of mid on each side"""
+        with self.lock:
+            mid = self.mid()
+            if not mid:
+                return {'bid': 0.0, 'ask': 0.0}
+            low = bisect.bisect_left(self.bid_prices, mid * (1 - bps / 10000))
+            high = bisect.bisect_right(self.ask_prices, mid * (1 + bps / 10000))
+            return {'bid': sum(p * self.bids[p] for p in self.bid_prices[low:]),
+                    'ask': sum(p * self.asks[p] for p in self.ask_prices[:high])}
+
+    def imbalance(self, bps: float = 10) -> float:
+        """(bid - ask) / (bid + ask) depth within `bps`; +1 all bids, -1 all asks"""
+        depth = self.depth_within(bps)
+        total = depth['bid'] + depth['ask']
+        return (depth['bid'] - depth['ask']) / total if total > 0 else 0.0
+
+    def estimate_slippage(self, side: str, amount: Optional[float] = None,
+                          quote_amount: Optional[float] = None) -> Dict:
+        """Walk the opposite side for a market order of `amount` base (or `quote_amount` quote)"""
+        with self.lock:
+            mid = self.mid()
+            buying = side.lower() == 'buy'
+            prices = self.ask_prices if buying else self.bid_prices[::-1]
+            levels = self.asks if buying else self.bids
+            remaining_base, remaining_quote = amount, quote_amount
+            filled = cost = 0.0
+            worst = None
+            walked = 0
+            for price in prices:
+                available = levels[price]
+                take = available
+                if remaining_base is not None:
+                    take = min(available, remaining_base)
+                    remaining_base -= take
+                elif remaining_quote is not None:
+                    take = min(available, remaining_quote / price)
+                    remaining_quote -= take * price
+                filled += take
+                cost += take * price
+                worst = price
+                walked += 1
+                if (remaining_base is not None and remaining_base <= 1e-12) or \
+                        (remaining_quote is not None and remaining_quote <= 1e-9):
+                    break
+
+            average = cost / filled if filled else None
+            slippage_bps = None
+            if average and mid:
+                slippage_bps = (average - mid) / mid * 10000 if buying else (mid - average) / mid * 10000
+            complete = (remaining_base is not None and remaining_base <= 1e-12) or \
+                       (remaining_quote is not None and remaining_quote <= 1e-9)
+            return {'side': side.lower(), 'filled': filled, 'cost': cost, 'average_price': average,
+                    'worst_price': worst, 'slippage_bps': slippage_bps, 'levels': walked, 'complete': complete}
+
+    def to_ccxt(self, limit: Optional[int] = None) -> Dict:
+        """Snapshot in ccxt's fetch_order_book layout, so existing callers need no changes"""
+        with self.lock:
+            bids = self.bid_prices[-limit:] if limit else self.bid_prices
+            asks = self.ask_prices[:limit] if limit else self.ask_prices
+            return {'symbol': self.symbol,
+                    'bids': [[p, self.bids[p]] for p in reversed(bids)],
+                    'asks': [[p, self.asks[p]] for p in asks],
+                    'timestamp': int(self.updated_at * 1000),
+                    'nonce': self.last_update_id,
+                    'source': 'local'}
+
+
+class OrderBookManager:
+    """
+    Runs the diff-depth stream in a daemon thread (own asyncio loop) and
+    serves local books; anything not live falls back to fetch_order_book
+    """
+
+    def __init__(self, exchange, config: Optional[Dict] = None, api_call: Optional[Callable] = None,
+                 clock: Optional[Callable[[], float]] = None):
+        self.exchange = exchange
+        self.config = dict(DEFAULT_ORDER_BOOK_CONFIG)
+        self.config.update(config or {})
+        self.api_call = api_call or (lambda func, *args, **kwargs: func(*args, **kwargs))
+        self.clock = clock or (lambda: time.time())
+        self.books: Dict[str, L2OrderBook] = {}
+        self.streams: Dict[str, str] = {}           # 'btcusdt@depth@100ms' -> 'BTC/USDT'
+        self.lock = threading.RLock()
+        self.connected = False
+        self.last_message_at = 0.0
+        self.rest_fallbacks = 0
+        self._resyncing: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._request_id = 0
+        self.listeners: List[Callable[[str, float], None]] = []
+
+    def _stream_name(self, symbol: str) -> str:
+        return f"{symbol.replace('/', '').lower()}@depth@{self.config['update_speed']}"
+
+    # ------------------------------------------------------------- symbols
+
+    def track(self, symbol: str) -> L2OrderBook:
+        """Start maintaining `symbol` (idempotent); the book goes live after its first snapshot"""
+        with self.lock:
+            book = self.books.get(symbol)
+            if book is None:
+                book = L2OrderBook(symbol, int(self.config['max_buffered_events']), self.clock)
+                self.books[symbol] = book
+                stream = self._stream_name(symbol)
+                self.streams[stream] = symbol
+                if self._loop is not None and self.connected:
+                    asyncio.run_coroutine_threadsafe(self._send('SUBSCRIBE', [stream]), self._loop)
+            return book
+
+    def untrack(self, symbol: str):
+        with self.lock:
+            if self.books.pop(symbol, None) is None:
+                return
+            stream = self._stream_name(symbol)
+            self.streams.pop(stream, None)
+            if self._loop is not None and self.connected:
+                asyncio.run_coroutine_threadsafe(self._send('UNSUBSCRIBE', [stream]), self._loop)
+
+    def book(self, symbol: str) -> Optional[L2OrderBook]:
+        """The live local book, or None when it cannot be trusted right now"""
+        book = self.books.get(symbol)
+        if book is None or not book.synced or not self.connected:
+            return None
+        if self.clock() - self.last_message_at > float(self.config['max_staleness_seconds']):
+            return None
+        return book
+
+    def get_order_book(self, symbol: str, limit: Optional[int] = None) -> Dict:
+        """Drop-in for exchange.fetch_order_book: local when live, REST otherwise"""
+        book = self.book(symbol)
+        if book is not None:
+            return book.to_ccxt(limit)
+        self.rest_fallbacks += 1
+        if limit:
+            snapshot = self.api_call(self.exchange.fetch_order_book, symbol, limit)
+        else:
+            snapshot = self.api_call(self.exchange.fetch_order_book, symbol)
+        if snapshot is not None:
+            snapshot['source'] = 'rest'
+        return snapshot
+
+    # ------------------------------------------------------------- listeners
+
+    def add_listener(self, callback: Callable[[str, float], None]):
+        """callback(symbol, mid) after every update that leaves a book synced"""
+        self.listeners.append(callback)
+
+    def _publish(self, book: L2OrderBook):
+        if not self.listeners or not book.synced:
+            return
+        mid = book.mid()
+        if mid is None:
+            return
+        for callback in list(self.listeners):
+            try:
+                callback(book.symbol, mid)
+            except Exception as e:
+                log_message(f"⚠️ Order book listener failed for {book.symbol}: {e}")
+
+    # ------------------------------------------------------------- stream handling
+
+    def handle_message(self, message: Dict) -> Optional[str]:
+        """Route one combined-stream message; returns the symbol that needs a snapshot, if any"""
+        self.last_message_at = self.clock()
+        data = message.get('data') if isinstance(message, dict) else None
+        if not data or data.get('e') != 'depthUpdate':
+            return None
+        symbol = self.streams.get(message.get('stream'))
+        book = self.books.get(symbol) if symbol else None
+        if book is None:
+            return None
+        book.apply_diff(data)
+        if not book.synced:
+            if symbol not in self._resyncing:
+                self._resyncing.add(symbol)
+                return symbol
+            return None
+        self._publish(book)
+        return None
+
+    def resync(self, symbol: str) -> bool:
+        """Fetch a REST snapshot and replay the buffered diffs onto it"""
+        book = self.books.get(symbol)
+        try:
+            if book is None:
+                return False
+            snapshot = self.api_call(self.exchange.fetch_order_book, symbol, int(self.config['snapshot_limit']))
+            if not snapshot:
+                return False
+            if book.load_snapshot(snapshot):
+                log_message(f"📚 {symbol} local order book synced at update {book.last_update_id}")
+                self._publish(book)
+                return True
+            return False
+        except Exception as e:
+            log_message(f"⚠️ {symbol} order book snapshot failed: {e}")
+            return False
+        finally:
+            self._resyncing.discard(symbol)
+
+    # ------------------------------------------------------------- thread
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self):
+        if self.running or not self.config.get('enabled', True):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name='order-book-stream',
+                                        daemon=True)
+        self._thread.start()
+        log_message(f"📚 Local order book stream started for {', '.join(self.books) or 'no symbols yet'}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    async def _send(self, method: str, streams: List[str]):
+        if self._ws is None or not streams:
+            return
+        self._request_id += 1
+        await self._ws.send_json({'method': method, 'params': streams, 'id': self._request_id})
+
+    async def _run(self):
+        import aiohttp
+
+        self._loop = asyncio.get_running_loop()
+        while not self._stop_event.is_set():
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.config['ws_url'], heartbeat=30) as ws:
+                        self._ws = ws
+                        self.connected = True
+                        with self.lock:
+                            streams = list(self.streams)
+                        await self._send('SUBSCRIBE', streams)
+                        async for msg in ws:
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                    break
+                                continue
+                            symbol = self.handle_message(json.loads(msg.data))
+                            if symbol:
+                                self._loop.run_in_executor(None, self.resync, symbol)
+            except Exception as e:
+                log_message(f"⚠️ Order book stream error: {e}")
+            finally:
+                self.connected = False
+                self._ws = None
+                for book in list(self.books.values()):
+                    book.invalidate()                       # Anything missed while down is a gap
+            if not self._stop_event.is_set():
+                await asyncio.sleep(float(self.config['reconnect_delay_seconds']))
+
+
+_order_book_manager: Optional[OrderBookManager] = None
+
+
+def get_order_book_manager(exchange, config: Optional[Dict] = None, **kwargs) -> OrderBookManager:
+    """Get the process-wide local order book manager"""
+    global _order_book_manager
+    if _order_book_manager is None:
+        _order_book_manager = OrderBookManager(exchange, config, **kwargs)
+    return _order_book_manager
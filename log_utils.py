@@ -8,6 +8,7 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 # Unified log files at workspace root
 LOG_FILE = os.path.join(BASE_DIR, 'trade_log.csv')
 BOT_LOG_FILE = os.path.join(BASE_DIR, 'bot_log.txt')
+MESSAGE_LOG_FILE = "bot_log.txt"  # log_message() target; tests point it elsewhere
 
 def init_log():
     if not os.path.exists(LOG_FILE):
@@ -315,7 +316,7 @@ def log_message(message):
     
     # Optionally write to a separate log file
     try:
-        with open("bot_log.txt", "a", encoding="utf-8") as f:
+        with open(MESSAGE_LOG_FILE, "a", encoding="utf-8") as f:
             f.write(formatted_message + "\n")
     except:
         pass  # Don't fail if we can't write to log file
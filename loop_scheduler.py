@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+⏱️ LOOP SCHEDULER
+Replaces the main loop's fixed sleep with events: strategy evaluation wakes on
+1m/5m candle closes, protection wakes on price-threshold crossings or explicit
+triggers, and background jobs (reports, scans, syncs) run on their own jittered
+cadences in priority order while the loop is idle.
+"""
+
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from log_utils import log_message
+
+DEFAULT_SCHEDULER_CONFIG = {
+    'enabled': True,
+    'evaluation_timeframes': ['1m', '5m'],
+    'candle_settle_seconds': 2.0,       # Give the exchange a moment to publish the closed bar
+    'max_idle_seconds': 300,            # Evaluate at least this often even without events
+    'price_check_seconds': 1.0,         # How often armed price thresholds are checked
+    'default_jitter_seconds': 1.0,      # Spreads background jobs so they don't stack on a boundary
+}
+
+TIMEFRAME_SECONDS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400, '1d': 86400}
+
+
+class ScheduledTask:
+    """A background job on its own cadence; lower priority number runs first"""
+
+    __slots__ = ('name', 'fn', 'interval', 'priority', 'jitter', 'slot', 'next_run', 'runs', 'failures',
+                 'last_seconds')
+
+    def __init__(self, name: str, fn: Callable[[], None], interval: float, priority: int, jitter: float,
+                 slot: float, next_run: float):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.priority = priority
+        self.jitter = jitter
+        self.slot = slot                # Un-jittered cadence grid
+        self.next_run = next_run
+        self.runs = 0
+        self.failures = 0
+        self.last_seconds = 0.0
+
+
+class LoopScheduler:
+    def __init__(self, config: Optional[Dict] = None, clock: Optional[Callable[[], float]] = None,
+                 wait: Optional[Callable[[float], None]] = None, rng: Optional[random.Random] = None,
+                 price_source: Optional[Callable[[str], Optional[float]]] = None):
+        self.config = dict(DEFAULT_SCHEDULER_CONFIG)
+        self.config.update(config or {})
+        self.clock = clock or (lambda: time.time())
+        self.rng = rng or random.Random()
+        self.price_source = price_source
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self.thresholds: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        self.wakeups: Dict[str, int] = {}
+        self.lock = threading.RLock()
+        self._event = threading.Event()
+        self._triggers: List[str] = []
+        self._wait = wait or self._event.wait
+
+    # ------------------------------------------------------------- registration
+
+    def every(self, name: str, seconds: float, fn: Callable[[], None], priority: int = 5,
+              jitter: Optional[float] = None, run_now: bool = False):
+        """Run `fn` roughly every `seconds` while the loop is idle"""
+        jitter = float(self.config['default_jitter_seconds'] if jitter is None else jitter)
+        slot = self.clock() + (0.0 if run_now else seconds)
+        first = slot if run_now else slot + self.rng.uniform(0, jitter)
+        with self.lock:
+            self.tasks[name] = ScheduledTask(name, fn, float(seconds), priority, jitter, slot, first)
+
+    def cancel(self, name: str):
+        with self.lock:
+            self.tasks.pop(name, None)
+
+    def set_price_thresholds(self, symbol: str, below: Optional[float] = None, above: Optional[float] = None):
+        """Wake the loop as soon as `symbol` trades at/below `below` or at/above `above`"""
+        with self.lock:
+            if below is None and above is None:
+                self.thresholds.pop(symbol, None)
+            else:
+                self.thresholds[symbol] = (below, above)
+
+    def clear_price_thresholds(self):
+        with self.lock:
+            self.thresholds.clear()
+
+    def trigger(self, reason: str):
+        """Wake the loop now (thread-safe), e.g. from a fill or a stop that went missing"""
+        with self.lock:
+            self._triggers.append(reason)
+            self._event.set()
+
+    # ------------------------------------------------------------- timing
+
+    def next_candle_close(self, timeframe: str, now: Optional[float] = None) -> float:
+        """Settled close time of the candle that is currently forming"""
+        seconds = TIMEFRAME_SECONDS[timeframe]
+        now = self.clock() if now is None else now
+        settle = float(self.config['candle_settle_seconds'])
+        close = math.floor((now - settle) / seconds) * seconds + seconds + settle
+        return close
+
+    def next_evaluation(self, now: Optional[float] = None) -> Tuple[float, str]:
+        now = self.clock() if now is None else now
+        return min((self.next_candle_close(tf, now), f"candle:{tf}")
+                   for tf in self.config['evaluation_timeframes'])
+
+    def _wake_target(self, start: float, max_wait: Optional[float], hold: Optional[float]) -> Tuple[float, str]:
+        if hold is not None:
+            return start + max(0.0, hold), 'hold'
+        wake_at, reason = self.next_evaluation(start)
+        cap = start + float(self.config['max_idle_seconds'] if max_wait is None else max_wait)
+        return (cap, 'idle') if cap < wake_at else (wake_at, reason)
+
+    def planned_wait(self, max_wait: Optional[float] = None, hold: Optional[float] = None) -> float:
+        """Longest the next wait_for_evaluation can idle (heartbeat deadlines)"""
+        now = self.clock()
+        return self._wake_target(now, max_wait, hold)[0] - now
+
+    # ------------------------------------------------------------- running
+
+    def run_due(self, now: Optional[float] = None) -> List[str]:
+        """Run every due background job once, highest priority first"""
+        now = self.clock() if now is None else now
+        with self.lock:
+            due = sorted((t for t in self.tasks.values() if t.next_run <= now),
+                         key=lambda t: (t.priority, t.next_run))
+        ran = []
+        for task in due:
+            started = time.perf_counter()
+            try:
+                task.fn()
+            except Exception as e:
+                task.failures += 1
+                log_message(f"⚠️ Scheduled task {task.name} failed: {e}")
+            task.last_seconds = time.perf_counter() - started
+            task.runs += 1
+            # Next slot on the task's own grid, so neither jitter nor a slow run drifts the cadence
+            task.slot = max(task.slot + task.interval, now)
+            task.next_run = task.slot + self.rng.uniform(0, task.jitter)
+            ran.append(task.name)
+        return ran
+
+    def _check_prices(self) -> Optional[str]:
+        if not self.price_source:
+            return None
+        with self.lock:
+            armed = list(self.thresholds.items())
+        for symbol, (below, above) in armed:
+            try:
+                price = self.price_source(symbol)
+            except Exception:
+                price = None
+            if not price:
+                continue
+            if below is not None and price <= below:
+                reason = f"price:{symbol}<={below:.6g}"
+            elif above is not None and price >= above:
+                reason = f"price:{symbol}>={above:.6g}"
+            else:
+                continue
+            self.set_price_thresholds(symbol)           # One wake per crossing; the loop re-arms
+            return reason
+        return None
+
+    def wait_for_evaluation(self, max_wait: Optional[float] = None, hold: Optional[float] = None) -> str:
+        """
+        Idle until the next evaluation event and return its reason.
+        `hold` is a fixed pause (cooldowns) that only protection events may cut short;
+        otherwise the loop wakes at the next settled candle close, capped by `max_wait`.
+        """
+        wake_at, reason = self._wake_target(self.clock(), max_wait, hold)
+
+        while True:
+            with self.lock:
+                if self._triggers:
+                    reason = f"trigger:{self._triggers.pop(0)}"
+                    if not self._triggers:
+                        self._event.clear()
+                    break
+            crossed = self._check_prices()
+            if crossed:
+                reason = crossed
+                break
+            now = self.clock()
+            if now >= wake_at:
+                break
+            self.run_due(now)
+
+            now = self.clock()
+            with self.lock:
+                next_task = min((t.next_run for t in self.tasks.values()), default=wake_at)
+                armed = bool(self.thresholds) and self.price_source is not None
+            timeout = min(wake_at, next_task) - now
+            if armed:
+                timeout = min(timeout, float(self.config['price_check_seconds']))
+            if timeout > 0:
+                self._wait(timeout)
+
+        kind = reason.split(':')[0]
+        self.wakeups[kind] = self.wakeups.get(kind, 0) + 1
+        return reason
+
+
+_loop_scheduler: Optional[LoopScheduler] = None
+
+
+def get_loop_scheduler(config: Optional[Dict] = None, **kwargs) -> LoopScheduler:
+    """Get the process-wide loop scheduler"""
+    global _loop_scheduler
+    if _loop_scheduler is None:
+        _loop_scheduler = LoopScheduler(config, **kwargs)
+    return _loop_scheduler
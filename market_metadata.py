@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+📐 MARKET METADATA SERVICE
+Loads exchange markets once, keeps them in a local cache with a refresh TTL and
+precomputes per-symbol trading rules (tick size, step size, minimum quantity,
+minimum notional). Orders are quantized and validated locally, so building one
+costs no extra round trip and is never rejected for precision.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from log_utils import log_message
+
+DEFAULT_MARKET_METADATA_CONFIG = {
+    'cache_file': 'market_metadata_{exchange}.json',   # One cache per exchange id
+    'exchange_id': None,                # Names the cache when no sync exchange is attached
+    'ttl_seconds': 6 * 3600,            # Markets rarely change; refresh a few times a day
+    'retry_seconds': 60,                # Back-off between refresh attempts while stale
+    'default_min_amount': 0.00001,      # Limits for symbols the exchange did not describe
+    'default_min_notional': 10.0,
+}
+
+_EPSILON = 1e-9     # Absorbs float noise so 0.3 / 0.1 floors to 3 steps, not 2
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _increment(precision) -> Optional[float]:
+    """ccxt precision is a tick size (float, TICK_SIZE mode) or a number of decimals (int)"""
+    if precision is None:
+        return None
+    if isinstance(precision, int) and not isinstance(precision, bool):
+        return 10.0 ** -precision
+    value = _float(precision)
+    return value if value and value > 0 else None
+
+
+def _decimals(increment: float) -> int:
+    text = f"{increment:.12f}".rstrip('0')
+    return len(text.split('.')[1]) if '.' in text else 0
+
+
+class MarketRules:
+    """Precomputed order rules for one symbol"""
+
+    __slots__ = ('symbol', 'active', 'tick_size', 'step_size', 'min_amount', 'max_amount',
+                 'min_price', 'max_price', 'min_notional', 'price_decimals', 'amount_decimals')
+
+    def __init__(self, symbol: str, tick_size: Optional[float], step_size: Optional[float], min_amount: float = 0.0,
+                 min_notional: float = 0.0, max_amount: Optional[float] = None,
+                 min_price: Optional[float] = None, max_price: Optional[float] = None, active: bool = True):
+        self.symbol = symbol
+        self.active = active
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_notional = min_notional
+        self.price_decimals = _decimals(tick_size) if tick_size else None
+        self.amount_decimals = _decimals(step_size) if step_size else None
+
+    @property
+    def described(self) -> bool:
+        """False when the exchange gave no tick/step for this symbol - there is no grid to quantize onto"""
+        return self.tick_size is not None and self.step_size is not None
+
+    @classmethod
+    def from_market(cls, market: Dict, defaults: Dict) -> 'MarketRules':
+        """Raw Binance filters when present, otherwise ccxt's unified precision/limits"""
+        precision = market.get('precision') or {}
+        limits = market.get('limits') or {}
+        filters = {f.get('filterType'): f for f in (market.get('info') or {}).get('filters') or []
+                   if isinstance(f, dict)}
+        price_filter = filters.get('PRICE_FILTER', {})
+        lot_size = filters.get('LOT_SIZE', {})
+        notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+
+        tick_size = _float(price_filter.get('tickSize')) or _increment(precision.get('price'))
+        step_size = _float(lot_size.get('stepSize')) or _increment(precision.get('amount'))
+        min_amount = _float(lot_size.get('minQty')) or _float((limits.get('amount') or {}).get('min')) or 0.0
+        min_notional = (_float(notional.get('minNotional')) or _float((limits.get('cost') or {}).get('min'))
+                        or defaults['default_min_notional'])
+        return cls(market['symbol'], tick_size, step_size, min_amount, min_notional,
+                   max_amount=_float(lot_size.get('maxQty')) or _float((limits.get('amount') or {}).get('max')),
+                   min_price=_float(price_filter.get('minPrice')) or _float((limits.get('price') or {}).get('min')),
+                   max_price=_float(price_filter.get('maxPrice')) or _float((limits.get('price') or {}).get('max')),
+                   active=market.get('active') is not False)
+
+    def amount(self, amount: float) -> float:
+        """Floor to the lot step - never sell or buy more than was asked for"""
+        if self.step_size is None:
+            return amount                       # No known grid: left as asked, check() refuses it
+        steps = math.floor(amount / self.step_size + _EPSILON)
+        return round(steps * self.step_size, self.amount_decimals)
+
+    def price(self, price: float, mode: str = 'round') -> float:
+        """Snap to the tick grid ('round', 'floor' or 'ceil')"""
+        if self.tick_size is None:
+            return price                        # Guessing a tick could floor a sub-cent price to 0
+        ticks = price / self.tick_size
+        if mode == 'floor':
+            ticks = math.floor(ticks + _EPSILON)
+        elif mode == 'ceil':
+            ticks = math.ceil(ticks - _EPSILON)
+        else:
+            ticks = round(ticks)
+        return round(ticks * self.tick_size, self.price_decimals)
+
+    def check(self, amount: float, price: float) -> Optional[str]:
+        """Reason the exchange would reject this (already quantized) order, or None"""
+        if not self.described:
+            return f"no exchange precision rules for {self.symbol}"
+        if not self.active:
+            return f"{self.symbol} is not active for trading"
+        if amount <= 0 or amount < self.min_amount:
+            return f"amount {amount:.8f} below minimum {self.min_amount:.8f}"
+        if self.max_amount and amount > self.max_amount:
+            return f"amount {amount:.8f} above maximum {self.max_amount:.8f}"
+        if self.min_price and price < self.min_price:
+            return f"price {price:.8f} below minimum {self.min_price:.8f}"
+        if self.max_price and price > self.max_price:
+            return f"price {price:.8f} above maximum {self.max_price:.8f}"
+        if amount * price < self.min_notional:
+            return f"order value ${amount * price:.2f} below ${self.min_notional:.2f} minimum"
+        return None
+
+
+class MarketMetadataService:
+    """
+    One load_markets per TTL for the whole process, mirrored to disk so restarts
+    and helper scripts start without it
+    """
+
+    def __init__(self, exchange=None, config: Optional[Dict] = None, clock: Optional[Callable[[], float]] = None):
+        self.exchange = exchange
+        self.config = dict(DEFAULT_MARKET_METADATA_CONFIG)
+        self.config.update(config or {})
+        self.clock = clock or (lambda: time.time())
+        self.markets: Dict[str, Dict] = {}
+        self.rules: Dict[str, MarketRules] = {}
+        self.loaded_at = 0.0
+        self.source: Optional[str] = None
+        self.attempted_at = float('-inf')
+        self.lock = threading.RLock()
+        self._fallback: Dict[str, MarketRules] = {}
+
+    # ------------------------------------------------------------- loading
+
+    def is_fresh(self) -> bool:
+        return bool(self.markets) and self.clock() - self.loaded_at < float(self.config['ttl_seconds'])
+
+    def load(self, force: bool = False) -> Dict[str, Dict]:
+        """Markets from memory, then the disk cache, then the exchange"""
+        with self.lock:
+            if not force and self.is_fresh():
+                return self.markets
+
+            self.attempted_at = self.clock()
+            cached = self._read_cache()
+            if not force and cached and self.clock() - cached['saved_at'] < float(self.config['ttl_seconds']):
+                self._install(cached['markets'], cached['saved_at'], 'cache')
+                return self.markets
+
+            if self.exchange is None:
+                if cached:
+                    self._install(cached['markets'], cached['saved_at'], 'stale cache')
+                return self.markets
+
+            try:
+                markets = self.exchange.load_markets(bool(self.loaded_at) or force)
+            except Exception as e:
+                if cached and not self.markets:
+                    log_message(f"⚠️ load_markets failed ({e}) - using cached markets from "
+                                f"{(self.clock() - cached['saved_at']) / 3600:.1f}h ago")
+                    self._install(cached['markets'], cached['saved_at'], 'stale cache')
+                else:
+                    log_message(f"⚠️ load_markets failed ({e}) - keeping current market rules")
+                return self.markets
+
+            self._install(markets, self.clock(), 'exchange')
+            self._write_cache()
+            log_message(f"📐 Market metadata loaded: {len(self.rules)} symbols")
+            return self.markets
+
+    def attach(self, exchange) -> bool:
+        """Hand fresh markets to another exchange instance (e.g. an async one) instead of a second load_markets"""
+        self.load()
+        if not self.is_fresh() or not hasattr(exchange, 'set_markets'):
+            return False
+        exchange.set_markets(self.markets)
+        return True
+
+    def _install(self, markets: Dict[str, Dict], loaded_at: float, source: str):
+        self.markets = dict(markets)
+        self.rules = {symbol: MarketRules.from_market(dict(market, symbol=market.get('symbol', symbol)), self.config)
+                      for symbol, market in self.markets.items()}
+        self.loaded_at = loaded_at
+        self.source = source
+
+    def cache_path(self) -> Optional[str]:
+        path = self.config.get('cache_file')
+        if not path:
+            return None
+        exchange_id = self.config.get('exchange_id') or getattr(self.exchange, 'id', None) or 'markets'
+        return path.format(exchange=exchange_id)
+
+    def _read_cache(self) -> Optional[Dict]:
+        path = self.cache_path()
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('markets'):
+                return cached
+        except (OSError, ValueError) as e:
+            log_message(f"⚠️ Ignoring unreadable market cache {path}: {e}")
+        return None
+
+    def _write_cache(self):
+        path = self.cache_path()
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'saved_at': self.loaded_at, 'markets': self.markets}, f, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            log_message(f"⚠️ Could not write market cache {path}: {e}")
+
+    # ------------------------------------------------------------- rules
+
+    def rules_for(self, symbol: str) -> MarketRules:
+        if not self.is_fresh() and self.clock() - self.attempted_at >= float(self.config['retry_seconds']):
+            self.load()
+        rules = self.rules.get(symbol)
+        if rules is None:
+            rules = self._fallback.get(symbol)
+            if rules is None:
+                config = self.config
+                rules = MarketRules(symbol, None, None, config['default_min_amount'], config['default_min_notional'])
+                self._fallback[symbol] = rules
+        return rules
+
+    def amount_to_precision(self, symbol: str, amount: float) -> float:
+        return self.rules_for(symbol).amount(amount)
+
+    def price_to_precision(self, symbol: str, price: float, mode: str = 'round') -> float:
+        return self.rules_for(symbol).price(price, mode)
+
+    def min_notional(self, symbol: str) -> float:
+        return self.rules_for(symbol).min_notional
+
+    def min_amount(self, symbol: str) -> float:
+        return self.rules_for(symbol).min_amount
+
+    def validate(self, symbol: str, amount: float, price: float) -> Tuple[bool, str]:
+        reason = self.rules_for(symbol).check(amount, price)
+        return reason is None, reason or "OK"
+
+    def prepare_order(self, symbol: str, amount: float, price: float, price_mode: str = 'round',
+                      stop_price: Optional[float] = None) -> Dict:
+        """Quantized amount/price(s) plus the validation verdict, in one call"""
+        rules = self.rules_for(symbol)
+        order = {'symbol': symbol, 'amount': rules.amount(amount), 'price': rules.price(price, price_mode)}
+        if stop_price is not None:
+            order['stop_price'] = rules.price(stop_price, price_mode)
+        reason = rules.check(order['amount'], order['price'])
+        order['valid'] = reason is None
+        order['reason'] = reason or "OK"
+        return order
+
+    def symbols(self, quote: Optional[str] = None, active_only: bool = True, spot_only: bool = True) -> List[str]:
+        markets = self.load()
+        return sorted(symbol for symbol, market in markets.items()
+                      if (quote is None or market.get('quote') == quote)
+                      and (not active_only or market.get('active') is not False)
+                      and (not spot_only or market.get('spot', market.get('type') == 'spot')))
+
+
+_market_metadata: Optional[MarketMetadataService] = None
+
+
+def get_market_metadata(exchange=None, config: Optional[Dict] = None, **kwargs) -> MarketMetadataService:
+    """Get the process-wide market metadata service"""
+    global _market_metadata
+    if _market_metadata is None:
+        _market_metadata = MarketMetadataService(exchange, config, **kwargs)
+    elif exchange is not None and _market_metadata.exchange is None:
+        _market_metadata.exchange = exchange
+    return _market_metadata
@@ -11,13 +11,16 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 import logging
 
+from regime_statistics import get_regime_stats_engine
+
 class MarketMicrostructureAnalyzer:
     """Advanced market microstructure analysis for crypto trading"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def analyze_market_structure(self, df: pd.DataFrame, orderbook_data: Optional[Dict] = None) -> Dict:
+    def analyze_market_structure(self, df: pd.DataFrame, orderbook_data: Optional[Dict] = None,
+                                 symbol: Optional[str] = None) -> Dict:
         """
         Comprehensive market structure analysis
         """
@@ -27,11 +30,14 @@ class MarketMicrostructureAnalyzer:
         # Liquidity analysis
         liquidity_analysis = self._analyze_liquidity(df)
         
+        # Rolling statistics shared with the other regime detectors
+        stats = get_regime_stats_engine().get_stats(df, symbol)
+        
         # Market regime detection
-        regime_analysis = self._detect_market_regime(df)
+        regime_analysis = self._detect_market_regime(df, stats)
         
         # Volatility structure
-        volatility_structure = self._analyze_volatility_structure(df)
+        volatility_structure = self._analyze_volatility_structure(stats)
         
         # Price efficiency analysis
         efficiency_analysis = self._analyze_price_efficiency(df)
@@ -48,6 +54,7 @@ class MarketMicrostructureAnalyzer:
         return {
             'structure_signal': signal,
             'confidence': confidence,
+            'order_book': self.analyze_order_book_pressure(orderbook_data),
             'liquidity': liquidity_analysis,
             'regime': regime_analysis,
             'volatility_structure': volatility_structure,
@@ -154,7 +161,7 @@ class MarketMicrostructureAnalyzer:
     def analyze_order_book_pressure(self, orderbook_snapshot: Optional[Dict] = None) -> Dict:
         """
         Analyze order book pressure and imbalances
-        Note: This would require real orderbook data
+        Accepts a fetch_order_book-style snapshot, e.g. OrderBookManager.get_order_book()
         """
         if not orderbook_snapshot:
             return {'pressure': 'unknown', 'imbalance': 0, 'signal': 'HOLD'}
@@ -236,34 +243,27 @@ class MarketMicrostructureAnalyzer:
             'liquidity_level': 'high' if composite_liquidity > 0.7 else 'medium' if composite_liquidity > 0.4 else 'low'
         }
     
-    def _detect_market_regime(self, df: pd.DataFrame) -> Dict:
+    def _detect_market_regime(self, df: pd.DataFrame, stats: Dict) -> Dict:
         """Detect current market regime"""
-        returns = df['close'].pct_change()
-        volume = df['volume']
-        
         # Volatility regime
-        volatility = returns.rolling(20).std()
-        current_vol = volatility.iloc[-1]
-        avg_vol = volatility.rolling(100).mean().iloc[-1]
+        current_vol = stats['vol_20']
+        avg_vol = stats['vol_20_mean_100']
         
         vol_regime = 'high' if current_vol > avg_vol * 1.5 else 'low' if current_vol < avg_vol * 0.7 else 'normal'
         
         # Trend regime
-        ma_short = df['close'].rolling(10).mean()
-        ma_long = df['close'].rolling(50).mean()
-        
-        if ma_short.iloc[-1] > ma_long.iloc[-1] * 1.02:
+        if stats['ma_10'] > stats['ma_50'] * 1.02:
             trend_regime = 'uptrend'
-        elif ma_short.iloc[-1] < ma_long.iloc[-1] * 0.98:
+        elif stats['ma_10'] < stats['ma_50'] * 0.98:
             trend_regime = 'downtrend'
         else:
             trend_regime = 'sideways'
         
         # Volume regime
-        avg_volume = volume.rolling(50).mean()
-        current_volume = volume.rolling(10).mean().iloc[-1]
+        avg_volume = stats.get('volume_ma_50', np.nan)
+        current_volume = stats.get('volume_mean_10', np.nan)
         
-        volume_regime = 'high' if current_volume > avg_volume.iloc[-1] * 1.3 else 'low' if current_volume < avg_volume.iloc[-1] * 0.7 else 'normal'
+        volume_regime = 'high' if current_volume > avg_volume * 1.3 else 'low' if current_volume < avg_volume * 0.7 else 'normal'
         
         # Market stress indicators
         stress_indicators = self._calculate_stress_indicators(df)
@@ -277,20 +277,13 @@ class MarketMicrostructureAnalyzer:
             'regime_strength': self._calculate_regime_strength(vol_regime, trend_regime, volume_regime)
         }
     
-    def _analyze_volatility_structure(self, df: pd.DataFrame) -> Dict:
+    def _analyze_volatility_structure(self, stats: Dict) -> Dict:
         """Analyze volatility term structure"""
-        returns = df['close'].pct_change()
-        
         # Multiple timeframe volatilities
-        vol_1 = returns.rolling(5).std()    # Short-term
-        vol_2 = returns.rolling(20).std()   # Medium-term
-        vol_3 = returns.rolling(50).std()   # Long-term
-        
-        # Volatility term structure
-        if len(vol_1) > 0 and len(vol_2) > 0 and len(vol_3) > 0:
-            current_vol_1 = vol_1.iloc[-1]
-            current_vol_2 = vol_2.iloc[-1]
-            current_vol_3 = vol_3.iloc[-1]
+        if stats['candles'] > 0:
+            current_vol_1 = stats['vol_5']    # Short-term
+            current_vol_2 = stats['vol_20']   # Medium-term
+            current_vol_3 = stats['vol_50']   # Long-term
             
             # Structure shape
             if current_vol_1 > current_vol_2 > current_vol_3:
@@ -304,7 +297,7 @@ class MarketMicrostructureAnalyzer:
             current_vol_1 = current_vol_2 = current_vol_3 = 0
         
         # Volatility clustering
-        vol_clustering = self._measure_volatility_clustering(returns)
+        vol_clustering = self._measure_volatility_clustering(stats)
         
         return {
             'term_structure': structure,
@@ -312,7 +305,7 @@ class MarketMicrostructureAnalyzer:
             'medium_term_vol': current_vol_2,
             'long_term_vol': current_vol_3,
             'volatility_clustering': vol_clustering,
-            'vol_of_vol': returns.rolling(20).std().rolling(10).std().iloc[-1] if len(returns) >= 30 else 0
+            'vol_of_vol': stats['vol_of_vol'] if stats['candles'] >= 30 else 0
         }
     
     def _analyze_price_efficiency(self, df: pd.DataFrame) -> Dict:
@@ -593,13 +586,12 @@ class MarketMicrostructureAnalyzer:
         
         return strength
     
-    def _measure_volatility_clustering(self, returns: pd.Series) -> float:
+    def _measure_volatility_clustering(self, stats: Dict) -> float:
         """Measure volatility clustering (GARCH effects)"""
-        if len(returns) < 30:
+        if stats['candles'] < 30:
             return 0.5
         
-        abs_returns = abs(returns)
-        autocorr = abs_returns.autocorr(lag=1)
+        autocorr = stats['abs_return_autocorr']
         
         return max(0, min(1, autocorr)) if not np.isnan(autocorr) else 0.5
     
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+💾 MEMORY FOOTPRINT BENCHMARK
+=============================
+
+Measures the heap cost of the high-churn record types in their slotted form
+against an otherwise identical per-instance __dict__ version (same __init__,
+no __slots__), and of PriceJumpDetector's price history as parallel arrays
+against a list of PricePoint objects.
+
+Usage:
+    python memory_footprint.py                 # 1,000 pairs, 500 ticks of history each
+    python memory_footprint.py --pairs 2000
+"""
+
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict
+
+from emergency_spike_detector import EmergencySpike
+from multi_crypto_monitor import CryptoMetrics
+from multi_pair_scanner import TradingOpportunity
+from optimized_emergency_spike_detector import OptimizedEmergencySpike
+from price_jump_detector import PriceHistory, PriceJump, PricePoint
+from src.comprehensive_opportunity_scanner import OpportunityAlert
+
+NOW = datetime(2025, 6, 1)
+
+# One sample constructor call per record type
+RECORD_SAMPLES = {
+    'PricePoint': (PricePoint, lambda cls, i: cls(1_750_000_000.0 + i, 100.0 + i)),
+    'PriceJump': (PriceJump, lambda cls, i: cls(100.0, 101.0 + i, 1.0, 60.0, 'UP', 1_750_000_000.0 + i)),
+    'OpportunityAlert': (OpportunityAlert, lambda cls, i: cls(f"PAIR{i}/USDT", 1.0, 2.0, 3.0, 4.0, 5.0 + i, 6.0,
+                                                             NOW, 'MAJOR_MOVE', 'MONITOR')),
+    'CryptoMetrics': (CryptoMetrics, lambda cls, i: cls(f"PAIR{i}/USDT", *[float(i + k) for k in range(13)])),
+    'TradingOpportunity': (TradingOpportunity, lambda cls, i: cls(f"PAIR{i}/USDT", 1.0, 0.5, 1e6 + i, 2.0, 0.7,
+                                                                 0.8, NOW)),
+    'EmergencySpike': (EmergencySpike, lambda cls, i: cls(f"PAIR{i}/USDT", 5.0, 150.0, '1h', 80.0 + i, NOW)),
+    'OptimizedEmergencySpike': (OptimizedEmergencySpike, lambda cls, i: cls(f"PAIR{i}/USDT", 5.0, 150.0, '1h',
+                                                                           80.0 + i, NOW, 1e6, 'fast_scan')),
+}
+
+
+def _unslotted(cls):
+    """The same record with a per-instance __dict__ (what the class looked like before __slots__)"""
+    return type(f"{cls.__name__}Dict", (), {'__init__': cls.__init__})
+
+
+def _measure(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used
+
+
+def measure_records(count: int = 1000) -> Dict[str, Dict[str, float]]:
+    """Bytes per instance, __dict__ vs __slots__, for `count` instances of each record type"""
+    results = {}
+    for name, (cls, make) in RECORD_SAMPLES.items():
+        legacy = _unslotted(cls)
+        # Strings/floats are shared by both variants; only the container cost differs
+        args = [make(lambda *a: a, i) for i in range(count)]
+        with_dict = _measure(lambda: [legacy(*a) for a in args])
+        slotted = _measure(lambda: [cls(*a) for a in args])
+        results[name] = {'dict_bytes': with_dict / count, 'slots_bytes': slotted / count,
+                         'ratio': slotted / with_dict}
+    return results
+
+
+def measure_price_history(pairs: int = 1000, ticks: int = 500) -> Dict[str, float]:
+    """Price history for `pairs` detectors holding `ticks` points each"""
+    legacy_point = _unslotted(PricePoint)
+
+    def as_objects():
+        return [[legacy_point(1_750_000_000.0 + t, 100.0 + t) for t in range(ticks)] for _ in range(pairs)]
+
+    def as_arrays():
+        histories = []
+        for _ in range(pairs):
+            history = PriceHistory(ticks)
+            for t in range(ticks):
+                history.append(1_750_000_000.0 + t, 100.0 + t)
+            histories.append(history)
+        return histories
+
+    objects = _measure(as_objects)
+    arrays = _measure(as_arrays)
+    return {'objects_mb': objects / 2 ** 20, 'arrays_mb': arrays / 2 ** 20, 'ratio': arrays / objects}
+
+
+if __name__ == "__main__":
+    pairs = int(sys.argv[sys.argv.index('--pairs') + 1]) if '--pairs' in sys.argv else 1000
+    print(f"💾 RECORD FOOTPRINT ({pairs:,} instances each)")
+    for name, row in measure_records(pairs).items():
+        print(f"   {name:>24}: {row['dict_bytes']:6.0f} B -> {row['slots_bytes']:6.0f} B ({row['ratio']:.0%})")
+    history = measure_price_history(pairs)
+    print(f"💾 PRICE HISTORY ({pairs:,} pairs x 500 ticks): {history['objects_mb']:.1f} MB objects -> "
+          f"{history['arrays_mb']:.1f} MB arrays ({history['ratio']:.0%})")
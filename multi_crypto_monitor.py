@@ -15,10 +15,16 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from log_utils import log_message
+from correlation_engine import get_correlation_engine
+from candle_frame import CandleFrame, CandleFrameCache
 
 @dataclass
 class CryptoMetrics:
     """Data class to store cryptocurrency performance metrics"""
+    __slots__ = ('symbol', 'price', 'volume_24h', 'momentum_1h', 'momentum_4h', 'momentum_24h', 'volatility',
+                 'rsi', 'ma_alignment_score', 'trend_strength', 'relative_strength_score', 'liquidity_score',
+                 'final_score', 'recommended_allocation')
+
     symbol: str
     price: float
     volume_24h: float
@@ -89,6 +95,12 @@ class MultiCryptoMonitor:
         self.crypto_data = {}
         self.current_rankings = []
         
+        # 📈 Cross-pair correlations fed from the candles fetched below (no extra API calls)
+        self.correlation_engine = get_correlation_engine()
+        
+        # 🕯️ Rolling array-backed candles per (symbol, timeframe); scans fetch only new candles
+        self.candles = CandleFrameCache(maxlen=100)
+        
     def fetch_crypto_data(self, symbol: str, timeframes=['30m', '2h', '12h']) -> Dict:
         """Fetch comprehensive data for a single cryptocurrency - DAY TRADING OPTIMIZED"""
         try:
@@ -99,10 +111,10 @@ class MultiCryptoMonitor:
             ohlcv_data = {}
             for tf in timeframes:
                 try:
-                    ohlcv = self.exchange.fetch_ohlcv(symbol, tf, limit=100)
-                    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                    ohlcv_data[tf] = df
+                    frame = self.candles.get(self.exchange, symbol, tf)
+                    ohlcv_data[tf] = frame
+                    if tf == self.correlation_engine.config['timeframe']:
+                        self.correlation_engine.ingest_closes(symbol, frame)
                 except Exception as e:
                     log_message(f"⚠️ Error fetching {tf} data for {symbol}: {e}")
                     continue
@@ -118,7 +130,7 @@ class MultiCryptoMonitor:
             log_message(f"❌ Error fetching data for {symbol}: {e}")
             return None
     
-    def calculate_momentum(self, df: pd.DataFrame, periods: List[float] = [0.5, 2, 12]) -> Dict[str, float]:
+    def calculate_momentum(self, df: CandleFrame, periods: List[float] = [0.5, 2, 12]) -> Dict[str, float]:
         """Calculate momentum over different periods - DAY TRADING OPTIMIZED (30min, 2h, 12h)"""
         # Convert hours to 30min periods (since we're using 30m timeframe)
         period_intervals = [max(1, int(p * 2)) for p in periods]  # 0.5h=1, 2h=4, 12h=24 intervals
@@ -127,53 +139,54 @@ class MultiCryptoMonitor:
             return {f'momentum_{p}h' if p >= 1 else f'momentum_{int(p*60)}m': 0.0 for p in periods}
         
         momentum = {}
-        current_price = df['close'].iloc[-1]
+        close = df['close']
+        current_price = close[-1]
         
         for i, period in enumerate(periods):
             interval = period_intervals[i]
+            key = f'momentum_{period}h' if period >= 1 else f'momentum_{int(period*60)}m'
             if len(df) >= interval:
-                past_price = df['close'].iloc[-interval]
-                momentum_pct = (current_price - past_price) / past_price
-                key = f'momentum_{period}h' if period >= 1 else f'momentum_{int(period*60)}m'
-                momentum[key] = momentum_pct
+                past_price = close[-interval]
+                momentum[key] = (current_price - past_price) / past_price
             else:
-                key = f'momentum_{period}h' if period >= 1 else f'momentum_{int(period*60)}m'
                 momentum[key] = 0.0
                 
         return momentum
     
-    def calculate_volatility(self, df: pd.DataFrame, period: int = 24) -> float:
+    def calculate_volatility(self, df: CandleFrame, period: int = 24) -> float:
         """Calculate recent volatility (higher = more trading opportunity)"""
         if len(df) < period:
             return 0.0
         
-        recent_returns = df['close'].pct_change().tail(period).dropna()
-        volatility = recent_returns.std() * np.sqrt(24)  # Annualized volatility
+        close = df['close'][-(period + 1):]
+        recent_returns = np.diff(close) / close[:-1]
+        volatility = recent_returns.std(ddof=1) * np.sqrt(24)  # Annualized volatility
         return volatility
     
-    def calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> float:
+    def calculate_rsi(self, df: CandleFrame, period: int = 14) -> float:
         """Calculate RSI for mean reversion opportunities"""
         if len(df) < period + 1:
             return 50.0
         
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        delta = np.diff(df['close'][-(period + 1):])
+        gain = np.maximum(delta, 0).mean()
+        loss = np.maximum(-delta, 0).mean()
         
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi.iloc[-1] if not np.isnan(rsi.iloc[-1]) else 50.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+        return rsi if not np.isnan(rsi) else 50.0
     
-    def calculate_ma_alignment_score(self, df: pd.DataFrame) -> float:
+    def calculate_ma_alignment_score(self, df: CandleFrame) -> float:
         """Calculate moving average alignment score (trend confirmation)"""
         if len(df) < 50:
             return 0.0
         
         # Calculate multiple moving averages
-        ma_7 = df['close'].rolling(7).mean().iloc[-1]
-        ma_25 = df['close'].rolling(25).mean().iloc[-1]
-        ma_50 = df['close'].rolling(50).mean().iloc[-1]
-        current_price = df['close'].iloc[-1]
+        close = df['close']
+        ma_7 = close[-7:].mean()
+        ma_25 = close[-25:].mean()
+        ma_50 = close[-50:].mean()
+        current_price = close[-1]
         
         # Score based on bullish alignment: Price > MA7 > MA25 > MA50
         score = 0.0
@@ -186,21 +199,22 @@ class MultiCryptoMonitor:
             
         return score
     
-    def calculate_trend_strength(self, df: pd.DataFrame) -> float:
+    def calculate_trend_strength(self, df: CandleFrame) -> float:
         """Calculate overall trend strength using multiple indicators"""
         if len(df) < 50:
             return 0.0
         
-        # ADX-like calculation for trend strength
-        high_low = df['high'] - df['low']
-        high_close_prev = np.abs(df['high'] - df['close'].shift(1))
-        low_close_prev = np.abs(df['low'] - df['close'].shift(1))
+        # ADX-like calculation for trend strength (last 14 candles, each with a previous close)
+        high, low, close = df['high'][-14:], df['low'][-14:], df['close'][-15:]
+        high_low = high - low
+        high_close_prev = np.abs(high - close[:-1])
+        low_close_prev = np.abs(low - close[:-1])
         
         true_range = np.maximum(high_low, np.maximum(high_close_prev, low_close_prev))
-        atr = true_range.rolling(14).mean().iloc[-1]
+        atr = true_range.mean()
         
         # Normalize trend strength
-        price_range = df['close'].rolling(14).max().iloc[-1] - df['close'].rolling(14).min().iloc[-1]
+        price_range = close[1:].max() - close[1:].min()
         trend_strength = min(1.0, atr / price_range if price_range > 0 else 0.0)
         
         return trend_strength
@@ -340,6 +354,9 @@ class MultiCryptoMonitor:
                 # Small delay to avoid rate limiting
                 time.sleep(0.2)
             
+            # One correlation update per new bar across the whole watchlist
+            self.correlation_engine.flush()
+            
             if successful_updates > 0:
                 self.last_update = time.time()
                 log_message(f"✅ Updated data for {successful_updates}/{len(self.watchlist)} cryptocurrencies")
@@ -6,9 +6,16 @@
 # Scans all supported pairs for maximum profit opportunities
 # Automatically switches to the most profitable trading pair
 #
+# All exchange I/O goes through ccxt.async_support on one shared session:
+# pairs are analysed concurrently, at most max_concurrent_requests requests
+# are in flight, and every request is bounded by request_timeout_seconds
+# (asyncio.wait_for cancels the request cleanly). Nothing blocks the event
+# loop, so tasks sharing it (EnhancedMultiPairBot's trading loop) keep
+# running while a full-universe scan is in flight.
+#
 # =============================================================================
 
-import ccxt
+import ccxt.async_support as ccxt_async
 import asyncio
 import json
 import time
@@ -16,10 +23,15 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
+from config_service import get_config_service
+from market_metadata import MarketMetadataService
 
 @dataclass
 class TradingOpportunity:
     """Represents a detected trading opportunity"""
+    __slots__ = ('symbol', 'price_change_1h', 'price_change_5m', 'volume_24h', 'volume_surge',
+                 'momentum_score', 'confidence', 'timestamp')
+
     symbol: str
     price_change_1h: float
     price_change_5m: float
@@ -48,6 +60,7 @@ class MultiPairScanner:
         self.scanning = False
         self.opportunities = {}
         self.current_best_pair = None
+        self._request_slots = None  # asyncio.Semaphore, created on the scanning loop
         
         # 🎯 SCANNING CONFIGURATION
         self.scan_config = {
@@ -58,6 +71,9 @@ class MultiPairScanner:
                 "MATIC/USDT", "LINK/USDT", "UNI/USDT", "LTC/USDT"
             ],
             'scan_interval_seconds': 30,  # Scan every 30 seconds
+            'max_concurrent_requests': 8,  # Exchange requests in flight across all pairs
+            'request_timeout_seconds': 10,  # Per request; the request is cancelled on timeout
+            'scan_timeout_seconds': 25,  # Whole scan; previous opportunities are kept on timeout
             'momentum_thresholds': {
                 'strong_bullish': 3.0,    # 3%+ in 1h
                 'moderate_bullish': 1.5,  # 1.5%+ in 1h
@@ -91,13 +107,19 @@ class MultiPairScanner:
         self.logger = self._setup_logging()
     
     def _load_config(self, config_path: str) -> Dict:
-        """Load bot configuration"""
+        """Load bot configuration from the shared config service and follow later edits"""
+        service = get_config_service()
         try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
+            snapshot = service.register(config_path)
         except Exception as e:
             print(f"⚠️ Error loading config: {e}")
             return {}
+        service.subscribe(self._on_config_change, path=config_path)
+        return snapshot.thaw() if snapshot else {}
+
+    def _on_config_change(self, change):
+        if change.kind in ('created', 'modified'):
+            self.config = change.snapshot.thaw()
     
     def _setup_logging(self) -> logging.Logger:
         """Setup logging for scanner"""
@@ -115,54 +137,71 @@ class MultiPairScanner:
         
         return logger
     
-    def initialize_exchange(self) -> bool:
-        """Initialize exchange connection"""
+    async def initialize_exchange(self) -> bool:
+        """Initialize the shared async exchange session"""
         try:
             # Use demo mode if no API keys
-            self.exchange = ccxt.binanceus({
+            self.exchange = ccxt_async.binanceus({
                 'sandbox': True,  # Use testnet for safety
                 'enableRateLimit': True,
                 'timeout': 30000
             })
             
-            # Test connection
-            self.exchange.load_markets()
+            # Reuse the cached market metadata; only a cold or stale cache costs a load_markets
+            if not MarketMetadataService(config={'exchange_id': self.exchange.id}).attach(self.exchange):
+                await self._request(self.exchange.load_markets)
             self.logger.info("✅ Exchange connection established")
             return True
             
         except Exception as e:
             self.logger.error(f"❌ Exchange initialization failed: {e}")
             # Fallback to free API mode
-            self.exchange = None
+            await self.close_exchange()
             return False
     
-    async def scan_all_pairs(self) -> Dict[str, TradingOpportunity]:
-        """Scan all supported pairs for opportunities"""
-        opportunities = {}
-        
-        for symbol in self.scan_config['supported_pairs']:
+    async def close_exchange(self):
+        """Close the shared exchange session"""
+        exchange, self.exchange = self.exchange, None
+        if exchange is not None:
             try:
-                opportunity = await self._analyze_pair(symbol)
-                if opportunity:
-                    opportunities[symbol] = opportunity
-                    
+                await exchange.close()
             except Exception as e:
-                self.logger.warning(f"⚠️ Error analyzing {symbol}: {e}")
-                continue
+                self.logger.warning(f"⚠️ Exchange close error: {e}")
+    
+    async def _request(self, method, *args, **kwargs):
+        """One exchange request: bounded fan-out, cancelled if it outlives the timeout"""
+        if self._request_slots is None:
+            self._request_slots = asyncio.Semaphore(self.scan_config['max_concurrent_requests'])
+        async with self._request_slots:
+            return await asyncio.wait_for(method(*args, **kwargs), self.scan_config['request_timeout_seconds'])
+    
+    async def scan_all_pairs(self) -> Dict[str, TradingOpportunity]:
+        """Scan all supported pairs concurrently for opportunities"""
+        pairs = self.scan_config['supported_pairs']
+        results = await asyncio.gather(*(self._analyze_pair(symbol) for symbol in pairs), return_exceptions=True)
+        
+        opportunities = {}
+        for symbol, result in zip(pairs, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"⚠️ Error analyzing {symbol}: {result}")
+            elif result:
+                opportunities[symbol] = result
         
         return opportunities
     
     async def _analyze_pair(self, symbol: str) -> Optional[TradingOpportunity]:
         """Analyze individual trading pair for opportunities"""
         try:
-            # Get market data
-            ticker = await self._get_ticker_data(symbol)
+            # Get market data (ticker and 5m candles in parallel)
+            ticker, price_change_5m = await asyncio.gather(
+                self._get_ticker_data(symbol),
+                self._get_short_term_change(symbol, '5m')
+            )
             if not ticker:
                 return None
             
             # Calculate momentum indicators
             price_change_1h = ticker.get('percentage', 0)
-            price_change_5m = await self._get_short_term_change(symbol, '5m')
             volume_24h = ticker.get('quoteVolume', 0)
             
             # Calculate volume surge
@@ -204,12 +243,12 @@ class MultiPairScanner:
         """Get ticker data for symbol"""
         try:
             if self.exchange:
-                return self.exchange.fetch_ticker(symbol)
+                return await self._request(self.exchange.fetch_ticker, symbol)
             else:
                 # Fallback to free API simulation
                 return await self._simulate_ticker_data(symbol)
         except Exception as e:
-            self.logger.warning(f"⚠️ Ticker data error for {symbol}: {e}")
+            self.logger.warning(f"⚠️ Ticker data error for {symbol}: {e or type(e).__name__}")
             return None
     
     async def _simulate_ticker_data(self, symbol: str) -> Dict:
@@ -238,7 +277,7 @@ class MultiPairScanner:
         try:
             if self.exchange:
                 # Get recent OHLCV data
-                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=2)
+                ohlcv = await self._request(self.exchange.fetch_ohlcv, symbol, timeframe, limit=2)
                 if len(ohlcv) >= 2:
                     old_close = ohlcv[0][4]
                     new_close = ohlcv[1][4]
@@ -357,12 +396,25 @@ class MultiPairScanner:
         self.logger.info("🚀 Starting multi-pair scanning...")
         
         # Initialize exchange if possible
-        self.initialize_exchange()
+        if self.exchange is None:
+            await self.initialize_exchange()
         
+        try:
+            await self._scan_loop()
+        finally:
+            # Also runs when the task is cancelled
+            await self.close_exchange()
+    
+    async def _scan_loop(self):
+        """Scan, log and recommend until stop_scanning()"""
         while self.scanning:
             try:
                 # Scan all pairs
-                self.opportunities = await self.scan_all_pairs()
+                try:
+                    self.opportunities = await asyncio.wait_for(self.scan_all_pairs(),
+                                                                self.scan_config['scan_timeout_seconds'])
+                except asyncio.TimeoutError:
+                    self.logger.warning("⚠️ Scan timed out - keeping previous opportunities")
                 
                 # Log opportunities
                 self._log_opportunities()
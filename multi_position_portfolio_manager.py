@@ -2,6 +2,11 @@
 """
 💰 MULTI-POSITION PORTFOLIO MANAGER
 Enables holding positions in multiple cryptocurrency pairs simultaneously
+
+Positions are valued from one batched ticker snapshot per cycle (one
+fetch_tickers call however many positions are open); PnL, high-water mark
+and drawdown are folded in incrementally and exits are evaluated as array
+comparisons across all positions at once.
 """
 
 import json
@@ -9,7 +14,9 @@ import time
 from datetime import datetime
 from dataclasses import dataclass
 from typing import Dict, List, Optional
+import numpy as np
 from log_utils import log_message
+from correlation_engine import get_correlation_engine
 
 @dataclass
 class PortfolioPosition:
@@ -21,11 +28,18 @@ class PortfolioPosition:
     take_profit: Optional[float] = None
     current_pnl_pct: float = 0.0
     current_pnl_usd: float = 0.0
+    current_price: Optional[float] = None
+    high_water_price: Optional[float] = None   # Highest price seen while held
+    drawdown_pct: float = 0.0                  # Current distance below the high-water mark
+    max_drawdown_pct: float = 0.0
 
 class MultiPositionPortfolioManager:
-    def __init__(self, max_positions=5, max_allocation_per_position=0.25):
+    def __init__(self, max_positions=5, max_allocation_per_position=0.25, max_position_correlation=0.8,
+                 correlation_engine=None):
         self.max_positions = max_positions
         self.max_allocation_per_position = max_allocation_per_position  # 25% max per position
+        self.max_position_correlation = max_position_correlation  # Refuse near-duplicate exposure
+        self.correlation_engine = correlation_engine or get_correlation_engine()
         self.active_positions: Dict[str, PortfolioPosition] = {}
         self.supported_pairs = [
             "BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT", 
@@ -44,6 +58,13 @@ class MultiPositionPortfolioManager:
         if len(self.active_positions) >= self.max_positions:
             return False, f"Maximum positions reached ({self.max_positions})"
         
+        # Correlation check against held positions (in-memory matrix, no API calls)
+        correlations = self.correlation_engine.correlations_with(symbol, self.active_positions.keys())
+        if correlations:
+            held_symbol, correlation = max(correlations.items(), key=lambda kv: kv[1])
+            if correlation >= self.max_position_correlation:
+                return False, f"Too correlated with {held_symbol} ({correlation:.2f} >= {self.max_position_correlation:.2f})"
+        
         return True, "Can open new position"
     
     def calculate_position_size(self, symbol: str, current_price: float, 
@@ -112,76 +133,126 @@ class MultiPositionPortfolioManager:
         
         return position
     
-    def update_positions_pnl(self, exchange) -> Dict[str, Dict]:
+    def fetch_price_snapshot(self, exchange, symbols: Optional[List[str]] = None) -> Dict[str, Dict]:
         """
-        Update P&L for all active positions
+        One batched ticker request for every open position (or `symbols`)
         """
-        position_status = {}
+        symbols = list(self.active_positions) if symbols is None else symbols
+        if not symbols:
+            return {}
+        return exchange.fetch_tickers(symbols) or {}
+    
+    def update_positions_pnl(self, exchange, tickers: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Update P&L, high-water mark and drawdown for all active positions from one ticker snapshot
+        """
+        if not self.active_positions:
+            return {}
         
-        for symbol, position in self.active_positions.items():
+        if tickers is None:
             try:
-                # Get current price
-                ticker = exchange.fetch_ticker(symbol)
-                current_price = ticker['last']
-                
-                # Calculate P&L
-                pnl_usd = (current_price - position.entry_price) * position.quantity
-                pnl_pct = ((current_price - position.entry_price) / position.entry_price) * 100
-                
-                # Update position
-                position.current_pnl_pct = pnl_pct
-                position.current_pnl_usd = pnl_usd
-                
-                position_status[symbol] = {
-                    'current_price': current_price,
-                    'entry_price': position.entry_price,
-                    'quantity': position.quantity,
-                    'pnl_usd': pnl_usd,
-                    'pnl_pct': pnl_pct,
-                    'stop_loss': position.stop_loss,
-                    'take_profit': position.take_profit,
-                    'age_minutes': (datetime.now() - position.entry_time).total_seconds() / 60
-                }
-                
+                tickers = self.fetch_price_snapshot(exchange)
             except Exception as e:
-                log_message(f"⚠️ Error updating {symbol} position: {e}")
-                position_status[symbol] = {'error': str(e)}
+                log_message(f"⚠️ Error fetching position prices: {e}")
+                return {symbol: {'error': str(e)} for symbol in self.active_positions}
+        
+        symbols = list(self.active_positions)
+        positions = [self.active_positions[symbol] for symbol in symbols]
+        prices = np.array([(tickers.get(symbol) or {}).get('last') or np.nan for symbol in symbols], dtype=float)
+        entry = np.array([p.entry_price for p in positions], dtype=float)
+        quantity = np.array([p.quantity for p in positions], dtype=float)
+        high_water = np.array([p.high_water_price or p.entry_price for p in positions], dtype=float)
+        max_drawdown = np.array([p.max_drawdown_pct for p in positions], dtype=float)
+        
+        # Fold the snapshot into every position at once
+        pnl_usd = (prices - entry) * quantity
+        pnl_pct = (prices - entry) / entry * 100
+        high_water = np.fmax(high_water, prices)
+        drawdown = (high_water - prices) / high_water * 100
+        max_drawdown = np.fmax(max_drawdown, drawdown)
+        now = datetime.now()
+        
+        position_status = {}
+        for i, (symbol, position) in enumerate(zip(symbols, positions)):
+            if np.isnan(prices[i]):
+                log_message(f"⚠️ Error updating {symbol} position: no price in ticker snapshot")
+                position_status[symbol] = {'error': 'no price in ticker snapshot'}
+                continue
+            
+            position.current_price = float(prices[i])
+            position.current_pnl_usd = float(pnl_usd[i])
+            position.current_pnl_pct = float(pnl_pct[i])
+            position.high_water_price = float(high_water[i])
+            position.drawdown_pct = float(drawdown[i])
+            position.max_drawdown_pct = float(max_drawdown[i])
+            
+            position_status[symbol] = {
+                'current_price': position.current_price,
+                'entry_price': position.entry_price,
+                'quantity': position.quantity,
+                'pnl_usd': position.current_pnl_usd,
+                'pnl_pct': position.current_pnl_pct,
+                'high_water_price': position.high_water_price,
+                'drawdown_pct': position.drawdown_pct,
+                'max_drawdown_pct': position.max_drawdown_pct,
+                'stop_loss': position.stop_loss,
+                'take_profit': position.take_profit,
+                'age_minutes': (now - position.entry_time).total_seconds() / 60
+            }
         
         return position_status
     
-    def check_exit_conditions(self, exchange) -> List[tuple[str, str]]:
+    def check_exit_conditions(self, exchange, tickers: Optional[Dict[str, Dict]] = None) -> List[tuple[str, str]]:
         """
         Check if any positions should be closed based on stop loss, take profit, or other conditions
         """
-        positions_to_close = []
+        position_status = self.update_positions_pnl(exchange, tickers)
+        valued = [symbol for symbol, status in position_status.items() if 'error' not in status]
+        if not valued:
+            return []
         
-        position_status = self.update_positions_pnl(exchange)
+        status = [position_status[symbol] for symbol in valued]
+        price = np.array([s['current_price'] for s in status])
+        stop_loss = np.array([s['stop_loss'] or np.nan for s in status], dtype=float)
+        take_profit = np.array([s['take_profit'] or np.nan for s in status], dtype=float)
+        pnl_pct = np.array([s['pnl_pct'] for s in status])
+        age_minutes = np.array([s['age_minutes'] for s in status])
         
-        for symbol, status in position_status.items():
-            if 'error' in status:
-                continue
-            
-            position = self.active_positions[symbol]
-            current_price = status['current_price']
-            
-            # Check stop loss
-            if position.stop_loss and current_price <= position.stop_loss:
-                positions_to_close.append((symbol, f"Stop loss hit: ${current_price:.4f} <= ${position.stop_loss:.4f}"))
-            
-            # Check take profit
-            elif position.take_profit and current_price >= position.take_profit:
-                positions_to_close.append((symbol, f"Take profit hit: ${current_price:.4f} >= ${position.take_profit:.4f}"))
-            
-            # Check for major losses (emergency exit)
-            elif status['pnl_pct'] <= -15.0:
-                positions_to_close.append((symbol, f"Emergency exit: {status['pnl_pct']:.2f}% loss"))
-            
-            # Check for aged profitable positions (take profits after 4 hours if >5% profit)
-            elif status['age_minutes'] > 240 and status['pnl_pct'] > 5.0:
-                positions_to_close.append((symbol, f"Aged profitable position: {status['pnl_pct']:.2f}% profit after {status['age_minutes']:.0f}min"))
+        # First matching rule wins, in this order (NaN limits never match)
+        rules = np.select(
+            [price <= stop_loss,
+             price >= take_profit,
+             pnl_pct <= -15.0,                                  # Major losses (emergency exit)
+             (age_minutes > 240) & (pnl_pct > 5.0)],            # Take profits after 4 hours if >5% profit
+            [1, 2, 3, 4], default=0)
+        
+        positions_to_close = []
+        for i in np.flatnonzero(rules):
+            symbol, rule = valued[i], rules[i]
+            if rule == 1:
+                reason = f"Stop loss hit: ${price[i]:.4f} <= ${stop_loss[i]:.4f}"
+            elif rule == 2:
+                reason = f"Take profit hit: ${price[i]:.4f} >= ${take_profit[i]:.4f}"
+            elif rule == 3:
+                reason = f"Emergency exit: {pnl_pct[i]:.2f}% loss"
+            else:
+                reason = f"Aged profitable position: {pnl_pct[i]:.2f}% profit after {age_minutes[i]:.0f}min"
+            positions_to_close.append((symbol, reason))
         
         return positions_to_close
     
+    def evaluate_portfolio(self, exchange) -> Dict:
+        """
+        One full portfolio cycle on a single all-symbol ticker snapshot:
+        valuation, exits, and opportunities for the free slots
+        """
+        tickers = exchange.fetch_tickers()
+        exits = self.check_exit_conditions(exchange, tickers)
+        opportunities = []
+        if len(self.active_positions) < self.max_positions:
+            opportunities = self.find_best_opportunities_for_new_positions(exchange, tickers)
+        return {'exits': exits, 'opportunities': opportunities, 'summary': self.get_portfolio_summary()}
+    
     def get_portfolio_summary(self) -> Dict:
         """
         Get summary of the entire portfolio
@@ -209,11 +280,17 @@ class MultiPositionPortfolioManager:
                 'entry_price': pos.entry_price,
                 'current_pnl_pct': pos.current_pnl_pct,
                 'current_pnl_usd': pos.current_pnl_usd,
+                'max_drawdown_pct': pos.max_drawdown_pct,
                 'age_minutes': (datetime.now() - pos.entry_time).total_seconds() / 60
             }
         
+        diversification_ratio = self.correlation_engine.diversification_ratio({
+            symbol: pos.entry_price * pos.quantity for symbol, pos in self.active_positions.items()
+        })
+        
         return {
             'active_positions': len(self.active_positions),
+            'diversification_ratio': diversification_ratio,
             'total_invested_usd': total_invested,
             'total_current_value_usd': total_current_value,
             'total_pnl_usd': total_pnl_usd,
@@ -221,15 +298,16 @@ class MultiPositionPortfolioManager:
             'positions': positions_summary
         }
     
-    def find_best_opportunities_for_new_positions(self, exchange) -> List[tuple[str, float, str]]:
+    def find_best_opportunities_for_new_positions(self, exchange,
+                                                  tickers: Optional[Dict[str, Dict]] = None) -> List[tuple[str, float, str]]:
         """
-        Find the best opportunities for opening new positions
+        Find the best opportunities for opening new positions (reusing `tickers` when given)
         """
         opportunities = []
         
         try:
-            from comprehensive_opportunity_scanner import run_immediate_comprehensive_scan
-            all_opportunities = run_immediate_comprehensive_scan(exchange)
+            from src.comprehensive_opportunity_scanner import run_immediate_comprehensive_scan
+            all_opportunities = run_immediate_comprehensive_scan(exchange, tickers)
             
             # Filter for pairs we're not already holding and that meet criteria
             available_opportunities = [
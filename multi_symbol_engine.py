@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+🧩 MULTI-SYMBOL TRADING ENGINE
+==============================
+
+One lightweight actor per watched symbol, each with its own position state,
+signal and protection, stepped concurrently once per engine tick. Actors
+share:
+
+- MarketDataHub: one batched fetch_tickers() per tick for every watched
+  symbol, plus an incremental CandleFrameCache for signal candles
+- RequestRateLimiter: a thread-safe token bucket every exchange call of
+  every actor goes through
+- PortfolioGovernor: the only place positions are opened or closed, built
+  on MultiPositionPortfolioManager (max_positions, per-position allocation,
+  correlation limits)
+
+A tick costs one ticker request plus each actor's candle refresh, run in
+parallel, so its latency is roughly the slowest actor rather than the sum of
+all of them.
+
+The default signal is the bot's MA7/MA25 crossover on the last closed
+candle. Exits are the governor's stop loss / take profit, a trailing stop
+behind the actor's highest price, and a death cross. With dry_run (default)
+orders are paper fills at the ticker price.
+
+Usage:
+    python bot.py --multi-symbol                  # Live exchange, config in trading.multi_symbol_engine
+    python multi_symbol_engine.py --dry-run       # Public market data, paper fills
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from candle_frame import CandleFrameCache
+from log_utils import log_message
+from multi_position_portfolio_manager import MultiPositionPortfolioManager
+
+DEFAULT_ENGINE_CONFIG = {
+    'symbols': ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'XRP/USDT', 'ADA/USDT', 'DOGE/USDT', 'XLM/USDT', 'SUI/USDT'],
+    'max_positions': 5,
+    'max_allocation_per_position': 0.25,
+    'tick_seconds': 15,
+    'timeframe': '30m',
+    'candles': 100,
+    'fast_ma': 7,
+    'slow_ma': 25,
+    'trailing_percent': 0.005,
+    'min_order_usd': 10.0,
+    'requests_per_second': 8.0,     # Token bucket shared by every actor
+    'request_burst': 8,
+    'dry_run': True,
+    'state_file': 'multi_symbol_state.json'
+}
+
+
+def base_fee(order: Dict, symbol: str) -> float:
+    """Fees an order paid in the base asset (they reduce the quantity actually held)"""
+    base = symbol.split('/')[0]
+    fees = order.get('fees') or ([order['fee']] if order.get('fee') else [])
+    return sum(float(fee.get('cost') or 0.0) for fee in fees if fee and fee.get('currency') == base)
+
+
+class RequestRateLimiter:
+    """
+    🚦 Thread-safe token bucket: `rate` requests per second, bursts up to `burst`
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Optional[Callable[[], float]] = None,
+                 sleep: Optional[Callable[[float], None]] = None):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.clock = clock or (lambda: time.monotonic())
+        self.sleep = sleep or (lambda seconds: time.sleep(seconds))
+        self.tokens = self.burst
+        self.updated = self.clock()
+        self.lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self, weight: float = 1.0):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            self.waited += wait
+            self.sleep(wait)
+
+    def call(self, func: Callable, *args, **kwargs):
+        self.acquire()
+        return func(*args, **kwargs)
+
+
+class MarketDataHub:
+    """
+    📡 Shared market data: one ticker snapshot per tick, incremental candles
+    """
+
+    def __init__(self, exchange, limiter: RequestRateLimiter, api_call: Callable, timeframe: str, candles: int):
+        self.exchange = exchange
+        self.limiter = limiter
+        self.api_call = api_call
+        self.timeframe = timeframe
+        self.candle_cache = CandleFrameCache(maxlen=candles)   # One frame per symbol: only its actor writes it
+        self.tickers: Dict[str, Dict] = {}
+
+    def refresh_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        self.tickers = self.limiter.call(self.api_call, self.exchange.fetch_tickers, symbols) or {}
+        return self.tickers
+
+    def price(self, symbol: str) -> Optional[float]:
+        ticker = self.tickers.get(symbol)
+        return float(ticker['last']) if ticker and ticker.get('last') else None
+
+    def candles(self, symbol: str) -> np.ndarray:
+        """Close prices, newest last (the last one is the forming candle)"""
+        self.limiter.acquire()
+        return self.candle_cache.get(self.exchange, symbol, self.timeframe)['close']
+
+
+class PortfolioGovernor:
+    """
+    🏛️ Central risk/allocation: every entry and exit goes through here
+    """
+
+    def __init__(self, portfolio: MultiPositionPortfolioManager, min_order_usd: float = 10.0):
+        self.portfolio = portfolio
+        self.min_order_usd = min_order_usd
+        self.lock = threading.Lock()
+        self.reserved = set()   # Entries sized but not yet filled: they hold a position slot
+
+    def size_entry(self, symbol: str, price: float, score: float, portfolio_value: float) -> float:
+        """Quantity to buy (reserving a slot until open()/cancel()), or 0.0 when refused"""
+        with self.lock:
+            allowed, reason = self.portfolio.can_open_new_position(symbol)
+            if allowed and len(self.portfolio.active_positions) + len(self.reserved) >= self.portfolio.max_positions:
+                allowed, reason = False, f"Maximum positions reached ({self.portfolio.max_positions}, incl. pending)"
+            if not allowed:
+                log_message(f"🏛️ {symbol} entry refused: {reason}")
+                return 0.0
+            quantity = self.portfolio.calculate_position_size(symbol, price, portfolio_value, score)
+            if quantity * price < self.min_order_usd:
+                log_message(f"🏛️ {symbol} entry refused: ${quantity * price:.2f} below minimum order")
+                return 0.0
+            self.reserved.add(symbol)
+            return quantity
+
+    def cancel(self, symbol: str):
+        with self.lock:
+            self.reserved.discard(symbol)
+
+    def open(self, symbol: str, price: float, quantity: float):
+        with self.lock:
+            self.reserved.discard(symbol)
+            if self.portfolio.add_position(symbol, price, quantity):
+                return self.portfolio.active_positions[symbol]
+            return None
+
+    def close(self, symbol: str, price: float, reason: str):
+        with self.lock:
+            return self.portfolio.remove_position(symbol, price, reason)
+
+    def limits(self, symbol: str):
+        """(stop_loss, take_profit) the governor holds for `symbol`"""
+        with self.lock:
+            position = self.portfolio.active_positions.get(symbol)
+            return (position.stop_loss, position.take_profit) if position else (None, None)
+
+
+class SymbolActor:
+    """
+    🎭 One symbol's position, signal and protection
+    """
+
+    __slots__ = ('symbol', 'engine', 'quantity', 'entry_price', 'highest_price', 'entry_time',
+                 'stop_order_id', 'last_signal', 'last_action')
+
+    def __init__(self, symbol: str, engine: 'MultiSymbolEngine'):
+        self.symbol = symbol
+        self.engine = engine
+        self.quantity = 0.0
+        self.entry_price: Optional[float] = None
+        self.highest_price: Optional[float] = None
+        self.entry_time: Optional[float] = None
+        self.stop_order_id: Optional[str] = None     # Exchange protective stop, persisted for restarts
+        self.last_signal = 'HOLD'
+        self.last_action: Optional[str] = None
+
+    @property
+    def holding(self) -> bool:
+        return self.quantity > 0
+
+    def to_dict(self) -> Dict:
+        return {'quantity': self.quantity, 'entry_price': self.entry_price,
+                'highest_price': self.highest_price, 'entry_time': self.entry_time,
+                'stop_order_id': self.stop_order_id}
+
+    def restore(self, data: Dict):
+        self.quantity = float(data.get('quantity') or 0.0)
+        self.entry_price = data.get('entry_price')
+        self.highest_price = data.get('highest_price')
+        self.entry_time = data.get('entry_time')
+        self.stop_order_id = data.get('stop_order_id')
+
+    def step(self) -> Optional[str]:
+        """One actor turn on the current tick; returns the action taken, if any"""
+        engine = self.engine
+        price = engine.market.price(self.symbol)
+        if price is None:
+            return None
+
+        if self.holding:
+            self.highest_price = max(self.highest_price or price, price)
+            reason = self._exit_reason(price)
+            if reason is None:
+                closes = engine.market.candles(self.symbol)
+                self.last_signal = engine.signal_fn(self.symbol, closes)
+                if self.last_signal == 'SELL':
+                    reason = "Death cross"
+            if reason:
+                return self._exit(price, reason)
+            return None
+
+        closes = engine.market.candles(self.symbol)
+        self.last_signal = engine.signal_fn(self.symbol, closes)
+        if self.last_signal == 'BUY':
+            return self._enter(price)
+        return None
+
+    def _exit_reason(self, price: float) -> Optional[str]:
+        stop_loss, take_profit = self.engine.governor.limits(self.symbol)
+        trail = self.highest_price * (1 - float(self.engine.config['trailing_percent']))
+        if stop_loss and price <= stop_loss:
+            return f"Stop loss hit: ${price:.4f} <= ${stop_loss:.4f}"
+        if take_profit and price >= take_profit:
+            return f"Take profit hit: ${price:.4f} >= ${take_profit:.4f}"
+        if trail > self.entry_price and price <= trail:    # Only ever locks in profit
+            return f"Trailing stop: ${price:.4f} <= ${trail:.4f} (high ${self.highest_price:.4f})"
+        return None
+
+    def _enter(self, price: float) -> Optional[str]:
+        engine = self.engine
+        quantity = engine.governor.size_entry(self.symbol, price, 100.0, engine.portfolio_value())
+        if quantity <= 0:
+            return None
+        fill = engine.execute(self.symbol, 'buy', quantity, price)
+        if fill is None:
+            engine.governor.cancel(self.symbol)
+            return None
+        fill_price, quantity = fill                 # Net of fees taken in the base asset
+        engine.governor.open(self.symbol, fill_price, quantity)
+        self.quantity, self.entry_price, self.highest_price = quantity, fill_price, fill_price
+        self.entry_time = time.time()
+        if engine.protector:
+            self.stop_order_id = engine.protector(self.symbol, fill_price, quantity, None)
+        self.last_action = 'BUY'
+        return 'BUY'
+
+    def _exit(self, price: float, reason: str) -> Optional[str]:
+        engine = self.engine
+        stopped_at = None
+        if engine.releaser:
+            # Protective orders hold the balance the sell needs; one that already filled closed the position
+            stopped_at = engine.releaser(self.symbol, self.stop_order_id)
+            self.stop_order_id = None
+        if stopped_at:
+            fill_price, reason = stopped_at, f"Protective stop filled at ${stopped_at:.4f}"
+        else:
+            fill = engine.execute(self.symbol, 'sell', self.quantity, price)
+            fill_price = fill[0] if fill else None
+        if fill_price is None:
+            if engine.protector:
+                self.stop_order_id = engine.protector(self.symbol, self.entry_price, self.quantity, None)
+            return None
+        engine.governor.close(self.symbol, fill_price, reason)
+        self.quantity, self.entry_price, self.highest_price, self.entry_time = 0.0, None, None, None
+        self.last_action = 'SELL'
+        return 'SELL'
+
+
+def ma_crossover_signal(fast: int = 7, slow: int = 25) -> Callable[[str, np.ndarray], str]:
+    """MA fast/slow crossover on the last closed candle (the forming one is ignored)"""
+    def signal(symbol: str, closes: np.ndarray) -> str:
+        closed = closes[:-1]
+        if len(closed) < slow + 1:
+            return 'HOLD'
+        fast_now, fast_prev = closed[-fast:].mean(), closed[-fast - 1:-1].mean()
+        slow_now, slow_prev = closed[-slow:].mean(), closed[-slow - 1:-1].mean()
+        if fast_prev <= slow_prev and fast_now > slow_now:
+            return 'BUY'
+        if fast_prev >= slow_prev and fast_now < slow_now:
+            return 'SELL'
+        return 'HOLD'
+    return signal
+
+
+class MultiSymbolEngine:
+    """
+    🧩 Steps every symbol actor concurrently on a shared market snapshot
+    """
+
+    def __init__(self, exchange, config: Optional[Dict] = None,
+                 portfolio: Optional[MultiPositionPortfolioManager] = None,
+                 api_call: Optional[Callable] = None,
+                 signal_fn: Optional[Callable[[str, np.ndarray], str]] = None,
+                 protector: Optional[Callable[[str, float, float, Optional[str]], Optional[str]]] = None,
+                 releaser: Optional[Callable[[str, Optional[str]], Optional[float]]] = None,
+                 portfolio_value_fn: Optional[Callable[[], float]] = None):
+        self.exchange = exchange
+        self.config = dict(DEFAULT_ENGINE_CONFIG)
+        self.config.update(config or {})
+        self.api_call = api_call or (lambda func, *args, **kwargs: func(*args, **kwargs))
+        self.limiter = RequestRateLimiter(self.config['requests_per_second'], self.config['request_burst'])
+        self.market = MarketDataHub(exchange, self.limiter, self.api_call,
+                                    self.config['timeframe'], int(self.config['candles']))
+        self.governor = PortfolioGovernor(
+            portfolio or MultiPositionPortfolioManager(
+                max_positions=int(self.config['max_positions']),
+                max_allocation_per_position=float(self.config['max_allocation_per_position'])),
+            float(self.config['min_order_usd']))
+        self.signal_fn = signal_fn or ma_crossover_signal(int(self.config['fast_ma']), int(self.config['slow_ma']))
+        self.protector = protector
+        self.releaser = releaser
+        self.portfolio_value = portfolio_value_fn or self._usdt_balance
+        self.actors: Dict[str, SymbolActor] = {symbol: SymbolActor(symbol, self) for symbol in self.config['symbols']}
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(self.actors)), thread_name_prefix='symbol-actor')
+        self.ticks = 0
+        self._load_state()
+
+    # ---------------------------------------------------------------- orders
+
+    def execute(self, symbol: str, side: str, quantity: float, price: float) -> Optional[Tuple[float, float]]:
+        """
+        Market order through the shared limiter; returns (fill price, quantity held afterwards on a buy /
+        sold on a sell), or None on failure. Paper fill at `price` when dry_run.
+        """
+        if self.config['dry_run']:
+            log_message(f"📝 PAPER {side.upper()} {symbol}: {quantity:.6f} @ ${price:.4f}")
+            return price, quantity
+        try:
+            if side == 'sell':
+                quantity = self._sellable(symbol, quantity)
+            order = self.limiter.call(self.api_call, self.exchange.create_market_order, symbol, side, quantity)
+        except Exception as e:
+            log_message(f"❌ {side.upper()} {symbol} failed: {e}")
+            return None
+        order = order or {}
+        log_message(f"✅ {side.upper()} {symbol}: {quantity:.6f} (order {order.get('id')})")
+        filled = float(order.get('filled') or quantity)
+        if side == 'buy':
+            filled -= base_fee(order, symbol)
+        return float(order.get('average') or price), filled
+
+    def _sellable(self, symbol: str, quantity: float) -> float:
+        """Never sell more than the free base balance (fees may have shaved the position)"""
+        balance = self.limiter.call(self.api_call, self.exchange.fetch_balance)
+        free = float((balance.get('free') or {}).get(symbol.split('/')[0]) or 0.0)
+        return min(quantity, free) if free > 0 else quantity
+
+    def _usdt_balance(self) -> float:
+        if self.config['dry_run']:
+            return 1000.0
+        balance = self.limiter.call(self.api_call, self.exchange.fetch_balance)
+        return float(balance.get('total', {}).get('USDT', 0.0))
+
+    # ----------------------------------------------------------------- ticks
+
+    def tick(self) -> Dict[str, str]:
+        """One shared snapshot, then every actor steps in parallel; returns the actions taken"""
+        self.market.refresh_tickers(list(self.actors))
+
+        def step(actor: SymbolActor):
+            try:
+                return actor.step()
+            except Exception as e:
+                log_message(f"⚠️ {actor.symbol} actor error: {e}")
+                return None
+
+        stops = {symbol: actor.stop_order_id for symbol, actor in self.actors.items()}
+        actions = {symbol: action for symbol, action in
+                   zip(self.actors, self.pool.map(step, self.actors.values())) if action}
+        self.ticks += 1
+        if actions or stops != {symbol: actor.stop_order_id for symbol, actor in self.actors.items()}:
+            self._persist()
+        return actions
+
+    def run(self, should_continue: Callable[[], bool] = lambda: True):
+        log_message(f"🧩 Multi-symbol engine: {len(self.actors)} actors, "
+                    f"up to {self.governor.portfolio.max_positions} positions")
+        try:
+            while should_continue():
+                started = time.time()
+                actions = self.tick()
+                if actions:
+                    log_message(f"🧩 Tick {self.ticks}: {actions}")
+                time.sleep(max(0.0, float(self.config['tick_seconds']) - (time.time() - started)))
+        finally:
+            self.pool.shutdown(wait=True)
+
+    def get_status(self) -> Dict:
+        return {
+            'ticks': self.ticks,
+            'positions': {s: a.to_dict() for s, a in self.actors.items() if a.holding},
+            'signals': {s: a.last_signal for s, a in self.actors.items()},
+            'portfolio': self.governor.portfolio.get_portfolio_summary(),
+            'rate_limit_wait_seconds': self.limiter.waited
+        }
+
+    # ----------------------------------------------------------- persistence
+
+    def _persist(self):
+        path = self.config['state_file']
+        if not path:
+            return
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({s: a.to_dict() for s, a in self.actors.items() if a.holding}, f, indent=2)
+            os.replace(tmp, path)
+        except Exception as e:
+            log_message(f"⚠️ Failed to persist multi-symbol state: {e}")
+
+    def _load_state(self):
+        path = self.config['state_file']
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except Exception as e:
+            log_message(f"⚠️ Ignoring unreadable multi-symbol state {path}: {e}")
+            return
+        for symbol, data in saved.items():
+            actor = self.actors.get(symbol)
+            if actor is None:
+                continue
+            actor.restore(data)
+            if actor.holding:
+                self.governor.open(symbol, actor.entry_price, actor.quantity)
+                if self.protector:
+                    # Re-adopt the persisted stop if it is still on the book, otherwise place a new one
+                    actor.stop_order_id = self.protector(symbol, actor.entry_price, actor.quantity,
+                                                         actor.stop_order_id)
+        if self.protector:
+            self._persist()
+
+
+if __name__ == "__main__":
+    import ccxt
+
+    if '--dry-run' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    engine = MultiSymbolEngine(ccxt.binanceus({'enableRateLimit': True}), {'dry_run': True, 'state_file': None})
+    engine.run()
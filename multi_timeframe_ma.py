@@ -5,7 +5,9 @@ Enhanced crossover detection using multiple timeframes for better responsiveness
 
 import pandas as pd
 from typing import Dict, List, Optional
-from strategies.ma_crossover import fetch_ohlcv
+from timeframe_aggregator import get_timeframe_aggregator
+
+MA_TIMEFRAMES = ('1m', '5m', '15m', '30m', '1h', '2h')
 
 def detect_multi_timeframe_ma_signals(exchange, symbol: str, current_price: float) -> Dict:
     """
@@ -27,13 +29,9 @@ def detect_multi_timeframe_ma_signals(exchange, symbol: str, current_price: floa
 
     try:
 
-        # Get data for all timeframes
-        df_1m = fetch_ohlcv(exchange, symbol, '1m', 50)
-        df_5m = fetch_ohlcv(exchange, symbol, '5m', 50)
-        df_15m = fetch_ohlcv(exchange, symbol, '15m', 50)
-        df_30m = fetch_ohlcv(exchange, symbol, '30m', 50)
-        df_1h = fetch_ohlcv(exchange, symbol, '1h', 50)
-        df_2h = fetch_ohlcv(exchange, symbol, '2h', 50)
+        # Get data for all timeframes (derived locally from the 1m stream)
+        frames = get_timeframe_aggregator().get_frames(exchange, symbol, MA_TIMEFRAMES, 50)
+        df_1m, df_5m, df_15m, df_30m, df_1h, df_2h = (frames[tf] for tf in MA_TIMEFRAMES)
 
         # Analyze each timeframe
         signals['1m'] = _analyze_timeframe_ma(df_1m, current_price, '1m')
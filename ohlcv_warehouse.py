@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+OHLCV History Warehouse
+Local, partitioned candle history per (symbol, timeframe) for backtests,
+model training and analysis scripts.
+
+Layout:
+    market_history/<BASE-QUOTE>/<timeframe>/<YYYY-MM>.npy   # hot month, memory-mapped
+    market_history/<BASE-QUOTE>/<timeframe>/<YYYY-MM>.npz   # sealed month, zlib-compressed
+
+Each partition is one columnar float64 block of shape (6, n): rows are
+timestamp (ms), open, high, low, close, volume, each contiguous. Reads of
+.npy partitions are zero-copy memory-mapped views; compressed partitions are
+decompressed on read. Writes go to a temp file and are swapped in with
+os.replace, so readers never see a half-written month.
+
+Usage:
+    python ohlcv_warehouse.py backfill --symbols BTC/USDT ETH/USDT --timeframes 1m 5m --days 90
+    python ohlcv_warehouse.py update                      # Append new candles for everything stored
+    python ohlcv_warehouse.py compact --compress-before 2025-06
+    python ohlcv_warehouse.py info
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WAREHOUSE_DIR = os.path.join(SCRIPT_DIR, 'market_history')
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+TIMEFRAME_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '12h': 43_200_000, '1d': 86_400_000
+}
+
+
+class CandleArrays(dict):
+    """Column name -> 1-D numpy array; views into the partition when possible"""
+
+    def __len__(self):
+        return len(self['timestamp']) if 'timestamp' in self else 0
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Same shape as strategies.ma_crossover.fetch_ohlcv returns"""
+        df = pd.DataFrame({name: np.asarray(self[name]) for name in COLUMNS})
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+        return df
+
+
+def _empty_block() -> np.ndarray:
+    return np.empty((len(COLUMNS), 0), dtype=np.float64)
+
+
+def _months(timestamps: np.ndarray) -> np.ndarray:
+    return timestamps.astype(np.int64).astype('datetime64[ms]').astype('datetime64[M]')
+
+
+class OHLCVWarehouse:
+    """
+    📦 Partitioned columnar candle store with memory-mapped reads
+    """
+
+    def __init__(self, root: str = DEFAULT_WAREHOUSE_DIR):
+        self.root = root
+
+    # ---------------------------------------------------------------- paths
+
+    def _series_dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol.replace('/', '-'), timeframe)
+
+    def _partitions(self, symbol: str, timeframe: str) -> List[Tuple[str, str]]:
+        """(month, path) sorted by month; .npy wins over a stale .npz of the same month"""
+        directory = self._series_dir(symbol, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        found: Dict[str, str] = {}
+        for name in sorted(os.listdir(directory)):
+            month, ext = os.path.splitext(name)
+            if ext == '.npy' or (ext == '.npz' and month not in found):
+                found[month] = os.path.join(directory, name)
+        return sorted(found.items())
+
+    def series(self) -> List[Tuple[str, str]]:
+        """Every stored (symbol, timeframe)"""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for symbol_dir in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, symbol_dir)
+            if os.path.isdir(path):
+                for timeframe in sorted(os.listdir(path)):
+                    result.append((symbol_dir.replace('-', '/', 1), timeframe))
+        return result
+
+    # -------------------------------------------------------------- reading
+
+    @staticmethod
+    def _load_partition(path: str) -> np.ndarray:
+        if path.endswith('.npz'):
+            with np.load(path) as archive:
+                return archive['candles']
+        return np.load(path, mmap_mode='r')
+
+    def query(self, symbol: str, timeframe: str, start_ms: Optional[int] = None,
+              end_ms: Optional[int] = None) -> CandleArrays:
+        """Candles with start_ms <= timestamp < end_ms (either bound optional)"""
+        blocks = []
+        for month, path in self._partitions(symbol, timeframe):
+            month_start = int(np.datetime64(month, 'M').astype('datetime64[ms]').astype(np.int64))
+            month_end = int((np.datetime64(month, 'M') + 1).astype('datetime64[ms]').astype(np.int64))
+            if (end_ms is not None and month_start >= end_ms) or (start_ms is not None and month_end <= start_ms):
+                continue
+            block = self._load_partition(path)
+            ts = block[0]
+            lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side='left'))
+            hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side='left'))
+            if hi > lo:
+                blocks.append(block[:, lo:hi])
+
+        if not blocks:
+            data = _empty_block()
+        elif len(blocks) == 1:
+            data = blocks[0]                     # Zero-copy view for .npy partitions
+        else:
+            data = np.concatenate(blocks, axis=1)
+        return CandleArrays((name, data[i]) for i, name in enumerate(COLUMNS))
+
+    def tail(self, symbol: str, timeframe: str, limit: int) -> CandleArrays:
+        """The most recent `limit` stored candles"""
+        step = TIMEFRAME_MS.get(timeframe, 60_000)
+        last = self.latest_timestamp(symbol, timeframe)
+        if last is None:
+            return self.query(symbol, timeframe, 0, 0)
+        candles = self.query(symbol, timeframe, last - (limit - 1) * step, last + 1)
+        return CandleArrays((name, values[-limit:]) for name, values in candles.items())
+
+    def latest_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        partitions = self._partitions(symbol, timeframe)
+        for _, path in reversed(partitions):
+            block = self._load_partition(path)
+            if block.shape[1]:
+                return int(block[0, -1])
+        return None
+
+    # -------------------------------------------------------------- writing
+
+    def _write_partition(self, symbol: str, timeframe: str, month: str, block: np.ndarray, compress: bool):
+        directory = self._series_dir(symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        final = os.path.join(directory, f"{month}.{'npz' if compress else 'npy'}")
+        tmp = f"{final}.tmp"
+        with open(tmp, 'wb') as f:
+            if compress:
+                np.savez_compressed(f, candles=block)
+            else:
+                np.save(f, np.ascontiguousarray(block))
+        os.replace(tmp, final)
+
+        # Only one representation of a month may exist
+        other = os.path.join(directory, f"{month}.{'npy' if compress else 'npz'}")
+        if os.path.exists(other):
+            os.remove(other)
+
+    @staticmethod
+    def _merge(existing: np.ndarray, new: np.ndarray) -> np.ndarray:
+        """Union by timestamp, newer rows win (a re-fetched candle replaces the stored one)"""
+        combined = np.concatenate([existing, new], axis=1) if existing.shape[1] else new
+        ts = combined[0]
+        # Last occurrence of each timestamp
+        _, last_idx = np.unique(ts[::-1], return_index=True)
+        keep = np.sort(len(ts) - 1 - last_idx)
+        merged = combined[:, keep]
+        return merged[:, np.argsort(merged[0], kind='stable')]
+
+    def append(self, symbol: str, timeframe: str, rows) -> int:
+        """
+        Upsert candles given as ccxt rows [[ts, o, h, l, c, v], ...] or a (n, 6) array.
+        Returns how many timestamps were new.
+        """
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.size == 0:
+            return 0
+        block = np.ascontiguousarray(rows.reshape(-1, len(COLUMNS)).T)
+        months = _months(block[0])
+        partitions = dict(self._partitions(symbol, timeframe))
+
+        added = 0
+        for month in np.unique(months):
+            label = str(month)
+            new = block[:, months == month]
+            path = partitions.get(label)
+            existing = np.array(self._load_partition(path)) if path else _empty_block()
+            merged = self._merge(existing, new)
+            added += merged.shape[1] - existing.shape[1]
+            self._write_partition(symbol, timeframe, label, merged, compress=bool(path and path.endswith('.npz')))
+        return added
+
+    # ------------------------------------------------------------ exchange
+
+    def backfill(self, exchange, symbol: str, timeframe: str, since_ms: int,
+                 until_ms: Optional[int] = None, page_limit: int = 1000) -> int:
+        """Page closed candles from the exchange into the warehouse"""
+        step = TIMEFRAME_MS[timeframe]
+        until_ms = until_ms or int(time.time() * 1000)
+        cursor = since_ms
+        buffered: List[list] = []
+        added = 0
+
+        while cursor < until_ms:
+            page = exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+            closed = [c for c in page if c[0] + step <= until_ms]
+            buffered.extend(closed)
+            if len(buffered) >= 20 * page_limit:   # Flush roughly once per month of 1m data
+                added += self.append(symbol, timeframe, buffered)
+                buffered = []
+            if not page or len(page) < page_limit or page[-1][0] + step <= cursor:
+                break
+            cursor = page[-1][0] + step
+
+        if buffered:
+            added += self.append(symbol, timeframe, buffered)
+        return added
+
+    def update(self, exchange, symbol: str, timeframe: str, default_days: int = 30) -> int:
+        """Append candles newer than the last stored one"""
+        last = self.latest_timestamp(symbol, timeframe)
+        since = last + TIMEFRAME_MS[timeframe] if last is not None else \
+            int(time.time() * 1000) - default_days * 86_400_000
+        return self.backfill(exchange, symbol, timeframe, since)
+
+    # ----------------------------------------------------------- compaction
+
+    def compact(self, compress_before: Optional[str] = None) -> Dict[str, int]:
+        """
+        Dedup/sort every partition, drop stray temp files, and zlib-compress
+        months strictly before `compress_before` (YYYY-MM).
+        """
+        stats = {'partitions': 0, 'compressed': 0, 'temp_removed': 0}
+        for symbol, timeframe in self.series():
+            directory = self._series_dir(symbol, timeframe)
+            for name in os.listdir(directory):
+                if name.endswith('.tmp'):
+                    os.remove(os.path.join(directory, name))
+                    stats['temp_removed'] += 1
+            for month, path in self._partitions(symbol, timeframe):
+                block = self._merge(_empty_block(), np.array(self._load_partition(path)))
+                compress = path.endswith('.npz') or (compress_before is not None and month < compress_before)
+                self._write_partition(symbol, timeframe, month, block, compress)
+                stats['partitions'] += 1
+                stats['compressed'] += int(compress and path.endswith('.npy'))
+        return stats
+
+    def info(self) -> List[Dict]:
+        rows = []
+        for symbol, timeframe in self.series():
+            partitions = self._partitions(symbol, timeframe)
+            candles = self.query(symbol, timeframe)
+            rows.append({
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'partitions': len(partitions),
+                'candles': len(candles),
+                'first': pd.to_datetime(int(candles['timestamp'][0]), unit='ms') if len(candles) else None,
+                'last': pd.to_datetime(int(candles['timestamp'][-1]), unit='ms') if len(candles) else None
+            })
+        return rows
+
+
+def load_history(exchange, symbol: str, timeframe: str, limit: int, fallback_limit: Optional[int] = None,
+                 warehouse: Optional[OHLCVWarehouse] = None) -> pd.DataFrame:
+    """
+    Training/research helper: the last `limit` closed candles from the
+    warehouse when it holds enough fresh history, otherwise a live fetch of
+    `fallback_limit` candles (default `limit`).
+    """
+    warehouse = warehouse or OHLCVWarehouse()
+    step = TIMEFRAME_MS.get(timeframe, 60_000)
+    now_ms = int(time.time() * 1000)
+    candles = warehouse.query(symbol, timeframe, now_ms - (limit + 2) * step, now_ms - step + 1)
+    if len(candles) >= limit and candles['timestamp'][-1] >= now_ms - 2 * step:
+        return CandleArrays((name, values[-limit:]) for name, values in candles.items()).to_dataframe()
+
+    from strategies.ma_crossover import fetch_ohlcv
+    return fetch_ohlcv(exchange, symbol, timeframe, fallback_limit or limit)
+
+
+def _arg_values(args: List[str], flag: str) -> List[str]:
+    if flag not in args:
+        return []
+    values = []
+    for value in args[args.index(flag) + 1:]:
+        if value.startswith('--'):
+            break
+        values.append(value)
+    return values
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or '--help' in args:
+        print(__doc__)
+        sys.exit(0)
+
+    command = args[0]
+    warehouse = OHLCVWarehouse((_arg_values(args, '--root') or [DEFAULT_WAREHOUSE_DIR])[0])
+
+    if command == 'info':
+        for row in warehouse.info():
+            print(f"📦 {row['symbol']} {row['timeframe']}: {row['candles']:,} candles in "
+                  f"{row['partitions']} partitions ({row['first']} → {row['last']})")
+        sys.exit(0)
+
+    if command == 'compact':
+        before = (_arg_values(args, '--compress-before') or [None])[0]
+        print(f"🗜️ Compaction: {warehouse.compact(before)}")
+        sys.exit(0)
+
+    from incremental_trade_sync import create_sync_exchange
+    exchange = create_sync_exchange()
+
+    if command == 'backfill':
+        symbols = _arg_values(args, '--symbols') or ['BTC/USDT']
+        timeframes = _arg_values(args, '--timeframes') or ['1m']
+        days = int((_arg_values(args, '--days') or ['30'])[0])
+        since = int(time.time() * 1000) - days * 86_400_000
+        for symbol in symbols:
+            for timeframe in timeframes:
+                start = time.time()
+                added = warehouse.backfill(exchange, symbol, timeframe, since)
+                print(f"📥 {symbol} {timeframe}: {added:,} new candles in {time.time() - start:.1f}s")
+    elif command == 'update':
+        for symbol, timeframe in warehouse.series():
+            added = warehouse.update(exchange, symbol, timeframe)
+            print(f"📥 {symbol} {timeframe}: {added:,} new candles")
+    else:
+        print(f"❌ Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
@@ -7,9 +7,9 @@
 #
 # =============================================================================
 
-import requests
 import time
 from datetime import datetime, timedelta
+from http_client import get_http_client
 from log_utils import log_message
 
 try:
@@ -275,7 +275,7 @@ class OnChainDataProvider:
             if api_key:
                 headers['x-cg-demo-api-key'] = api_key
             
-            response = requests.get(dex_url, headers=headers, timeout=10)
+            response = get_http_client().get('coingecko', dex_url, headers=headers)
             
             if response.status_code == 200:
                 dex_data = response.json()
@@ -321,7 +321,7 @@ class OnChainDataProvider:
             if api_key:
                 headers['x-cg-demo-api-key'] = api_key
             
-            response = requests.get(crypto_url, headers=headers, params=params, timeout=10)
+            response = get_http_client().get('coingecko', crypto_url, headers=headers, params=params)
             
             if response.status_code == 200:
                 market_data = response.json()
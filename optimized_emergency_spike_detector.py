@@ -21,6 +21,9 @@ from log_utils import log_message
 
 class OptimizedEmergencySpike:
     """Enhanced emergency spike data class with optimization info"""
+    __slots__ = ('symbol', 'price_change_pct', 'volume_surge', 'timeframe', 'urgency_score', 'detected_at',
+                 'volume_24h', 'detection_method')
+
     def __init__(self, symbol: str, price_change_pct: float, volume_surge: float, 
                  timeframe: str, urgency_score: float, detected_at: datetime,
                  volume_24h: float = 0, detection_method: str = "fast_scan"):
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+🧾 ORDER RECONCILER
+===================
+
+Diffs the protection each position should have (order ids recorded in
+trading state) against one open-orders snapshot and issues only the
+cancels that are actually needed, concurrently.
+
+- Snapshot: one fetch_open_orders(symbol) for a single symbol, one
+  all-symbols fetch_open_orders() for several (falling back to concurrent
+  per-symbol fetches if the exchange refuses the all-symbols call)
+- Cancels run on a small thread pool; max_workers bounds how many requests
+  are in flight at once, on top of the exchange's own rate limiter
+- reconcile_all() diffs the desired orders of every pair against one
+  snapshot and never stacks a new stop on top of an existing one:
+    desired order live       -> protected; protective strays are cancelled
+    desired missing, strays  -> protected by the strays (left in place)
+    nothing live             -> unprotected; place() restores protection
+  All stray cancels go out in one concurrent round, then all places in
+  another. reconcile() is the single-symbol form without placement.
+
+Emergency cleanup (cancel every protective sell on a set of symbols) is
+cancel_protective(): one snapshot plus one concurrent cancel round. Its
+scope is every symbol with open orders plus protection_scope() - the
+active pair and the positions recorded in state - for exchanges that
+refuse the all-symbols open-orders call.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config_service import get_config_service, thaw
+from log_utils import log_message
+
+DEFAULT_RECONCILER_CONFIG = {
+    'max_workers': 4,
+    'symbols': []       # Extra pairs for emergency cleanup on top of the active pair and recorded positions
+}
+
+
+def load_reconciler_config(config_path: str = 'enhanced_config.json') -> Dict:
+    """risk_management.order_reconciler from the bot config, over the defaults (for standalone scripts)"""
+    section = get_config_service().get(config_path, 'risk_management', default={}).get('order_reconciler', {})
+    return {**DEFAULT_RECONCILER_CONFIG, **thaw(section)}
+
+
+def protection_scope(active_symbol: Optional[str], engine_positions: Optional[Dict[str, Dict]] = None,
+                     extra: Iterable[str] = ()) -> List[str]:
+    """Pairs that may carry protective orders: the active pair, multi-symbol engine holdings, then `extra`"""
+    symbols = [active_symbol] if active_symbol else []
+    symbols += [symbol for symbol, position in (engine_positions or {}).items()
+                if float(position.get('quantity') or 0) > 0]
+    return list(dict.fromkeys(symbols + list(extra)))
+
+
+def load_protection_scope(config_path: str = 'enhanced_config.json', config: Optional[Dict] = None) -> List[str]:
+    """protection_scope() from the bot config and the multi-symbol engine's state file (for standalone scripts)"""
+    service = get_config_service()
+    trading = service.get(config_path, 'trading', default={})
+    engine_file = trading.get('multi_symbol_engine', {}).get('state_file', 'multi_symbol_state.json')
+    engine_positions = {}
+    if engine_file and os.path.exists(engine_file):
+        try:
+            with open(engine_file) as f:
+                engine_positions = json.load(f)
+        except (OSError, ValueError) as e:
+            log_message(f"⚠️ Ignoring unreadable multi-symbol state {engine_file}: {e}")
+    config = config if config is not None else load_reconciler_config(config_path)
+    return protection_scope(trading.get('symbol'), engine_positions, config.get('symbols', []))
+
+
+def is_protective_order(order: Dict) -> bool:
+    """Stop-loss, stop-limit and OCO sell orders"""
+    order_type = (order.get('type') or '').lower()
+    side = (order.get('side') or '').lower()
+    return ('stop' in order_type or order_type in ('stop_loss_limit', 'stop_loss', 'oco')) and side == 'sell'
+
+
+def desired_protection(trading_state: Dict) -> Dict[str, str]:
+    """
+    Protective order ids the bot believes are working, mapped to the state
+    flag that tracks them. Manual OCOs are expanded into their components;
+    partial OCOs don't record their component ids and are not listed.
+    """
+    desired = {}
+    if trading_state.get('trailing_stop_active') and trading_state.get('trailing_stop_order_id'):
+        desired[str(trading_state['trailing_stop_order_id'])] = 'trailing_stop_active'
+    if trading_state.get('immediate_stop_limit_active') and trading_state.get('immediate_stop_limit_order_id'):
+        desired[str(trading_state['immediate_stop_limit_order_id'])] = 'immediate_stop_limit_active'
+    oco_id = trading_state.get('trailing_oco_order_id')
+    if trading_state.get('trailing_oco_active') and oco_id:
+        if 'MANUAL_OCO_' in oco_id:
+            for part in oco_id.replace('MANUAL_OCO_', '').split('_'):
+                desired[part] = 'trailing_oco_active'
+        elif 'PARTIAL_OCO_' not in oco_id:
+            desired[str(oco_id)] = 'trailing_oco_active'
+    return desired
+
+
+class OrderReconciler:
+    """
+    🧾 Snapshot-and-diff order maintenance
+    """
+
+    def __init__(self, exchange, config: Optional[Dict] = None, api_call: Optional[Callable] = None):
+        self.exchange = exchange
+        self.config = dict(DEFAULT_RECONCILER_CONFIG)
+        self.config.update(config or {})
+        self.api_call = api_call or (lambda func, *args, **kwargs: func(*args, **kwargs))
+
+    def _concurrently(self, func: Callable, items: List) -> List:
+        """func(item) for every item on the pool; results (or the raised exception) in item order"""
+        def run(item):
+            try:
+                return func(item)
+            except Exception as e:
+                return e
+
+        if len(items) <= 1:
+            return [run(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(int(self.config['max_workers']), len(items))) as pool:
+            return list(pool.map(run, items))
+
+    # ------------------------------------------------------------ snapshot
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None, include_unlisted: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Open orders grouped by symbol (every requested symbol gets a list). include_unlisted keeps the
+        all-symbols call's orders on other pairs too; `symbols` is then the per-symbol fallback scope.
+        """
+        symbols = list(symbols) if symbols is not None else None
+        if symbols is not None and len(symbols) == 1 and not include_unlisted:
+            orders = self.api_call(self.exchange.fetch_open_orders, symbols[0]) or []
+        else:
+            try:
+                options = getattr(self.exchange, 'options', None)
+                if isinstance(options, dict):
+                    options['warnOnFetchOpenOrdersWithoutSymbol'] = False
+                orders = self.api_call(self.exchange.fetch_open_orders) or []
+            except Exception as e:
+                if not symbols:
+                    raise
+                log_message(f"⚠️ All-symbol open orders unavailable ({e}) - fetching per symbol")
+                orders = []
+                for symbol, result in zip(symbols, self._concurrently(
+                        lambda s: self.api_call(self.exchange.fetch_open_orders, s), symbols)):
+                    if isinstance(result, Exception):
+                        raise result
+                    orders.extend(result or [])
+
+        grouped = {symbol: [] for symbol in symbols or []}
+        for order in orders:
+            if symbols is None or include_unlisted or order.get('symbol') in grouped:
+                grouped.setdefault(order.get('symbol'), []).append(order)
+        return grouped
+
+    # -------------------------------------------------------------- cancels
+
+    def cancel_orders(self, orders: List[Dict]) -> Dict:
+        """Cancel orders ({'id', 'symbol'}) concurrently"""
+        results = self._concurrently(
+            lambda order: self.api_call(self.exchange.cancel_order, order['id'], order['symbol']), orders)
+        cancelled, failed = [], {}
+        for order, result in zip(orders, results):
+            if isinstance(result, Exception):
+                failed[order['id']] = str(result)
+                log_message(f"⚠️ Failed to cancel order {order['id']} ({order['symbol']}): {result}")
+            else:
+                cancelled.append(order['id'])
+                log_message(f"✅ Cancelled {order.get('type') or 'order'} {order['id']} ({order['symbol']})")
+        return {'cancelled': cancelled, 'failed': failed}
+
+    def cancel_protective(self, symbols: Optional[Iterable[str]] = None,
+                          predicate: Callable[[Dict], bool] = is_protective_order,
+                          include_unlisted: bool = False) -> Dict:
+        """Cancel every matching open order on `symbols` (all symbols when None)"""
+        snapshot = self.snapshot(symbols, include_unlisted)
+        targets = [order for orders in snapshot.values() for order in orders if predicate(order)]
+        result = self.cancel_orders(targets)
+        result.update({'open': sum(len(orders) for orders in snapshot.values()), 'matched': len(targets)})
+        return result
+
+    # ------------------------------------------------------------ reconcile
+
+    def plan(self, open_orders: List[Dict], desired: Dict[str, str]) -> Dict:
+        """Split one symbol's protective orders into live desired ids, missing ids and strays"""
+        protective = [order for order in open_orders if is_protective_order(order)]
+        open_ids = {str(order.get('id')) for order in protective}
+        return {
+            'live': [order_id for order_id in desired if order_id in open_ids],
+            'missing': [order_id for order_id in desired if order_id not in open_ids],
+            'strays': [order for order in protective if str(order.get('id')) not in desired]
+        }
+
+    def reconcile_all(self, desired: Dict[str, Dict[str, str]],
+                      place: Optional[Callable[[str, Dict], Any]] = None) -> Dict[str, Dict]:
+        """
+        One snapshot across every pair in `desired`, one concurrent round of stray cancels, then
+        place(symbol, result) concurrently for each pair left unprotected; see the module docstring
+        """
+        symbols = list(desired)
+        snapshot = self.snapshot(symbols) if symbols else {}
+        results, strays = {}, []
+        for symbol in symbols:
+            wanted = desired[symbol]
+            plan = self.plan(snapshot.get(symbol, []), wanted)
+            results[symbol] = {'symbol': symbol, 'live': plan['live'], 'missing': plan['missing'],
+                               'missing_flags': sorted({wanted[order_id] for order_id in plan['missing']} -
+                                                       {wanted[order_id] for order_id in plan['live']}),
+                               'strays': [order['id'] for order in plan['strays']], 'cancelled': [], 'failed': {},
+                               'protected': bool(plan['live'] or plan['strays'])}
+            if plan['live'] and plan['strays']:
+                log_message(f"🧹 {symbol}: cancelling {len(plan['strays'])} stray protective order(s)")
+                strays.extend(plan['strays'])
+
+        if strays:
+            outcome = self.cancel_orders(strays)
+            for order in strays:
+                result = results[order['symbol']]
+                if order['id'] in outcome['failed']:
+                    result['failed'][order['id']] = outcome['failed'][order['id']]
+                else:
+                    result['cancelled'].append(order['id'])
+
+        unprotected = [symbol for symbol in symbols if not results[symbol]['protected']]
+        if place and unprotected:
+            for symbol, placed in zip(unprotected, self._concurrently(lambda s: place(s, results[s]), unprotected)):
+                if isinstance(placed, Exception):
+                    log_message(f"⚠️ Could not restore protection on {symbol}: {placed}")
+                    placed = None
+                results[symbol]['placed'] = placed
+        return results
+
+    def reconcile(self, symbol: str, desired: Dict[str, str]) -> Dict:
+        """Single-pair reconcile_all without placement; the caller decides how to restore protection"""
+        return self.reconcile_all({symbol: desired})[symbol]
+
+
+# Global reconciler instance
+_order_reconciler = None
+
+
+def get_order_reconciler(exchange, config: Optional[Dict] = None, **kwargs) -> OrderReconciler:
+    """Get the process-wide order reconciler"""
+    global _order_reconciler
+    if _order_reconciler is None:
+        _order_reconciler = OrderReconciler(exchange, config, **kwargs)
+    return _order_reconciler
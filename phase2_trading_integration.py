@@ -28,8 +28,9 @@ class Phase2TradingIntegration:
     - On-chain metrics → Confidence scoring
     """
     
-    def __init__(self):
+    def __init__(self, refresher=None):
         self.enabled = PHASE2_AVAILABLE
+        self.refresher = refresher  # IntelligenceRefresher: the trading path reads its snapshots, never fetches
         self.cache = {}
         self.cache_duration = 300  # 5 minutes
         
@@ -52,6 +53,8 @@ class Phase2TradingIntegration:
         try:
             # Get comprehensive Phase 2 intelligence
             intelligence = self._get_cached_intelligence(symbol)
+            if intelligence is None:  # Background snapshot still warming up
+                return self._create_fallback_enhancement(current_signal)
             
             # Analyze intelligence for trading insights
             enhancement = self._analyze_trading_insights(symbol, intelligence, current_signal)
@@ -62,8 +65,14 @@ class Phase2TradingIntegration:
             logging.error(f"Phase 2 enhancement error for {symbol}: {e}")
             return self._create_fallback_enhancement(current_signal)
     
-    def _get_cached_intelligence(self, symbol: str) -> Dict:
-        """Get cached Phase 2 intelligence or fetch new data"""
+    def _get_cached_intelligence(self, symbol: str) -> Optional[Dict]:
+        """
+        Latest Phase 2 intelligence for `symbol`. With a refresher this is its snapshot (None while
+        warming up); standalone, the local cache is refilled inline.
+        """
+        if self.refresher is not None:
+            return self.refresher.get('phase2_enhancement', symbol)
+
         cache_key = f'intelligence_{symbol}'
         
         if cache_key in self.cache:
@@ -71,22 +80,26 @@ class Phase2TradingIntegration:
             if time.time() - timestamp < self.cache_duration:
                 return data
         
-        # Fetch fresh intelligence
-        intelligence = self.phase2_provider.get_comprehensive_phase2_intelligence(symbol)
-        onchain_data = self.onchain_provider.get_exchange_flows(symbol)
+        combined_intelligence = self.fetch_intelligence(symbol)
+        
+        # Cache the data
+        self.cache[cache_key] = (combined_intelligence, time.time())
+        
+        return combined_intelligence
+    
+    def fetch_intelligence(self, symbol: str) -> Dict:
+        """Provider calls behind one enhancement (the refresher's fetch); accepts a pair or its base asset"""
+        crypto = symbol.split('/')[0]
+        intelligence = self.phase2_provider.get_comprehensive_phase2_intelligence(crypto)
+        onchain_data = self.onchain_provider.get_exchange_flows(crypto)
         
         # Combine data sources
-        combined_intelligence = {
+        return {
             'symbol': symbol,
             'timestamp': time.time(),
             'phase2_data': intelligence,
             'onchain_flows': onchain_data,
         }
-        
-        # Cache the data
-        self.cache[cache_key] = (combined_intelligence, time.time())
-        
-        return combined_intelligence
     
     def _analyze_trading_insights(self, symbol: str, intelligence: Dict, current_signal: Dict) -> Dict:
         """
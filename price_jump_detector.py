@@ -7,17 +7,65 @@ import time
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
 @dataclass
 class PricePoint:
     """Represents a price point with timestamp"""
+    __slots__ = ('timestamp', 'price')
     timestamp: float
     price: float
 
+class PriceHistory:
+    """
+    Rolling price history as two parallel float64 arrays (timestamps, prices)
+    instead of one PricePoint object per tick. Appends write in place; the
+    window shifts once every max_size appends.
+    """
+
+    __slots__ = ('_timestamps', '_prices', '_start', '_stop', 'max_size')
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._timestamps = np.empty(2 * max_size)
+        self._prices = np.empty(2 * max_size)
+        self._start = 0
+        self._stop = 0
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index: int) -> PricePoint:
+        index = range(self._start, self._stop)[index]
+        return PricePoint(float(self._timestamps[index]), float(self._prices[index]))
+
+    def append(self, timestamp: float, price: float):
+        if self._stop == len(self._prices):
+            keep = self.max_size - 1
+            self._timestamps[:keep] = self._timestamps[self._stop - keep:self._stop]
+            self._prices[:keep] = self._prices[self._stop - keep:self._stop]
+            self._start, self._stop = 0, keep
+        self._timestamps[self._stop] = timestamp
+        self._prices[self._stop] = price
+        self._stop += 1
+        if self._stop - self._start > self.max_size:
+            self._start += 1
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[self._start:self._stop]
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self._prices[self._start:self._stop]
+
 @dataclass  # type: ignore
 class PriceJump:
     """Represents a detected price jump"""
+    # timeframe / threshold_met / urgency_score are set after detection
+    __slots__ = ('start_price', 'end_price', 'change_pct', 'duration_seconds', 'direction', 'timestamp',
+                 'timeframe', 'threshold_met', 'urgency_score')
     start_price: float
     end_price: float
     change_pct: float
@@ -30,8 +78,8 @@ class PriceJumpDetector:
 
     def __init__(self, config: Dict):
         self.config = config
-        self.price_history: List[PricePoint] = []
         self.max_history_size = 500  # Increased for longer trend tracking
+        self.price_history = PriceHistory(self.max_history_size)
 
         # Multi-timeframe detection windows
         self.detection_windows = {
@@ -81,12 +129,8 @@ class PriceJumpDetector:
 
         current_time = time.time()
 
-        # Add to history
-        self.price_history.append(PricePoint(current_time, price))
-
-        # Trim history to prevent memory issues
-        if len(self.price_history) > self.max_history_size:
-            self.price_history = self.price_history[-self.max_history_size:]
+        # Add to history (bounded to max_history_size)
+        self.price_history.append(current_time, price)
 
         # Clean old jumps
         self._clean_old_jumps()
@@ -106,23 +150,26 @@ class PriceJumpDetector:
 
         best_jump = None
         best_urgency = 0
+        timestamps = self.price_history.timestamps
+        prices = self.price_history.prices
 
         # Check each timeframe
         for timeframe, window_seconds in self.detection_windows.items():
             threshold = self.thresholds[timeframe]
 
-            # Find relevant price points within this window
+            # Find relevant price points within this window (history is time-ordered)
             window_start = current_time - window_seconds
-            relevant_points = [p for p in self.price_history if p.timestamp >= window_start]
+            first = int(np.searchsorted(timestamps, window_start, side='left'))
 
-            if len(relevant_points) < 2:
+            if len(timestamps) - first < 2:
                 continue
 
             # Get the earliest price in the window
-            earliest_point = min(relevant_points, key=lambda p: p.timestamp)
+            earliest_time = float(timestamps[first])
+            earliest_price = float(prices[first])
 
             # Calculate price change
-            price_change = (current_price - earliest_point.price) / earliest_point.price
+            price_change = (current_price - earliest_price) / earliest_price
             change_pct = price_change * 100
 
             # Check if this meets the threshold for this timeframe
@@ -130,10 +177,10 @@ class PriceJumpDetector:
                 # Check if we haven't detected this movement recently
                 if not self._is_duplicate_jump(current_price, current_time, timeframe):
                     direction = 'UP' if change_pct > 0 else 'DOWN'
-                    duration = current_time - earliest_point.timestamp
+                    duration = current_time - earliest_time
 
                     jump = PriceJump(
-                        start_price=earliest_point.price,
+                        start_price=earliest_price,
                         end_price=current_price,
                         change_pct=change_pct,
                         duration_seconds=duration,
@@ -187,17 +234,15 @@ class PriceJumpDetector:
             return
 
         # Look at last 10 price points to determine trend
-        recent_points = self.price_history[-10:]
+        recent_prices = self.price_history.prices[-10:]
+        recent_start_time = float(self.price_history.timestamps[-10])
 
         # Calculate trend direction and strength
-        price_changes = []
-        for i in range(1, len(recent_points)):
-            change = (recent_points[i].price - recent_points[i-1].price) / recent_points[i-1].price
-            price_changes.append(change)
+        price_changes = np.diff(recent_prices) / recent_prices[:-1]
 
         # Determine trend direction
-        positive_changes = sum(1 for c in price_changes if c > 0)
-        negative_changes = sum(1 for c in price_changes if c < 0)
+        positive_changes = int((price_changes > 0).sum())
+        negative_changes = int((price_changes < 0).sum())
 
         if positive_changes > negative_changes * 1.5:
             new_direction = 'UP'
@@ -210,13 +255,13 @@ class PriceJumpDetector:
         if new_direction != self.trend_state['direction']:
             # Trend direction changed
             self.trend_state['direction'] = new_direction
-            self.trend_state['start_price'] = recent_points[0].price
+            self.trend_state['start_price'] = float(recent_prices[0])
             self.trend_state['duration'] = 0
             self.trend_state['peak_change'] = 0
 
         # Update trend metrics
         if self.trend_state['direction'] and self.trend_state['start_price']:
-            self.trend_state['duration'] = current_time - recent_points[0].timestamp
+            self.trend_state['duration'] = current_time - recent_start_time
             current_change = (current_price - self.trend_state['start_price']) / self.trend_state['start_price'] * 100
 
             if abs(current_change) > abs(self.trend_state['peak_change']):
@@ -324,20 +369,14 @@ class PriceJumpDetector:
             return 0.5
 
         # Look at recent price velocity
-        recent_points = self.price_history[-5:]
-        velocities = []
-
-        for i in range(1, len(recent_points)):
-            time_diff = recent_points[i].timestamp - recent_points[i-1].timestamp
-            if time_diff > 0:
-                price_change = (recent_points[i].price - recent_points[i-1].price) / recent_points[i-1].price
-                velocity = abs(price_change) / time_diff  # %/second
-                velocities.append(velocity)
-
-        if not velocities:
+        recent_prices = self.price_history.prices[-5:]
+        time_diffs = np.diff(self.price_history.timestamps[-5:])
+        moving = time_diffs > 0
+        if not moving.any():
             return 0.5
 
-        avg_velocity = sum(velocities) / len(velocities)
+        price_changes = np.diff(recent_prices) / recent_prices[:-1]
+        avg_velocity = float((np.abs(price_changes[moving]) / time_diffs[moving]).mean())  # %/second
         # Normalize to 0-1 scale (0.001 %/second = full strength)
         return min(1.0, avg_velocity / 0.001)
 
@@ -11,6 +11,7 @@ import ccxt
 from config import BINANCE_API_KEY, BINANCE_API_SECRET
 from success_rate_enhancer import SuccessRateEnhancer, check_anti_whipsaw_protection
 from log_utils import log_message
+from ohlcv_warehouse import load_history
 
 def analyze_quality_gate():
     """Analyze why signals are failing the quality gate"""
@@ -39,11 +40,8 @@ def analyze_quality_gate():
         timeframe = '5m'
         limit = 200
         
-        print(f"📊 Fetching {symbol} data ({timeframe})...")
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        print(f"📊 Loading {symbol} data ({timeframe})...")
+        df = load_history(exchange, symbol, timeframe, limit)  # Local warehouse first, live fetch otherwise
         df.set_index('timestamp', inplace=True)
         
         current_price = df['close'].iloc[-1]
@@ -0,0 +1,314 @@
+# =============================================================================
+# REGIME STATISTICS ENGINE - Shared rolling statistics for regime detectors
+# =============================================================================
+#
+# MarketRegimeDetector (institutional_strategies), AdvancedHybridStrategy
+# (strategies/hybrid_strategy) and MarketMicrostructureAnalyzer
+# (market_microstructure) all classify regimes from the same handful of
+# statistics: rolling volatility, Hurst exponent, variance ratio, price
+# efficiency, moving averages and volume ratios.
+#
+# This engine computes every one of them in a single vectorized numpy pass
+# and caches the result:
+#   - per (symbol, timeframe): a candle buffer that only appends candles newer
+#     than the last one seen (the forming candle is overwritten in place);
+#   - per frame fingerprint when no symbol is given, so detectors called on
+#     the same DataFrame in the same loop share one computation.
+#
+# Statistics are computed over the same window as the DataFrame passed in, so
+# each detector sees exactly the values its old pandas code produced.
+#
+# =============================================================================
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_REGIME_STATS_CONFIG = {
+    'max_history': 2000,     # Candles kept per (symbol, timeframe)
+    'hurst_window': 50,      # Returns used for the Hurst exponent
+    'hurst_max_lag': 20,
+    'cache_size': 64         # Fingerprint-keyed results kept for anonymous frames
+}
+
+
+# ----------------------------------------------------------------- helpers
+
+def _last(values: np.ndarray) -> float:
+    return float(values[-1]) if len(values) else float('nan')
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean, one value per full window (like pandas minus the NaN head)"""
+    if len(values) < window:
+        return np.empty(0)
+    csum = np.cumsum(np.insert(values, 0, 0.0))
+    return (csum[window:] - csum[:-window]) / window
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sample standard deviation (ddof=1), one value per full window"""
+    if len(values) < window or window < 2:
+        return np.empty(0)
+    return sliding_window_view(values, window).std(axis=1, ddof=1)
+
+
+def _tail_mean(values: np.ndarray, count: int) -> float:
+    tail = values[-count:]
+    return float(np.mean(tail)) if len(tail) else float('nan')
+
+
+def _std(values: np.ndarray) -> float:
+    return float(np.std(values, ddof=1)) if len(values) > 1 else float('nan')
+
+
+def _autocorr(values: np.ndarray, lag: int = 1) -> float:
+    """Pearson autocorrelation, same definition as pandas Series.autocorr"""
+    if len(values) <= lag + 1:
+        return float('nan')
+    a, b = values[lag:], values[:-lag]
+    if np.std(a) == 0 or np.std(b) == 0:
+        return float('nan')
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def hurst_exponent(returns: np.ndarray, max_lag: int = 20) -> float:
+    """
+    Hurst exponent of the cumulative return path, all lags at once.
+
+    tau(lag) = RMS of lag-differences of the path; H is the slope of
+    log(tau) against log(lag), solved in closed form. 0.5 = random walk,
+    < 0.5 mean reverting, > 0.5 trending. Clamped to [0.1, 0.9].
+    """
+    if len(returns) < 20:
+        return 0.5
+    path = np.cumsum(returns)
+    lags = np.arange(2, min(max_lag, len(returns) // 2))
+    if len(lags) < 2:
+        return 0.5
+
+    # diffs[k, i] = path[i + lag_k] - path[i], masked where i + lag_k runs off the end
+    idx = np.arange(len(path))
+    target = idx[None, :] + lags[:, None]
+    valid = target < len(path)
+    diffs = np.where(valid, path[np.minimum(target, len(path) - 1)] - path[None, :], 0.0)
+    tau = np.sqrt((diffs ** 2).sum(axis=1) / valid.sum(axis=1))
+    if np.any(tau <= 0):
+        return 0.5
+
+    x, y = np.log(lags), np.log(tau)
+    x_centered = x - x.mean()
+    slope = float((x_centered * (y - y.mean())).sum() / (x_centered ** 2).sum())
+    return max(0.1, min(0.9, slope))
+
+
+def compute_regime_statistics(close: np.ndarray, volume: Optional[np.ndarray] = None,
+                              config: Optional[Dict] = None) -> Dict:
+    """Every regime statistic the detectors use, from one pass over the arrays"""
+    cfg = dict(DEFAULT_REGIME_STATS_CONFIG)
+    cfg.update(config or {})
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    returns = np.diff(close) / close[:-1] if n > 1 else np.empty(0)
+    abs_returns = np.abs(returns)
+
+    vol5 = _rolling_std(returns, 5)
+    vol10 = _rolling_std(returns, 10)
+    vol20 = _rolling_std(returns, 20)
+    vol50 = _rolling_std(returns, 50)
+    ma10 = _rolling_mean(close, 10)
+    ma20 = _rolling_mean(close, 20)
+    ma50 = _rolling_mean(close, 50)
+    close_std20 = _rolling_std(close, 20)
+
+    stats = {
+        'candles': n,
+        'close': _last(close),
+        'returns_count': len(returns),
+        'returns_std': _std(returns),
+        'returns_sum': float(returns.sum()) if len(returns) else 0.0,
+        'abs_returns_sum': float(abs_returns.sum()) if len(returns) else 0.0,
+        'vol_5': _last(vol5),
+        'vol_10': _last(vol10),
+        'vol_20': _last(vol20),
+        'vol_50': _last(vol50),
+        'ma_10': _last(ma10),
+        'ma_20': _last(ma20),
+        'ma_50': _last(ma50),
+        'close_std_20': _last(close_std20),
+        'momentum_5': (close[-1] - close[-6]) / close[-6] if n >= 6 else float('nan'),
+        'momentum_20': (close[-1] - close[-21]) / close[-21] if n >= 21 else float('nan'),
+    }
+
+    # Price efficiency: net move over total absolute movement
+    stats['price_efficiency'] = (abs(stats['returns_sum']) / stats['abs_returns_sum']
+                                 if len(returns) >= 10 and stats['abs_returns_sum'] > 0 else 0.5)
+
+    stats['hurst_exponent'] = hurst_exponent(returns[-int(cfg['hurst_window']):], int(cfg['hurst_max_lag']))
+
+    # Variance ratio (5-period sums vs 1-period)
+    var_1 = float(np.var(returns, ddof=1)) if len(returns) > 1 else 0.0
+    k_sums = _rolling_mean(returns, 5) * 5
+    if len(returns) >= 10 and len(k_sums) > 1 and var_1 > 0:
+        stats['variance_ratio_5'] = float(np.var(k_sums, ddof=1)) / (5 * var_1)
+    else:
+        stats['variance_ratio_5'] = 1.0
+
+    # Volatility regime on the 20-period volatility series
+    stats['vol_20_tail5_mean'] = _tail_mean(vol20, 5)
+    stats['vol_20_tail50_mean'] = _tail_mean(vol20, 50)
+    if len(vol20):
+        stats['vol_20_percentile'] = float((vol20 <= vol20[-1]).sum() - ((vol20 == vol20[-1]).sum() - 1) / 2) / len(vol20) * 100
+    else:
+        stats['vol_20_percentile'] = 50.0
+    avg_vol_100 = _rolling_mean(vol20, 100)
+    stats['vol_20_mean_100'] = _last(avg_vol_100)
+    vol_of_vol = _rolling_std(vol20, 10)
+    stats['vol_of_vol'] = _last(vol_of_vol)
+    abs_vol20 = _rolling_std(abs_returns, 20)
+    stats['abs_return_vol_clustering'] = _last(_rolling_std(abs_vol20, 10))
+    stats['abs_return_autocorr'] = _autocorr(abs_returns, 1)
+
+    # Volume ratios
+    if volume is not None and len(volume) == n:
+        volume = np.asarray(volume, dtype=np.float64)
+        stats['volume_ma_20'] = _last(_rolling_mean(volume, 20))
+        stats['volume_ma_50'] = _last(_rolling_mean(volume, 50))
+        stats['volume_mean_5'] = _tail_mean(volume, 5)
+        stats['volume_mean_10'] = _last(_rolling_mean(volume, 10))
+    return stats
+
+
+# ------------------------------------------------------------------ engine
+
+class _CandleBuffer:
+    """Closed-candle history for one (symbol, timeframe), appended incrementally"""
+
+    __slots__ = ('timestamps', 'close', 'volume', 'results')
+
+    def __init__(self):
+        self.timestamps = np.empty(0)
+        self.close = np.empty(0)
+        self.volume = np.empty(0)
+        self.results: Dict[Tuple, Dict] = {}
+
+    def update(self, timestamps: np.ndarray, close: np.ndarray, volume: np.ndarray, max_history: int):
+        contiguous = (len(self.timestamps) and len(timestamps)
+                      and timestamps[0] <= self.timestamps[-1] <= timestamps[-1])
+        if not contiguous:
+            # First frame, a gap we cannot bridge, or an older window (replay restart)
+            self.timestamps, self.close, self.volume = timestamps.copy(), close.copy(), volume.copy()
+            self.results.clear()
+            return
+
+        last = self.timestamps[-1]
+        overlap = int(np.searchsorted(timestamps, last, side='left'))
+        start = overlap
+        if overlap < len(timestamps) and timestamps[overlap] == last:
+            # The previously newest candle may have been still forming
+            if self.close[-1] != close[overlap] or self.volume[-1] != volume[overlap]:
+                self.close[-1] = close[overlap]
+                self.volume[-1] = volume[overlap]
+                self.results.clear()
+            start = overlap + 1
+
+        if start < len(timestamps):
+            self.timestamps = np.concatenate([self.timestamps, timestamps[start:]])[-max_history:]
+            self.close = np.concatenate([self.close, close[start:]])[-max_history:]
+            self.volume = np.concatenate([self.volume, volume[start:]])[-max_history:]
+            self.results.clear()
+
+
+class RegimeStatisticsEngine:
+    """
+    📐 Rolling regime statistics shared by all regime detectors
+
+    get_stats(df, symbol) returns a dict of scalars; repeated calls for an
+    unchanged frame are a dict lookup.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_REGIME_STATS_CONFIG)
+        self.config.update(config or {})
+        self.buffers: Dict[Tuple[str, Optional[int]], _CandleBuffer] = {}
+        self.anonymous: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self.computations = 0
+        self.lookups = 0
+
+    @staticmethod
+    def _frame_arrays(df):
+        close = df['close'].values.astype(np.float64)
+        volume = df['volume'].values.astype(np.float64) if 'volume' in df.columns else np.ones(len(df))
+        timestamps = None
+        if 'timestamp' in df.columns and len(df):
+            ts = df['timestamp'].values
+            if np.issubdtype(ts.dtype, np.datetime64):
+                timestamps = ts.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+            else:
+                timestamps = ts.astype(np.float64)
+        return close, volume, timestamps
+
+    @staticmethod
+    def _timeframe(timestamps: Optional[np.ndarray]) -> Optional[int]:
+        if timestamps is None or len(timestamps) < 2:
+            return None
+        diffs = np.diff(timestamps[-20:])
+        diffs = diffs[diffs > 0]
+        return int(np.median(diffs)) if len(diffs) else None
+
+    def _compute(self, close, volume) -> Dict:
+        self.computations += 1
+        return compute_regime_statistics(close, volume, self.config)
+
+    def get_stats(self, df, symbol: Optional[str] = None) -> Dict:
+        close, volume, timestamps = self._frame_arrays(df)
+        if len(close) == 0:
+            return compute_regime_statistics(close, volume, self.config)
+
+        window = len(close)
+        fingerprint = (window, float(close[0]), float(close[-1]), float(volume[-1]),
+                       float(timestamps[-1]) if timestamps is not None else None)
+
+        if symbol is None or timestamps is None:
+            cached = self.anonymous.get(fingerprint)
+            if cached is not None:
+                self.lookups += 1
+                self.anonymous.move_to_end(fingerprint)
+                return cached
+            stats = self._compute(close, volume)
+            self.anonymous[fingerprint] = stats
+            while len(self.anonymous) > int(self.config['cache_size']):
+                self.anonymous.popitem(last=False)
+            return stats
+
+        key = (symbol, self._timeframe(timestamps))
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = _CandleBuffer()
+        buffer.update(timestamps, close, volume, int(self.config['max_history']))
+
+        cached = buffer.results.get(fingerprint)
+        if cached is not None:
+            self.lookups += 1
+            return cached
+
+        # Statistics over the caller's window, read from the shared buffer
+        window = min(window, len(buffer.close))
+        stats = self._compute(buffer.close[-window:], buffer.volume[-window:])
+        stats['symbol'] = symbol
+        buffer.results[fingerprint] = stats
+        return stats
+
+
+# Global engine instance
+_regime_stats_engine = None
+
+
+def get_regime_stats_engine(config: Optional[Dict] = None) -> RegimeStatisticsEngine:
+    """Get the process-wide regime statistics engine"""
+    global _regime_stats_engine
+    if _regime_stats_engine is None:
+        _regime_stats_engine = RegimeStatisticsEngine(config)
+    return _regime_stats_engine
@@ -0,0 +1,977 @@
+#!/usr/bin/env python3
+# =============================================================================
+# ACCELERATED-CLOCK REPLAY ENGINE
+# =============================================================================
+#
+# Runs the real bot.run_continuously decision loop against recorded market
+# history under a virtual clock. time.sleep() advances simulated time
+# instantly, time.time() / datetime.now() report simulated time, and a paper
+# exchange fills orders from the recorded 1m candles.
+#
+# Usage:
+#   python replay_engine.py record --symbols BTC/USDT,ETH/USDT --days 7 --out replay_data
+#   python bot.py --replay replay_data [--replay-days 7] [--replay-balance 100]
+#
+# Each run writes a decision log plus a wall-clock/CPU profile per simulated
+# day into its own working directory under replay_runs/.
+#
+# =============================================================================
+
+import argparse
+import csv
+import datetime as _datetime_module
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from ccxt.base.errors import BadSymbol, InsufficientFunds, OrderNotFound
+except ImportError:  # pragma: no cover - ccxt is a core dependency of the bot
+    class BadSymbol(Exception):
+        pass
+
+    class InsufficientFunds(Exception):
+        pass
+
+    class OrderNotFound(Exception):
+        pass
+
+# Keep references to the real clock before anything gets patched
+_real_time = time.time
+_real_sleep = time.sleep
+_real_datetime = _datetime_module.datetime
+
+MINUTE_MS = 60_000
+
+TIMEFRAME_MS = {
+    '1m': MINUTE_MS,
+    '3m': 3 * MINUTE_MS,
+    '5m': 5 * MINUTE_MS,
+    '15m': 15 * MINUTE_MS,
+    '30m': 30 * MINUTE_MS,
+    '1h': 60 * MINUTE_MS,
+    '2h': 120 * MINUTE_MS,
+    '4h': 240 * MINUTE_MS,
+    '6h': 360 * MINUTE_MS,
+    '12h': 720 * MINUTE_MS,
+    '1d': 1440 * MINUTE_MS,
+}
+
+REPLAY_FILES_TO_COPY = [
+    'enhanced_config.json',
+    'comprehensive_all_pairs_config.json',
+    'ml_signal_learning.json',
+]
+
+
+class ReplayComplete(BaseException):
+    """
+    Raised by the virtual clock when recorded history is exhausted.
+
+    Derives from BaseException so the bot's broad ``except Exception``
+    handlers inside run_continuously cannot swallow it.
+    """
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """Convert a ccxt timeframe string ('5m', '1h', '1d') to milliseconds"""
+    if timeframe not in TIMEFRAME_MS:
+        raise ValueError(f"Unsupported replay timeframe: {timeframe}")
+    return TIMEFRAME_MS[timeframe]
+
+
+def symbol_to_filename(symbol: str, timeframe: str = '1m') -> str:
+    """BTC/USDT -> BTC_USDT_1m.csv"""
+    return f"{symbol.replace('/', '_')}_{timeframe}.csv"
+
+
+# =============================================================================
+# VIRTUAL CLOCK
+# =============================================================================
+
+class _VirtualDatetimeMeta(type):
+    """Keeps isinstance() working for datetimes created before the patch"""
+
+    def __instancecheck__(cls, obj):
+        return isinstance(obj, _real_datetime)
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, _real_datetime)
+
+
+class VirtualClock:
+    """
+    ⏱️ Simulated wall clock for replay runs
+
+    The main thread drives time forward through sleep(). Any other thread that
+    sleeps blocks until simulated time reaches its wake-up point, so background
+    workers keep their relative cadence without racing the clock ahead.
+    """
+
+    def __init__(self, start_ms: int, end_ms: int):
+        self.now_ms = int(start_ms)
+        self.end_ms = int(end_ms)
+        self.finished = False
+        self._listeners = []
+        self._condition = threading.Condition()
+        self._main_thread = threading.main_thread()
+        self._installed = False
+        self._saved = {}
+
+    def time(self) -> float:
+        return self.now_ms / 1000.0
+
+    def add_listener(self, callback):
+        """Register callback(prev_ms, now_ms) invoked whenever time advances"""
+        self._listeners.append(callback)
+
+    def advance_to(self, target_ms: int):
+        """Move simulated time forward and notify listeners"""
+        target_ms = min(int(target_ms), self.end_ms)
+        if target_ms <= self.now_ms:
+            return
+        prev_ms = self.now_ms
+        self.now_ms = target_ms
+        for callback in self._listeners:
+            callback(prev_ms, target_ms)
+        with self._condition:
+            self._condition.notify_all()
+
+    def sleep(self, seconds: float):
+        if seconds is None or seconds < 0:
+            seconds = 0
+        # Round up: a positive sleep always moves time, or callers waiting on a sub-ms gap would spin
+        target_ms = self.now_ms + int(math.ceil(seconds * 1000 - 1e-6))
+
+        if threading.current_thread() is not self._main_thread:
+            # Background threads wait for the main loop to move time forward
+            with self._condition:
+                while self.now_ms < target_ms and not self.finished:
+                    self._condition.wait(timeout=0.05)
+            if self.finished:
+                raise ReplayComplete()
+            return
+
+        if target_ms >= self.end_ms:
+            self.advance_to(self.end_ms)
+            self.finish()
+            raise ReplayComplete()
+        self.advance_to(target_ms)
+
+    def finish(self):
+        self.finished = True
+        with self._condition:
+            self._condition.notify_all()
+
+    def datetime_class(self):
+        """Build a datetime subclass whose now()/utcnow() read this clock"""
+        clock = self
+
+        class VirtualDatetime(_real_datetime, metaclass=_VirtualDatetimeMeta):
+            @classmethod
+            def now(cls, tz=None):
+                return _real_datetime.fromtimestamp(clock.time(), tz)
+
+            @classmethod
+            def utcnow(cls):
+                return _real_datetime.fromtimestamp(
+                    clock.time(), _datetime_module.timezone.utc
+                ).replace(tzinfo=None)
+
+            @classmethod
+            def today(cls):
+                return cls.now()
+
+        return VirtualDatetime
+
+    def install(self):
+        """Patch time.time, time.sleep and datetime.datetime process-wide"""
+        if self._installed:
+            return
+        # C extensions validate the datetime type when first imported, so bind
+        # them to the real class before the module attribute is swapped
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            pass
+        self._saved = {
+            'time': time.time,
+            'sleep': time.sleep,
+            'datetime': _datetime_module.datetime,
+        }
+        time.time = self.time
+        time.sleep = self.sleep
+        _datetime_module.datetime = self.datetime_class()
+        self._installed = True
+
+    def uninstall(self):
+        if not self._installed:
+            return
+        time.time = self._saved['time']
+        time.sleep = self._saved['sleep']
+        _datetime_module.datetime = self._saved['datetime']
+        self._installed = False
+
+
+# =============================================================================
+# RECORDED HISTORY
+# =============================================================================
+
+class HistoryStore:
+    """
+    📼 Recorded 1m candles per symbol, served as any higher timeframe
+
+    Higher timeframes are aggregated on demand from the 1m candles that have
+    closed by the current simulated time, so the last bar is partial exactly
+    like a live exchange's forming candle.
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.candles: Dict[str, Dict[str, np.ndarray]] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.isdir(self.data_dir):
+            raise FileNotFoundError(f"Replay history directory not found: {self.data_dir}")
+
+        for filename in sorted(os.listdir(self.data_dir)):
+            if not filename.endswith('_1m.csv'):
+                continue
+            symbol = filename[:-len('_1m.csv')].replace('_', '/', 1)
+            data = np.loadtxt(os.path.join(self.data_dir, filename), delimiter=',',
+                              skiprows=1, ndmin=2)
+            if data.size == 0:
+                continue
+            data = data[np.argsort(data[:, 0], kind='stable')]
+            self.candles[symbol] = {
+                'timestamp': data[:, 0].astype(np.int64),
+                'open': data[:, 1].copy(),
+                'high': data[:, 2].copy(),
+                'low': data[:, 3].copy(),
+                'close': data[:, 4].copy(),
+                'volume': data[:, 5].copy(),
+            }
+
+        if not self.candles:
+            raise ValueError(f"No *_1m.csv history files found in {self.data_dir}")
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.candles.keys())
+
+    def time_range(self):
+        """Common (start_ms, end_ms) covered by every recorded symbol"""
+        starts = [int(c['timestamp'][0]) for c in self.candles.values()]
+        ends = [int(c['timestamp'][-1]) + MINUTE_MS for c in self.candles.values()]
+        return max(starts), min(ends)
+
+    def closed_count(self, symbol: str, now_ms: int) -> int:
+        """Number of 1m candles fully closed at now_ms"""
+        ts = self.candles[symbol]['timestamp']
+        return int(np.searchsorted(ts + MINUTE_MS, now_ms, side='right'))
+
+    def last_price(self, symbol: str, now_ms: int) -> Optional[float]:
+        n = self.closed_count(symbol, now_ms)
+        if n == 0:
+            return None
+        return float(self.candles[symbol]['close'][n - 1])
+
+    def window(self, symbol: str, start_ms: int, end_ms: int):
+        """1m candles that closed in (start_ms, end_ms]"""
+        a = self.closed_count(symbol, start_ms)
+        b = self.closed_count(symbol, end_ms)
+        c = self.candles[symbol]
+        return c['high'][a:b], c['low'][a:b], c['close'][a:b]
+
+    def ohlcv(self, symbol: str, timeframe: str, limit: int, now_ms: int,
+              since: Optional[int] = None) -> List[list]:
+        c = self.candles[symbol]
+        tf_ms = timeframe_to_ms(timeframe)
+        factor = tf_ms // MINUTE_MS
+        limit = int(limit or 500)
+
+        n = self.closed_count(symbol, now_ms)
+        if since is not None:
+            a = int(np.searchsorted(c['timestamp'], since, side='left'))
+        else:
+            a = max(0, n - (limit + 1) * factor)
+        if a >= n:
+            return []
+
+        ts = c['timestamp'][a:n]
+        if factor == 1:
+            rows = np.column_stack((ts, c['open'][a:n], c['high'][a:n], c['low'][a:n],
+                                    c['close'][a:n], c['volume'][a:n]))
+        else:
+            keys = ts // tf_ms
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+            ends = np.concatenate((starts[1:], [len(ts)]))
+            rows = np.column_stack((
+                keys[starts] * tf_ms,
+                c['open'][a:n][starts],
+                np.maximum.reduceat(c['high'][a:n], starts),
+                np.minimum.reduceat(c['low'][a:n], starts),
+                c['close'][a:n][ends - 1],
+                np.add.reduceat(c['volume'][a:n], starts),
+            ))
+            # Drop a leading bucket that only partially fell inside the slice
+            if since is None and a > 0 and ts[0] % tf_ms != 0:
+                rows = rows[1:]
+
+        if since is None:
+            rows = rows[-limit:]
+        else:
+            rows = rows[:limit]
+        return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])]
+                for r in rows]
+
+
+# =============================================================================
+# PAPER EXCHANGE
+# =============================================================================
+
+class ReplayExchange:
+    """
+    💱 ccxt-compatible paper exchange backed by recorded history
+
+    Implements the subset of the ccxt API that the bot uses. Market orders
+    fill at the simulated bid/ask; limit and stop orders rest and are filled
+    from the 1m candle highs/lows as the virtual clock advances.
+    """
+
+    id = 'replay'
+
+    def __init__(self, history: HistoryStore, clock: VirtualClock,
+                 starting_balances: Dict[str, float], fee_rate: float = 0.001,
+                 spread_pct: float = 0.0005):
+        self.history = history
+        self.clock = clock
+        self.fee_rate = fee_rate
+        self.spread_pct = spread_pct
+        self.options = {'timeDifference': 0}
+        self.markets = {}
+        self.balances: Dict[str, Dict[str, float]] = {}
+        self.orders: Dict[str, dict] = {}
+        self.trades: List[dict] = []
+        self.decisions: List[dict] = []
+        self.api_calls: Dict[str, int] = {}
+        self._order_seq = 0
+
+        for symbol in history.symbols:
+            base, quote = symbol.split('/')
+            self.balances.setdefault(base, {'free': 0.0, 'used': 0.0})
+            self.balances.setdefault(quote, {'free': 0.0, 'used': 0.0})
+        for asset, amount in starting_balances.items():
+            self.balances.setdefault(asset, {'free': 0.0, 'used': 0.0})
+            self.balances[asset]['free'] = float(amount)
+
+        clock.add_listener(self._on_clock_advance)
+
+    # ------------------------------------------------------------------ helpers
+
+    def _count(self, method: str):
+        self.api_calls[method] = self.api_calls.get(method, 0) + 1
+
+    def _now_ms(self) -> int:
+        return self.clock.now_ms
+
+    def _require(self, symbol: str):
+        if symbol not in self.history.candles:
+            raise BadSymbol(f"Replay: no recorded history for {symbol} in {self.history.data_dir}")
+
+    def _price(self, symbol: str) -> float:
+        self._require(symbol)
+        price = self.history.last_price(symbol, self._now_ms())
+        if price is None:
+            raise Exception(f"Replay: no history for {symbol} before {self._iso(self._now_ms())}")
+        return price
+
+    @staticmethod
+    def _iso(ms: int) -> str:
+        return _real_datetime.utcfromtimestamp(ms / 1000).strftime('%Y-%m-%dT%H:%M:%S')
+
+    def _record(self, event: str, order: dict, **extra):
+        entry = {
+            'sim_time': self._iso(self._now_ms()),
+            'event': event,
+            'order_id': order.get('id'),
+            'symbol': order.get('symbol'),
+            'type': order.get('type'),
+            'side': order.get('side'),
+            'amount': order.get('amount'),
+            'price': order.get('average') or order.get('price'),
+            'stop_price': order.get('stopPrice'),
+        }
+        entry.update(extra)
+        self.decisions.append(entry)
+
+    def _asset(self, asset: str) -> Dict[str, float]:
+        return self.balances.setdefault(asset, {'free': 0.0, 'used': 0.0})
+
+    # --------------------------------------------------------------- market data
+
+    def load_markets(self, reload=False):
+        self._count('load_markets')
+        if not self.markets:
+            for symbol in self.history.symbols:
+                base, quote = symbol.split('/')
+                self.markets[symbol] = {
+                    'id': symbol.replace('/', ''),
+                    'symbol': symbol,
+                    'base': base,
+                    'quote': quote,
+                    'active': True,
+                    'spot': True,
+                    'precision': {'amount': 8, 'price': 8},
+                    'limits': {'amount': {'min': 1e-8}, 'cost': {'min': 10.0}},
+                }
+        return self.markets
+
+    def fetch_time(self, params=None):
+        self._count('fetch_time')
+        return self._now_ms()
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._count('fetch_ohlcv')
+        self._require(symbol)
+        return self.history.ohlcv(symbol, timeframe, limit, self._now_ms(), since=since)
+
+    def fetch_ticker(self, symbol, params=None):
+        self._count('fetch_ticker')
+        return self._ticker(symbol)
+
+    def _ticker(self, symbol):
+        now_ms = self._now_ms()
+        last = self._price(symbol)
+        high, low, close = self.history.window(symbol, now_ms - 1440 * MINUTE_MS, now_ms)
+        c = self.history.candles[symbol]
+        n = self.history.closed_count(symbol, now_ms)
+        a = max(0, n - 1440)
+        volume = float(np.sum(c['volume'][a:n]))
+        open_24h = float(c['open'][a]) if n > a else last
+        half_spread = last * self.spread_pct / 2
+        return {
+            'symbol': symbol,
+            'timestamp': now_ms,
+            'datetime': self._iso(now_ms),
+            'last': last,
+            'close': last,
+            'bid': last - half_spread,
+            'ask': last + half_spread,
+            'high': float(np.max(high)) if len(high) else last,
+            'low': float(np.min(low)) if len(low) else last,
+            'open': open_24h,
+            'baseVolume': volume,
+            'quoteVolume': volume * last,
+            'change': last - open_24h,
+            'percentage': (last - open_24h) / open_24h * 100 if open_24h else 0.0,
+        }
+
+    def fetch_tickers(self, symbols=None, params=None):
+        self._count('fetch_tickers')
+        tickers = {}
+        for symbol in symbols or self.history.symbols:
+            if symbol in self.history.candles and self.history.last_price(symbol, self._now_ms()):
+                tickers[symbol] = self._ticker(symbol)
+        return tickers
+
+    def fetch_order_book(self, symbol, limit=None, params=None):
+        self._count('fetch_order_book')
+        ticker = self._ticker(symbol)
+        depth = int(limit or 5)
+        step = ticker['last'] * self.spread_pct / 2
+        bids = [[ticker['bid'] - i * step, 1.0] for i in range(depth)]
+        asks = [[ticker['ask'] + i * step, 1.0] for i in range(depth)]
+        return {'symbol': symbol, 'bids': bids, 'asks': asks, 'timestamp': self._now_ms()}
+
+    # ------------------------------------------------------------------ account
+
+    def fetch_balance(self, params=None):
+        self._count('fetch_balance')
+        result = {'free': {}, 'used': {}, 'total': {}}
+        for asset, bal in self.balances.items():
+            total = bal['free'] + bal['used']
+            result[asset] = {'free': bal['free'], 'used': bal['used'], 'total': total}
+            result['free'][asset] = bal['free']
+            result['used'][asset] = bal['used']
+            result['total'][asset] = total
+        return result
+
+    def fetch_my_trades(self, symbol=None, since=None, limit=None, params=None):
+        self._count('fetch_my_trades')
+        trades = [t for t in self.trades
+                  if (symbol is None or t['symbol'] == symbol)
+                  and (since is None or t['timestamp'] >= since)]
+        return trades[-limit:] if limit else trades
+
+    # ------------------------------------------------------------------- orders
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self._count('create_order')
+        params = params or {}
+        self._require(symbol)
+        order_type = str(type).lower()
+        amount = float(amount)
+        if amount <= 0:
+            raise Exception(f"Replay: invalid order amount {amount}")
+
+        self._order_seq += 1
+        order = {
+            'id': f"replay-{self._order_seq}",
+            'clientOrderId': params.get('newClientOrderId'),
+            'timestamp': self._now_ms(),
+            'datetime': self._iso(self._now_ms()),
+            'symbol': symbol,
+            'type': order_type,
+            'side': side,
+            'amount': amount,
+            'price': float(price) if price is not None else None,
+            'stopPrice': float(params['stopPrice']) if params.get('stopPrice') else None,
+            'filled': 0.0,
+            'remaining': amount,
+            'average': None,
+            'cost': 0.0,
+            'status': 'open',
+            'fee': None,
+            'info': {'replay': True},
+        }
+
+        base, quote = symbol.split('/')
+        if side == 'sell':
+            if self._asset(base)['free'] + 1e-12 < amount:
+                raise InsufficientFunds(f"Replay: insufficient {base} balance for {amount}")
+            self._asset(base)['free'] -= amount
+            self._asset(base)['used'] += amount
+        else:
+            reserve_price = order['price'] or self._ticker(symbol)['ask']
+            cost = amount * reserve_price * (1 + self.fee_rate)
+            if self._asset(quote)['free'] + 1e-9 < cost:
+                raise InsufficientFunds(f"Replay: insufficient {quote} balance for {cost:.2f}")
+            self._asset(quote)['free'] -= cost
+            self._asset(quote)['used'] += cost
+            order['info']['reserved'] = cost
+
+        self.orders[order['id']] = order
+        self._record('place', order)
+
+        if order_type == 'market':
+            ticker = self._ticker(symbol)
+            self._fill(order, ticker['ask'] if side == 'buy' else ticker['bid'])
+        elif order['stopPrice'] is None and order['price'] is not None:
+            ticker = self._ticker(symbol)
+            if side == 'buy' and order['price'] >= ticker['ask']:
+                self._fill(order, ticker['ask'])
+            elif side == 'sell' and order['price'] <= ticker['bid']:
+                self._fill(order, ticker['bid'])
+        return dict(order)
+
+    def create_market_order(self, symbol, side, amount, price=None, params=None):
+        return self.create_order(symbol, 'market', side, amount, price, params)
+
+    def create_limit_order(self, symbol, side, amount, price, params=None):
+        return self.create_order(symbol, 'limit', side, amount, price, params)
+
+    def create_market_buy_order(self, symbol, amount, params=None):
+        return self.create_order(symbol, 'market', 'buy', amount, None, params)
+
+    def create_market_sell_order(self, symbol, amount, params=None):
+        return self.create_order(symbol, 'market', 'sell', amount, None, params)
+
+    def create_limit_buy_order(self, symbol, amount, price, params=None):
+        return self.create_order(symbol, 'limit', 'buy', amount, price, params)
+
+    def create_limit_sell_order(self, symbol, amount, price, params=None):
+        return self.create_order(symbol, 'limit', 'sell', amount, price, params)
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._count('fetch_order')
+        if id not in self.orders:
+            raise OrderNotFound(f"Replay: order {id} not found")
+        return dict(self.orders[id])
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        self._count('fetch_open_orders')
+        return [dict(o) for o in self.orders.values()
+                if o['status'] == 'open' and (symbol is None or o['symbol'] == symbol)]
+
+    def cancel_order(self, id, symbol=None, params=None):
+        self._count('cancel_order')
+        order = self.orders.get(id)
+        if order is None or order['status'] != 'open':
+            raise OrderNotFound(f"Replay: order {id} not open")
+        self._release(order)
+        order['status'] = 'canceled'
+        self._record('cancel', order)
+        return dict(order)
+
+    def _release(self, order):
+        base, quote = order['symbol'].split('/')
+        if order['side'] == 'sell':
+            self._asset(base)['used'] -= order['remaining']
+            self._asset(base)['free'] += order['remaining']
+        else:
+            reserved = order['info'].get('reserved', 0.0)
+            self._asset(quote)['used'] -= reserved
+            self._asset(quote)['free'] += reserved
+            order['info']['reserved'] = 0.0
+
+    def _fill(self, order, fill_price):
+        base, quote = order['symbol'].split('/')
+        amount = order['remaining']
+        cost = amount * fill_price
+        fee = cost * self.fee_rate
+
+        if order['side'] == 'buy':
+            self._release(order)
+            self._asset(quote)['free'] -= cost + fee
+            self._asset(base)['free'] += amount
+        else:
+            self._asset(base)['used'] -= amount
+            self._asset(quote)['free'] += cost - fee
+
+        order.update({
+            'filled': order['amount'],
+            'remaining': 0.0,
+            'average': fill_price,
+            'cost': cost,
+            'status': 'closed',
+            'fee': {'currency': quote, 'cost': fee},
+            'lastTradeTimestamp': self._now_ms(),
+        })
+        self.trades.append({
+            'id': f"{order['id']}-fill",
+            'order': order['id'],
+            'timestamp': self._now_ms(),
+            'datetime': self._iso(self._now_ms()),
+            'symbol': order['symbol'],
+            'side': order['side'],
+            'price': fill_price,
+            'amount': amount,
+            'cost': cost,
+            'fee': order['fee'],
+        })
+        self._record('fill', order, fee=fee)
+
+    def _on_clock_advance(self, prev_ms, now_ms):
+        """Fill resting limit/stop orders touched by candles closed in (prev, now]"""
+        for order in list(self.orders.values()):
+            if order['status'] != 'open':
+                continue
+            high, low, _ = self.history.window(order['symbol'], prev_ms, now_ms)
+            if not len(high):
+                continue
+            period_high = float(np.max(high))
+            period_low = float(np.min(low))
+            stop = order['stopPrice']
+            limit = order['price']
+
+            if stop is not None:
+                triggered = period_low <= stop if order['side'] == 'sell' else period_high >= stop
+                if triggered:
+                    self._fill(order, limit if limit is not None else stop)
+            elif limit is not None:
+                if order['side'] == 'buy' and period_low <= limit:
+                    self._fill(order, limit)
+                elif order['side'] == 'sell' and period_high >= limit:
+                    self._fill(order, limit)
+
+    def portfolio_value(self, quote: str = 'USDT') -> float:
+        """Mark all balances to market in the given quote asset"""
+        total = 0.0
+        for asset, bal in self.balances.items():
+            amount = bal['free'] + bal['used']
+            if amount == 0:
+                continue
+            if asset == quote:
+                total += amount
+                continue
+            symbol = f"{asset}/{quote}"
+            if symbol in self.history.candles:
+                price = self.history.last_price(symbol, self._now_ms())
+                if price:
+                    total += amount * price
+        return total
+
+
+# =============================================================================
+# PROFILER
+# =============================================================================
+
+class ReplayProfiler:
+    """
+    📊 Wall-clock and CPU cost of each loop iteration, grouped by simulated day
+    """
+
+    def __init__(self, clock: VirtualClock, exchange: ReplayExchange):
+        self.clock = clock
+        self.exchange = exchange
+        self.days: Dict[str, dict] = {}
+        self._iter_start = None
+
+    def _snapshot(self):
+        return {
+            'wall': time.perf_counter(),
+            'cpu': time.process_time(),
+            'sim_ms': self.clock.now_ms,
+            'api_calls': sum(self.exchange.api_calls.values()),
+            'decisions': len(self.exchange.decisions),
+        }
+
+    def mark_iteration(self):
+        """Call at the top of every loop iteration"""
+        now = self._snapshot()
+        if self._iter_start is not None:
+            self._close_iteration(self._iter_start, now)
+        self._iter_start = now
+
+    def finish(self):
+        if self._iter_start is not None:
+            self._close_iteration(self._iter_start, self._snapshot())
+            self._iter_start = None
+
+    def _close_iteration(self, start, end):
+        day = _real_datetime.utcfromtimestamp(start['sim_ms'] / 1000).strftime('%Y-%m-%d')
+        stats = self.days.setdefault(day, {
+            'iterations': 0,
+            'wall_seconds': 0.0,
+            'cpu_seconds': 0.0,
+            'simulated_seconds': 0.0,
+            'api_calls': 0,
+            'decisions': 0,
+            'iteration_wall': [],
+        })
+        wall = end['wall'] - start['wall']
+        stats['iterations'] += 1
+        stats['wall_seconds'] += wall
+        stats['cpu_seconds'] += end['cpu'] - start['cpu']
+        stats['simulated_seconds'] += (end['sim_ms'] - start['sim_ms']) / 1000
+        stats['api_calls'] += end['api_calls'] - start['api_calls']
+        stats['decisions'] += end['decisions'] - start['decisions']
+        stats['iteration_wall'].append(wall)
+
+    def summary(self) -> Dict[str, dict]:
+        result = {}
+        for day, stats in sorted(self.days.items()):
+            walls = np.array(stats['iteration_wall']) if stats['iteration_wall'] else np.zeros(1)
+            result[day] = {
+                'iterations': stats['iterations'],
+                'wall_seconds': round(stats['wall_seconds'], 4),
+                'cpu_seconds': round(stats['cpu_seconds'], 4),
+                'simulated_seconds': round(stats['simulated_seconds'], 1),
+                'speedup': round(stats['simulated_seconds'] / stats['wall_seconds'], 1)
+                if stats['wall_seconds'] > 0 else None,
+                'iteration_wall_mean_ms': round(float(walls.mean()) * 1000, 3),
+                'iteration_wall_p95_ms': round(float(np.percentile(walls, 95)) * 1000, 3),
+                'iteration_wall_max_ms': round(float(walls.max()) * 1000, 3),
+                'api_calls': stats['api_calls'],
+                'decisions': stats['decisions'],
+            }
+        return result
+
+
+# =============================================================================
+# SESSION
+# =============================================================================
+
+class ReplaySession:
+    """
+    🎬 Wires the virtual clock, recorded history and paper exchange together
+
+    Create the session before bot.py imports anything that reads the clock,
+    then hand ``session.exchange`` to the bot in place of the ccxt client.
+    """
+
+    def __init__(self, data_dir: str, days: Optional[float] = None,
+                 warmup_hours: float = 48.0, starting_balance: float = 100.0,
+                 quote_asset: str = 'USDT', output_dir: Optional[str] = None):
+        self.data_dir = os.path.abspath(data_dir)
+        self.history = HistoryStore(self.data_dir)
+
+        history_start, history_end = self.history.time_range()
+        start_ms = history_start + int(warmup_hours * 3600 * 1000)
+        end_ms = history_end
+        if days is not None:
+            end_ms = min(history_end, start_ms + int(days * 86400 * 1000))
+        if start_ms >= end_ms:
+            raise ValueError("Replay history is shorter than the requested warmup")
+
+        self.quote_asset = quote_asset
+        self.starting_balance = float(starting_balance)
+        self.clock = VirtualClock(start_ms, end_ms)
+        self.exchange = ReplayExchange(self.history, self.clock, {quote_asset: starting_balance})
+        self.profiler = ReplayProfiler(self.clock, self.exchange)
+        self.output_dir = output_dir
+        self._wall_start = None
+        self._cpu_start = None
+
+    def prepare_workdir(self):
+        """
+        Run inside a scratch directory so replay never touches the live
+        bot_state.json, trade_log.csv or bot_log.txt.
+        """
+        source_dir = os.getcwd()
+        if self.output_dir is None:
+            stamp = _real_datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.output_dir = os.path.join(source_dir, 'replay_runs', f"replay_{stamp}")
+        self.output_dir = os.path.abspath(self.output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        for filename in REPLAY_FILES_TO_COPY:
+            src = os.path.join(source_dir, filename)
+            if os.path.exists(src):
+                shutil.copy2(src, os.path.join(self.output_dir, filename))
+
+        if source_dir not in sys.path:
+            sys.path.insert(0, source_dir)
+        os.chdir(self.output_dir)
+
+    def start(self):
+        self.clock.install()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        print(f"🎬 REPLAY MODE: {len(self.history.symbols)} symbols from {self.data_dir}")
+        print(f"   Simulated window: {ReplayExchange._iso(self.clock.now_ms)} → "
+              f"{ReplayExchange._iso(self.clock.end_ms)}")
+        print(f"   Starting balance: {self.starting_balance:.2f} {self.quote_asset}")
+        if self.output_dir:
+            print(f"   Output: {self.output_dir}")
+
+    def mark_iteration(self):
+        self.profiler.mark_iteration()
+
+    def finish(self) -> dict:
+        """Stop the clock, write the decision log and profile, return the report"""
+        self.profiler.finish()
+        self.clock.finish()
+        self.clock.uninstall()
+
+        report = {
+            'history_dir': self.data_dir,
+            'simulated_end': ReplayExchange._iso(self.clock.now_ms),
+            'wall_seconds': round(time.perf_counter() - (self._wall_start or time.perf_counter()), 3),
+            'cpu_seconds': round(time.process_time() - (self._cpu_start or time.process_time()), 3),
+            'starting_balance': self.starting_balance,
+            'final_portfolio_value': round(self.exchange.portfolio_value(self.quote_asset), 4),
+            'orders_placed': sum(1 for d in self.exchange.decisions if d['event'] == 'place'),
+            'fills': len(self.exchange.trades),
+            'api_calls': dict(sorted(self.exchange.api_calls.items())),
+            'days': self.profiler.summary(),
+        }
+
+        output_dir = self.output_dir or os.getcwd()
+        with open(os.path.join(output_dir, 'replay_report.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+
+        fields = ['sim_time', 'event', 'order_id', 'symbol', 'type', 'side',
+                  'amount', 'price', 'stop_price', 'fee']
+        with open(os.path.join(output_dir, 'replay_decisions.csv'), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.exchange.decisions)
+
+        print("\n🎬 REPLAY COMPLETE")
+        print(f"   Wall: {report['wall_seconds']:.1f}s | CPU: {report['cpu_seconds']:.1f}s")
+        print(f"   Portfolio: {self.starting_balance:.2f} → {report['final_portfolio_value']:.2f} {self.quote_asset}")
+        print(f"   Orders: {report['orders_placed']} | Fills: {report['fills']}")
+        for day, stats in report['days'].items():
+            print(f"   {day}: {stats['iterations']} loops | wall {stats['wall_seconds']:.2f}s | "
+                  f"cpu {stats['cpu_seconds']:.2f}s | mean {stats['iteration_wall_mean_ms']:.1f}ms/loop")
+        print(f"   Report: {os.path.join(output_dir, 'replay_report.json')}")
+        return report
+
+
+def parse_replay_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--replay', dest='replay_dir')
+    parser.add_argument('--replay-days', type=float, default=None)
+    parser.add_argument('--replay-warmup-hours', type=float, default=48.0)
+    parser.add_argument('--replay-balance', type=float, default=100.0)
+    parser.add_argument('--replay-quote', default='USDT')
+    parser.add_argument('--replay-out', default=None)
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+
+def start_replay_session_from_argv(argv: List[str]) -> ReplaySession:
+    """Build, sandbox and start a replay session from bot.py's command line"""
+    args = parse_replay_args(argv)
+    if not args.replay_dir:
+        raise ValueError("--replay requires a history directory")
+    session = ReplaySession(
+        args.replay_dir,
+        days=args.replay_days,
+        warmup_hours=args.replay_warmup_hours,
+        starting_balance=args.replay_balance,
+        quote_asset=args.replay_quote,
+        output_dir=args.replay_out,
+    )
+    session.prepare_workdir()
+    session.start()
+    return session
+
+
+# =============================================================================
+# HISTORY RECORDER
+# =============================================================================
+
+def record_history(exchange, symbols: List[str], days: float, out_dir: str,
+                   page_limit: int = 1000) -> Dict[str, int]:
+    """Download 1m candles for each symbol into <out_dir>/<BASE>_<QUOTE>_1m.csv"""
+    os.makedirs(out_dir, exist_ok=True)
+    end_ms = int(_real_time() * 1000)
+    start_ms = end_ms - int(days * 86400 * 1000)
+    counts = {}
+
+    for symbol in symbols:
+        rows = []
+        since = start_ms
+        while since < end_ms:
+            batch = exchange.fetch_ohlcv(symbol, '1m', since=since, limit=page_limit)
+            if not batch:
+                break
+            rows.extend(r for r in batch if r[0] < end_ms)
+            next_since = batch[-1][0] + MINUTE_MS
+            if next_since <= since:
+                break
+            since = next_since
+
+        path = os.path.join(out_dir, symbol_to_filename(symbol))
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            writer.writerows(rows)
+        counts[symbol] = len(rows)
+        print(f"📼 Recorded {len(rows)} 1m candles for {symbol} → {path}")
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record market history for bot replay runs")
+    sub = parser.add_subparsers(dest='command')
+    rec = sub.add_parser('record', help='Download 1m candles from Binance.US')
+    rec.add_argument('--symbols', required=True, help='Comma-separated, e.g. BTC/USDT,ETH/USDT')
+    rec.add_argument('--days', type=float, default=7)
+    rec.add_argument('--out', default='replay_data')
+    args = parser.parse_args()
+
+    if args.command != 'record':
+        parser.print_help()
+        return
+
+    import ccxt
+    exchange = ccxt.binanceus({'enableRateLimit': True})
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    record_history(exchange, symbols, args.days, args.out)
+
+
+if __name__ == "__main__":
+    main()
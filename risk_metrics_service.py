@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+📉 RISK METRICS SERVICE
+=======================
+
+Rolling return windows per traded symbol, refreshed only when a new candle
+(1h by default) has closed, with VaR/CVaR and volatility precomputed on every
+refresh. Position sizing reads the cached figures instead of fetching 100
+candles and re-running ValueAtRiskCalculator on every order.
+
+- Historical VaR/CVaR: empirical quantile / tail mean of hourly returns,
+  scaled by sqrt(horizon) exactly like ValueAtRiskCalculator.
+- Parametric VaR/CVaR: normal model on the same window.
+- Portfolio VaR: covariance matrix across symbols, aligned on candle time.
+
+The trading loop calls refresh_if_due() for the active symbol; that makes at
+most one small OHLCV request per symbol per closed candle. get_var_analysis()
+is a few multiplications on cached numbers.
+"""
+
+import time
+from collections import deque
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_RISK_METRICS_CONFIG = {
+    'timeframe': '1h',
+    'window_candles': 100,          # Same window the old per-order fetch used
+    'confidence_levels': [0.95, 0.99],
+    'horizons': {'daily': 1, 'weekly': 7, 'monthly': 30},
+    'min_returns': 30,              # Below this, ValueAtRiskCalculator defaults apply
+    'refresh_grace_seconds': 5,     # Wait for the exchange to publish the closed candle
+    'retry_seconds': 60,            # Between attempts while the closed candle is missing
+    'max_covariance_symbols': 20
+}
+
+TIMEFRAME_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400, '1d': 86400}
+
+
+def _risk_assessment(daily_var: float, portfolio_value: float) -> str:
+    """Same thresholds as ValueAtRiskCalculator._assess_risk_level"""
+    var_percentage = daily_var / portfolio_value if portfolio_value > 0 else 0
+    if var_percentage > 0.05:
+        return 'HIGH'
+    elif var_percentage > 0.03:
+        return 'MEDIUM'
+    return 'LOW'
+
+
+class _SymbolWindow:
+    """Closed candles and precomputed risk figures for one symbol"""
+
+    __slots__ = ('timestamps', 'closes', 'returns', 'metrics', 'updated_at', 'attempted_at')
+
+    def __init__(self, window: int):
+        self.timestamps = deque(maxlen=window)   # Candle open time, ms
+        self.closes = deque(maxlen=window)
+        self.returns = np.empty(0)
+        self.metrics: Dict = {}
+        self.updated_at = 0.0
+        self.attempted_at = 0.0
+
+
+class RiskMetricsService:
+    """
+    📉 Cached rolling VaR/CVaR and volatility per symbol
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_RISK_METRICS_CONFIG)
+        self.config.update(config or {})
+        self.timeframe_ms = TIMEFRAME_SECONDS.get(self.config['timeframe'], 3600) * 1000
+        self.windows: Dict[str, _SymbolWindow] = {}
+        self._covariance: Optional[Tuple[List[str], np.ndarray]] = None
+
+    # ------------------------------------------------------------ updates
+
+    def _window(self, symbol: str) -> _SymbolWindow:
+        window = self.windows.get(symbol)
+        if window is None:
+            window = self.windows[symbol] = _SymbolWindow(int(self.config['window_candles']))
+        return window
+
+    def on_candle_close(self, symbol: str, timestamp_ms: int, close: float) -> bool:
+        """Append one closed candle; returns True if the metrics changed"""
+        window = self._window(symbol)
+        if window.timestamps and timestamp_ms <= window.timestamps[-1]:
+            return False
+        window.timestamps.append(int(timestamp_ms))
+        window.closes.append(float(close))
+        self._recompute(symbol, window)
+        return True
+
+    def update_candles(self, symbol: str, df, now: Optional[float] = None) -> int:
+        """Fold closed candles from an OHLCV frame; the still-forming candle is ignored"""
+        if df is None or len(df) == 0:
+            return 0
+        now_ms = (time.time() if now is None else now) * 1000
+        timestamps = df['timestamp'].values
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+        closes = df['close'].values
+
+        window = self._window(symbol)
+        last = window.timestamps[-1] if window.timestamps else None
+        added = 0
+        for ts, close in zip(timestamps, closes):
+            ts = int(ts)
+            if ts + self.timeframe_ms > now_ms or (last is not None and ts <= last):
+                continue
+            window.timestamps.append(ts)
+            window.closes.append(float(close))
+            last = ts
+            added += 1
+        if added:
+            self._recompute(symbol, window)
+        return added
+
+    def refresh_due(self, symbol: str, now: Optional[float] = None) -> bool:
+        """True once a candle newer than the last one we hold has closed"""
+        window = self.windows.get(symbol)
+        now = time.time() if now is None else now
+        if window is not None and now - window.attempted_at < float(self.config['retry_seconds']):
+            return False
+        if window is None or not window.timestamps:
+            return True
+        now_ms = now * 1000
+        next_close = window.timestamps[-1] + 2 * self.timeframe_ms
+        return now_ms >= next_close + float(self.config['refresh_grace_seconds']) * 1000
+
+    def refresh_if_due(self, symbol: str, fetch_candles: Callable[[str, str, int], object],
+                       now: Optional[float] = None) -> bool:
+        """
+        Fetch only the candles missing since the last refresh.
+
+        fetch_candles(symbol, timeframe, limit) returns an OHLCV DataFrame
+        (bot.fetch_ohlcv bound to the exchange).
+        """
+        if not self.refresh_due(symbol, now):
+            return False
+        now = time.time() if now is None else now
+        window = self._window(symbol)
+        window.attempted_at = now
+        limit = int(self.config['window_candles']) + 1
+        if window.timestamps:
+            now_ms = now * 1000
+            missing = int((now_ms - window.timestamps[-1]) // self.timeframe_ms)
+            limit = max(2, min(limit, missing))  # Missing closed candles plus the forming one
+        df = fetch_candles(symbol, self.config['timeframe'], limit)
+        return self.update_candles(symbol, df, now) > 0
+
+    # -------------------------------------------------------- computation
+
+    def _recompute(self, symbol: str, window: _SymbolWindow):
+        closes = np.fromiter(window.closes, dtype=np.float64)
+        returns = np.diff(closes) / closes[:-1] if len(closes) > 1 else np.empty(0)
+        window.returns = returns
+        window.updated_at = time.time()
+        self._covariance = None
+
+        metrics = {'returns': len(returns), 'last_candle': window.timestamps[-1]}
+        if len(returns) > 1:
+            mean = float(returns.mean())
+            std = float(returns.std(ddof=1))
+            metrics.update({'mean_return': mean, 'volatility': std})
+            for confidence in self.config['confidence_levels']:
+                quantile = float(np.percentile(returns, (1 - confidence) * 100))
+                tail = returns[returns <= quantile]
+                z = NormalDist().inv_cdf(confidence)
+                metrics[confidence] = {
+                    # Per-unit-horizon loss fractions; scaled by sqrt(horizon) on read
+                    'historical_var': abs(quantile),
+                    'historical_cvar': abs(float(tail.mean())) if len(tail) else abs(quantile),
+                    'parametric_var': max(0.0, z * std - mean),
+                    'parametric_cvar': max(0.0, std * NormalDist().pdf(z) / (1 - confidence) - mean)
+                }
+        window.metrics = metrics
+
+    # ------------------------------------------------------------ queries
+
+    def volatility(self, symbol: str) -> Optional[float]:
+        """Standard deviation of per-candle returns, or None before the first refresh"""
+        window = self.windows.get(symbol)
+        return window.metrics.get('volatility') if window else None
+
+    def get_var_analysis(self, symbol: str, portfolio_value: float, confidence: float = 0.95) -> Dict:
+        """
+        Drop-in for ValueAtRiskCalculator.calculate_var on the cached window,
+        plus CVaR and parametric figures.
+        """
+        window = self.windows.get(symbol)
+        metrics = window.metrics if window else {}
+        if metrics.get('returns', 0) < int(self.config['min_returns']) or confidence not in metrics:
+            return {
+                'var_daily': portfolio_value * 0.02,  # 2% default
+                'var_weekly': portfolio_value * 0.05,
+                'var_monthly': portfolio_value * 0.10,
+                'confidence_level': confidence,
+                'cached': window is not None
+            }
+
+        figures = metrics[confidence]
+        result = {'confidence_level': confidence, 'volatility': metrics['volatility'], 'cached': True}
+        for name, days in self.config['horizons'].items():
+            scale = np.sqrt(days) * portfolio_value
+            result[f"var_{name}"] = figures['historical_var'] * scale
+            result[f"cvar_{name}"] = figures['historical_cvar'] * scale
+            result[f"parametric_var_{name}"] = figures['parametric_var'] * scale
+            result[f"parametric_cvar_{name}"] = figures['parametric_cvar'] * scale
+        result['max_expected_loss'] = result['var_daily']
+        result['risk_assessment'] = _risk_assessment(result['var_daily'], portfolio_value)
+        return result
+
+    def covariance_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Return covariance across symbols, aligned on shared candle times"""
+        if self._covariance is not None:
+            return self._covariance
+
+        symbols = [s for s, w in self.windows.items() if len(w.returns) > 1]
+        symbols = symbols[:int(self.config['max_covariance_symbols'])]
+        if not symbols:
+            self._covariance = ([], np.empty((0, 0)))
+            return self._covariance
+
+        # Returns are keyed by the close time of the candle they end on
+        keyed = {s: dict(zip(list(self.windows[s].timestamps)[1:], self.windows[s].returns)) for s in symbols}
+        shared = sorted(set.intersection(*(set(k) for k in keyed.values())))
+        if len(shared) < 2:
+            self._covariance = (symbols, np.diag([self.windows[s].returns.var(ddof=1) for s in symbols]))
+            return self._covariance
+
+        matrix = np.array([[keyed[s][ts] for ts in shared] for s in symbols])
+        self._covariance = (symbols, np.atleast_2d(np.cov(matrix, ddof=1)))
+        return self._covariance
+
+    def portfolio_var(self, exposures: Dict[str, float], confidence: float = 0.95, horizon: int = 1) -> Dict:
+        """Parametric VaR of USD exposures per symbol using the cross-asset covariance"""
+        symbols, cov = self.covariance_matrix()
+        index = {s: i for i, s in enumerate(symbols)}
+        covered = [s for s in exposures if s in index]
+        if not covered:
+            return {'portfolio_var': 0.0, 'portfolio_volatility': 0.0, 'uncovered': list(exposures)}
+
+        idx = [index[s] for s in covered]
+        weights = np.array([exposures[s] for s in covered], dtype=np.float64)
+        sub_cov = cov[np.ix_(idx, idx)]
+        portfolio_std = float(np.sqrt(max(0.0, weights @ sub_cov @ weights)))
+        z = NormalDist().inv_cdf(confidence)
+        standalone = sum(abs(w) * np.sqrt(sub_cov[i, i]) for i, w in enumerate(weights))
+        return {
+            'portfolio_var': z * portfolio_std * np.sqrt(horizon),
+            'portfolio_volatility': portfolio_std,
+            'diversification_ratio': standalone / portfolio_std if portfolio_std > 0 else 1.0,
+            'confidence_level': confidence,
+            'uncovered': [s for s in exposures if s not in index]
+        }
+
+
+# Global service instance
+_risk_metrics_service = None
+
+
+def get_risk_metrics_service(config: Optional[Dict] = None) -> RiskMetricsService:
+    """Get the process-wide risk metrics service"""
+    global _risk_metrics_service
+    if _risk_metrics_service is None:
+        _risk_metrics_service = RiskMetricsService(config)
+    return _risk_metrics_service
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# =============================================================================
+# SAMPLING PROFILER - Runtime-toggled stack sampling for the bot and watchdog
+# =============================================================================
+#
+# Lets us see why the EC2 bot is slow without restarting it under a profiler:
+#
+#   kill -USR1 <pid>                    # start (or stop) a profiling window
+#   echo 120 > profile.control          # same, via control file, 120 seconds
+#   echo stop > profile.control         # stop early
+#
+# While active, a background thread samples the main thread's stack every
+# few milliseconds. When the window ends it writes to logs/profiles/:
+#   <name>_<timestamp>.collapsed       collapsed stacks (flamegraph.pl / speedscope)
+#   <name>_<timestamp>_top.txt         hottest functions, self and inclusive
+#   <name>_<timestamp>_tracemalloc.txt top allocation sites during the window
+#
+# While off, the only cost is one os.stat() of the control file per second.
+#
+# =============================================================================
+
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+DEFAULT_PROFILER_CONFIG = {
+    'duration_seconds': 60,
+    'interval_ms': 10,
+    'output_dir': os.path.join('logs', 'profiles'),
+    'control_file': 'profile.control',
+    'control_poll_seconds': 1.0,
+    'tracemalloc_frames': 10,
+    'tracemalloc_top': 25
+}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    🔬 On-demand stack sampler for one target thread (normally the main loop)
+
+    sys._current_frames() is read from a separate thread, so samples are
+    taken even while the main thread is blocked inside a network call.
+    """
+
+    def __init__(self, name: str, config: Optional[Dict] = None,
+                 target_thread_id: Optional[int] = None):
+        self.name = name
+        self.config = dict(DEFAULT_PROFILER_CONFIG)
+        self.config.update(config or {})
+        self.target_thread_id = target_thread_id or threading.main_thread().ident
+        self.lock = threading.Lock()
+        self.active = False
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.deadline = None
+        self.started_tracemalloc = False
+        self.last_outputs = []
+        self._sampler_thread = None
+        self._stop_event = threading.Event()
+        self._control_wakeup = threading.Event()
+        self._control_thread = None
+
+    # ------------------------------------------------------------- control
+
+    def install(self):
+        """Hook SIGUSR1 (where available) and start watching the control file"""
+        if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self._handle_signal)
+
+        if self._control_thread is None:
+            self._control_thread = threading.Thread(
+                target=self._watch_control_file, name=f"{self.name}-profiler-control", daemon=True
+            )
+            self._control_thread.start()
+        return self
+
+    def _handle_signal(self, signum, frame):
+        # Keep the handler trivial; the work happens on helper threads
+        threading.Thread(target=self.toggle, name=f"{self.name}-profiler-toggle", daemon=True).start()
+
+    def _watch_control_file(self):
+        control_file = self.config['control_file']
+        poll = float(self.config['control_poll_seconds'])
+        while True:
+            try:
+                if os.path.exists(control_file):
+                    with open(control_file, 'r') as f:
+                        command = f.read().strip().lower()
+                    os.remove(control_file)
+                    self.handle_command(command)
+            except Exception as e:
+                print(f"⚠️ Profiler control file error: {e}")
+            self._control_wakeup.wait(poll)  # Real-time wait, unaffected by replay clocks
+
+    def handle_command(self, command: str):
+        """'' toggles, 'stop' stops, a number starts a window of that many seconds"""
+        if command == 'stop':
+            self.stop()
+        elif command in ('', 'toggle'):
+            self.toggle()
+        else:
+            try:
+                self.start(float(command))
+            except ValueError:
+                print(f"⚠️ Unknown profiler command: {command!r}")
+
+    def toggle(self):
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    # ------------------------------------------------------------ sampling
+
+    def start(self, duration_seconds: Optional[float] = None) -> bool:
+        with self.lock:
+            if self.active:
+                return False
+            duration = float(duration_seconds or self.config['duration_seconds'])
+            self.active = True
+            self.stacks = Counter()
+            self.samples = 0
+            self.started_at = time.perf_counter()
+            self.deadline = self.started_at + duration
+            self._stop_event.clear()
+
+            self.started_tracemalloc = not tracemalloc.is_tracing()
+            if self.started_tracemalloc:
+                tracemalloc.start(int(self.config['tracemalloc_frames']))
+
+            self._sampler_thread = threading.Thread(
+                target=self._sample_loop, name=f"{self.name}-profiler-sampler", daemon=True
+            )
+            self._sampler_thread.start()
+
+        print(f"🔬 PROFILER STARTED: {self.name} for {duration:.0f}s "
+              f"(every {self.config['interval_ms']}ms)")
+        return True
+
+    def stop(self):
+        """Stop sampling early; output is written by the sampler thread"""
+        thread = self._sampler_thread
+        self._stop_event.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=30)
+
+    def _sample_loop(self):
+        interval = float(self.config['interval_ms']) / 1000.0
+        target = self.target_thread_id
+        own_id = threading.get_ident()
+
+        while not self._stop_event.is_set() and time.perf_counter() < self.deadline:
+            frame = sys._current_frames().get(target)
+            if frame is not None and target != own_id:
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[';'.join(stack)] += 1
+                self.samples += 1
+            del frame
+            self._stop_event.wait(interval)
+
+        self._finish()
+
+    def _finish(self):
+        snapshot = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+
+        elapsed = time.perf_counter() - self.started_at
+        try:
+            self.last_outputs = self.write_outputs(snapshot, elapsed)
+            print(f"🔬 PROFILER STOPPED: {self.samples} samples in {elapsed:.1f}s → {self.last_outputs[0]}")
+        except Exception as e:
+            print(f"⚠️ Profiler output failed: {e}")
+        finally:
+            with self.lock:
+                self.active = False
+
+    # -------------------------------------------------------------- output
+
+    def write_outputs(self, snapshot, elapsed: float):
+        output_dir = self.config['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(output_dir, f"{self.name}_{stamp}_{os.getpid()}")
+
+        collapsed_path = f"{base}.collapsed"
+        with open(collapsed_path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        top_path = f"{base}_top.txt"
+        self_counts = Counter()
+        inclusive_counts = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                inclusive_counts[label] += count
+
+        total = max(self.samples, 1)
+        with open(top_path, 'w') as f:
+            f.write(f"{self.name} profile: {self.samples} samples over {elapsed:.1f}s "
+                    f"(pid {os.getpid()})\n\n")
+            f.write("TOP SELF TIME\n")
+            for label, count in self_counts.most_common(30):
+                f.write(f"{count / total:7.1%}  {count:6d}  {label}\n")
+            f.write("\nTOP INCLUSIVE TIME\n")
+            for label, count in inclusive_counts.most_common(30):
+                f.write(f"{count / total:7.1%}  {count:6d}  {label}\n")
+
+        outputs = [collapsed_path, top_path]
+        if snapshot is not None:
+            tracemalloc_path = f"{base}_tracemalloc.txt"
+            stats = snapshot.statistics('lineno')
+            with open(tracemalloc_path, 'w') as f:
+                f.write(f"Top {self.config['tracemalloc_top']} allocation sites "
+                        f"(traced allocations still alive at window end)\n\n")
+                for stat in stats[:int(self.config['tracemalloc_top'])]:
+                    f.write(f"{stat.size / 1024:10.1f} KiB  {stat.count:8d} blocks  {stat.traceback}\n")
+            outputs.append(tracemalloc_path)
+
+        return outputs
+
+
+# Global profiler instance
+_sampling_profiler = None
+
+
+def install_sampling_profiler(name: str, config: Optional[Dict] = None) -> SamplingProfiler:
+    """Create and install the process-wide profiler (call from the main thread)"""
+    global _sampling_profiler
+    if _sampling_profiler is None:
+        _sampling_profiler = SamplingProfiler(name, config).install()
+    return _sampling_profiler
+
+
+def get_sampling_profiler() -> Optional[SamplingProfiler]:
+    """Get the installed profiler, if any"""
+    return _sampling_profiler
@@ -872,17 +872,18 @@ def get_alternative_data_aggregator(config: Dict = None) -> AlternativeDataAggre
         _alternative_data_aggregator = AlternativeDataAggregator(config)
     return _alternative_data_aggregator
 
-def enhance_signal_with_alternative_data(signal: Dict, symbol: str = 'BTC/USDT') -> Dict:
+def enhance_signal_with_alternative_data(signal: Dict, symbol: str = 'BTC/USDT',
+                                         alt_data: Dict[str, Any] = None) -> Dict:
     """
     🎯 ENHANCE TRADING SIGNAL WITH ALTERNATIVE DATA
     
-    Combines traditional trading signal with alternative data intelligence
+    Combines traditional trading signal with alternative data intelligence.
+    Pass pre-fetched `alt_data` to skip the aggregation call.
     """
     try:
-        aggregator = get_alternative_data_aggregator()
-        
         # Get comprehensive alternative data
-        alt_data = aggregator.get_comprehensive_alternative_data(symbol)
+        if alt_data is None:
+            alt_data = get_alternative_data_aggregator().get_comprehensive_alternative_data(symbol)
         
         # Extract key metrics
         composite_score = alt_data['aggregated_scores']['composite_score']
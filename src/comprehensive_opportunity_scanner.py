@@ -19,6 +19,12 @@ import json
 @dataclass
 class OpportunityAlert:
     """Data class for opportunity alerts"""
+    # Slotted: one alert per pair per scan across the whole pair universe.
+    # The phase2_* slots are filled in later by the bot's Phase 2 enhancement.
+    __slots__ = ('symbol', 'price_change_1h', 'price_change_4h', 'price_change_24h', 'volume_change_24h',
+                 'current_price', 'urgency_score', 'detected_at', 'alert_type', 'recommendation',
+                 'phase2_enhanced', 'phase2_confidence_boost')
+
     symbol: str
     price_change_1h: float
     price_change_4h: float
@@ -122,12 +128,13 @@ class ComprehensiveOpportunityScanner:
                 'AVAX/USDT', 'DOT/USDT', 'MATIC/USDT', 'LINK/USDT', 'UNI/USDT', 'LTC/USDT'
             ]
     
-    def scan_all_pairs_comprehensive(self) -> List[OpportunityAlert]:
+    def scan_all_pairs_comprehensive(self, all_tickers: Optional[Dict] = None) -> List[OpportunityAlert]:
         """
         🔍 OPTIMIZED COMPREHENSIVE SCAN - 90% Fewer API Calls
         
         Uses batch ticker fetching to dramatically reduce API calls
-        and avoid rate limiting issues.
+        and avoid rate limiting issues. A caller that already holds an
+        all-symbol ticker snapshot can pass it in to skip the fetch.
         """
         opportunities = []
         scan_start = datetime.now()
@@ -136,9 +143,10 @@ class ComprehensiveOpportunityScanner:
         
         try:
             # 🚀 OPTIMIZATION 1: Batch fetch all tickers in ONE API call
-            log_message("📊 BATCH FETCHING ALL TICKERS (API OPTIMIZATION)")
-            all_tickers = self.exchange.fetch_tickers()
-            log_message(f"✅ FETCHED {len(all_tickers)} tickers in single API call")
+            if all_tickers is None:
+                log_message("📊 BATCH FETCHING ALL TICKERS (API OPTIMIZATION)")
+                all_tickers = self.exchange.fetch_tickers()
+                log_message(f"✅ FETCHED {len(all_tickers)} tickers in single API call")
             
             # 🚀 OPTIMIZATION 2: Filter only supported pairs from batch
             available_pairs = [pair for pair in self.supported_pairs if pair in all_tickers]
@@ -714,12 +722,12 @@ def get_comprehensive_scanner(exchange, config_path="comprehensive_all_pairs_con
     """Get configured comprehensive opportunity scanner with ALL pairs"""
     return ComprehensiveOpportunityScanner(exchange, config_path)
 
-def run_immediate_comprehensive_scan(exchange) -> List[OpportunityAlert]:
+def run_immediate_comprehensive_scan(exchange, all_tickers: Optional[Dict] = None) -> List[OpportunityAlert]:
     """Run immediate comprehensive scan of ALL available pairs"""
     scanner = get_comprehensive_scanner(exchange)
     
     log_message("🚀 RUNNING IMMEDIATE COMPREHENSIVE SCAN - ALL PAIRS")
-    opportunities = scanner.scan_all_pairs_comprehensive()
+    opportunities = scanner.scan_all_pairs_comprehensive(all_tickers)
     
     log_message(f"📊 SCAN RESULTS: {len(opportunities)} opportunities detected")
     
@@ -20,14 +20,17 @@ Integrates with existing LSTM AI for compound intelligence.
 import numpy as np
 import pandas as pd
 import cv2
-from sklearn.cluster import DBSCAN
-from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LinearRegression
 from scipy.signal import find_peaks, argrelextrema
 from scipy.stats import linregress
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from src.support_resistance_index import SwingExtrema, SupportResistanceIndex
+except ImportError:
+    from support_resistance_index import SwingExtrema, SupportResistanceIndex
+
 class PatternRecognitionAI:
     """
     🧠 Advanced Pattern Recognition AI Engine
@@ -39,7 +42,7 @@ class PatternRecognitionAI:
     def __init__(self, config=None):
         self.config = config or {}
         self.pattern_memory = {}  # Store recent patterns for trend analysis
-        self.support_resistance_levels = {}  # Cache S/R levels
+        self.level_index = SupportResistanceIndex(self.config)  # Persistent S/R levels per (symbol, timeframe)
         self.pattern_confidence_threshold = 65  # Minimum confidence for pattern signals
         
         # Pattern detection parameters
@@ -51,27 +54,31 @@ class PatternRecognitionAI:
         print("🔍 Features: Chart patterns, S/R levels, breakout prediction")
         print("💰 Cost: $0 - OpenCV + scikit-learn")
     
-    def analyze_chart_patterns(self, df, symbol='BTC/USDT'):
+    def analyze_chart_patterns(self, df, symbol='BTC/USDT', extrema=None):
         """
         🔍 COMPREHENSIVE CHART PATTERN ANALYSIS
         
         Detects multiple pattern types and returns confidence-scored signals.
+        All detectors share one swing-extrema pass (pass `extrema` to reuse it).
         """
         try:
             if len(df) < self.min_pattern_length:
                 return {'patterns': [], 'confidence': 0, 'action': 'HOLD'}
             
+            if extrema is None:
+                extrema = SwingExtrema(df)
+            
             patterns_detected = []
             overall_confidence = 0
             
             # 1. HEAD & SHOULDERS PATTERN
-            h_s_pattern = self._detect_head_shoulders(df)
+            h_s_pattern = self._detect_head_shoulders(df, extrema)
             if h_s_pattern['confidence'] > 50:
                 patterns_detected.append(h_s_pattern)
                 overall_confidence += h_s_pattern['confidence'] * 0.3
             
             # 2. TRIANGLE PATTERNS
-            triangle_pattern = self._detect_triangles(df)
+            triangle_pattern = self._detect_triangles(df, extrema)
             if triangle_pattern['confidence'] > 50:
                 patterns_detected.append(triangle_pattern)
                 overall_confidence += triangle_pattern['confidence'] * 0.25
@@ -83,13 +90,13 @@ class PatternRecognitionAI:
                 overall_confidence += flag_pattern['confidence'] * 0.2
             
             # 4. WEDGE PATTERNS
-            wedge_pattern = self._detect_wedges(df)
+            wedge_pattern = self._detect_wedges(df, extrema)
             if wedge_pattern['confidence'] > 50:
                 patterns_detected.append(wedge_pattern)
                 overall_confidence += wedge_pattern['confidence'] * 0.15
             
             # 5. DOUBLE TOP/BOTTOM
-            double_pattern = self._detect_double_top_bottom(df)
+            double_pattern = self._detect_double_top_bottom(df, extrema)
             if double_pattern['confidence'] > 50:
                 patterns_detected.append(double_pattern)
                 overall_confidence += double_pattern['confidence'] * 0.1
@@ -121,7 +128,7 @@ class PatternRecognitionAI:
             print(f"⚠️ Pattern analysis error for {symbol}: {e}")
             return {'patterns': [], 'confidence': 0, 'action': 'HOLD'}
     
-    def _detect_head_shoulders(self, df):
+    def _detect_head_shoulders(self, df, extrema=None):
         """
         🔍 HEAD & SHOULDERS PATTERN DETECTION
         
@@ -133,8 +140,9 @@ class PatternRecognitionAI:
             lows = df['low'].values
             
             # Find peaks and troughs
-            peaks, _ = find_peaks(highs, distance=5)
-            troughs, _ = find_peaks(-lows, distance=5)
+            extrema = extrema or SwingExtrema(df)
+            peaks = extrema.peaks(distance=5)
+            troughs = extrema.troughs(distance=5)
             
             if len(peaks) < 3:
                 return {'pattern': 'head_shoulders', 'confidence': 0, 'direction': 'neutral'}
@@ -207,7 +215,7 @@ class PatternRecognitionAI:
         except Exception as e:
             return {'pattern': 'head_shoulders', 'confidence': 0, 'direction': 'neutral'}
     
-    def _detect_triangles(self, df):
+    def _detect_triangles(self, df, extrema=None):
         """
         🔺 TRIANGLE PATTERN DETECTION
         
@@ -227,8 +235,9 @@ class PatternRecognitionAI:
             recent_lows = recent_data['low'].values
             
             # Find peaks and troughs in recent data
-            peaks, _ = find_peaks(recent_highs, distance=3)
-            troughs, _ = find_peaks(-recent_lows, distance=3)
+            extrema = extrema or SwingExtrema(df)
+            peaks = extrema.recent_peaks(40, distance=3)
+            troughs = extrema.recent_troughs(40, distance=3)
             
             if len(peaks) >= 2 and len(troughs) >= 2:
                 # Calculate trend lines
@@ -374,7 +383,7 @@ class PatternRecognitionAI:
         except Exception as e:
             return {'pattern': 'flag', 'confidence': 0, 'direction': 'neutral'}
     
-    def _detect_wedges(self, df):
+    def _detect_wedges(self, df, extrema=None):
         """
         🔻 WEDGE PATTERN DETECTION
         
@@ -389,8 +398,9 @@ class PatternRecognitionAI:
             lows = recent_data['low'].values
             
             # Find peaks and troughs
-            peaks, _ = find_peaks(highs, distance=3)
-            troughs, _ = find_peaks(-lows, distance=3)
+            extrema = extrema or SwingExtrema(df)
+            peaks = extrema.recent_peaks(35, distance=3)
+            troughs = extrema.recent_troughs(35, distance=3)
             
             if len(peaks) >= 3 and len(troughs) >= 3:
                 # Calculate trend lines for recent peaks and troughs
@@ -436,7 +446,7 @@ class PatternRecognitionAI:
         except Exception as e:
             return {'pattern': 'wedge', 'confidence': 0, 'direction': 'neutral'}
     
-    def _detect_double_top_bottom(self, df):
+    def _detect_double_top_bottom(self, df, extrema=None):
         """
         🔄 DOUBLE TOP/BOTTOM PATTERN DETECTION
         
@@ -450,8 +460,10 @@ class PatternRecognitionAI:
             lows = df['low'].values
             
             # Find significant peaks and troughs
-            peaks, _ = find_peaks(highs, distance=5, height=np.percentile(highs, 70))
-            troughs, _ = find_peaks(-lows, distance=5)
+            extrema = extrema or SwingExtrema(df)
+            peaks = extrema.peaks(distance=5)
+            peaks = peaks[highs[peaks] >= np.percentile(highs, 70)]
+            troughs = extrema.troughs(distance=5)
             
             # Double Top Detection
             if len(peaks) >= 2:
@@ -523,81 +535,36 @@ class PatternRecognitionAI:
         except Exception as e:
             return {'pattern': 'double', 'confidence': 0, 'direction': 'neutral'}
     
-    def detect_support_resistance_levels(self, df, symbol='BTC/USDT'):
+    def detect_support_resistance_levels(self, df, symbol='BTC/USDT', extrema=None):
         """
         📊 DYNAMIC SUPPORT & RESISTANCE LEVEL DETECTION
         
-        Uses clustering to identify key price levels.
+        Folds newly confirmed swing highs/lows into the persistent level index
+        for this symbol/timeframe and reads the strongest levels around price.
         """
         try:
             if len(df) < 50:
                 return {'support_levels': [], 'resistance_levels': [], 'confidence': 0}
             
-            highs = df['high'].values
-            lows = df['low'].values
-            volumes = df['volume'].values if 'volume' in df.columns else np.ones(len(df))
-            
-            # Combine significant highs and lows
-            peaks, _ = find_peaks(highs, distance=3)
-            troughs, _ = find_peaks(-lows, distance=3)
-            
-            # Create price points with volumes as weights
-            price_points = []
-            weights = []
-            
-            for peak in peaks:
-                price_points.append(highs[peak])
-                weights.append(volumes[peak])
-            
-            for trough in troughs:
-                price_points.append(lows[trough])
-                weights.append(volumes[trough])
-            
-            if len(price_points) < 5:
-                return {'support_levels': [], 'resistance_levels': [], 'confidence': 0}
-            
-            # Use DBSCAN clustering to find price levels
-            price_array = np.array(price_points).reshape(-1, 1)
-            
-            # Scale prices for clustering
-            scaler = StandardScaler()
-            scaled_prices = scaler.fit_transform(price_array)
-            
-            # Cluster similar price levels
-            clustering = DBSCAN(eps=0.3, min_samples=2).fit(scaled_prices)
-            labels = clustering.labels_
+            if extrema is None:
+                extrema = SwingExtrema(df)
+            state = self.level_index.update(symbol, extrema)
             
-            # Extract significant levels
             current_price = df['close'].iloc[-1]
-            support_levels = []
-            resistance_levels = []
-            
-            for label in set(labels):
-                if label != -1:  # Ignore noise points
-                    cluster_points = [price_points[i] for i in range(len(price_points)) if labels[i] == label]
-                    cluster_weights = [weights[i] for i in range(len(weights)) if labels[i] == label]
-                    
-                    # Weighted average for level
-                    level = np.average(cluster_points, weights=cluster_weights)
-                    strength = len(cluster_points) * np.mean(cluster_weights)
-                    
-                    # Classify as support or resistance
-                    if level < current_price:
-                        support_levels.append({'level': level, 'strength': strength, 'touches': len(cluster_points)})
-                    else:
-                        resistance_levels.append({'level': level, 'strength': strength, 'touches': len(cluster_points)})
+            now = extrema.timestamps[-1] if extrema.timestamps is not None else None
+            support_levels, resistance_levels = self.level_index.levels(state, current_price, now)
             
-            # Sort by strength
-            support_levels.sort(key=lambda x: x['strength'], reverse=True)
-            resistance_levels.sort(key=lambda x: x['strength'], reverse=True)
+            total_levels = len(support_levels) + len(resistance_levels)
+            if total_levels == 0:
+                return {'support_levels': [], 'resistance_levels': [], 'confidence': 0,
+                        'current_price': current_price, 'symbol': symbol}
             
             # Calculate overall confidence based on level quality
-            total_levels = len(support_levels) + len(resistance_levels)
             confidence = min(90, total_levels * 10 + np.mean([level['touches'] for level in support_levels + resistance_levels]) * 5)
             
             return {
-                'support_levels': support_levels[:5],  # Top 5 support levels
-                'resistance_levels': resistance_levels[:5],  # Top 5 resistance levels
+                'support_levels': support_levels,  # Top 5 support levels
+                'resistance_levels': resistance_levels,  # Top 5 resistance levels
                 'confidence': confidence,
                 'current_price': current_price,
                 'symbol': symbol
@@ -607,6 +574,16 @@ class PatternRecognitionAI:
             print(f"⚠️ S/R level detection error for {symbol}: {e}")
             return {'support_levels': [], 'resistance_levels': [], 'confidence': 0}
     
+    def nearest_levels(self, symbol, price):
+        """
+        📍 Nearest indexed support below and resistance above `price` (O(log n)).
+        Uses levels from earlier detect_support_resistance_levels calls.
+        """
+        return {
+            'support': self.level_index.nearest_support(symbol, price),
+            'resistance': self.level_index.nearest_resistance(symbol, price)
+        }
+    
     def predict_breakout_probability(self, df, patterns, sr_levels, symbol='BTC/USDT'):
         """
         🎯 BREAKOUT PREDICTION ENGINE
@@ -725,9 +702,10 @@ class PatternRecognitionAI:
         Enhances existing trading signals with pattern analysis.
         """
         try:
-            # Run full pattern analysis
-            patterns = self.analyze_chart_patterns(df, symbol)
-            sr_levels = self.detect_support_resistance_levels(df, symbol)
+            # Run full pattern analysis (one shared swing-extrema pass)
+            extrema = SwingExtrema(df)
+            patterns = self.analyze_chart_patterns(df, symbol, extrema)
+            sr_levels = self.detect_support_resistance_levels(df, symbol, extrema)
             breakout_prediction = self.predict_breakout_probability(df, patterns, sr_levels, symbol)
             
             # Create enhanced signal
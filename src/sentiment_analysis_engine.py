@@ -664,15 +664,18 @@ def get_sentiment_engine() -> SentimentAnalysisEngine:
         sentiment_engine = SentimentAnalysisEngine()
     return sentiment_engine
 
-def enhance_signal_with_sentiment(signal: Dict, symbol: str, current_price: float = None) -> Dict:
+def enhance_signal_with_sentiment(signal: Dict, symbol: str, current_price: float = None,
+                                  sentiment_score: SentimentScore = None) -> Dict:
     """
     🎯 ENHANCE TRADING SIGNAL WITH SENTIMENT ANALYSIS
     
-    Main function to enhance trading signals with sentiment data
+    Main function to enhance trading signals with sentiment data.
+    Pass a pre-fetched `sentiment_score` to skip the analysis call.
     """
     try:
         engine = get_sentiment_engine()
-        sentiment_score = engine.get_sentiment_analysis(symbol, current_price)
+        if sentiment_score is None:
+            sentiment_score = engine.get_sentiment_analysis(symbol, current_price)
         enhanced_signal = engine.enhance_trading_signal(signal, sentiment_score)
         
         return enhanced_signal
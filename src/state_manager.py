@@ -12,7 +12,7 @@ import threading
 class StateManager:
     def __init__(self, state_file="bot_state.json"):
         self.state_file = state_file
-        self.state_lock = threading.Lock()
+        self.state_lock = threading.RLock()  # save_state() re-enters from update methods
         self.default_state = {
             "bot_info": {
                 "last_updated": None,
@@ -28,7 +28,14 @@ class StateManager:
                 "entry_timestamp": None,
                 "consecutive_losses": 0,
                 "last_trade_time": 0,
-                "active_trade_index": None
+                "active_trade_index": None,
+                "trailing_stop_order_id": None,
+                "trailing_stop_active": False,
+                "trailing_stop_data": None,
+                "immediate_stop_limit_order_id": None,
+                "immediate_stop_limit_active": False,
+                "trailing_oco_order_id": None,
+                "trailing_oco_active": False
             },
             "risk_management": {
                 "account_peak_value": 20.0,
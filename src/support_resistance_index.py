@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+📊 INCREMENTAL SUPPORT/RESISTANCE LEVEL INDEX
+=============================================
+
+Persistent per-(symbol, timeframe) index of support/resistance levels used by
+PatternRecognitionAI.
+
+- SwingExtrema: one find_peaks pass over a candle frame, shared by every
+  pattern detector and by the level index.
+- SupportResistanceIndex: keeps price-bucketed clusters of swing highs/lows
+  between calls. Each call only folds in swings that were confirmed since the
+  previous call; cluster strength is volume-weighted and decays with a
+  half-life, so stale levels fade out instead of being recomputed away.
+  Nearest support/resistance lookups are a bisect over sorted levels.
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.signal import find_peaks
+
+DEFAULT_SR_INDEX_CONFIG = {
+    'sr_bucket_pct': 0.003,          # Swings within 0.3% merge into one level
+    'sr_min_touches': 2,             # Touches before a cluster counts as a level
+    'sr_half_life_candles': 200,     # Strength halves every N candles without a touch
+    'sr_min_strength_ratio': 0.01,   # Drop clusters below 1% of their peak strength
+    'sr_max_clusters': 200
+}
+
+
+class SwingExtrema:
+    """
+    Swing highs/lows of one candle frame, computed once.
+
+    Detectors ask for `peaks(distance)` / `troughs(distance)` (whole frame) or
+    `recent_peaks(window, distance)` (indices relative to df.tail(window)).
+    """
+
+    def __init__(self, df):
+        self.highs = df['high'].values
+        self.lows = df['low'].values
+        self.closes = df['close'].values
+        self.volumes = df['volume'].values if 'volume' in df.columns else np.ones(len(df))
+        self.length = len(df)
+        self.timestamps = None
+        if 'timestamp' in df.columns and len(df):
+            self.timestamps = _timestamps_seconds(df['timestamp'])
+        self._cache: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def peaks(self, distance: int = 3) -> np.ndarray:
+        key = ('peaks', distance)
+        if key not in self._cache:
+            self._cache[key] = find_peaks(self.highs, distance=distance)[0]
+        return self._cache[key]
+
+    def troughs(self, distance: int = 3) -> np.ndarray:
+        key = ('troughs', distance)
+        if key not in self._cache:
+            self._cache[key] = find_peaks(-self.lows, distance=distance)[0]
+        return self._cache[key]
+
+    def recent_peaks(self, window: int, distance: int = 3) -> np.ndarray:
+        start = max(0, self.length - window)
+        peaks = self.peaks(distance)
+        return peaks[peaks >= start] - start
+
+    def recent_troughs(self, window: int, distance: int = 3) -> np.ndarray:
+        start = max(0, self.length - window)
+        troughs = self.troughs(distance)
+        return troughs[troughs >= start] - start
+
+    def timeframe_seconds(self) -> Optional[int]:
+        if self.timestamps is None or self.length < 2:
+            return None
+        diffs = np.diff(self.timestamps[-20:])
+        diffs = diffs[diffs > 0]
+        return int(np.median(diffs)) if len(diffs) else None
+
+
+def _timestamps_seconds(series) -> np.ndarray:
+    values = series.values
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ms]').astype(np.int64) / 1000.0
+    values = values.astype(np.float64)
+    return values / 1000.0 if values.size and values[-1] > 1e11 else values  # ms or s
+
+
+class _LevelCluster:
+    __slots__ = ('level', 'weight_sum', 'touches', 'strength', 'peak_strength', 'updated_at')
+
+    def __init__(self, price: float, weight: float, timestamp: float):
+        self.level = price
+        self.weight_sum = weight
+        self.touches = 1
+        self.strength = weight
+        self.peak_strength = weight
+        self.updated_at = timestamp
+
+
+class _SymbolLevels:
+    """Clusters for one (symbol, timeframe)"""
+
+    def __init__(self, timeframe_seconds: Optional[int]):
+        self.timeframe_seconds = timeframe_seconds or 60
+        self.watermark = None             # Timestamp of the newest swing folded in
+        self.clusters: Dict[int, _LevelCluster] = {}
+        self.sorted_levels: List[float] = []
+        self.sorted_clusters: List[_LevelCluster] = []
+
+
+class SupportResistanceIndex:
+    """
+    📊 Support/resistance levels that persist between analysis calls
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_SR_INDEX_CONFIG)
+        for key in DEFAULT_SR_INDEX_CONFIG:
+            if config and key in config:
+                self.config[key] = config[key]
+        self.log_step = math.log1p(float(self.config['sr_bucket_pct']))
+        self.states: Dict[Tuple[str, Optional[int]], _SymbolLevels] = {}
+
+    # ------------------------------------------------------------ updating
+
+    def update(self, symbol: str, extrema: SwingExtrema, distance: int = 3) -> _SymbolLevels:
+        """Fold swings confirmed since the last call into the symbol's clusters"""
+        timeframe = extrema.timeframe_seconds()
+        key = (symbol, timeframe)
+        state = self.states.get(key)
+        if state is None or extrema.timestamps is None:
+            # Without timestamps we cannot tell new candles from old ones
+            state = self.states[key] = _SymbolLevels(timeframe)
+
+        if extrema.timestamps is not None:
+            times = extrema.timestamps
+        else:
+            times = np.arange(extrema.length, dtype=np.float64) * state.timeframe_seconds
+
+        # A swing is only final once `distance` later candles exist
+        last_confirmed = extrema.length - 1 - distance
+        swings = [(i, extrema.highs[i]) for i in extrema.peaks(distance) if i <= last_confirmed]
+        swings += [(i, extrema.lows[i]) for i in extrema.troughs(distance) if i <= last_confirmed]
+        swings.sort(key=lambda s: s[0])
+
+        watermark = state.watermark
+        changed = False
+        for i, price in swings:
+            ts = float(times[i])
+            if watermark is not None and ts <= watermark:
+                continue
+            self._add_swing(state, float(price), float(extrema.volumes[i]), ts)
+            state.watermark = ts
+            changed = True
+
+        if changed:
+            self._prune_and_sort(state, float(times[-1]) if extrema.length else 0.0)
+        return state
+
+    def _decayed(self, state: _SymbolLevels, cluster: _LevelCluster, now: float) -> float:
+        half_life = float(self.config['sr_half_life_candles']) * state.timeframe_seconds
+        elapsed = max(0.0, now - cluster.updated_at)
+        return cluster.strength * 0.5 ** (elapsed / half_life)
+
+    def _add_swing(self, state: _SymbolLevels, price: float, volume: float, timestamp: float):
+        if price <= 0:
+            return
+        bucket = int(math.floor(math.log(price) / self.log_step))
+        tolerance = float(self.config['sr_bucket_pct'])
+
+        target_bucket = None
+        for candidate in (bucket, bucket - 1, bucket + 1):
+            cluster = state.clusters.get(candidate)
+            if cluster and abs(cluster.level - price) / cluster.level <= tolerance:
+                target_bucket = candidate
+                break
+        if target_bucket is None and bucket in state.clusters:
+            target_bucket = bucket  # Level drifted to the bucket edge; still the same zone
+
+        if target_bucket is None:
+            state.clusters[bucket] = _LevelCluster(price, volume, timestamp)
+            return
+
+        cluster = state.clusters[target_bucket]
+        total_weight = cluster.weight_sum + volume
+        if total_weight > 0:
+            cluster.level = (cluster.level * cluster.weight_sum + price * volume) / total_weight
+        cluster.weight_sum = total_weight
+        cluster.touches += 1
+        cluster.strength = self._decayed(state, cluster, timestamp) + volume
+        cluster.peak_strength = max(cluster.peak_strength, cluster.strength)
+        cluster.updated_at = timestamp
+
+    def _prune_and_sort(self, state: _SymbolLevels, now: float):
+        min_ratio = float(self.config['sr_min_strength_ratio'])
+        for bucket, cluster in list(state.clusters.items()):
+            if self._decayed(state, cluster, now) < cluster.peak_strength * min_ratio:
+                del state.clusters[bucket]
+
+        max_clusters = int(self.config['sr_max_clusters'])
+        if len(state.clusters) > max_clusters:
+            ranked = sorted(state.clusters.items(), key=lambda kv: self._decayed(state, kv[1], now))
+            for bucket, _ in ranked[:len(state.clusters) - max_clusters]:
+                del state.clusters[bucket]
+
+        min_touches = int(self.config['sr_min_touches'])
+        qualified = sorted((c for c in state.clusters.values() if c.touches >= min_touches),
+                           key=lambda c: c.level)
+        state.sorted_clusters = qualified
+        state.sorted_levels = [c.level for c in qualified]
+
+    # ------------------------------------------------------------- queries
+
+    def _get_state(self, symbol: str, timeframe_seconds: Optional[int]) -> Optional[_SymbolLevels]:
+        """Without a timeframe, the symbol's shortest indexed timeframe answers"""
+        state = self.states.get((symbol, timeframe_seconds))
+        if state is None and timeframe_seconds is None:
+            matches = [s for (sym, _), s in self.states.items() if sym == symbol]
+            state = min(matches, key=lambda s: s.timeframe_seconds) if matches else None
+        return state
+
+    def nearest_support(self, symbol: str, price: float,
+                        timeframe_seconds: Optional[int] = None) -> Optional[Dict]:
+        """Nearest level strictly below `price` (O(log n))"""
+        state = self._get_state(symbol, timeframe_seconds)
+        if not state or not state.sorted_levels:
+            return None
+        i = bisect_left(state.sorted_levels, price) - 1
+        return self._describe(state, state.sorted_clusters[i]) if i >= 0 else None
+
+    def nearest_resistance(self, symbol: str, price: float,
+                           timeframe_seconds: Optional[int] = None) -> Optional[Dict]:
+        """Nearest level strictly above `price` (O(log n))"""
+        state = self._get_state(symbol, timeframe_seconds)
+        if not state or not state.sorted_levels:
+            return None
+        i = bisect_right(state.sorted_levels, price)
+        return self._describe(state, state.sorted_clusters[i]) if i < len(state.sorted_levels) else None
+
+    def levels(self, state: _SymbolLevels, current_price: float, now: Optional[float] = None,
+               top: int = 5) -> Tuple[List[Dict], List[Dict]]:
+        """Support and resistance levels around `current_price`, strongest first"""
+        now = state.watermark if now is None else now
+        split = bisect_left(state.sorted_levels, current_price)
+        support = [self._describe(state, c, now) for c in state.sorted_clusters[:split]]
+        resistance = [self._describe(state, c, now) for c in state.sorted_clusters[split:]]
+        support.sort(key=lambda x: x['strength'], reverse=True)
+        resistance.sort(key=lambda x: x['strength'], reverse=True)
+        return support[:top], resistance[:top]
+
+    def _describe(self, state: _SymbolLevels, cluster: _LevelCluster, now: Optional[float] = None) -> Dict:
+        now = state.watermark if now is None else now
+        return {
+            'level': cluster.level,
+            'strength': self._decayed(state, cluster, now) if now is not None else cluster.strength,
+            'touches': cluster.touches
+        }
+
+    def reset(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self.states.clear()
+        else:
+            for key in [k for k in self.states if k[0] == symbol]:
+                del self.states[key]
@@ -9,6 +9,8 @@ import numpy as np
 from typing import Dict, List, Optional
 import logging
 
+from regime_statistics import get_regime_stats_engine
+
 class AdvancedHybridStrategy:
     """
     Adaptive strategy that switches between mean-reversion and trend-following
@@ -35,7 +37,8 @@ class AdvancedHybridStrategy:
             self.TREND_FOLLOWING: {'wins': 0, 'losses': 0, 'total_return': 0.0}
         }
         
-    def get_adaptive_signal(self, df: pd.DataFrame, market_conditions: Optional[Dict] = None) -> Dict:
+    def get_adaptive_signal(self, df: pd.DataFrame, market_conditions: Optional[Dict] = None,
+                            symbol: Optional[str] = None) -> Dict:
         """
         Generate adaptive signal based on current market regime
         """
@@ -49,7 +52,7 @@ class AdvancedHybridStrategy:
             }
         
         # Detect current market regime
-        regime_analysis = self._detect_market_regime(df)
+        regime_analysis = self._detect_market_regime(df, symbol)
         
         # Determine optimal strategy mode
         optimal_mode = self._determine_optimal_mode(regime_analysis, market_conditions)
@@ -75,24 +78,24 @@ class AdvancedHybridStrategy:
         
         return signal
     
-    def _detect_market_regime(self, df: pd.DataFrame) -> Dict:
+    def _detect_market_regime(self, df: pd.DataFrame, symbol: Optional[str] = None) -> Dict:
         """
         Comprehensive market regime detection
         """
-        # Price-based regime indicators
-        returns = df['close'].pct_change().dropna()
+        # Rolling statistics shared with the other regime detectors
+        stats = get_regime_stats_engine().get_stats(df, symbol)
         
         # 1. Trend Strength Analysis
         trend_analysis = self._analyze_trend_strength(df)
         
         # 2. Volatility Regime Analysis
-        volatility_analysis = self._analyze_volatility_regime(returns)
+        volatility_analysis = self._analyze_volatility_regime(stats)
         
         # 3. Mean Reversion Tendencies
         mean_reversion_analysis = self._analyze_mean_reversion_tendency(df)
         
         # 4. Market Microstructure
-        microstructure_analysis = self._analyze_market_microstructure(df)
+        microstructure_analysis = self._analyze_market_microstructure(df, stats)
         
         # 5. Volume Pattern Analysis
         volume_analysis = self._analyze_volume_patterns(df)
@@ -190,24 +193,22 @@ class AdvancedHybridStrategy:
             'strength_category': 'strong' if trend_strength > 0.7 else 'moderate' if trend_strength > 0.4 else 'weak'
         }
     
-    def _analyze_volatility_regime(self, returns: pd.Series) -> Dict:
+    def _analyze_volatility_regime(self, stats: Dict) -> Dict:
         """Analyze volatility regime"""
         
         # Current volatility
-        current_vol = returns.rolling(20).std().iloc[-1] * np.sqrt(1440)  # Annualized
+        current_vol = stats['vol_20'] * np.sqrt(1440)  # Annualized
         
         # Historical volatility percentile
-        vol_series = returns.rolling(20).std() * np.sqrt(1440)
-        vol_percentile = (vol_series.rank(pct=True) * 100).iloc[-1] if len(vol_series) > 50 else 50
+        vol_percentile = stats['vol_20_percentile'] if stats['returns_count'] > 50 else 50
         
         # Volatility trend
-        recent_vol = vol_series.tail(5).mean()
-        historical_vol = vol_series.tail(50).mean()
+        recent_vol = stats['vol_20_tail5_mean']
+        historical_vol = stats['vol_20_tail50_mean']
         vol_trend = 'increasing' if recent_vol > historical_vol * 1.1 else 'decreasing' if recent_vol < historical_vol * 0.9 else 'stable'
         
         # Volatility clustering (GARCH effects)
-        abs_returns = abs(returns)
-        vol_clustering = abs_returns.rolling(20).std().rolling(10).std().iloc[-1] if len(abs_returns) >= 30 else 0
+        vol_clustering = stats['abs_return_vol_clustering'] if stats['returns_count'] >= 30 else 0
         
         # Regime classification
         if vol_percentile > 80:
@@ -277,7 +278,7 @@ class AdvancedHybridStrategy:
             'reversion_favorable': serial_corr_1 < -0.1 or mean_reversion_rate > 0.6 or at_extremes
         }
     
-    def _analyze_market_microstructure(self, df: pd.DataFrame) -> Dict:
+    def _analyze_market_microstructure(self, df: pd.DataFrame, stats: Dict) -> Dict:
         """Analyze market microstructure indicators"""
         
         # Estimate bid-ask spread from high-low
@@ -285,8 +286,7 @@ class AdvancedHybridStrategy:
         avg_spread = estimated_spread.rolling(20).mean().iloc[-1]
         
         # Price efficiency (random walk characteristics)
-        returns = df['close'].pct_change().dropna()
-        variance_ratio = self._calculate_variance_ratio(returns, 5) if len(returns) >= 10 else 1.0
+        variance_ratio = stats['variance_ratio_5']
         
         # Order flow imbalance (simplified)
         up_moves = (df['close'] > df['close'].shift(1)).rolling(20).sum()
@@ -639,24 +639,6 @@ class AdvancedHybridStrategy:
             
             self.performance_tracker[mode]['total_return'] += trade_result
     
-    def _calculate_variance_ratio(self, returns: pd.Series, k: int) -> float:
-        """Calculate variance ratio for random walk test"""
-        
-        if len(returns) < k * 2:
-            return 1.0
-        
-        # Variance of k-period returns
-        k_period_returns = returns.rolling(k).sum().dropna()
-        var_k = k_period_returns.var()
-        
-        # Variance of 1-period returns
-        var_1 = returns.var()
-        
-        # Variance ratio
-        variance_ratio = var_k / (k * var_1) if var_1 > 0 else 1.0
-        
-        return variance_ratio
-    
     def get_mode_statistics(self) -> Dict:
         """Get comprehensive mode statistics"""
         
@@ -66,7 +66,8 @@ def test_strategy_execution():
         print(f"   Enhanced strategy: {enhanced_signal.get('action', 'N/A')} (conf: {enhanced_signal.get('confidence', 0):.3f})")
         
         # Institutional signal
-        institutional_signal = institutional_manager.get_institutional_signal(df, portfolio_value=50, base_position_size=12)
+        institutional_signal = institutional_manager.get_institutional_signal(df, portfolio_value=50, base_position_size=12,
+                                                                         symbol='BTC/USDC')
         print(f"   Institutional: {institutional_signal.get('action', 'N/A')} (conf: {institutional_signal.get('confidence', 0):.3f})")
         
         # 5. Test market filters
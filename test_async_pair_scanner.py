@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the non-blocking multi-pair scanner
+Checks bounded concurrent fan-out, cancelled timeouts and event-loop responsiveness during a scan
+"""
+
+import asyncio
+import time
+
+from multi_pair_scanner import MultiPairScanner
+
+
+class _AsyncExchange:
+    """ccxt.async_support stand-in: every request takes `delay` seconds"""
+
+    def __init__(self, delay=0.05, hang=()):
+        self.delay = delay
+        self.hang = set(hang)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.cancelled = 0
+        self.closed = False
+
+    async def _io(self, symbol):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(3600 if symbol in self.hang else self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def fetch_ticker(self, symbol):
+        await self._io(symbol)
+        return {'symbol': symbol, 'last': 100.0, 'percentage': 2.0, 'quoteVolume': 1e6}
+
+    async def fetch_ohlcv(self, symbol, timeframe='5m', limit=2):
+        await self._io(symbol)
+        return [[0, 100, 101, 99, 100.0, 1], [300000, 100, 102, 99, 101.0, 1]]
+
+    async def close(self):
+        self.closed = True
+
+
+def _scanner(exchange, **scan_config):
+    scanner = MultiPairScanner()
+    scanner.exchange = exchange
+    scanner.scan_config.update(scan_config)
+    return scanner
+
+
+def test_bounded_concurrent_fan_out():
+    """All pairs are scanned together, never more than max_concurrent_requests at once"""
+    print("🎯 TESTING BOUNDED SCAN FAN-OUT")
+    exchange = _AsyncExchange(delay=0.05)
+    scanner = _scanner(exchange, max_concurrent_requests=8)
+    pairs = len(scanner.scan_config['supported_pairs'])
+
+    started = time.perf_counter()
+    opportunities = asyncio.run(scanner.scan_all_pairs())
+    elapsed = time.perf_counter() - started
+
+    assert exchange.requests == 2 * pairs and exchange.max_in_flight == 8
+    assert len(opportunities) == pairs
+    assert opportunities['BTC/USDT'].price_change_5m == 1.0
+    assert elapsed < 2 * pairs * 0.05 / 3                # Serial scanning took 2 * pairs * delay
+    print(f"✅ Scan fan-out OK ({pairs} pairs in {elapsed * 1000:.0f} ms)")
+
+
+def test_request_timeouts_cancel_cleanly():
+    """A hung request is cancelled after request_timeout_seconds; the other pairs still report"""
+    print("🎯 TESTING REQUEST TIMEOUTS")
+    exchange = _AsyncExchange(delay=0.01, hang={'SUI/USDT'})
+    scanner = _scanner(exchange, request_timeout_seconds=0.2)
+    opportunities = asyncio.run(scanner.scan_all_pairs())
+
+    assert 'SUI/USDT' not in opportunities and 'ETH/USDT' in opportunities
+    assert exchange.cancelled == 2 and exchange.in_flight == 0
+    print("✅ Request timeouts OK")
+
+
+def test_event_loop_stays_responsive():
+    """A 10 ms heartbeat keeps ticking during a scan, and cancelling the scanner closes its session"""
+    print("🎯 TESTING EVENT LOOP RESPONSIVENESS")
+    exchange = _AsyncExchange(delay=0.05)
+    scanner = _scanner(exchange, max_concurrent_requests=4, scan_interval_seconds=60)
+
+    async def main():
+        gaps = []
+        scan_task = asyncio.create_task(scanner.start_scanning())
+        last = time.perf_counter()
+        while not scanner.opportunities:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+        scan_task.cancel()
+        await asyncio.gather(scan_task, return_exceptions=True)
+        return gaps
+
+    gaps = asyncio.run(main())
+    assert len(gaps) > 10 and max(gaps) < 0.05
+    assert exchange.closed and scanner.exchange is None
+    print(f"✅ Event loop responsive OK (max heartbeat gap {max(gaps) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    test_bounded_concurrent_fan_out()
+    test_request_timeouts_cancel_cleanly()
+    test_event_loop_stays_responsive()
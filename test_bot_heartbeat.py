@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the bot/watchdog heartbeat record
+Checks publishing, cross-reader consistency and overdue/error-rate detection
+"""
+
+import mmap
+import os
+import tempfile
+import threading
+import time
+
+from bot_heartbeat import HeartbeatWriter, _read_record, read_heartbeat
+from bot_metrics import BotMetrics
+
+
+def test_heartbeat_publish_and_read():
+    """Stage entries and loop completions are visible to a reader"""
+    print("💓 TESTING HEARTBEAT PUBLISH/READ")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bot_heartbeat.bin')
+        writer = HeartbeatWriter({'file': path, 'stage_budget_seconds': 30, 'sleep_grace_seconds': 5})
+        try:
+            beat = read_heartbeat(path)
+            assert beat['pid'] == os.getpid()
+            assert beat['stage'] == 'startup'
+            assert beat['loops'] == 0
+
+            metrics = BotMetrics({'summary_file': os.path.join(tmp, 'metrics_summary.json'),
+                                  'summary_interval_seconds': 3600})
+            metrics.attach_heartbeat(writer)
+            metrics.loop_started()
+            with metrics.stage('balance_sync'):
+                beat = read_heartbeat(path)
+                assert beat['stage'] == 'balance_sync'
+                assert 25 < beat['deadline'] - time.time() <= 30
+
+            writer.record_error()
+            writer.loop_completed(metrics.loop_completed(), 60, open_positions=1, exchange_errors=3)
+            beat = read_heartbeat(path)
+            assert beat['loops'] == 1
+            assert beat['stage'] == 'sleep'
+            assert beat['open_positions'] == 1
+            assert beat['exchange_errors'] == 3
+            assert beat['loop_errors'] == 1
+            assert beat['error_rate'] == 1.0
+            assert 60 < beat['deadline'] - time.time() <= 65
+            assert beat['sequence'] % 2 == 0
+        finally:
+            writer.close()
+
+        with open(path, 'wb') as f:
+            f.write(b'not a heartbeat')
+        assert read_heartbeat(path) is None
+        assert read_heartbeat(os.path.join(tmp, 'missing.bin')) is None
+    print("✅ Heartbeat publish/read OK")
+
+
+def test_overdue_heartbeat_detected():
+    """A stage that overruns its budget shows up as overdue"""
+    print("💓 TESTING OVERDUE HEARTBEAT")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bot_heartbeat.bin')
+        writer = HeartbeatWriter({'file': path})
+        try:
+            writer.stage_started('order_placement', budget_seconds=0.01)
+            time.sleep(0.05)
+            beat = read_heartbeat(path)
+            assert time.time() > beat['deadline']
+            assert beat['stage'] == 'order_placement'
+        finally:
+            writer.close()
+    print("✅ Overdue heartbeat detection OK")
+
+
+class _WriteDuringCopy:
+    """Mapping view that lets a whole write land between the two halves of the reader's body copy"""
+
+    def __init__(self, mm, write):
+        self.mm = mm
+        self.write = write
+        self.copies = 0
+
+    def __getitem__(self, key):
+        if key.start in (None, 0) and key.stop > 64 and self.copies == 0:
+            self.copies += 1
+            head = bytes(self.mm[:key.stop // 2])
+            self.write()                                        # Starts and finishes mid-copy
+            return head + bytes(self.mm[key.stop // 2:key.stop])
+        return self.mm[key]
+
+
+def test_reader_never_sees_torn_record():
+    """A write that begins and ends while the reader copies the body is detected and re-read"""
+    print("💓 TESTING SEQLOCK READ")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bot_heartbeat.bin')
+        writer = HeartbeatWriter({'file': path})
+        try:
+            writer.loops = 1
+            writer.stage_started('stage-1')
+
+            def write():
+                writer.loops = 2
+                writer.stage_started('stage-2')
+
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                view = _WriteDuringCopy(mm, write)
+                beat = _read_record(view, retries=5)
+                assert view.copies == 1
+                assert (beat['loops'], beat['stage']) == (2, 'stage-2')   # Torn copy discarded, re-read
+            finally:
+                mm.close()
+
+            stop = threading.Event()
+
+            def hammer():
+                i = 2
+                while not stop.is_set():
+                    i += 1
+                    writer.loops = i
+                    writer.stage_started(f'stage-{i}')
+
+            thread = threading.Thread(target=hammer)
+            thread.start()
+            try:
+                for _ in range(2000):
+                    beat = read_heartbeat(path)
+                    if beat is not None:
+                        assert beat['stage'] == f"stage-{beat['loops']}" and beat['sequence'] % 2 == 0
+            finally:
+                stop.set()
+                thread.join()
+        finally:
+            writer.close()
+    print("✅ Seqlock read OK")
+
+
+if __name__ == "__main__":
+    test_heartbeat_publish_and_read()
+    test_overdue_heartbeat_detected()
+    test_reader_never_sees_torn_record()
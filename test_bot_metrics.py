@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for trading loop metrics
+Checks stage timing, cache/exchange counters and the Prometheus/JSON endpoint
+"""
+
+import json
+import os
+import tempfile
+import time
+import urllib.request
+
+from bot_metrics import BotMetrics
+
+
+class FakeExchange:
+    """Minimal stand-in for a ccxt exchange's fetch2/cost hooks"""
+
+    def calculate_rate_limiter_cost(self, api, method, path, params, config):
+        return config.get('cost', 1)
+
+    def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        if path == 'broken':
+            raise RuntimeError("exchange down")
+        return {'path': path}
+
+
+def test_stage_and_counter_recording():
+    """Stages, cache hits and exchange weight land in the snapshot"""
+    print("📈 TESTING LOOP METRICS RECORDING")
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = BotMetrics({'summary_file': os.path.join(tmp, 'metrics_summary.json'),
+                              'summary_interval_seconds': 3600})
+
+        metrics.loop_started()
+        with metrics.stage('balance_sync'):
+            time.sleep(0.01)
+        timer = metrics.stage('signal_first_scan')
+        timer.stop()
+        timer.stop()  # Second stop must not double count
+        metrics.record_cache('ticker', True)
+        metrics.record_cache('ticker', True)
+        metrics.record_cache('ticker', False)
+
+        exchange = FakeExchange()
+        assert metrics.instrument_exchange(exchange)
+        assert not metrics.instrument_exchange(exchange)  # Idempotent
+        exchange.fetch2('ticker/price', 'public', 'GET', {}, None, None, {'cost': 2})
+        try:
+            exchange.fetch2('broken')
+        except RuntimeError:
+            pass
+        metrics.loop_completed()
+
+        snap = metrics.snapshot()
+        assert snap['loops'] == 1
+        assert snap['stages']['balance_sync']['count'] == 1
+        assert snap['stages']['balance_sync']['mean_ms'] >= 10
+        assert snap['stages']['signal_first_scan']['count'] == 1
+        assert 0 < snap['stages']['balance_sync']['loop_share'] <= 1
+        assert abs(snap['caches']['ticker']['hit_rate'] - 2 / 3) < 1e-3
+        assert snap['exchange']['endpoints']['GET public/ticker/price']['weight'] == 2
+        assert snap['exchange']['endpoints']['GET public/broken']['errors'] == 1
+    print("✅ Stage, cache and exchange metrics OK")
+
+
+def test_http_endpoint_and_summary():
+    """The HTTP endpoint serves both formats and the summary is written"""
+    print("📈 TESTING METRICS ENDPOINT")
+    with tempfile.TemporaryDirectory() as tmp:
+        summary_path = os.path.join(tmp, 'metrics_summary.json')
+        metrics = BotMetrics({'summary_file': summary_path, 'summary_interval_seconds': 0})
+        with metrics.stage('config_reload'):
+            pass
+        metrics.loop_completed(0.05)
+        assert json.load(open(summary_path))['loops'] == 1
+
+        server = metrics.start_http_server('127.0.0.1', 0)
+        try:
+            port = server.server_address[1]
+            text = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+            assert 'cryptobot_stage_duration_seconds_count{stage="config_reload"} 1' in text
+            assert 'cryptobot_loop_iterations_total 1' in text
+            data = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics.json", timeout=5).read())
+            assert data['stages']['loop_total']['count'] == 1
+        finally:
+            metrics.stop_http_server()
+    print("✅ Metrics endpoint and rolling summary OK")
+
+
+if __name__ == "__main__":
+    test_stage_and_counter_recording()
+    test_http_endpoint_and_summary()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for array-backed candle frames
+Checks zero-copy views, in-place rolling appends, incremental cache refreshes and indicator parity
+"""
+
+import numpy as np
+import pandas as pd
+
+from candle_frame import CandleFrame, CandleFrameCache
+from multi_crypto_monitor import MultiCryptoMonitor
+from strategies.ma_crossover import fetch_ohlcv
+
+STEP_MS = 30 * 60 * 1000
+START_MS = 1_750_000_000_000 - 1_750_000_000_000 % STEP_MS
+
+
+def _rows(count, start=0, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, start + count))[start:]
+    ts = START_MS + np.arange(start, start + count) * STEP_MS
+    return np.column_stack([ts, close, close * 1.01, close * 0.99, close, rng.uniform(1, 10, count)]).tolist()
+
+
+class _Exchange:
+    def __init__(self, rows):
+        self.rows = rows
+        self.limits = []
+
+    def fetch_ohlcv(self, symbol, timeframe='30m', since=None, limit=100):
+        self.limits.append(limit)
+        return self.rows[-limit:]
+
+
+def test_views_and_rolling_appends():
+    """Slices share the buffers, appends are in place and the window rolls at maxlen"""
+    print("🕯️ TESTING CANDLE FRAME BUFFERS")
+    rows = _rows(120)
+    frame = CandleFrame(maxlen=100)
+    assert frame.upsert(rows[:60]) == 60
+    buffer = frame['close'].base
+    tail = frame.tail(10)
+    assert len(tail) == 10 and np.shares_memory(tail['close'], frame['close'])
+
+    for row in rows[60:]:
+        frame.append(*row)
+    assert len(frame) == 100 and frame['timestamp'][0] == rows[20][0]
+    assert frame['close'].base is buffer               # No reallocation while rolling
+    assert np.array_equal(frame['close'], np.array(rows)[20:, 4])
+
+    revised = list(rows[-1])
+    revised[4] = 1.0
+    assert frame.upsert([rows[-2], revised]) == 0      # Forming candle replaced in place
+    assert frame['close'][-1] == 1.0 and len(frame) == 100
+
+    expected = fetch_ohlcv(_Exchange(rows), 'BTC/USDT', '30m', 100)
+    expected.loc[expected.index[-1], 'close'] = 1.0
+    pd.testing.assert_frame_equal(frame.to_dataframe(), expected)
+    print("✅ Candle frame buffers OK")
+
+
+def test_cache_fetches_only_new_candles():
+    """After the first fetch, a refresh asks for the missing candles plus the forming one"""
+    print("🕯️ TESTING INCREMENTAL CANDLE CACHE")
+    exchange = _Exchange(_rows(100))
+    cache = CandleFrameCache(maxlen=100)
+    frame = cache.get(exchange, 'ETH/USDT', '30m', now=(START_MS + 99.5 * STEP_MS) / 1000)
+
+    exchange.rows = _rows(103)
+    again = cache.get(exchange, 'ETH/USDT', '30m', now=(START_MS + 102.5 * STEP_MS) / 1000)
+    assert again is frame and exchange.limits == [100, 5]
+    assert len(frame) == 100 and frame.last_timestamp == exchange.rows[-1][0]
+    assert np.array_equal(frame['close'], np.array(exchange.rows)[-100:, 4])
+    print("✅ Incremental candle cache OK")
+
+
+def test_monitor_indicators_match_pandas():
+    """Array indicators reproduce the previous pandas calculations"""
+    print("🕯️ TESTING MONITOR INDICATOR PARITY")
+    rows = _rows(100, seed=9)
+    frame = CandleFrame.from_rows(rows)
+    df = fetch_ohlcv(_Exchange(rows), 'SOL/USDT', '30m', 100)
+    monitor = MultiCryptoMonitor(None)
+
+    delta = df['close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rsi = (100 - 100 / (1 + gain / loss)).iloc[-1]
+
+    true_range = np.maximum(df['high'] - df['low'], np.maximum(np.abs(df['high'] - df['close'].shift(1)),
+                                                               np.abs(df['low'] - df['close'].shift(1))))
+    price_range = df['close'].rolling(14).max().iloc[-1] - df['close'].rolling(14).min().iloc[-1]
+
+    assert np.isclose(monitor.calculate_rsi(frame), rsi)
+    assert np.isclose(monitor.calculate_volatility(frame),
+                      df['close'].pct_change().tail(24).dropna().std() * np.sqrt(24))
+    assert np.isclose(monitor.calculate_trend_strength(frame),
+                      min(1.0, true_range.rolling(14).mean().iloc[-1] / price_range))
+    assert monitor.calculate_momentum(frame)['momentum_2h'] == \
+        (df['close'].iloc[-1] - df['close'].iloc[-4]) / df['close'].iloc[-4]
+    print("✅ Monitor indicator parity OK")
+
+
+if __name__ == "__main__":
+    test_views_and_rolling_appends()
+    test_cache_fetches_only_new_candles()
+    test_monitor_indicators_match_pandas()
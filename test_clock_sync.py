@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the clock sync service
+Checks round-trip filtering, drift tracking, and the background thread owning timeDifference
+"""
+
+import os
+import time
+
+import log_utils
+from clock_sync import ClockSyncService
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class _Exchange:
+    """Server clock runs `offset(local_ms)` behind local time; each probe takes (up, down) seconds"""
+
+    def __init__(self, clock, offset, legs=None):
+        self.clock = clock
+        self.offset = offset
+        self.legs = list(legs or [])
+        self.options = {'timeDifference': 1000, 'adjustForTimeDifference': True}
+        self.fail = False
+        self.calls = 0
+
+    def fetch_time(self):
+        self.calls += 1
+        if self.fail:
+            raise Exception("binanceus GET https://api.binance.us/api/v3/time 503")
+        up, down = self.legs.pop(0) if self.legs else (0.02, 0.02)
+        self.clock.now += up
+        local_ms = self.clock.now * 1000.0
+        server_ms = int(round(local_ms - self.offset(local_ms)))
+        self.clock.now += down
+        return server_ms
+
+
+def test_lowest_round_trip_wins():
+    """Asymmetric slow probes are filtered out; timeDifference keeps signed requests just behind the server"""
+    print("⏰ TESTING ROUND-TRIP FILTERING")
+    clock = _Clock(1_700_000_000.0)
+    exchange = _Exchange(clock, lambda t: 1500.0, legs=[(0.25, 0.05), (0.02, 0.02), (0.7, 0.1), (0.05, 0.3)])
+    service = ClockSyncService(exchange, {'samples_per_round': 4, 'max_rtt_ms': 500}, clock=clock)
+
+    assert service.sync_now()
+    assert abs(service.rtt_ms - 40.0) < 1e-6 and abs(service.offset_ms - 1500.0) < 1.0
+    assert exchange.options['timeDifference'] == 1500 + 20 + 250            # offset + rtt/2 + safety margin
+
+    server_now = clock.now * 1000.0 - 1500.0
+    nonce = clock.now * 1000.0 - exchange.options['timeDifference']          # What ccxt signs with
+    assert 0 < server_now - nonce < 10000                                     # Behind, inside recvWindow
+    assert service.status()['healthy'] and service.rounds == 1
+    print("✅ Round-trip filtering OK")
+
+
+def test_drift_is_tracked_between_rounds():
+    """A clock gaining 50 ppm is fitted across rounds and extrapolated without new probes"""
+    print("⏰ TESTING DRIFT ESTIMATE")
+    clock = _Clock(1_700_000_000.0)
+    origin = clock.now * 1000.0
+    exchange = _Exchange(clock, lambda t: 800.0 + 50e-6 * (t - origin))
+    service = ClockSyncService(exchange, {'samples_per_round': 3}, clock=clock)
+
+    for _ in range(10):
+        assert service.sync_now()
+        clock.now += 60
+    assert abs(service.drift_ppm - 50.0) < 1.0
+
+    calls = exchange.calls
+    clock.now += 600
+    truth = 800.0 + 50e-6 * (clock.now * 1000.0 - origin)
+    assert abs(service.estimated_offset() - truth) < 2.0
+    service.apply()
+    assert exchange.options['timeDifference'] == int(round(service.estimated_offset() + 20 + 250))
+    assert exchange.calls == calls                                            # Applying never probes
+    print("✅ Drift estimate OK")
+
+
+def test_failures_and_background_thread():
+    """Failed rounds keep the last estimate; the daemon owns timeDifference once started"""
+    print("⏰ TESTING FAILURES AND BACKGROUND SYNC")
+    clock = _Clock(1_700_000_000.0)
+    exchange = _Exchange(clock, lambda t: 0.0)
+    exchange.fail = True
+    service = ClockSyncService(exchange, {'samples_per_round': 2}, clock=clock)
+    assert not service.sync_now() and service.failures == 1
+    assert exchange.options['timeDifference'] == 1000 and not service.healthy
+
+    slow = _Exchange(clock, lambda t: 0.0, legs=[(2.0, 1.0)])
+    assert not ClockSyncService(slow, {'samples_per_round': 1}, clock=clock).sync_now()   # RTT over max_rtt_ms
+    assert not ClockSyncService(exchange, {'enabled': False}).start()
+
+    class _LiveExchange:
+        options = {'timeDifference': 1000, 'adjustForTimeDifference': True}
+
+        def fetch_time(self):
+            return int(time.time() * 1000) - 2000                            # Server 2 s behind us
+
+    live = _LiveExchange()
+    service = ClockSyncService(live, {'interval_seconds': 0.02, 'apply_seconds': 0.01, 'samples_per_round': 2})
+    assert service.start()
+    deadline = time.time() + 2.0
+    while service.rounds == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    service.stop()
+    assert service.rounds >= 1 and live.options['adjustForTimeDifference'] is False
+    assert 2240 <= live.options['timeDifference'] <= 2300
+    print("✅ Failures and background sync OK")
+
+
+if __name__ == "__main__":
+    test_lowest_round_trip_wins()
+    test_drift_is_tracked_between_rounds()
+    test_failures_and_background_thread()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for the config service
+Checks parse-once frozen snapshots, typed change events with validation, and the file watcher
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import log_utils
+from config_service import ConfigService
+from currency_switching import CurrencySwitch
+from enhanced_config import BotConfig, config_errors
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+BASE = {'trading': {'symbol': 'BTC/USDT', 'min_amount_usd': 8, 'max_amount_usd': 19,
+                    'supported_pairs': ['BTC/USDT', 'ETH/USDT']},
+        'risk_management': {'stop_loss_pct': 0.02, 'take_profit_pct': 0.05},
+        'strategy_parameters': {'confidence_threshold': 0.4}}
+
+
+def _write(path, data, bump=0):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    if bump:                                            # Guarantee a new mtime on coarse filesystems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+def _edit(data, section, key, value):
+    edited = json.loads(json.dumps(data))
+    edited[section][key] = value
+    return edited
+
+
+def test_parse_once_frozen_snapshots():
+    """One parse per file; snapshots are read-only, merged with defaults and carry validation results"""
+    print("🗂️ TESTING FROZEN SNAPSHOTS")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bot.json')
+        _write(path, BASE)
+        service = ConfigService()
+        snapshot = service.register(path, defaults={'system': {'loop_interval_seconds': 60}})
+        assert snapshot.get('system', 'loop_interval_seconds') == 60 and snapshot.version == 1
+
+        _write(path, _edit(BASE, 'trading', 'symbol', 'ETH/USDT'), bump=1)
+        assert service.register(path) is snapshot                       # No re-parse without a change event
+        assert service.get(path, 'trading', 'symbol') == 'BTC/USDT'
+        assert service.get(os.path.join(tmp, 'missing.json'), 'trading', default='n/a') == 'n/a'
+
+        try:
+            snapshot.data['trading']['symbol'] = 'XRP/USDT'
+            assert False, "snapshot should be read-only"
+        except TypeError:
+            pass
+        assert snapshot.get('trading', 'supported_pairs') == ('BTC/USDT', 'ETH/USDT')
+        mutable = snapshot.thaw()
+        mutable['trading']['supported_pairs'].append('SOL/USDT')
+        assert len(snapshot.get('trading', 'supported_pairs')) == 2
+
+        broken = os.path.join(tmp, 'broken.json')
+        with open(broken, 'w') as f:
+            f.write('{"trading": ')
+        try:
+            service.register(broken)
+            assert False, "first parse failure should raise"
+        except ValueError:
+            pass
+        bad_risk = _edit(BASE, 'risk_management', 'stop_loss_pct', 0.09)
+        assert config_errors(bad_risk) == ["Stop loss must be less than take profit"]
+    print("✅ Frozen snapshots OK")
+
+
+def test_change_events_and_validation():
+    """Edits publish typed events with changed keys; bad edits are rejected and the last good snapshot stays"""
+    print("🗂️ TESTING CHANGE EVENTS")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bot.json')
+        _write(path, BASE)
+        service = ConfigService()
+        service.register(path, validator=config_errors)
+        trading_events, risk_events = [], []
+        service.subscribe(trading_events.append, path=path, keys=['trading'])
+        service.subscribe(risk_events.append, path=path, keys=['risk_management'])
+
+        assert service.check() == []                                    # Untouched: stat only
+        _write(path, _edit(BASE, 'trading', 'symbol', 'ETH/USDT'), bump=1)
+        change, = service.check()
+        assert change.kind == 'modified' and change.changed == ('trading.symbol',)
+        assert change.previous.get('trading', 'symbol') == 'BTC/USDT' and change.snapshot.version == 2
+        assert len(trading_events) == 1 and risk_events == []
+
+        _write(path, _edit(BASE, 'trading', 'symbol', 'ETH/USDT'), bump=2)
+        assert service.check() == []                                    # Re-saved with identical content
+
+        _write(path, _edit(_edit(BASE, 'trading', 'symbol', 'ETH/USDT'), 'risk_management', 'stop_loss_pct', 0.3),
+               bump=3)
+        change, = service.check()
+        assert change.kind == 'invalid' and service.get(path, 'risk_management', 'stop_loss_pct') == 0.02
+        assert len(risk_events) == 1                                    # Invalid edits reach every subscriber
+
+        with open(path, 'w') as f:
+            f.write('{"trading": {')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 4_000_000_000))
+        assert service.check()[0].kind == 'invalid' and service.check() == []   # Rejected once per edit
+        os.remove(path)
+        assert service.check()[0].kind == 'deleted' and service.get(path, 'trading', 'symbol') == 'ETH/USDT'
+        assert service.events == {'modified': 1, 'invalid': 2, 'deleted': 1}
+    print("✅ Change events OK")
+
+
+def test_watcher_feeds_bot_config():
+    """The watcher thread delivers edits to BotConfig; the loop's reload check is a memory read"""
+    print("🗂️ TESTING FILE WATCHER")
+    for use_inotify in (True, False):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'enhanced_config.json')
+            _write(path, BASE)
+            service = ConfigService({'use_inotify': use_inotify, 'poll_seconds': 0.05, 'debounce_seconds': 0.01})
+            bot_config = BotConfig(path, config_service=service)
+            assert bot_config.get_current_trading_symbol() == 'BTC/USDT'
+            assert bot_config.reload_config_if_changed() is False
+
+            service.start()
+            try:
+                assert service.mode == ('inotify' if use_inotify else 'polling')
+                _write(path, _edit(BASE, 'trading', 'symbol', 'SOL/USDT'), bump=1)
+                deadline = time.time() + 3.0
+                while bot_config.version < 2 and time.time() < deadline:
+                    time.sleep(0.02)
+            finally:
+                service.stop()
+            assert bot_config.get_current_trading_symbol() == 'SOL/USDT'
+            assert bot_config.config['trading']['supported_pairs'] == ['BTC/USDT', 'ETH/USDT']   # Mutable copy
+            assert bot_config.reload_config_if_changed() is True
+            assert bot_config.reload_config_if_changed() is False
+    print("✅ File watcher OK")
+
+
+def test_currency_switch_reads_real_config():
+    """CurrencySwitch reads its sections from the shared snapshot of the shipped enhanced_config.json"""
+    print("🗂️ TESTING CURRENCY SWITCH CONFIG")
+    with open('enhanced_config.json') as f:
+        shipped = json.load(f)
+    switch = CurrencySwitch(exchange=None)
+    assert switch.enabled == shipped['currency_switching']['enabled'] is True
+    assert switch.usd_equivalents['BTC/USDT'] == 'BTC/USD'
+    assert len(switch.usd_equivalents) == len(shipped['multi_currency']['usd_equivalents'])
+    assert switch.spread_threshold == shipped['currency_switching']['spread_threshold']
+    assert switch.get_optimal_pair('DOGE', {})[1] != "Currency switching disabled"
+    print("✅ Currency switch config OK")
+
+
+if __name__ == "__main__":
+    test_parse_once_frozen_snapshots()
+    test_change_events_and_validation()
+    test_watcher_feeds_bot_config()
+    test_currency_switch_reads_real_config()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming correlation engine
+Checks incremental ingestion, clusters, diversification and the portfolio correlation gate
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+import log_utils
+from correlation_engine import StreamingCorrelationEngine
+from institutional_strategies import CrossAssetCorrelationAnalyzer, InstitutionalStrategyManager
+from multi_position_portfolio_manager import MultiPositionPortfolioManager
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+BAR_MS = 30 * 60 * 1000
+
+
+def _frames(bars=120, seed=11):
+    """BTC and ETH share a driver; XLM moves on its own"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, bars)
+    returns = {
+        'BTC/USDT': market + rng.normal(0, 0.002, bars),
+        'ETH/USDT': market + rng.normal(0, 0.002, bars),
+        'XLM/USDT': rng.normal(0, 0.01, bars)
+    }
+    timestamps = pd.to_datetime(1_750_000_000_000 + np.arange(bars + 1) * BAR_MS, unit='ms')
+    return {s: pd.DataFrame({'timestamp': timestamps, 'close': 100 * np.cumprod(np.insert(1 + r, 0, 1.0))})
+            for s, r in returns.items()}
+
+
+def _engine(frames):
+    engine = StreamingCorrelationEngine({'halflife_bars': 30})
+    for symbol, df in frames.items():
+        engine.ingest_closes(symbol, df)
+    engine.flush()
+    return engine
+
+
+def test_incremental_correlations():
+    """Shared-driver pairs correlate; re-ingesting the same candles changes nothing"""
+    print("📈 TESTING STREAMING CORRELATIONS")
+    frames = _frames()
+    engine = _engine(frames)
+    assert engine.correlation('BTC/USDT', 'ETH/USDT') > 0.9
+    assert abs(engine.correlation('BTC/USDT', 'XLM/USDT')) < 0.4
+
+    before = engine.cov.copy()
+    for symbol, df in frames.items():
+        assert engine.ingest_closes(symbol, df) == 0
+    assert engine.flush() == 0
+    assert np.array_equal(before, engine.cov)
+
+    # One new bar = one update, not a recomputation
+    longer = _frames(bars=121)
+    for symbol, df in longer.items():
+        assert engine.ingest_closes(symbol, df) == 1
+    assert engine.flush() == 1
+    print("✅ Streaming correlations OK")
+
+
+def test_clusters_and_diversification():
+    """Correlated pairs cluster together and diversify less than uncorrelated ones"""
+    print("📈 TESTING CLUSTERS AND DIVERSIFICATION")
+    engine = _engine(_frames())
+    assert engine.clusters(0.8) == [['BTC/USDT', 'ETH/USDT']]
+    correlated = engine.diversification_ratio({'BTC/USDT': 1.0, 'ETH/USDT': 1.0})
+    independent = engine.diversification_ratio({'BTC/USDT': 1.0, 'XLM/USDT': 1.0})
+    assert 1.0 <= correlated < independent
+
+    manager = InstitutionalStrategyManager()
+    manager.correlation_analyzer = CrossAssetCorrelationAnalyzer(engine)
+    df = _frames()['XLM/USDT']
+    df = df.assign(open=df['close'], high=df['close'], low=df['close'], volume=1.0)
+    signal = manager.get_institutional_signal(df, symbol='XLM/USDT')
+    correlations = signal['institutional_analysis']['correlation_analysis']['correlations']
+    assert set(correlations) == {'BTC/USDT', 'ETH/USDT'}            # The traded pair, not BTC, vs the rest
+    assert signal['institutional_analysis']['correlation_analysis']['regime'] == 'low_correlation'
+    print("✅ Clusters and diversification OK")
+
+
+def test_portfolio_refuses_correlated_position():
+    """A second position highly correlated with a held one is refused"""
+    print("📈 TESTING PORTFOLIO CORRELATION GATE")
+    portfolio = MultiPositionPortfolioManager(correlation_engine=_engine(_frames()))
+    assert portfolio.add_position('BTC/USDT', 100.0, 1.0)
+
+    allowed, reason = portfolio.can_open_new_position('ETH/USDT')
+    assert not allowed and 'BTC/USDT' in reason
+    assert portfolio.can_open_new_position('XLM/USDT')[0]
+    print("✅ Portfolio correlation gate OK")
+
+
+if __name__ == "__main__":
+    test_incremental_correlations()
+    test_clusters_and_diversification()
+    test_portfolio_refuses_correlated_position()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared HTTP client
+Checks jittered retries with Retry-After, per-provider rate and concurrency limits with
+latency metrics, and concurrent multi-source fetches through the free-API providers,
+including under the replay clock
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+
+import log_utils
+from http_client import HttpClient
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+
+class _Response:
+    def __init__(self, status_code=200, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload or {}
+        self.headers = headers or {}
+        self.closed = False
+
+    def json(self):
+        return self.payload
+
+    def close(self):
+        self.closed = True
+
+
+class _Session:
+    """Stands in for requests.Session; replies come from a script or a router"""
+
+    def __init__(self, replies=None, router=None, delay=0.0):
+        self.replies = list(replies or [])
+        self.router = router
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self.lock:
+            self.calls.append((method, url, kwargs))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            reply = self.router(method, url, kwargs) if self.router else self.replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_retries_with_jittered_backoff():
+    """429/5xx and connection errors are retried with full-jitter backoff, never shorter than Retry-After"""
+    print("🌐 TESTING RETRIES AND BACKOFF")
+    sleeps = []
+    throttled = _Response(429, headers={'Retry-After': '3'})
+    session = _Session([throttled, _Response(503), _Response(200, {'ok': True})])
+    client = HttpClient({'backoff_base_seconds': 0.5}, session=session, clock=lambda: 0.0,
+                        sleep=sleeps.append, rng=random.Random(7))
+
+    response = client.get('coincap', 'https://api.coincap.io/v2/assets/bitcoin')
+    assert response.json() == {'ok': True} and len(session.calls) == 3
+    assert session.calls[0][2]['timeout'] == 10                         # Default timeout applied
+    assert sleeps[0] == 3.0 and 0 <= sleeps[1] <= 1.0                   # Retry-After wins, then jitter ≤ base·2
+    assert throttled.closed                                             # Connection handed back before retrying
+
+    stats = client.summary()['coincap']
+    assert stats['requests'] == 3 and stats['retries'] == 2 and stats['last_status'] == 200
+
+    flaky = _Session([requests.ConnectionError('reset')] * 3)
+    client = HttpClient({'max_retries': 2}, session=flaky, clock=lambda: 0.0, sleep=lambda s: None)
+    try:
+        client.get('coingecko', 'https://api.coingecko.com/api/v3/ping')
+        assert False, "exhausted retries should raise"
+    except requests.ConnectionError:
+        pass
+    assert client.summary()['coingecko']['error_rate'] == 1.0
+
+    client = HttpClient(session=_Session([_Response(404)]), clock=lambda: 0.0, sleep=lambda s: None)
+    assert client.get('defillama', 'https://api.llama.fi/missing').status_code == 404   # Not retried
+    print("✅ Retries and backoff OK")
+
+
+def test_rate_and_concurrency_limits():
+    """Each provider has its own token bucket and in-flight cap; latencies feed p50/p95"""
+    print("🌐 TESTING PROVIDER LIMITS")
+    clock = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    session = _Session(router=lambda method, url, kwargs: _Response(200))
+    client = HttpClient({'providers': {'bitquery': {'rate_per_minute': 6, 'max_concurrent': 1}}},
+                        session=session, clock=lambda: clock[0], sleep=sleep)
+    for _ in range(3):
+        client.post('bitquery', 'https://graphql.bitquery.io', json={'query': '{}'})
+    assert sleeps == [10.0, 10.0]                                       # 6/min → one request per 10s
+    client.get('coincap', 'https://api.coincap.io/v2/assets')
+    assert sleeps == [10.0, 10.0]                                       # Other providers aren't throttled
+    assert client.summary()['bitquery']['throttled_seconds'] == 20.0
+
+    slow = _Session(router=lambda method, url, kwargs: _Response(200), delay=0.05)
+    client = HttpClient({'providers': {'coingecko': {'rate_per_minute': 6000, 'max_concurrent': 2}}}, session=slow)
+    client.fetch_all({i: (lambda: client.get('coingecko', 'https://api.coingecko.com/api/v3/ping'))
+                      for i in range(6)})
+    assert slow.peak == 2
+
+    stats = client.summary()['coingecko']
+    assert stats['requests'] == 6 and stats['error_rate'] == 0.0
+    assert 40 <= stats['p50_ms'] <= stats['p95_ms']
+
+    class _Metrics:
+        gauges = {}
+
+        def set_gauge(self, name, value):
+            self.gauges[name] = value
+
+    metrics = _Metrics()
+    client.publish(metrics)
+    assert set(metrics.gauges) == {'http_coingecko_p50_ms', 'http_coingecko_p95_ms', 'http_coingecko_error_rate'}
+
+    owned = HttpClient()
+    owned.configure({'pool_maxsize': 24, 'providers': {'coingecko': {'max_concurrent': 1}}})
+    adapter = owned.session.get_adapter('https://api.coingecko.com')
+    assert adapter._pool_maxsize == 24 and owned.session.get_adapter('http://x') is adapter
+    assert owned._provider('coingecko')[0].slots._value == 1           # Limiters rebuilt from the new config
+    client.configure({'pool_maxsize': 24})
+    assert client.session is slow                                       # Injected sessions are left alone
+    print("✅ Provider limits OK")
+
+
+def test_concurrent_source_fetches():
+    """Multi-source aggregation costs about one round trip; a failing source doesn't sink the others"""
+    print("🌐 TESTING CONCURRENT FETCHES")
+    client = HttpClient(clock=lambda: 0.0)
+
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    def broken():
+        raise ValueError("bad payload")
+
+    started = time.perf_counter()
+    results = client.fetch_all({'a': lambda: slow(1), 'b': lambda: slow(2), 'c': lambda: slow(3), 'd': broken})
+    assert time.perf_counter() - started < 0.5
+    assert results['a'] == 1 and results['c'] == 3 and isinstance(results['d'], ValueError)
+
+    from free_phase2_api import FreePhase2Provider
+
+    def router(method, url, kwargs):
+        if 'bitquery' in url:
+            return requests.Timeout('read timed out')
+        if 'llama' in url:
+            return _Response(200, [])
+        return _Response(200, {'data': {}})
+
+    session = _Session(router=router, delay=0.1)
+    http = HttpClient({'max_retries': 0}, session=session, sleep=lambda s: None)
+    provider = FreePhase2Provider()
+    provider.http = http
+    provider._get_exchange_flows_bitquery = lambda symbol: http.post('bitquery', 'https://graphql.bitquery.io')
+
+    started = time.perf_counter()
+    intelligence = provider.get_comprehensive_phase2_intelligence('ETH/USDT')
+    elapsed = time.perf_counter() - started
+    assert intelligence['sources_used'][0] == 'bitquery_simulated'      # Raised → simulated fallback
+    assert 'defillama' in intelligence['sources_used']
+    assert sum(1 for call in session.calls if 'llama' in call[1]) == 3
+    assert elapsed < 0.35, f"sources should overlap, took {elapsed:.2f}s"
+    print("✅ Concurrent fetches OK")
+
+
+def test_fetch_all_under_replay_clock():
+    """Retry backoff inside pool workers must not wait on the replay clock the joining main thread drives"""
+    print("🌐 TESTING FETCH_ALL UNDER THE REPLAY CLOCK")
+    from replay_engine import VirtualClock
+
+    def router(method, url, kwargs):
+        return _Response(503) if session.calls.count((method, url, kwargs)) == 1 else _Response(200, {'ok': 1})
+
+    session = _Session(router=router)
+    clock = VirtualClock(1_700_000_000_000, 1_700_086_400_000)
+    clock.install()
+    watchdog = threading.Timer(5.0, clock.finish)     # A regression ends the wait instead of hanging the suite
+    watchdog.start()
+    try:
+        client = HttpClient({'backoff_base_seconds': 0.01, 'providers': {'coingecko': {'rate_per_minute': 6000,
+                                                                                'max_concurrent': 3}}},
+                            session=session)
+        started = time.perf_counter()
+        results = client.fetch_all({name: (lambda name=name: client.get('coingecko', f'https://x/{name}'))
+                                    for name in ('a', 'b', 'c')})
+    finally:
+        watchdog.cancel()
+        clock.uninstall()
+    assert all(not isinstance(result, BaseException) and result.status_code == 200 for result in results.values())
+    assert client.summary()['coingecko']['retries'] == 3 and time.perf_counter() - started < 2.0
+
+    client.configure({'offline': True})                 # What bot.py sets for replay runs
+    try:
+        client.get('coingecko', 'https://x/a')
+        assert False, "offline client should not send"
+    except requests.ConnectionError:
+        pass
+    assert len(session.calls) == 6 and client.summary()['coingecko']['errors'] == 4
+    print("✅ fetch_all under replay clock OK")
+
+
+if __name__ == "__main__":
+    test_retries_with_jittered_backoff()
+    test_rate_and_concurrency_limits()
+    test_concurrent_source_fetches()
+    test_fetch_all_under_replay_clock()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental trade sync engine
+Checks cursor paging, idempotent ledger upserts and pair discovery
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from incremental_trade_sync import IncrementalTradeSync
+
+BASE_TS = 1_750_000_000_000
+
+
+def _trade(symbol, trade_id):
+    return {'id': str(trade_id), 'order': f"o{trade_id}", 'symbol': symbol, 'side': 'buy',
+            'timestamp': BASE_TS + trade_id * 1000, 'amount': 1.0, 'price': 10.0 + trade_id,
+            'cost': 10.0 + trade_id, 'fee': {'cost': 0.01, 'currency': 'USDT'}}
+
+
+class FakeExchange:
+    """Binance-like myTrades: latest page without fromId, ascending from fromId otherwise"""
+
+    def __init__(self, fills):
+        self.fills = fills
+        self.calls = []
+
+    def load_markets(self):
+        return {'BTC/USDT': {}, 'ETH/USDT': {}, 'XLM/USDT': {}}
+
+    def fetch_balance(self):
+        return {'total': {'USDT': 50.0, 'ETH': 0.5, 'DOGE': 10.0}}
+
+    def fetch_my_trades(self, symbol, since=None, limit=None, params={}):
+        self.calls.append((symbol, params.get('fromId')))
+        fills = sorted(self.fills.get(symbol, []), key=lambda t: int(t['id']))
+        if 'fromId' in params:
+            return [t for t in fills if int(t['id']) >= params['fromId']][:limit]
+        return fills[-limit:]
+
+
+def _config(tmp):
+    bot_config = os.path.join(tmp, 'enhanced_config.json')
+    with open(bot_config, 'w') as f:
+        json.dump({'trading': {'symbol': 'XLM/USDT'}}, f)
+    return {
+        'ledger_file': os.path.join(tmp, 'ledger.csv'),
+        'cursor_file': os.path.join(tmp, 'cursors.json'),
+        'trade_log_file': os.path.join(tmp, 'trade_log.csv'),
+        'config_file': bot_config,
+        'page_limit': 3,
+        'max_workers': 2
+    }
+
+
+def test_incremental_paging_and_idempotence():
+    """Only fills past the cursor are fetched, and re-syncing adds nothing"""
+    print("🔄 TESTING INCREMENTAL TRADE SYNC")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _config(tmp)
+        exchange = FakeExchange({'BTC/USDT': [_trade('BTC/USDT', i) for i in range(1, 5)]})
+
+        # First sync of a pair backfills its whole history, resuming from the cursor when capped
+        first = IncrementalTradeSync(exchange, dict(config, max_pages=1)).sync(['BTC/USDT'])
+        assert first['new_fills'] == 3 and exchange.calls == [('BTC/USDT', 0)]
+        assert json.load(open(config['cursor_file']))['BTC/USDT']['last_id'] == 3
+        resumed = IncrementalTradeSync(exchange, config).sync(['BTC/USDT'])
+        assert resumed['new_fills'] == 1
+        assert json.load(open(config['cursor_file']))['BTC/USDT']['last_id'] == 4
+
+        exchange.fills['BTC/USDT'] += [_trade('BTC/USDT', i) for i in range(5, 12)]
+        exchange.calls.clear()
+        second = IncrementalTradeSync(exchange, config).sync(['BTC/USDT'])
+        assert second['new_fills'] == 7
+        assert exchange.calls == [('BTC/USDT', 5), ('BTC/USDT', 8), ('BTC/USDT', 11)]
+
+        # Losing the cursor must not duplicate ledger rows
+        os.remove(config['cursor_file'])
+        third = IncrementalTradeSync(exchange, config).sync(['BTC/USDT'])
+        assert third['new_fills'] == 0
+
+        with open(config['ledger_file'], newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert [int(r['trade_id']) for r in rows] == list(range(1, 12))
+        assert rows[0]['action'] == 'BUY'
+    print("✅ Incremental paging and idempotent upsert OK")
+
+
+def test_pair_discovery():
+    """Cursors, trade log, active pair and held assets are all synced"""
+    print("🔄 TESTING TRADED PAIR DISCOVERY")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _config(tmp)
+        with open(config['trade_log_file'], 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'action', 'symbol', 'amount', 'price', 'balance'])
+            writer.writerow(['2025-06-30 06:03:07', 'BUY', 'BTC/USDT', 0.1, 100, 10])
+
+        sync = IncrementalTradeSync(FakeExchange({}), config)
+        # DOGE is held but has no market here, so it is skipped
+        assert sync.discover_symbols() == ['BTC/USDT', 'ETH/USDT', 'XLM/USDT']
+    print("✅ Traded pair discovery OK")
+
+
+def test_fills_reach_trade_log():
+    """New fills are appended to trade_log.csv for its readers, skipping trades the bot already logged"""
+    print("🔄 TESTING TRADE LOG MIRROR")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _config(tmp)
+        fills = [_trade('BTC/USDT', i) for i in range(1, 4)]
+        logged_by_bot = datetime.fromtimestamp(fills[0]['timestamp'] / 1000 - 0.4)
+        with open(config['trade_log_file'], 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'action', 'symbol', 'amount', 'price', 'balance'])
+            writer.writerow([logged_by_bot.strftime('%Y-%m-%d %H:%M:%S.%f'), 'BUY', 'BTC/USDT', 1.0, 11.0, 20.0])
+
+        summary = IncrementalTradeSync(FakeExchange({'BTC/USDT': fills}), config).sync(['BTC/USDT'])
+        assert summary['new_fills'] == 3 and summary['trade_log_rows'] == 2
+        with open(config['trade_log_file'], newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert [float(r['price']) for r in rows] == [11.0, 12.0, 13.0]
+
+        os.remove(config['cursor_file'])                    # Re-fetching never duplicates log rows either
+        assert IncrementalTradeSync(FakeExchange({'BTC/USDT': fills}), config).sync(['BTC/USDT'])['trade_log_rows'] == 0
+    print("✅ Trade log mirror OK")
+
+
+if __name__ == "__main__":
+    test_incremental_paging_and_idempotence()
+    test_pair_discovery()
+    test_fills_reach_trade_log()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test script for the intelligence refresher
+Checks per-source cadences over the active pair and top candidates, non-blocking snapshot reads,
+and enhancers consuming pre-fetched snapshots
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import log_utils
+from intelligence_refresher import IntelligenceRefresher
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+
+class _Provider:
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, symbol):
+        self.calls.append(symbol)
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise Exception(f"{self.name} HTTP 503")
+        return {'source': self.name, 'symbol': symbol, 'confidence_score': 0.8, 'n': len(self.calls)}
+
+
+def test_cadence_over_active_and_candidates():
+    """Each source refreshes on its own cadence for the active pair first, then the top-N candidates"""
+    print("🛰️ TESTING REFRESH CADENCE")
+    clock = [1000.0]
+    refresher = IntelligenceRefresher({'top_n_candidates': 2, 'refresh_seconds': {'phase2': 300}},
+                                      clock=lambda: clock[0])
+    free, phase2 = _Provider('free_crypto'), _Provider('phase2')
+    refresher.register('free_crypto', free)
+    refresher.register('phase2', phase2)
+    refresher.set_symbols(active='SUI/USDT', candidates=['ETH/USDT', 'SUI/USDT', 'SOL/USDT', 'XRP/USDT'])
+
+    assert refresher.wanted_symbols() == ['SUI/USDT', 'ETH/USDT', 'SOL/USDT']
+    jobs = refresher.refresh_due()
+    assert jobs[:2] == [('free_crypto', 'SUI/USDT'), ('phase2', 'SUI/USDT')] and len(jobs) == 6
+
+    clock[0] += 61
+    assert refresher.refresh_due() == [('free_crypto', s) for s in ('SUI/USDT', 'ETH/USDT', 'SOL/USDT')]
+    clock[0] += 240
+    assert len(refresher.refresh_due()) == 6 and phase2.calls.count('SUI/USDT') == 2
+
+    data, age = refresher.read('phase2', 'SUI/USDT')
+    assert data['n'] == 4 and age == 0.0                   # Reads never call the provider
+    assert len(phase2.calls) == 6
+
+    inline = IntelligenceRefresher(clock=lambda: clock[0])  # No thread: inline calls as before
+    inline.register('free_crypto', free)
+    assert inline.get('free_crypto', 'BTC/USDT')['symbol'] == 'BTC/USDT'
+    free.fail = True
+    try:
+        inline.get('free_crypto', 'BTC/USDT')
+        assert False, "inline errors reach the caller's handler"
+    except Exception as e:
+        assert 'HTTP 503' in str(e)
+    print("✅ Refresh cadence OK")
+
+
+def test_trading_path_never_waits():
+    """A slow provider delays only the background thread; the read returns immediately"""
+    print("🛰️ TESTING NON-BLOCKING READS")
+    slow = _Provider('sentiment', delay=0.3)
+    refresher = IntelligenceRefresher({'refresh_seconds': {'sentiment': 60}})
+    refresher.register('sentiment', slow)
+    refresher.set_symbols(active='BTC/USDT')
+    assert refresher.start()
+    try:
+        started = time.perf_counter()
+        assert refresher.get('sentiment', 'ETH/USDT') is None           # Cold symbol: miss, scheduled
+        assert time.perf_counter() - started < 0.05 and refresher.misses == 1
+
+        deadline = time.time() + 3.0
+        while refresher.read('sentiment', 'ETH/USDT')[0] is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert refresher.get('sentiment', 'ETH/USDT')['symbol'] == 'ETH/USDT'
+        assert refresher.get('sentiment', 'BTC/USDT')['symbol'] == 'BTC/USDT'
+        assert refresher.get('sentiment', 'ETH/USDT', max_age=-1) is None   # Stale snapshots aren't served
+    finally:
+        refresher.stop()
+    assert not refresher.running and slow.calls.count('ETH/USDT') == 1
+
+    from phase2_trading_integration import Phase2TradingIntegration
+
+    refresher = IntelligenceRefresher()
+    integration = Phase2TradingIntegration(refresher)
+    integration.phase2_provider = type('P', (), {'get_comprehensive_phase2_intelligence': _Provider('phase2', 0.3)})()
+    integration.onchain_provider = type('O', (), {'get_exchange_flows': _Provider('flows')})()
+    refresher.register('phase2_enhancement', integration.fetch_intelligence)
+    refresher.start()
+    try:
+        signal = {'symbol': 'SOL/USDT', 'confidence': 0.7, 'urgency_score': 30.0}
+        started = time.perf_counter()
+        assert integration.get_trading_enhancement('SOL/USDT', signal)['phase2_enabled'] is False   # Warming up
+        assert time.perf_counter() - started < 0.05
+
+        deadline = time.time() + 3.0
+        while refresher.read('phase2_enhancement', 'SOL/USDT')[0] is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert integration.get_trading_enhancement('SOL/USDT', signal)['phase2_enabled'] is True
+    finally:
+        refresher.stop()
+    assert integration.phase2_provider.get_comprehensive_phase2_intelligence.calls == ['SOL']   # Base asset
+    print("✅ Non-blocking reads OK")
+
+
+def test_failures_and_prefetched_enhancers():
+    """A failed refresh keeps the last data and backs off; enhancers use the snapshot instead of fetching"""
+    print("🛰️ TESTING FAILURE BACK-OFF AND ENHANCERS")
+    clock = [1000.0]
+    provider = _Provider('onchain')
+    refresher = IntelligenceRefresher({'failure_retry_seconds': 30}, clock=lambda: clock[0])
+    refresher.register('onchain', provider, refresh_seconds=60)
+    refresher.set_symbols(active='BTC/USDT')
+    refresher.refresh_due()
+    provider.fail = True
+    clock[0] += 60
+    refresher.refresh_due()
+    assert refresher.read('onchain', 'BTC/USDT')[0]['n'] == 1
+    assert refresher.status()['errors'] == {'onchain:BTC/USDT': 'onchain HTTP 503'}
+    clock[0] += 10
+    assert refresher.refresh_due() == []                   # Backing off
+    clock[0] += 20
+    provider.fail = False
+    assert refresher.refresh_due() == [('onchain', 'BTC/USDT')] and refresher.status()['errors'] == {}
+
+    from src.alternative_data_sources import enhance_signal_with_alternative_data
+    from src.sentiment_analysis_engine import SentimentScore, enhance_signal_with_sentiment, get_sentiment_engine
+
+    engine = get_sentiment_engine()
+    original = engine.get_sentiment_analysis
+    engine.get_sentiment_analysis = lambda *a, **k: (_ for _ in ()).throw(AssertionError("fetched inline"))
+    try:
+        score = SentimentScore('BTC/USDT', 0.6, 0.9, 1.0, {}, 'BULLISH', [], datetime.now())
+        enhanced = enhance_signal_with_sentiment({'action': 'BUY', 'confidence': 0.6, 'reason': 'x'}, 'BTC/USDT',
+                                                 sentiment_score=score)
+        assert 'sentiment_enhancement' in enhanced
+    finally:
+        engine.get_sentiment_analysis = original
+
+    alt_data = {'aggregated_scores': {'composite_score': 0.8, 'consensus_level': 0.9}, 'confidence_level': 'HIGH',
+                'alternative_data_summary': 'bullish'}
+    enhanced = enhance_signal_with_alternative_data({'action': 'BUY', 'confidence': 0.6, 'reason': 'x'},
+                                                    'BTC/USDT', alt_data=alt_data)
+    assert enhanced['alternative_data_enhancement']['enhancement_type'] == 'STRONG_SUPPORT'
+    assert enhanced['confidence'] > 0.6
+    print("✅ Failure back-off and enhancers OK")
+
+
+if __name__ == "__main__":
+    test_cadence_over_active_and_candidates()
+    test_trading_path_never_waits()
+    test_failures_and_prefetched_enhancers()
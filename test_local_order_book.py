@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the local L2 order book
+Checks snapshot + buffered diff sync, sequence-gap resync with REST fallback, and book analytics
+"""
+
+import os
+import time
+
+import log_utils
+from local_order_book import L2OrderBook, OrderBookManager
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+STREAM = 'btcusdt@depth@100ms'
+
+
+def _diff(first_id, final_id, bids=(), asks=()):
+    return {'stream': STREAM, 'data': {'e': 'depthUpdate', 's': 'BTCUSDT', 'U': first_id, 'u': final_id,
+                                       'b': [[str(p), str(q)] for p, q in bids],
+                                       'a': [[str(p), str(q)] for p, q in asks]}}
+
+
+class _Exchange:
+    def __init__(self, nonce=100):
+        self.nonce = nonce
+        self.calls = []
+
+    def fetch_order_book(self, symbol, limit=None):
+        self.calls.append(('fetch_order_book', symbol, limit))
+        return {'symbol': symbol, 'nonce': self.nonce,
+                'bids': [[100.0, 1.0], [99.9, 2.0], [99.5, 5.0]],
+                'asks': [[100.1, 1.0], [100.2, 3.0], [101.0, 4.0]]}
+
+
+def _manager(exchange, clock):
+    manager = OrderBookManager(exchange, {'max_staleness_seconds': 5}, clock=lambda: clock[0])
+    manager.track('BTC/USDT')
+    manager.connected = True
+    return manager
+
+
+def test_snapshot_and_buffered_diffs():
+    """Diffs buffer until the snapshot lands; stale ones are dropped, the rest replay in order"""
+    print("📚 TESTING SNAPSHOT SYNC")
+    clock = [1000.0]
+    exchange = _Exchange(nonce=100)
+    manager = _manager(exchange, clock)
+
+    assert manager.handle_message(_diff(95, 99, bids=[(99.9, 7.0)])) == 'BTC/USDT'   # First diff asks for a snapshot
+    assert manager.handle_message(_diff(100, 102, bids=[(100.05, 0.5)])) is None     # Already resyncing
+    assert manager.resync('BTC/USDT')
+
+    book = manager.book('BTC/USDT')
+    assert book is not None and book.last_update_id == 102
+    assert book.bids[99.9] == 2.0                           # u=99 diff predates the snapshot
+    assert book.best_bid() == 100.05 and book.best_ask() == 100.1
+
+    manager.handle_message(_diff(103, 103, bids=[(100.05, 0)], asks=[(100.1, 0), (100.15, 2.0)]))
+    assert (book.best_bid(), book.best_ask()) == (100.0, 100.15)
+    snapshot = manager.get_order_book('BTC/USDT', 2)
+    assert snapshot['source'] == 'local' and snapshot['bids'] == [[100.0, 1.0], [99.9, 2.0]]
+    assert snapshot['asks'] == [[100.15, 2.0], [100.2, 3.0]]
+    assert exchange.calls == [('fetch_order_book', 'BTC/USDT', 1000)]
+    print("✅ Snapshot sync OK")
+
+
+def test_gap_detection_and_fallback():
+    """A missed update id invalidates the book; callers get REST until the resync lands"""
+    print("📚 TESTING SEQUENCE GAP RESYNC")
+    clock = [1000.0]
+    exchange = _Exchange(nonce=100)
+    manager = _manager(exchange, clock)
+    manager.handle_message(_diff(100, 101))
+    manager.resync('BTC/USDT')
+    assert manager.book('BTC/USDT') is not None
+
+    assert manager.handle_message(_diff(105, 106, bids=[(100.0, 9.0)])) == 'BTC/USDT'  # 102-104 missing
+    assert manager.book('BTC/USDT') is None and manager.books['BTC/USDT'].resyncs == 1
+    fallback = manager.get_order_book('BTC/USDT')
+    assert fallback['source'] == 'rest' and manager.rest_fallbacks == 1
+
+    exchange.nonce = 106
+    manager.handle_message(_diff(107, 108, asks=[(100.1, 0.25)]))
+    assert manager.resync('BTC/USDT')
+    assert manager.book('BTC/USDT').asks[100.1] == 0.25
+
+    clock[0] += 6                                           # Stream silent past max_staleness_seconds
+    assert manager.book('BTC/USDT') is None
+    print("✅ Sequence gap resync OK")
+
+
+def test_depth_imbalance_and_slippage():
+    """Depth within bps, imbalance and a level walk for market orders, all in microseconds"""
+    print("📚 TESTING BOOK ANALYTICS")
+    book = L2OrderBook('BTC/USDT')
+    book.load_snapshot(_Exchange().fetch_order_book('BTC/USDT'))
+
+    assert abs(book.mid() - 100.05) < 1e-9 and abs(book.spread_bps() - 9.995) < 0.01
+    depth = book.depth_within(10)                           # 99.95 .. 100.15
+    assert abs(depth['bid'] - 100.0) < 1e-9 and abs(depth['ask'] - 100.1) < 1e-9
+    wide = book.depth_within(100)
+    assert abs(wide['bid'] - (100.0 + 199.8 + 497.5)) < 1e-9
+    assert abs(wide['ask'] - (100.1 + 300.6 + 404.0)) < 1e-9
+    assert abs(book.imbalance(100) - (797.3 - 804.7) / (797.3 + 804.7)) < 1e-9
+
+    buy = book.estimate_slippage('buy', amount=2.0)
+    assert buy['complete'] and buy['levels'] == 2 and abs(buy['average_price'] - 100.15) < 1e-9
+    assert abs(buy['slippage_bps'] - 0.1 / 100.05 * 10000) < 1e-6
+    sell = book.estimate_slippage('sell', quote_amount=299.8)
+    assert sell['complete'] and abs(sell['filled'] - 3.0) < 1e-9 and sell['worst_price'] == 99.9
+    assert not book.estimate_slippage('buy', amount=100.0)['complete']
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        book.estimate_slippage('buy', amount=2.0)
+        book.imbalance(10)
+    per_call_us = (time.perf_counter() - started) * 1e6 / 2000
+    assert per_call_us < 200
+    print(f"✅ Book analytics OK ({per_call_us:.1f} µs per estimate)")
+
+
+if __name__ == "__main__":
+    test_snapshot_and_buffered_diffs()
+    test_gap_detection_and_fallback()
+    test_depth_imbalance_and_slippage()
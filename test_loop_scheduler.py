@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for the loop scheduler
+Checks candle-close alignment, price-threshold and trigger wakes, prioritized jittered background jobs,
+and that bot.run_continuously starts with its jobs registered
+"""
+
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import log_utils
+from loop_scheduler import LoopScheduler
+from replay_engine import symbol_to_filename
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+
+class _Clock:
+    """Virtual time: waiting advances the clock instead of sleeping"""
+
+    def __init__(self, now):
+        self.now = now
+        self.waits = []
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, seconds):
+        self.waits.append(round(seconds, 3))
+        self.now += seconds
+
+
+def _scheduler(clock, **kwargs):
+    return LoopScheduler({'default_jitter_seconds': 0.0, **kwargs.pop('config', {})}, clock=clock,
+                         wait=clock.wait, rng=random.Random(7), **kwargs)
+
+
+def test_wakes_on_candle_close():
+    """Evaluation wakes just after each settled 1m close, not on a fixed interval"""
+    print("⏱️ TESTING CANDLE-CLOSE WAKES")
+    clock = _Clock(1_000_040.0)                         # 20 s into a minute (1_000_020 is a minute boundary)
+    scheduler = _scheduler(clock)
+    assert scheduler.next_candle_close('1m') == 1_000_082.0
+    assert scheduler.next_candle_close('5m') == 1_000_202.0
+
+    assert scheduler.wait_for_evaluation() == 'candle:1m'
+    assert clock.now == 1_000_082.0 and clock.waits == [42.0]
+    scheduler.wait_for_evaluation()
+    assert clock.now == 1_000_142.0                     # Woken at close + settle, one wait per candle
+
+    clock.now = 1_000_201.0                             # 1m and 5m close together: a single wake
+    assert scheduler.wait_for_evaluation() == 'candle:1m' and clock.now == 1_000_202.0
+
+    assert scheduler.wait_for_evaluation(max_wait=10) == 'idle' and clock.now == 1_000_212.0
+    assert scheduler.planned_wait(hold=30) == 30.0
+    print("✅ Candle-close wakes OK")
+
+
+def test_protection_events_cut_the_wait_short():
+    """A stop/target crossing or an engine trigger wakes the loop, even during a cooldown hold"""
+    print("⏱️ TESTING PROTECTION WAKES")
+    clock = _Clock(1_000_005.0)
+    prices = {'BTC/USDT': 100.0}
+    scheduler = _scheduler(clock, price_source=lambda s: prices.get(s))
+    scheduler.set_price_thresholds('BTC/USDT', below=95.0, above=108.0)
+
+    original_wait = clock.wait
+
+    def market_moves(seconds):
+        original_wait(seconds)
+        if clock.now >= 1_000_010.0:
+            prices['BTC/USDT'] = 94.5
+    scheduler._wait = market_moves
+
+    assert scheduler.wait_for_evaluation(hold=300) == 'price:BTC/USDT<=95'
+    assert clock.now == 1_000_010.0 and set(clock.waits) == {1.0}          # Checked every price_check_seconds
+    assert 'BTC/USDT' not in scheduler.thresholds                          # Fires once until re-armed
+
+    real = LoopScheduler({'max_idle_seconds': 30})
+    timer = threading.Timer(0.05, real.trigger, args=('trailing_stop_released:BTC/USDT',))
+    started = time.perf_counter()
+    timer.start()
+    assert real.wait_for_evaluation() == 'trigger:trailing_stop_released:BTC/USDT'
+    assert time.perf_counter() - started < 1.0
+    assert real.wakeups == {'trigger': 1}
+    print("✅ Protection wakes OK")
+
+
+def test_background_jobs_by_priority_and_cadence():
+    """Idle time runs due jobs in priority order on a fixed grid; a failing job does not stop the loop"""
+    print("⏱️ TESTING BACKGROUND JOBS")
+    clock = _Clock(1_000_022.0)
+    scheduler = _scheduler(clock)
+    ran = []
+    scheduler.every('report', 20, lambda: ran.append(('report', clock.now)), priority=8)
+    scheduler.every('sync', 20, lambda: ran.append(('sync', clock.now)), priority=2)
+    scheduler.every('broken', 30, lambda: 1 / 0, priority=5)
+
+    assert scheduler.wait_for_evaluation() == 'candle:1m' and clock.now == 1_000_082.0
+    assert ran == [('sync', 1_000_042.0), ('report', 1_000_042.0), ('sync', 1_000_062.0), ('report', 1_000_062.0)]
+    assert scheduler.tasks['broken'].failures == 1 and scheduler.tasks['sync'].slot == 1_000_082.0
+
+    jittered = LoopScheduler({'default_jitter_seconds': 5.0}, clock=clock, wait=clock.wait, rng=random.Random(1))
+    jittered.every('scan', 60, lambda: None)
+    for _ in range(5):
+        clock.now = jittered.tasks['scan'].next_run
+        jittered.run_due()
+        assert 0 <= jittered.tasks['scan'].next_run - jittered.tasks['scan'].slot <= 5.0
+    assert jittered.tasks['scan'].slot == 1_000_082.0 + 6 * 60                # Jitter never accumulates
+    print("✅ Background jobs OK")
+
+
+
+def test_bot_loop_registers_and_runs_jobs():
+    """run_continuously starts under replay and its registered background report actually runs"""
+    print("⏱️ TESTING BOT LOOP STARTUP")
+    repo = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(repo, 'enhanced_config.json')) as f:
+        symbol = json.load(f)['trading']['symbol']      # History for the pair the loop starts on
+    with tempfile.TemporaryDirectory() as tmp:
+        history = os.path.join(tmp, 'history')
+        os.makedirs(history)
+        with open(os.path.join(history, symbol_to_filename(symbol)), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            for i in range(5 * 60):
+                price = 0.12 * (1 + 0.003 * ((i % 40) - 20) / 20)
+                writer.writerow([1_700_006_400_000 + i * 60_000, price, price * 1.001, price * 0.999, price, 10.0])
+        run = subprocess.run([sys.executable, os.path.join(repo, 'bot.py'), '--replay', history,
+                              '--replay-warmup-hours', '4', '--replay-days', '0.01',
+                              '--replay-out', os.path.join(tmp, 'run')],
+                             cwd=repo, capture_output=True, text=True, timeout=300)
+    output = run.stdout + run.stderr
+    assert run.returncode == 0, output[-2000:]
+    assert 'is not defined' not in output and 'Fatal error' not in output, output[-2000:]
+    assert 'ENHANCED PRICE DETECTION STATUS' in output and 'Loop wake' in output
+    print("✅ Bot loop startup OK")
+
+
+if __name__ == "__main__":
+    test_wakes_on_candle_close()
+    test_protection_events_cut_the_wait_short()
+    test_background_jobs_by_priority_and_cadence()
+    test_bot_loop_registers_and_runs_jobs()
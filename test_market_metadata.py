@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script for the market metadata service
+Checks rule parsing and quantization, the single cached load_markets, and precision-safe stop replacement
+"""
+
+import os
+import tempfile
+
+import log_utils
+from market_metadata import MarketMetadataService, MarketRules
+from trailing_stop_engine import TrailingStopEngine
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+BTC_MARKET = {
+    'symbol': 'BTC/USDT', 'base': 'BTC', 'quote': 'USDT', 'active': True, 'spot': True, 'type': 'spot',
+    'precision': {'amount': 1e-05, 'price': 0.01},
+    'limits': {'amount': {'min': 1e-05}, 'cost': {'min': 1.0}},
+    'info': {'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.01000000', 'minPrice': '0.01', 'maxPrice': '1000000.00'},
+        {'filterType': 'LOT_SIZE', 'stepSize': '0.00001000', 'minQty': '0.00001000', 'maxQty': '9000.0'},
+        {'filterType': 'NOTIONAL', 'minNotional': '10.00000000'},
+    ]},
+}
+XLM_MARKET = {
+    'symbol': 'XLM/USDT', 'base': 'XLM', 'quote': 'USDT', 'active': True, 'spot': True, 'type': 'spot',
+    'precision': {'amount': 1, 'price': 4},                 # DECIMAL_PLACES style precision
+    'limits': {'amount': {'min': 1.0}, 'cost': {'min': 5.0}},
+}
+
+
+class _Exchange:
+    id = 'testex'
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+        self.markets = None
+
+    def load_markets(self, reload=False):
+        self.calls.append(('load_markets', reload))
+        if self.fail:
+            raise Exception("exchange unavailable")
+        return {'BTC/USDT': dict(BTC_MARKET), 'XLM/USDT': dict(XLM_MARKET)}
+
+    def set_markets(self, markets):
+        self.markets = markets
+
+    def cancel_order(self, order_id, symbol):
+        self.calls.append(('cancel', order_id))
+
+    def create_order(self, symbol, order_type, side, amount, price, params=None):
+        self.calls.append(('create', amount, price, params['stopPrice']))
+        return {'id': 'new'}
+
+
+def test_rules_and_quantization():
+    """Binance filters win over ccxt precision; amounts floor to the step, prices snap to the tick"""
+    print("📐 TESTING RULES AND QUANTIZATION")
+    defaults = MarketMetadataService().config
+    btc = MarketRules.from_market(BTC_MARKET, defaults)
+    assert (btc.tick_size, btc.step_size, btc.min_amount, btc.min_notional) == (0.01, 1e-05, 1e-05, 10.0)
+    assert btc.amount(0.123456789) == 0.12345
+    assert btc.amount(0.3) == 0.3                           # No float-noise loss of a whole step
+    assert btc.price(65000.128, 'floor') == 65000.12 and btc.price(65000.121, 'ceil') == 65000.13
+    assert btc.check(0.0001, 65000.0) == "order value $6.50 below $10.00 minimum"
+    assert btc.check(0.0002, 65000.0) is None
+
+    xlm = MarketRules.from_market(XLM_MARKET, defaults)
+    assert (xlm.tick_size, xlm.step_size, xlm.min_notional) == (0.0001, 0.1, 5.0)
+    assert xlm.amount(123.456) == 123.4 and xlm.price(0.123456) == 0.1235
+
+    service = MarketMetadataService(_Exchange(), {'cache_file': None})
+    order = service.prepare_order('BTC/USDT', 0.000234567, 64999.999, 'floor', stop_price=65100.005)
+    assert order == {'symbol': 'BTC/USDT', 'amount': 0.00023, 'price': 64999.99, 'stop_price': 65100.0,
+                     'valid': True, 'reason': 'OK'}
+    unknown = service.rules_for('NEW/USDT')                 # Undescribed symbol: conservative limits, no grid
+    assert unknown.min_notional == 10.0 and not unknown.described
+    assert unknown.price(0.004321, 'floor') == 0.004321      # Never floored onto a guessed 0.01 tick
+    assert service.prepare_order('NEW/USDT', 5000.0, 0.004321)['reason'] == "no exchange precision rules for NEW/USDT"
+    bare = MarketRules.from_market({'symbol': 'PEPE/USDT', 'precision': {}, 'limits': {}}, defaults)
+    assert not bare.described and bare.check(1e6, 0.00001) is not None
+    print("✅ Rules and quantization OK")
+
+
+def test_single_cached_load():
+    """One load_markets per TTL across instances; refresh after the TTL, stale cache on failure"""
+    print("📐 TESTING CACHED MARKET LOAD")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'cache_file': os.path.join(tmp, 'markets_{exchange}.json'), 'ttl_seconds': 100}
+        clock = [1000.0]
+        exchange = _Exchange()
+        service = MarketMetadataService(exchange, config, clock=lambda: clock[0])
+        for _ in range(50):
+            service.amount_to_precision('BTC/USDT', 0.5)
+        assert exchange.calls == [('load_markets', False)]
+        assert os.path.exists(os.path.join(tmp, 'markets_testex.json'))
+
+        restarted = _Exchange()
+        service = MarketMetadataService(restarted, config, clock=lambda: clock[0])
+        assert service.min_notional('BTC/USDT') == 10.0 and restarted.calls == [] and service.source == 'cache'
+
+        other = _Exchange()
+        assert service.attach(other) and set(other.markets) == {'BTC/USDT', 'XLM/USDT'}
+
+        clock[0] += 101
+        service.min_amount('XLM/USDT')
+        assert restarted.calls == [('load_markets', True)] and service.source == 'exchange'
+
+        failing = _Exchange()
+        failing.fail = True
+        clock[0] += 1000
+        service = MarketMetadataService(failing, config, clock=lambda: clock[0])
+        assert service.min_notional('XLM/USDT') == 5.0 and service.source == 'stale cache'
+        service.min_notional('XLM/USDT')                    # Backs off instead of retrying every call
+        assert len(failing.calls) == 1
+    print("✅ Cached market load OK")
+
+
+def test_trailing_engine_orders_on_grid():
+    """Ratcheted stops are submitted on the tick/step grid, never above the trail"""
+    print("📐 TESTING PRECISION-SAFE STOP REPLACEMENT")
+    with tempfile.TemporaryDirectory() as tmp:
+        exchange = _Exchange()
+        metadata = MarketMetadataService(exchange, {'cache_file': None})
+        engine = TrailingStopEngine(exchange, {'state_file': os.path.join(tmp, 'stops.json'), 'min_replace_seconds': 0},
+                                    clock=lambda: 0.0, market_metadata=metadata)
+        engine.protect('BTC/USDT', '1', 0.0123456, 65000.0, 64675.0, 0.005)
+        assert engine.on_price('BTC/USDT', 66123.457)
+        assert engine.process_pending() == 1
+
+        created = [c for c in exchange.calls if c[0] == 'create'][0]
+        assert created == ('create', 0.01234, 65463.87, '65792.83')
+        assert float(created[3]) <= 66123.457 * 0.995
+    print("✅ Precision-safe stop replacement OK")
+
+
+if __name__ == "__main__":
+    test_rules_and_quantization()
+    test_single_cached_load()
+    test_trailing_engine_orders_on_grid()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-symbol trading engine
+Checks parallel actor ticks on one ticker snapshot, the governor's position cap and per-actor exits
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import log_utils
+from multi_position_portfolio_manager import MultiPositionPortfolioManager
+from multi_symbol_engine import MultiSymbolEngine, RequestRateLimiter, ma_crossover_signal
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'XRP/USDT', 'ADA/USDT', 'DOGE/USDT', 'XLM/USDT', 'SUI/USDT']
+STEP_MS = 30 * 60 * 1000
+
+
+class _Correlations:
+    def correlations_with(self, symbol, held):
+        return {}
+
+    def diversification_ratio(self, weights):
+        return 1.0
+
+
+class _Exchange:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prices = {s: 100.0 for s in SYMBOLS}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def fetch_tickers(self, symbols):
+        self.calls.append(('fetch_tickers', len(symbols)))
+        return {s: {'symbol': s, 'last': self.prices[s]} for s in symbols}
+
+    def fetch_ohlcv(self, symbol, timeframe='30m', since=None, limit=100):
+        with self.lock:
+            self.calls.append(('fetch_ohlcv', symbol))
+        time.sleep(self.delay)
+        last = int(time.time() * 1000) // STEP_MS * STEP_MS
+        return [[last - (limit - 1 - i) * STEP_MS, 100, 101, 99, 100.0, 1] for i in range(limit)]
+
+
+def _engine(exchange, signal, tmp, **config):
+    portfolio = MultiPositionPortfolioManager(max_positions=config.pop('max_positions', 5),
+                                              correlation_engine=_Correlations())
+    settings = {'symbols': SYMBOLS, 'state_file': os.path.join(tmp, 'engine.json'), 'requests_per_second': 1000,
+                'request_burst': 1000}
+    protector = config.pop('protector', None)
+    settings.update(config)
+    return MultiSymbolEngine(exchange, settings, portfolio=portfolio, signal_fn=lambda s, closes: signal[s],
+                             protector=protector, portfolio_value_fn=lambda: 1000.0)
+
+
+def test_actors_tick_in_parallel():
+    """One ticker request per tick, every actor's candle refresh in flight at once"""
+    print("🧩 TESTING PARALLEL ACTOR TICKS")
+    with tempfile.TemporaryDirectory() as tmp:
+        exchange = _Exchange(delay=0.05)
+        engine = _engine(exchange, {s: 'HOLD' for s in SYMBOLS}, tmp)
+        started = time.perf_counter()
+        assert engine.tick() == {}
+        elapsed = time.perf_counter() - started
+        assert exchange.calls[0] == ('fetch_tickers', len(SYMBOLS))
+        assert sorted(c[1] for c in exchange.calls[1:]) == sorted(SYMBOLS)
+        assert elapsed < len(SYMBOLS) * 0.05 / 2            # Serial would be 8 x 50 ms
+
+    closes = np.r_[np.full(30, 100.0), np.linspace(99, 97, 5), 99.0, 101.0, 104.0, 100.0]
+    assert ma_crossover_signal(3, 10)('BTC/USDT', closes) == 'BUY'
+    assert ma_crossover_signal(3, 10)('BTC/USDT', np.full(40, 100.0)) == 'HOLD'
+
+    limiter = RequestRateLimiter(rate=10, burst=2, clock=lambda: 0.0, sleep=lambda s: None)
+    limiter.acquire()
+    limiter.acquire()
+    assert limiter.tokens == 0.0
+    print(f"✅ Parallel actor ticks OK ({elapsed * 1000:.0f} ms for {len(SYMBOLS)} actors)")
+
+
+def test_governor_caps_concurrent_entries():
+    """Every actor signals BUY at once; the governor lets exactly max_positions through"""
+    print("🧩 TESTING GOVERNOR POSITION CAP")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(_Exchange(delay=0.01), {s: 'BUY' for s in SYMBOLS}, tmp, max_positions=3)
+        actions = engine.tick()
+        assert list(actions.values()) == ['BUY'] * 3
+        assert len(engine.governor.portfolio.active_positions) == 3 and not engine.governor.reserved
+        assert set(engine.get_status()['positions']) == set(actions)
+        assert engine.tick() == {}                          # Slots full, holders see no exit
+    print("✅ Governor position cap OK")
+
+
+def test_actor_exits_and_restart():
+    """Stop loss and trailing exits per actor, state reloads, a filled protective stop closes the position"""
+    print("🧩 TESTING ACTOR EXITS")
+    with tempfile.TemporaryDirectory() as tmp:
+        exchange = _Exchange()
+        signal = {s: 'HOLD' for s in SYMBOLS}
+        signal['BTC/USDT'] = signal['ETH/USDT'] = signal['SOL/USDT'] = 'BUY'
+        engine = _engine(exchange, signal, tmp)
+        assert engine.tick() == {'BTC/USDT': 'BUY', 'ETH/USDT': 'BUY', 'SOL/USDT': 'BUY'}
+        signal.update({s: 'HOLD' for s in SYMBOLS})
+
+        exchange.prices['BTC/USDT'] = 94.0                  # Below the 5% stop loss
+        exchange.prices['ETH/USDT'] = 104.0                 # New high: trail at 103.48
+        assert engine.tick() == {'BTC/USDT': 'SELL'}
+        exchange.prices['ETH/USDT'] = 103.4
+        assert engine.tick() == {'ETH/USDT': 'SELL'}
+        assert list(engine.governor.portfolio.active_positions) == ['SOL/USDT']
+
+        engine.actors['SOL/USDT'].stop_order_id = 'stop-1'
+        engine._persist()
+        protected = []
+
+        def protector(symbol, entry_price, quantity, order_id):
+            protected.append((symbol, order_id))
+            return order_id or 'stop-2'
+
+        restarted = _engine(exchange, signal, tmp, protector=protector)
+        assert restarted.actors['SOL/USDT'].holding and list(restarted.governor.portfolio.active_positions) == ['SOL/USDT']
+        assert protected == [('SOL/USDT', 'stop-1')]        # Persisted stop handed back for re-adoption
+        released = []
+        restarted.releaser = lambda symbol, order_id: released.append(order_id) or 96.0   # Stop already executed
+        signal['SOL/USDT'] = 'SELL'
+        assert restarted.tick() == {'SOL/USDT': 'SELL'}
+        assert released == ['stop-1']
+        assert not restarted.governor.portfolio.active_positions and not restarted.actors['SOL/USDT'].holding
+
+        live = _engine(exchange, signal, tmp, dry_run=False, state_file=None)
+        orders = []
+
+        def create_market_order(symbol, side, quantity):
+            orders.append((side, quantity))
+            return {'id': f'o{len(orders)}', 'average': 100.0, 'filled': quantity,
+                    'fee': {'cost': 0.001, 'currency': 'SOL'}}
+
+        exchange.create_market_order = create_market_order
+        exchange.fetch_balance = lambda: {'free': {'SOL': 0.999, 'USDT': 500.0}}
+        fill_price, held = live.execute('SOL/USDT', 'buy', 1.0, 100.0)
+        assert fill_price == 100.0 and abs(held - 0.999) < 1e-12     # Base-asset fee comes off the position
+        live.execute('SOL/USDT', 'sell', 1.0, 100.0)
+        assert orders[-1] == ('sell', 0.999)                        # Sized from the free balance
+    print("✅ Actor exits OK")
+
+
+if __name__ == "__main__":
+    test_actors_tick_in_parallel()
+    test_governor_caps_concurrent_entries()
+    test_actor_exits_and_restart()
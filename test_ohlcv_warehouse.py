@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for the OHLCV history warehouse
+Checks partitioned upserts, memory-mapped range reads, compaction and exchange backfill
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from ohlcv_warehouse import OHLCVWarehouse
+
+MINUTE_MS = 60_000
+MAY_31_2025 = 1_748_649_600_000      # 2025-05-31 00:00 UTC
+JUNE_1_2025 = 1_748_736_000_000      # 2025-06-01 00:00 UTC
+
+
+def _rows(start_ms, count, price=100.0):
+    ts = start_ms + np.arange(count) * MINUTE_MS
+    close = price + np.arange(count, dtype=np.float64)
+    return np.column_stack([ts, close, close + 1, close - 1, close, np.ones(count)])
+
+
+class _FakeExchange:
+    """Pages 1m candles like ccxt fetch_ohlcv(symbol, timeframe, since, limit)"""
+
+    def __init__(self, rows):
+        self.rows = rows.tolist()
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls += 1
+        return [r for r in self.rows if r[0] >= since][:limit]
+
+
+def test_append_splits_months_and_upserts():
+    """Candles land in monthly partitions; a re-appended candle replaces the stored one"""
+    print("📦 TESTING PARTITIONED UPSERT")
+    with tempfile.TemporaryDirectory() as root:
+        warehouse = OHLCVWarehouse(root)
+        start = JUNE_1_2025 - 30 * MINUTE_MS
+        assert warehouse.append('BTC/USDT', '1m', _rows(start, 60)) == 60
+        assert sorted(os.listdir(os.path.join(root, 'BTC-USDT', '1m'))) == ['2025-05.npy', '2025-06.npy']
+
+        revised = _rows(start + 59 * MINUTE_MS, 2, price=500.0)
+        assert warehouse.append('BTC/USDT', '1m', revised) == 1
+        candles = warehouse.query('BTC/USDT', '1m')
+        assert len(candles) == 61
+        assert np.all(np.diff(candles['timestamp']) == MINUTE_MS)
+        assert candles['close'][59] == 500.0
+        assert warehouse.latest_timestamp('BTC/USDT', '1m') == start + 60 * MINUTE_MS
+        assert warehouse.series() == [('BTC/USDT', '1m')]
+        print("✅ Partitioned upsert OK")
+
+
+def test_query_is_memory_mapped_and_survives_compaction():
+    """Single-partition reads are mmap views; compressed months still answer queries"""
+    print("📦 TESTING MEMORY-MAPPED READS AND COMPACTION")
+    with tempfile.TemporaryDirectory() as root:
+        warehouse = OHLCVWarehouse(root)
+        warehouse.append('ETH/USDT', '1m', _rows(MAY_31_2025, 2 * 24 * 60))
+
+        window = warehouse.query('ETH/USDT', '1m', JUNE_1_2025 + 10 * MINUTE_MS, JUNE_1_2025 + 20 * MINUTE_MS)
+        assert len(window) == 10 and window['timestamp'][0] == JUNE_1_2025 + 10 * MINUTE_MS
+        assert isinstance(window['close'].base, np.memmap)
+
+        before = warehouse.query('ETH/USDT', '1m')
+        stats = warehouse.compact(compress_before='2025-06')
+        assert stats['compressed'] == 1
+        assert sorted(os.listdir(os.path.join(root, 'ETH-USDT', '1m'))) == ['2025-05.npz', '2025-06.npy']
+        after = warehouse.query('ETH/USDT', '1m')
+        assert all(np.array_equal(before[name], after[name]) for name in before)
+
+        # Appending into a sealed month keeps it compressed
+        warehouse.append('ETH/USDT', '1m', _rows(MAY_31_2025 - MINUTE_MS, 1))
+        assert '2025-05.npz' in os.listdir(os.path.join(root, 'ETH-USDT', '1m'))
+        assert len(warehouse.tail('ETH/USDT', '1m', 5)) == 5
+        print("✅ Memory-mapped reads and compaction OK")
+
+
+def test_backfill_pages_exchange():
+    """Backfill pages through the exchange, stores only closed candles and resumes on update"""
+    print("📦 TESTING EXCHANGE BACKFILL")
+    with tempfile.TemporaryDirectory() as root:
+        warehouse = OHLCVWarehouse(root)
+        exchange = _FakeExchange(_rows(MAY_31_2025, 250))
+        until = MAY_31_2025 + 200 * MINUTE_MS + MINUTE_MS // 2    # Candle 200 still forming
+
+        assert warehouse.backfill(exchange, 'SOL/USDT', '1m', MAY_31_2025, until, page_limit=50) == 200
+        assert exchange.calls == 5
+        assert warehouse.latest_timestamp('SOL/USDT', '1m') == MAY_31_2025 + 199 * MINUTE_MS
+
+        assert warehouse.backfill(exchange, 'SOL/USDT', '1m', MAY_31_2025 + 200 * MINUTE_MS,
+                                  MAY_31_2025 + 250 * MINUTE_MS, page_limit=50) == 50
+        assert len(warehouse.query('SOL/USDT', '1m')) == 250
+        print("✅ Exchange backfill OK")
+
+
+if __name__ == "__main__":
+    test_append_splits_months_and_upserts()
+    test_query_is_memory_mapped_and_survives_compaction()
+    test_backfill_pages_exchange()
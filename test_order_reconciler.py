@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test script for the order reconciler
+Checks the single-snapshot diff, concurrent cancels, the cross-symbol reconcile with placement
+and the emergency cleanup scope
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import log_utils
+from order_reconciler import (DEFAULT_RECONCILER_CONFIG, OrderReconciler, desired_protection, load_protection_scope,
+                              load_reconciler_config, protection_scope)
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+
+def _order(order_id, symbol, order_type='stop_loss_limit', side='sell'):
+    return {'id': order_id, 'symbol': symbol, 'type': order_type, 'side': side, 'amount': 1.0}
+
+
+class _Exchange:
+    def __init__(self, orders, delay=0.0, all_symbols=True):
+        self.orders = orders
+        self.delay = delay
+        self.all_symbols = all_symbols
+        self.options = {}
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def fetch_open_orders(self, symbol=None):
+        self.calls.append(('fetch_open_orders', symbol))
+        if symbol is None and not self.all_symbols:
+            raise Exception("symbol required")
+        return [o for o in self.orders if symbol is None or o['symbol'] == symbol]
+
+    def cancel_order(self, order_id, symbol):
+        with self.lock:
+            self.calls.append(('cancel', order_id))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if order_id == 'bad':
+            raise Exception("Unknown order sent")
+        return {'id': order_id}
+
+
+def test_desired_state_diff():
+    """Live recorded orders keep strays cancelled; a missing record is reported, never re-stacked"""
+    print("🧾 TESTING PROTECTION DIFF")
+    state = {'trailing_stop_active': True, 'trailing_stop_order_id': '1',
+             'immediate_stop_limit_active': True, 'immediate_stop_limit_order_id': '2',
+             'trailing_oco_active': True, 'trailing_oco_order_id': 'MANUAL_OCO_3_4'}
+    desired = desired_protection(state)
+    assert desired == {'1': 'trailing_stop_active', '2': 'immediate_stop_limit_active',
+                       '3': 'trailing_oco_active', '4': 'trailing_oco_active'}
+
+    exchange = _Exchange([_order('1', 'BTC/USDT'), _order('9', 'BTC/USDT'),
+                          _order('tp', 'BTC/USDT', 'limit'), _order('5', 'ETH/USDT')])
+    result = OrderReconciler(exchange).reconcile('BTC/USDT', desired)
+    assert result['protected'] and result['live'] == ['1'] and result['cancelled'] == ['9']
+    assert result['missing'] == ['2', '3', '4']
+    assert result['missing_flags'] == ['immediate_stop_limit_active', 'trailing_oco_active']
+    assert exchange.calls == [('fetch_open_orders', 'BTC/USDT'), ('cancel', '9')]
+
+    # Recorded order gone but an unrecorded stop is working: keep it, cancel nothing
+    exchange = _Exchange([_order('9', 'BTC/USDT')])
+    result = OrderReconciler(exchange).reconcile('BTC/USDT', {'1': 'trailing_stop_active'})
+    assert result['protected'] and result['strays'] == ['9'] and not result['cancelled']
+
+    exchange = _Exchange([_order('tp', 'BTC/USDT', 'limit')])
+    assert not OrderReconciler(exchange).reconcile('BTC/USDT', desired)['protected']
+    print("✅ Protection diff OK")
+
+
+def test_cancels_run_concurrently():
+    """Cancels overlap up to max_workers and failures are reported per order"""
+    print("🧾 TESTING CONCURRENT CANCELS")
+    orders = [_order(str(i), 'BTC/USDT') for i in range(7)] + [_order('bad', 'BTC/USDT')]
+    exchange = _Exchange(orders, delay=0.05)
+    started = time.perf_counter()
+    result = OrderReconciler(exchange, {'max_workers': 4}).cancel_protective(['BTC/USDT'])
+    elapsed = time.perf_counter() - started
+
+    assert result['matched'] == 8 and len(result['cancelled']) == 7 and list(result['failed']) == ['bad']
+    assert exchange.max_in_flight == 4
+    assert elapsed < 8 * 0.05 * 0.6                     # Two rounds instead of eight serial cancels
+    print(f"✅ Concurrent cancels OK ({elapsed * 1000:.0f} ms for 8)")
+
+
+def test_emergency_cleanup_single_snapshot():
+    """Several symbols share one open-orders request, with a per-symbol fallback"""
+    print("🧾 TESTING MULTI-SYMBOL SNAPSHOT")
+    orders = [_order('1', 'BTC/USDT'), _order('2', 'ETH/USDT'), _order('3', 'ETH/USDT', 'limit', 'buy'),
+              _order('4', 'DOGE/USDT')]
+    exchange = _Exchange(orders)
+    result = OrderReconciler(exchange).cancel_protective(['BTC/USDT', 'ETH/USDT', 'SOL/USDT'])
+    assert sorted(result['cancelled']) == ['1', '2'] and result['open'] == 3
+    assert [c for c in exchange.calls if c[0] == 'fetch_open_orders'] == [('fetch_open_orders', None)]
+    assert exchange.options['warnOnFetchOpenOrdersWithoutSymbol'] is False
+
+    exchange = _Exchange(orders, all_symbols=False)
+    snapshot = OrderReconciler(exchange).snapshot(['BTC/USDT', 'ETH/USDT'])
+    assert {s: [o['id'] for o in v] for s, v in snapshot.items()} == {'BTC/USDT': ['1'], 'ETH/USDT': ['2', '3']}
+
+    with tempfile.TemporaryDirectory() as tmp:           # Cleanup scope comes from the bot config
+        path = os.path.join(tmp, 'enhanced_config.json')
+        with open(path, 'w') as f:
+            json.dump({'risk_management': {'order_reconciler': {'symbols': ['DOGE/USDT']}}}, f)
+        config = load_reconciler_config(path)
+    assert config['symbols'] == ['DOGE/USDT'] and config['max_workers'] == 4
+    assert load_reconciler_config(os.path.join(tmp, 'missing.json')) == DEFAULT_RECONCILER_CONFIG
+    print("✅ Multi-symbol snapshot OK")
+
+
+def test_reconcile_all_places_concurrently():
+    """Every pair is diffed off one snapshot; strays go in one cancel round, missing protection is placed in parallel"""
+    print("🧾 TESTING CROSS-SYMBOL RECONCILE")
+    orders = [_order('1', 'BTC/USDT'), _order('9', 'BTC/USDT'), _order('2', 'ETH/USDT'), _order('8', 'ETH/USDT'),
+              _order('tp', 'SOL/USDT', 'limit')]
+    exchange = _Exchange(orders)
+    placing = []
+
+    def place(symbol, result):
+        placing.append(symbol)
+        time.sleep(0.1)
+        if symbol == 'ADA/USDT':
+            raise Exception("insufficient balance")
+        return {'id': f'new-{symbol}'}
+
+    started = time.perf_counter()
+    results = OrderReconciler(exchange).reconcile_all(
+        {'BTC/USDT': {'1': 'trailing_stop_active'}, 'ETH/USDT': {'2': 'trailing_stop_active'},
+         'SOL/USDT': {'3': 'trailing_stop_active'}, 'ADA/USDT': {}}, place=place)
+    elapsed = time.perf_counter() - started
+
+    assert [c for c in exchange.calls if c[0] == 'fetch_open_orders'] == [('fetch_open_orders', None)]
+    assert sorted(c[1] for c in exchange.calls if c[0] == 'cancel') == ['8', '9']
+    assert results['BTC/USDT']['cancelled'] == ['9'] and results['ETH/USDT']['cancelled'] == ['8']
+    assert 'placed' not in results['BTC/USDT'] and sorted(placing) == ['ADA/USDT', 'SOL/USDT']
+    assert results['SOL/USDT']['placed'] == {'id': 'new-SOL/USDT'} and results['SOL/USDT']['missing'] == ['3']
+    assert results['ADA/USDT']['placed'] is None                    # Failure is logged, not raised
+    assert elapsed < 0.18                                           # Both places overlapped
+
+    # Emergency scope: the active pair, engine holdings and extras, plus whatever has open orders
+    engine = {'ETH/USDT': {'quantity': 0.5}, 'SOL/USDT': {'quantity': 0}, 'BTC/USDT': {'quantity': 1}}
+    assert protection_scope('BTC/USDT', engine, ['XRP/USDT']) == ['BTC/USDT', 'ETH/USDT', 'XRP/USDT']
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, 'engine.json')
+        with open(state_file, 'w') as f:
+            json.dump(engine, f)
+        path = os.path.join(tmp, 'scope_config.json')
+        with open(path, 'w') as f:
+            json.dump({'trading': {'symbol': 'LTC/USDT', 'multi_symbol_engine': {'state_file': state_file}}}, f)
+        assert load_protection_scope(path) == ['LTC/USDT', 'ETH/USDT', 'BTC/USDT']
+
+    snapshot = OrderReconciler(_Exchange(orders)).snapshot(['LTC/USDT'], include_unlisted=True)
+    assert set(snapshot) == {'LTC/USDT', 'BTC/USDT', 'ETH/USDT', 'SOL/USDT'} and not snapshot['LTC/USDT']
+    print(f"✅ Cross-symbol reconcile OK ({elapsed * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    test_desired_state_diff()
+    test_cancels_run_concurrently()
+    test_emergency_cleanup_single_snapshot()
+    test_reconcile_all_places_concurrently()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for batched portfolio valuation
+Checks one ticker request per cycle, incremental high-water/drawdown tracking and vectorized exit rules
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import log_utils
+from multi_position_portfolio_manager import MultiPositionPortfolioManager
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+
+class _Correlations:
+    def correlations_with(self, symbol, held):
+        return {}
+
+    def diversification_ratio(self, weights):
+        return 1.0
+
+
+class _Exchange:
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def fetch_tickers(self, symbols=None):
+        self.calls.append(('fetch_tickers', symbols))
+        symbols = list(self.prices) if symbols is None else symbols
+        return {s: {'symbol': s, 'last': self.prices[s]} for s in symbols if s in self.prices}
+
+    def fetch_ticker(self, symbol):
+        self.calls.append(('fetch_ticker', symbol))
+        return {'symbol': symbol, 'last': self.prices[symbol]}
+
+
+def _portfolio(entries):
+    portfolio = MultiPositionPortfolioManager(max_positions=len(entries), max_allocation_per_position=1.0,
+                                              correlation_engine=_Correlations())
+    for symbol, price in entries.items():
+        assert portfolio.add_position(symbol, price, 1.0)
+    return portfolio
+
+
+def test_single_snapshot_valuation():
+    """Five positions are valued from one fetch_tickers call; a missing quote is reported per symbol"""
+    print("💰 TESTING BATCHED VALUATION")
+    entries = {'BTC/USDT': 100.0, 'ETH/USDT': 50.0, 'SOL/USDT': 20.0, 'XRP/USDT': 2.0, 'ADA/USDT': 1.0}
+    portfolio = _portfolio(entries)
+    exchange = _Exchange({'BTC/USDT': 110.0, 'ETH/USDT': 45.0, 'SOL/USDT': 20.0, 'XRP/USDT': 2.2})
+
+    status = portfolio.update_positions_pnl(exchange)
+    assert exchange.calls == [('fetch_tickers', list(entries))]
+    assert abs(status['BTC/USDT']['pnl_pct'] - 10.0) < 1e-9 and status['BTC/USDT']['pnl_usd'] == 10.0
+    assert abs(status['ETH/USDT']['pnl_pct'] + 10.0) < 1e-9
+    assert status['ADA/USDT'] == {'error': 'no price in ticker snapshot'}
+
+    # A caller-supplied snapshot costs no request at all
+    portfolio.update_positions_pnl(exchange, tickers={'BTC/USDT': {'last': 120.0}})
+    assert len(exchange.calls) == 1 and portfolio.active_positions['BTC/USDT'].current_price == 120.0
+    print("✅ Batched valuation OK")
+
+
+def test_high_water_and_drawdown():
+    """The high-water mark only rises and the worst drawdown is remembered between snapshots"""
+    print("💰 TESTING HIGH-WATER / DRAWDOWN")
+    portfolio = _portfolio({'BTC/USDT': 100.0})
+    position = portfolio.active_positions['BTC/USDT']
+    for price in (105.0, 120.0, 108.0, 114.0):
+        portfolio.update_positions_pnl(None, tickers={'BTC/USDT': {'last': price}})
+
+    assert position.high_water_price == 120.0
+    assert abs(position.drawdown_pct - 5.0) < 1e-9
+    assert abs(position.max_drawdown_pct - 10.0) < 1e-9
+    assert portfolio.get_portfolio_summary()['positions']['BTC/USDT']['max_drawdown_pct'] == position.max_drawdown_pct
+    print("✅ High-water / drawdown OK")
+
+
+def test_vectorized_exit_rules():
+    """Stop, target, emergency and aged-profit exits keep their priority and messages"""
+    print("💰 TESTING VECTORIZED EXITS")
+    portfolio = _portfolio({'BTC/USDT': 100.0, 'ETH/USDT': 100.0, 'SOL/USDT': 100.0,
+                            'XRP/USDT': 100.0, 'ADA/USDT': 100.0})
+    positions = portfolio.active_positions
+    positions['SOL/USDT'].stop_loss = None                  # Only the emergency rule can fire
+    positions['XRP/USDT'].take_profit = None
+    positions['XRP/USDT'].entry_time = datetime.now() - timedelta(minutes=300)
+    exchange = _Exchange({'BTC/USDT': 94.0, 'ETH/USDT': 111.0, 'SOL/USDT': 80.0, 'XRP/USDT': 106.0,
+                          'ADA/USDT': 101.0})
+
+    exits = dict(portfolio.check_exit_conditions(exchange))
+    assert len(exchange.calls) == 1
+    assert exits['BTC/USDT'] == "Stop loss hit: $94.0000 <= $95.0000"
+    assert exits['ETH/USDT'] == "Take profit hit: $111.0000 >= $108.0000"
+    assert exits['SOL/USDT'] == "Emergency exit: -20.00% loss"
+    assert exits['XRP/USDT'] == "Aged profitable position: 6.00% profit after 300min"
+    assert 'ADA/USDT' not in exits
+
+    # Stop loss outranks the emergency rule when both match
+    assert portfolio.check_exit_conditions(exchange, {'BTC/USDT': {'last': 80.0}}) == [
+        ('BTC/USDT', "Stop loss hit: $80.0000 <= $95.0000")]
+    print("✅ Vectorized exits OK")
+
+
+if __name__ == "__main__":
+    test_single_snapshot_valuation()
+    test_high_water_and_drawdown()
+    test_vectorized_exit_rules()
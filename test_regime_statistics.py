@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared regime statistics engine
+Checks parity with the pandas formulas, caching and incremental candle appends
+"""
+
+import numpy as np
+import pandas as pd
+
+from regime_statistics import RegimeStatisticsEngine, hurst_exponent
+
+START = pd.Timestamp('2025-01-01')
+
+
+def _frame(candles, offset=0, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, offset + candles)))[offset:]
+    volume = rng.uniform(5, 15, offset + candles)[offset:]
+    return pd.DataFrame({
+        'timestamp': START + pd.to_timedelta(np.arange(offset, offset + candles), unit='m'),
+        'close': close,
+        'volume': volume
+    })
+
+
+def test_matches_pandas_formulas():
+    """Vectorized statistics equal the per-detector pandas calculations"""
+    print("📐 TESTING REGIME STATISTICS PARITY")
+    df = _frame(200)
+    stats = RegimeStatisticsEngine().get_stats(df)
+    returns = df['close'].pct_change().dropna()
+    vol20 = returns.rolling(20).std()
+
+    assert np.isclose(stats['vol_20'], vol20.iloc[-1])
+    assert np.isclose(stats['vol_20_mean_100'], vol20.rolling(100).mean().iloc[-1])
+    assert np.isclose(stats['vol_20_percentile'], vol20.rank(pct=True).iloc[-1] * 100)
+    assert np.isclose(stats['vol_of_vol'], vol20.rolling(10).std().iloc[-1])
+    assert np.isclose(stats['ma_50'], df['close'].rolling(50).mean().iloc[-1])
+    assert np.isclose(stats['abs_return_autocorr'], returns.abs().autocorr(lag=1))
+    assert np.isclose(stats['price_efficiency'], abs(returns.sum()) / returns.abs().sum())
+    k_sums = returns.rolling(5).sum().dropna()
+    assert np.isclose(stats['variance_ratio_5'], k_sums.var() / (5 * returns.var()))
+    assert np.isclose(stats['volume_mean_10'], df['volume'].rolling(10).mean().iloc[-1])
+    print("✅ Regime statistics parity OK")
+
+
+def test_hurst_separates_regimes():
+    """Trending paths score above 0.5, mean-reverting paths below"""
+    print("📐 TESTING HURST EXPONENT")
+    rng = np.random.default_rng(1)
+    noise = rng.normal(0, 0.01, 51)
+    assert hurst_exponent(0.01 + noise[:50] * 0.1) > 0.6   # Steady drift
+    assert hurst_exponent(np.diff(noise)) < 0.4            # Every move undone by the next
+    print("✅ Hurst exponent OK")
+
+
+def test_cache_and_incremental_append():
+    """Repeated frames are lookups; a sliding window appends only new candles"""
+    print("📐 TESTING REGIME STATISTICS CACHE")
+    engine = RegimeStatisticsEngine()
+    first = engine.get_stats(_frame(150), 'BTC/USDT')
+    assert engine.get_stats(_frame(150), 'BTC/USDT') is first
+    assert engine.computations == 1 and engine.lookups == 1
+
+    slid = _frame(150, offset=3)
+    stats = engine.get_stats(slid, 'BTC/USDT')
+    buffer = engine.buffers[('BTC/USDT', 60000)]
+    assert len(buffer.close) == 153
+    assert np.isclose(stats['vol_20'], slid['close'].pct_change().rolling(20).std().iloc[-1])
+    assert engine.computations == 2
+    print("✅ Regime statistics cache OK")
+
+
+if __name__ == "__main__":
+    test_matches_pandas_formulas()
+    test_hurst_separates_regimes()
+    test_cache_and_incremental_append()
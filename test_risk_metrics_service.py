@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached risk metrics service
+Checks VaR parity with ValueAtRiskCalculator, closed-candle refresh and portfolio VaR
+"""
+
+import numpy as np
+import pandas as pd
+
+from institutional_strategies import ValueAtRiskCalculator
+from risk_metrics_service import RiskMetricsService
+
+HOUR_MS = 3600 * 1000
+START_MS = 1_750_000_000_000 - 1_750_000_000_000 % HOUR_MS
+
+
+def _candles(count, seed=5, start=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, start + count)))[start:]
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(START_MS + np.arange(start, start + count) * HOUR_MS, unit='ms'),
+        'close': close
+    })
+
+
+def test_var_matches_calculator():
+    """Cached VaR equals a fresh ValueAtRiskCalculator run on the same closed candles"""
+    print("📉 TESTING CACHED VAR PARITY")
+    df = _candles(101)
+    now = START_MS / 1000 + 101 * 3600      # Every candle in the frame has closed
+    service = RiskMetricsService()
+    assert service.update_candles('ETH/USDT', df, now=now) == 101
+    assert len(service.windows['ETH/USDT'].closes) == 100   # Rolling window keeps 100 candles
+
+    expected = ValueAtRiskCalculator().calculate_var(df['close'].tail(100).pct_change().dropna(), 500.0)
+    cached = service.get_var_analysis('ETH/USDT', 500.0)
+    for key in ('var_daily', 'var_weekly', 'var_monthly'):
+        assert np.isclose(cached[key], expected[key])
+    assert cached['risk_assessment'] == expected['risk_assessment']
+    assert cached['cvar_daily'] >= cached['var_daily']
+    print("✅ Cached VaR parity OK")
+
+
+def test_refresh_only_after_candle_close():
+    """The forming candle is skipped and the exchange is only asked for missing candles"""
+    print("📉 TESTING CLOSED-CANDLE REFRESH")
+    calls = []
+    history = _candles(200)
+
+    def fetch(symbol, timeframe, limit):
+        calls.append(limit)
+        visible = history[history['timestamp'] <= pd.to_datetime(now * 1000, unit='ms')]
+        return visible.tail(limit)
+
+    service = RiskMetricsService({'retry_seconds': 0})
+    now = START_MS / 1000 + 150.5 * 3600    # Candle 150 is still forming
+    assert service.refresh_if_due('BTC/USDT', fetch, now=now)
+    assert service.windows['BTC/USDT'].timestamps[-1] == START_MS + 149 * HOUR_MS
+
+    now += 0.25 * 3600                      # Same hour: nothing to do
+    assert not service.refresh_if_due('BTC/USDT', fetch, now=now)
+    now += 2 * 3600                         # Two more candles closed
+    assert service.refresh_if_due('BTC/USDT', fetch, now=now)
+    assert calls == [101, 3]
+    assert service.windows['BTC/USDT'].timestamps[-1] == START_MS + 151 * HOUR_MS
+    print("✅ Closed-candle refresh OK")
+
+
+def test_portfolio_var_diversifies():
+    """Uncorrelated exposures carry less VaR than the sum of their standalone VaRs"""
+    print("📉 TESTING PORTFOLIO VAR")
+    now = START_MS / 1000 + 101 * 3600
+    service = RiskMetricsService()
+    service.update_candles('BTC/USDT', _candles(101, seed=1), now=now)
+    service.update_candles('ETH/USDT', _candles(101, seed=2), now=now)
+    symbols, cov = service.covariance_matrix()
+    assert symbols == ['BTC/USDT', 'ETH/USDT'] and cov.shape == (2, 2)
+
+    combined = service.portfolio_var({'BTC/USDT': 100.0, 'ETH/USDT': 100.0})
+    alone = [service.portfolio_var({s: 100.0})['portfolio_var'] for s in symbols]
+    assert combined['portfolio_var'] < sum(alone)
+    assert combined['diversification_ratio'] > 1.0
+    print("✅ Portfolio VaR OK")
+
+
+if __name__ == "__main__":
+    test_var_matches_calculator()
+    test_refresh_only_after_candle_close()
+    test_portfolio_var_diversifies()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the runtime-toggled sampling profiler
+Runs a short profiling window over a busy main thread and checks the outputs
+"""
+
+import os
+import tempfile
+import time
+
+from sampling_profiler import SamplingProfiler
+
+
+def _busy_work(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(i * i for i in range(200))
+    return total
+
+
+def test_profiling_window_outputs():
+    """A window started by command writes collapsed stacks, top and tracemalloc reports"""
+    print("🔬 TESTING SAMPLING PROFILER WINDOW")
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = SamplingProfiler('test', {'output_dir': tmp, 'interval_ms': 2})
+        profiler.handle_command('5')
+        assert profiler.active
+        assert not profiler.start()  # Already running
+
+        _busy_work(0.3)
+        profiler.handle_command('stop')
+        assert not profiler.active
+
+        assert profiler.samples > 0
+        assert len(profiler.last_outputs) == 3
+        assert all(os.path.exists(path) for path in profiler.last_outputs)
+
+        collapsed = open(profiler.last_outputs[0]).read()
+        assert '_busy_work' in collapsed
+        top = open(profiler.last_outputs[1]).read()
+        assert 'TOP SELF TIME' in top and 'TOP INCLUSIVE TIME' in top
+    print("✅ Profiling window outputs OK")
+
+
+def test_control_file_toggle():
+    """Writing the control file toggles a window without a signal"""
+    print("🔬 TESTING PROFILER CONTROL FILE")
+    with tempfile.TemporaryDirectory() as tmp:
+        control_file = os.path.join(tmp, 'profile.control')
+        profiler = SamplingProfiler('test', {'output_dir': tmp, 'control_file': control_file,
+                                             'control_poll_seconds': 0.05}).install()
+        with open(control_file, 'w') as f:
+            f.write('toggle')
+
+        deadline = time.time() + 5
+        while not profiler.active and time.time() < deadline:
+            time.sleep(0.02)
+        assert profiler.active
+        assert not os.path.exists(control_file)
+
+        profiler.toggle()
+        assert not profiler.active
+        assert profiler.last_outputs
+    print("✅ Control file toggle OK")
+
+
+if __name__ == "__main__":
+    test_profiling_window_outputs()
+    test_control_file_toggle()
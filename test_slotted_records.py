@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for slotted hot-path records and the array-backed price history
+Checks that records carry no __dict__, late attributes still work, and jump detection is unchanged
+"""
+
+import time
+
+import numpy as np
+
+import price_jump_detector
+from memory_footprint import RECORD_SAMPLES, measure_price_history, measure_records
+from price_jump_detector import PriceHistory, PriceJumpDetector
+
+
+def test_records_are_slotted():
+    """Every hot record type is __dict__-free and smaller than its __dict__ twin"""
+    print("💾 TESTING SLOTTED RECORDS")
+    for name, (cls, make) in RECORD_SAMPLES.items():
+        record = make(cls, 1)
+        assert not hasattr(record, '__dict__'), name
+    for name, row in measure_records(200).items():
+        assert row['slots_bytes'] < row['dict_bytes'], name
+
+    # Attributes filled in after construction are declared slots
+    jump = RECORD_SAMPLES['PriceJump'][1](RECORD_SAMPLES['PriceJump'][0], 0)
+    assert getattr(jump, 'timeframe', 'spike') == 'spike'
+    jump.timeframe, jump.urgency_score = 'short_trend', 3.0
+    alert = RECORD_SAMPLES['OpportunityAlert'][1](RECORD_SAMPLES['OpportunityAlert'][0], 0)
+    alert.phase2_enhanced, alert.phase2_confidence_boost = True, 0.1
+    print("✅ Slotted records OK")
+
+
+def test_price_history_rolls_in_place():
+    """The history keeps the newest max_size points without reallocating"""
+    print("💾 TESTING PRICE HISTORY ARRAYS")
+    history = PriceHistory(5)
+    buffer = history.prices.base
+    for t in range(23):
+        history.append(float(t), 100.0 + t)
+    assert len(history) == 5 and history.prices.base is buffer
+    assert np.array_equal(history.timestamps, np.arange(18, 23, dtype=float))
+    assert history[-1].price == 122.0 and history[0].timestamp == 18.0
+    assert measure_price_history(pairs=20, ticks=200)['ratio'] < 0.5
+    print("✅ Price history arrays OK")
+
+
+def test_jump_detection_unchanged():
+    """A 1% move inside a minute is still detected as an UP spike with the same fields"""
+    print("💾 TESTING JUMP DETECTION ON ARRAYS")
+    clock = [1_750_000_000.0]
+    real_time = price_jump_detector.time.time
+    price_jump_detector.time.time = lambda: clock[0]
+    try:
+        detector = PriceJumpDetector({})
+        jump = None
+        for i, price in enumerate([100.0] * 10 + [100.3, 100.6, 101.0]):
+            clock[0] += 5
+            jump = detector.add_price_point(price) or jump
+    finally:
+        price_jump_detector.time.time = real_time
+
+    assert jump is not None and jump.direction == 'UP' and jump.timeframe == 'spike'
+    assert jump.start_price == 100.0 and np.isclose(jump.change_pct, 1.0)
+    assert jump.duration_seconds == 60.0           # Earliest point inside the 60s window
+    analysis = detector.get_jump_analysis(jump)
+    assert analysis['override_cooldown'] and 0 < analysis['momentum_strength'] <= 1.0
+    print("✅ Jump detection on arrays OK")
+
+
+if __name__ == "__main__":
+    test_records_are_slotted()
+    test_price_history_rolls_in_place()
+    test_jump_detection_unchanged()
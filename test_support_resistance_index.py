@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental support/resistance level index
+Checks shared extrema, incremental folding and nearest-level lookups
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.support_resistance_index import SupportResistanceIndex, SwingExtrema
+
+START = pd.Timestamp('2025-01-01')
+
+
+def _oscillating_frame(candles, offset=0):
+    """Price bouncing between ~95 (support) and ~105 (resistance) on a 1m grid"""
+    idx = np.arange(offset, offset + candles)
+    close = 100 + 5 * np.sin(idx * 2 * np.pi / 20)
+    return pd.DataFrame({
+        'timestamp': START + pd.to_timedelta(idx, unit='m'),
+        'open': close,
+        'high': close + 0.05,
+        'low': close - 0.05,
+        'close': close,
+        'volume': np.full(candles, 10.0)
+    })
+
+
+def test_shared_extrema():
+    """Tail views match the whole-frame pass"""
+    print("📊 TESTING SHARED SWING EXTREMA")
+    df = _oscillating_frame(100)
+    extrema = SwingExtrema(df)
+    peaks = extrema.peaks(3)
+    assert len(peaks) == 5
+    assert extrema.peaks(3) is peaks  # Cached, not recomputed
+    assert list(extrema.recent_peaks(40, 3)) == [p - 60 for p in peaks if p >= 60]
+    assert extrema.timeframe_seconds() == 60
+    print("✅ Shared swing extrema OK")
+
+
+def test_incremental_levels_and_nearest_lookup():
+    """New candles only add new swings; nearest lookups bracket the price"""
+    print("📊 TESTING INCREMENTAL S/R INDEX")
+    index = SupportResistanceIndex()
+
+    state = index.update('BTC/USDT', SwingExtrema(_oscillating_frame(100)))
+    support, resistance = index.levels(state, 100.0)
+    assert len(support) == 1 and len(resistance) == 1
+    assert abs(support[0]['level'] - 94.95) < 0.1
+    assert abs(resistance[0]['level'] - 105.05) < 0.1
+    touches_before = resistance[0]['touches']
+
+    # Same window again: nothing new is folded in
+    index.update('BTC/USDT', SwingExtrema(_oscillating_frame(100)))
+    assert index.levels(state, 100.0)[1][0]['touches'] == touches_before
+
+    # Window slides forward by 40 candles: exactly the two new highs are added
+    index.update('BTC/USDT', SwingExtrema(_oscillating_frame(100, offset=40)))
+    assert index.levels(state, 100.0)[1][0]['touches'] == touches_before + 2
+
+    assert abs(index.nearest_support('BTC/USDT', 100.0)['level'] - 94.95) < 0.1
+    assert abs(index.nearest_resistance('BTC/USDT', 100.0)['level'] - 105.05) < 0.1
+    assert index.nearest_resistance('BTC/USDT', 200.0) is None
+    assert index.nearest_support('ETH/USDT', 100.0) is None
+
+    # A second timeframe for the same symbol: lookups without one use the shortest
+    hourly = _oscillating_frame(100).assign(timestamp=START + pd.to_timedelta(np.arange(100), unit='h'),
+                                           high=lambda d: d['close'] + 20, low=lambda d: d['close'] - 20)
+    index.update('BTC/USDT', SwingExtrema(hourly))
+    assert abs(index.nearest_support('BTC/USDT', 100.0)['level'] - 94.95) < 0.1
+    assert abs(index.nearest_support('BTC/USDT', 100.0, timeframe_seconds=3600)['level'] - 75.0) < 0.1
+    print("✅ Incremental S/R index OK")
+
+
+def test_strength_decays():
+    """Levels untouched for many half-lives lose their strength"""
+    print("📊 TESTING S/R STRENGTH DECAY")
+    index = SupportResistanceIndex({'sr_half_life_candles': 10})
+    state = index.update('BTC/USDT', SwingExtrema(_oscillating_frame(100)))
+    fresh = index.levels(state, 100.0)[0][0]['strength']
+    later = state.watermark + 100 * 60
+    stale = index.levels(state, 100.0, now=later)[0][0]['strength']
+    assert stale < fresh * 0.01
+    print("✅ S/R strength decay OK")
+
+
+if __name__ == "__main__":
+    test_shared_extrema()
+    test_incremental_levels_and_nearest_lookup()
+    test_strength_decays()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the timeframe aggregator
+Checks locally derived 5m...1d candles against exchange candles, partial bars and request counts
+"""
+
+import numpy as np
+import pandas as pd
+
+import timeframe_aggregator
+from timeframe_aggregator import TimeframeAggregator
+from ohlcv_warehouse import TIMEFRAME_MS
+
+DAY_MS = TIMEFRAME_MS['1d']
+START_MS = 1_750_032_000_000 - 3 * DAY_MS       # Three days of 1m history before 2025-06-16
+TIMEFRAMES = ('1m', '5m', '15m', '30m', '1h', '2h', '4h', '1d')
+
+
+class _Market:
+    """Fake exchange serving 1m-consistent candles for any timeframe, including the forming one"""
+
+    def __init__(self, minutes=5 * 24 * 60, seed=3):
+        rng = np.random.default_rng(seed)
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.002, minutes))
+        open_ = np.insert(close[:-1], 0, 100.0)
+        wick = np.abs(rng.normal(0, 0.1, (2, minutes)))
+        self.ts = START_MS + np.arange(minutes) * 60_000
+        self.full = np.column_stack([self.ts, open_, np.maximum(open_, close) + wick[0],
+                                     np.minimum(open_, close) - wick[1], close,
+                                     rng.integers(1, 100, minutes).astype(float)])
+        self.now = START_MS / 1000
+        self.calls = []
+
+    def _minutes(self):
+        now_ms = self.now * 1000
+        rows = self.full[:np.searchsorted(self.ts, now_ms, side='right')].copy()
+        frac = (now_ms - rows[-1, 0]) / 60_000
+        o, h, l, c, v = rows[-1, 1:]
+        # The forming minute grows towards its final values
+        rows[-1, 1:] = [o, o + (h - o) * frac, o - (o - l) * frac, o + (c - o) * frac, v * frac]
+        return rows
+
+    def candles(self, timeframe, limit):
+        rows = self._minutes()
+        step = TIMEFRAME_MS[timeframe]
+        rows = rows[rows[:, 0] >= rows[-1, 0] - rows[-1, 0] % step - (limit - 1) * step]
+        buckets = rows[:, 0] - rows[:, 0] % step
+        starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        ends = np.append(starts[1:], len(rows)) - 1
+        candles = np.column_stack([buckets[starts], rows[starts, 1], np.maximum.reduceat(rows[:, 2], starts),
+                                   np.minimum.reduceat(rows[:, 3], starts), rows[ends, 4],
+                                   np.add.reduceat(rows[:, 5], starts)])
+        return candles[-limit:].tolist()
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        self.calls.append(timeframe)
+        return self.candles(timeframe, limit)
+
+
+def _assert_matches(market, rows, limit):
+    for timeframe in TIMEFRAMES:
+        actual = np.array(rows[timeframe])
+        expected = np.array(market.candles(timeframe, limit))
+        if timeframe == '1m':
+            expected = expected[-len(actual):]    # Only as much 1m history as was seeded
+        assert actual.shape == expected.shape and np.allclose(actual, expected), timeframe
+
+
+def test_matches_exchange_candles():
+    """Derived candles equal exchange candles at every step, from one 1m request per refresh"""
+    print("🕯️ TESTING DERIVED TIMEFRAMES")
+    market = _Market()
+    market.now = (START_MS + 3 * DAY_MS + 137 * 60_000) / 1000 + 20   # Mid-bucket for 2h/4h/1d
+    aggregator = TimeframeAggregator({'seed_1m_candles': 30, 'min_refresh_seconds': 0},
+                                     clock=lambda: market.now)
+    _assert_matches(market, aggregator.get_rows(market, 'BTC/USDT', TIMEFRAMES, 50), 50)
+    assert sorted(market.calls) == sorted(TIMEFRAMES)
+
+    market.calls.clear()
+    for _ in range(420):                      # 140 minutes in 20s steps, across 1h/2h/4h closes
+        market.now += 20
+        _assert_matches(market, aggregator.get_rows(market, 'BTC/USDT', TIMEFRAMES, 50), 50)
+    assert market.calls == ['1m'] * 420
+    print("✅ Derived timeframes OK")
+
+
+def test_ingest_frame_and_gap_reseed():
+    """A frame handed over by the loop saves the refresh; a frame with a hole forces a reseed"""
+    print("🕯️ TESTING FRAME INGESTION")
+    market = _Market(seed=4)
+    market.now = (START_MS + 3 * DAY_MS) / 1000 + 30
+    aggregator = TimeframeAggregator({'min_refresh_seconds': 60}, clock=lambda: market.now)
+    aggregator.get_rows(market, 'ETH/USDT', TIMEFRAMES, 50)
+
+    def frame():
+        df = pd.DataFrame(market.candles('1m', 50), columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+        return df
+
+    market.now += 185
+    assert aggregator.ingest_frame('ETH/USDT', frame())
+    market.calls.clear()
+    _assert_matches(market, aggregator.get_rows(market, 'ETH/USDT', TIMEFRAMES, 50), 50)
+    assert market.calls == []
+
+    market.now += 100 * 60                    # Longer than the 50-candle frame covers
+    assert not aggregator.ingest_frame('ETH/USDT', frame())
+    _assert_matches(market, aggregator.get_rows(market, 'ETH/USDT', TIMEFRAMES, 50), 50)
+    assert market.calls.count('1m') == 1
+    print("✅ Frame ingestion OK")
+
+
+def test_ma_detector_uses_one_request():
+    """After the first call the multi-timeframe MA detector costs a single 1m request"""
+    print("🕯️ TESTING MA DETECTOR REQUESTS")
+    from multi_timeframe_ma import detect_multi_timeframe_ma_signals
+    market = _Market(seed=5)
+    market.now = (START_MS + 3 * DAY_MS) / 1000 + 600
+    timeframe_aggregator._timeframe_aggregator = TimeframeAggregator({'min_refresh_seconds': 0},
+                                                                     clock=lambda: market.now)
+    try:
+        first = detect_multi_timeframe_ma_signals(market, 'BTC/USDT', 100.0)
+        assert not any('Error' in reason for reason in first['combined']['reasons'])
+        market.calls.clear()
+        market.now += 60
+        detect_multi_timeframe_ma_signals(market, 'BTC/USDT', 100.0)
+        assert market.calls == ['1m']
+    finally:
+        timeframe_aggregator._timeframe_aggregator = None
+    print("✅ MA detector requests OK")
+
+
+if __name__ == "__main__":
+    test_matches_exchange_candles()
+    test_ingest_frame_and_gap_reseed()
+    test_ma_detector_uses_one_request()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test script for the event-driven trailing stop engine
+Checks hysteresis on the ratchet, batched cancel/replace with one state write, restart recovery,
+and the order book price feed with its REST fallback
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+import log_utils
+import trailing_stop_engine
+from local_order_book import OrderBookManager
+from trailing_stop_engine import TrailingStopEngine
+
+log_utils.MESSAGE_LOG_FILE = os.devnull     # Keep the tracked bot_log.txt untouched
+
+
+class _Exchange:
+    def __init__(self):
+        self.prices = {}
+        self.calls = []
+        self.next_id = 100
+        self.fail_create = False
+        self.during_io = None
+
+    def fetch_tickers(self, symbols):
+        self.calls.append(('fetch_tickers', tuple(symbols)))
+        return {s: {'symbol': s, 'last': self.prices[s]} for s in symbols if s in self.prices}
+
+    def fetch_order_book(self, symbol, limit=None):
+        self.calls.append(('fetch_order_book', symbol))
+        return {'symbol': symbol, 'nonce': 100, 'bids': [[100.5, 1.0]], 'asks': [[100.7, 1.0]]}
+
+    def cancel_order(self, order_id, symbol):
+        self.calls.append(('cancel', order_id, symbol))
+        if self.during_io:
+            self.during_io(symbol)
+        return {'id': order_id, 'status': 'canceled'}
+
+    def create_order(self, symbol, order_type, side, amount, price, params=None):
+        self.calls.append(('create', symbol, order_type, side, amount, price, params['stopPrice']))
+        if self.fail_create:
+            raise Exception("insufficient balance")
+        self.next_id += 1
+        return {'id': str(self.next_id)}
+
+
+def _engine(exchange, state_file, clock, updates=None):
+    return TrailingStopEngine(exchange, {'state_file': state_file, 'min_replace_seconds': 5},
+                              on_update=lambda s, d: updates.append((s, d)) if updates is not None else None,
+                              clock=lambda: clock[0])
+
+
+def test_ratchet_hysteresis():
+    """Small highs only move the high; a stop moves once it clears 0.1% and the replace window"""
+    print("🛡️ TESTING TRAILING RATCHET HYSTERESIS")
+    with tempfile.TemporaryDirectory() as tmp:
+        clock, exchange, updates = [1000.0], _Exchange(), []
+        engine = _engine(exchange, os.path.join(tmp, 'stops.json'), clock, updates)
+        engine.protect('BTC/USDT', '1', 0.01, 100.0, 99.5, 0.005)
+
+        assert not engine.on_price('BTC/USDT', 100.05)          # Stop 99.55: +0.05%, below hysteresis
+        assert engine.positions['BTC/USDT'].highest_price == 100.05
+        assert not engine.on_price('BTC/USDT', 99.0)            # Lower prices never move anything
+        assert engine.on_price('BTC/USDT', 100.3)               # Stop 99.80: +0.3%
+        assert engine.process_pending() == 0                    # Still inside the replace window
+
+        clock[0] += 5
+        engine.on_price('BTC/USDT', 100.6)                      # Latest high wins
+        assert engine.process_pending() == 1
+        assert [c[0] for c in exchange.calls] == ['cancel', 'create']
+        assert exchange.calls[1][6] == str(100.6 * 0.995)
+        symbol, data = updates[-1]
+        assert symbol == 'BTC/USDT' and data['order_id'] == '101' and data['active']
+        assert data['current_stop_price'] == 100.6 * 0.995 and data['highest_price'] == 100.6
+        assert engine.process_pending() == 0                    # Nothing queued any more
+    print("✅ Trailing ratchet hysteresis OK")
+
+
+def test_batched_replace_persists_once():
+    """One ticker request for all symbols, one state write per batch, failed creates are retried"""
+    print("🛡️ TESTING BATCHED CANCEL/REPLACE")
+    with tempfile.TemporaryDirectory() as tmp:
+        clock, exchange, updates = [1000.0], _Exchange(), []
+        engine = _engine(exchange, os.path.join(tmp, 'stops.json'), clock, updates)
+        for i, symbol in enumerate(['BTC/USDT', 'ETH/USDT', 'SOL/USDT']):
+            engine.protect(symbol, str(i), 1.0, 10.0, 9.95, 0.005)
+
+        writes = []
+        persist = engine._persist
+        engine._persist = lambda: (writes.append(1), persist())
+        clock[0] += 10
+        exchange.prices = {'BTC/USDT': 10.2, 'ETH/USDT': 10.3, 'SOL/USDT': 10.0}
+        assert engine.tick() == 2
+        assert exchange.calls[0] == ('fetch_tickers', ('BTC/USDT', 'ETH/USDT', 'SOL/USDT'))
+        assert len(writes) == 1 and engine.replacements == 2
+
+        # Cancel went through but the new order failed: no working stop, retried next window
+        exchange.prices['BTC/USDT'] = 10.5
+        exchange.fail_create = True
+        clock[0] += 10
+        assert engine.tick() == 0
+        position = engine.positions['BTC/USDT']
+        assert position.order_id is None and position.target_stop is not None
+        assert updates[-1][0] == 'BTC/USDT' and updates[-1][1]['order_id'] is None   # Bot drops the cancelled id
+        exchange.fail_create = False
+        clock[0] += 10
+        assert engine.process_pending() == 1 and position.order_id is not None
+        assert exchange.calls[-1][0] == 'create'                # Nothing left to cancel
+
+        # Exchange calls run without the engine lock: the strategy thread keeps working meanwhile
+        def strategy_thread(symbol):
+            worker = threading.Thread(target=lambda: (engine.on_price('ETH/USDT', 11.0), engine.release(symbol)))
+            worker.start()
+            worker.join(timeout=2)
+            assert not worker.is_alive(), "engine lock held during exchange I/O"
+
+        exchange.during_io = strategy_thread
+        exchange.prices['BTC/USDT'] = 11.0
+        clock[0] += 10
+        assert engine.tick() == 0                               # Released mid-replace: not counted
+        assert 'BTC/USDT' not in engine.positions
+        assert exchange.calls[-1][:2] == ('cancel', str(exchange.next_id))   # Stray new stop cancelled
+        assert engine.positions['ETH/USDT'].target_stop is not None          # Price folded in during I/O
+    print("✅ Batched cancel/replace OK")
+
+
+def test_state_survives_restart():
+    """State is written atomically and reloaded; bot state is adopted only when unknown"""
+    print("🛡️ TESTING TRAILING STATE RECOVERY")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stops.json')
+        clock, exchange = [1000.0], _Exchange()
+        engine = _engine(exchange, path, clock)
+        engine.protect('BTC/USDT', '7', 0.01, 100.0, 99.5, 0.005, highest_price=101.0)
+        assert not os.path.exists(path + '.tmp')
+        with open(path) as f:
+            assert json.load(f)['BTC/USDT']['order_id'] == '7'
+
+        restarted = _engine(exchange, path, clock)
+        assert restarted.get('BTC/USDT')['highest_price'] == 101.0
+        assert not restarted.adopt(dict(engine.get('BTC/USDT'), order_id='stale'))
+        assert restarted.adopt({'order_id': '9', 'symbol': 'ETH/USDT', 'amount': 1, 'entry_price': 10,
+                                'highest_price': 10, 'current_stop_price': 9.95, 'trailing_percent': 0.005,
+                                'last_updated': 0, 'active': True})
+        restarted.release('BTC/USDT')
+        with open(path) as f:
+            assert list(json.load(f)) == ['ETH/USDT']
+
+        # The background thread ticks without the caller's loop
+        exchange.prices = {'ETH/USDT': 11.0}
+        restarted.config['poll_interval_seconds'] = 0.01
+        restarted.start()
+        try:
+            for _ in range(200):
+                if restarted.replacements:
+                    break
+                trailing_stop_engine.time.sleep(0.01)
+        finally:
+            restarted.stop()
+        assert restarted.replacements == 1 and not restarted.running
+    print("✅ Trailing state recovery OK")
+
+
+def test_order_book_feed_with_rest_fallback():
+    """Stream mids drive the ratchet and wake the thread; fetch_tickers only covers a stale feed"""
+    print("🛡️ TESTING ORDER BOOK PRICE FEED")
+
+    def diff(update_id, bid):
+        return {'stream': 'btcusdt@depth@100ms',
+                'data': {'e': 'depthUpdate', 'U': update_id, 'u': update_id, 'b': [[str(bid), '1']], 'a': []}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clock, exchange = [1000.0], _Exchange()
+        books = OrderBookManager(exchange, {'max_staleness_seconds': 5}, clock=lambda: clock[0])
+        books.connected = True
+        engine = _engine(exchange, os.path.join(tmp, 'stops.json'), clock)
+        engine.attach_feed(books)
+        engine.protect('BTC/USDT', '1', 1.0, 100.0, 99.5, 0.005)
+        assert 'BTC/USDT' in books.books                        # Protected symbols join the stream
+
+        assert books.handle_message(diff(99, 100.5)) == 'BTC/USDT' and books.resync('BTC/USDT')
+        assert engine.positions['BTC/USDT'].highest_price == 100.6    # Snapshot mid folded in
+        clock[0] += 5
+        assert engine.tick() == 1
+        assert not [c for c in exchange.calls if c[0] == 'fetch_tickers']
+
+        clock[0] += 10                                          # Stream silent: REST takes over
+        exchange.prices = {'BTC/USDT': 101.5}
+        assert engine.tick() == 1
+        assert ('fetch_tickers', ('BTC/USDT',)) in exchange.calls
+
+        # A stream ratchet wakes the thread instead of waiting out the poll interval
+        engine.config['poll_interval_seconds'] = 60
+        engine.start()
+        try:
+            clock[0] += 10
+            books.handle_message(diff(101, 103.0))
+            for _ in range(200):
+                if engine.replacements == 3:
+                    break
+                trailing_stop_engine.time.sleep(0.01)
+        finally:
+            engine.stop()
+        assert engine.replacements == 3 and engine.positions['BTC/USDT'].highest_price == (103.0 + 100.7) / 2
+    print("✅ Order book price feed OK")
+
+
+if __name__ == "__main__":
+    test_ratchet_hysteresis()
+    test_batched_replace_persists_once()
+    test_state_survives_restart()
+    test_order_book_feed_with_rest_fallback()
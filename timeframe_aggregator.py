@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+🕯️ TIMEFRAME AGGREGATOR
+=======================
+
+Builds 5m ... 1d candles locally from one 1m stream per symbol.
+
+Higher-timeframe history is fetched once per (symbol, timeframe) when first
+requested; after that, every refresh is a single 1m request covering the
+minutes since the last one (or none at all when the trading loop has already
+handed over its 1m frame via ingest_frame()). The multi-timeframe MA detectors
+and the emergency spike detector read their frames from here instead of six
+or four separate fetch_ohlcv calls per symbol.
+
+Partial-bar semantics match the exchange: the last row of every frame is the
+still-forming candle, built from the closed 1m bars of the current bucket plus
+the forming 1m bar. When a timeframe is seeded mid-bucket, the exchange's
+partial candle is used as the bucket prefix; high/low merge idempotently and
+the volume already present in the local 1m bars is subtracted, so minutes
+older than the 1m history are still accounted for exactly once.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_warehouse import COLUMNS, TIMEFRAME_MS
+
+MINUTE_MS = TIMEFRAME_MS['1m']
+
+DEFAULT_AGGREGATOR_CONFIG = {
+    'seed_1m_candles': 120,         # 1m history fetched when a symbol is first seen
+    'seed_candles': 100,            # Higher-timeframe history fetched once per timeframe
+    'max_candles': 300,             # Closed candles kept per timeframe
+    'max_refresh_candles': 1000,    # Longer gaps reseed the symbol instead
+    'min_refresh_seconds': 5        # Reuse the last 1m refresh within this window
+}
+
+
+class _TimeframeState:
+    """Closed candles plus the closed-minute aggregate of the forming bucket"""
+
+    __slots__ = ('step', 'closed', 'acc')
+
+    def __init__(self, step: int, max_candles: int):
+        self.step = step
+        self.closed = deque(maxlen=max_candles)   # [ts, o, h, l, c, v] rows
+        self.acc: Optional[List[float]] = None    # Forming bucket without the forming minute
+
+    def fold(self, row: List[float]):
+        """Fold one closed 1m candle into the forming bucket"""
+        bucket = row[0] - row[0] % self.step
+        acc = self.acc
+        if acc is not None and bucket < acc[0]:
+            return
+        if acc is None or bucket > acc[0]:
+            if acc is not None:
+                self.closed.append(acc)
+            self.acc = [bucket, row[1], row[2], row[3], row[4], row[5]]
+        else:
+            acc[2] = max(acc[2], row[2])
+            acc[3] = min(acc[3], row[3])
+            acc[4] = row[4]
+            acc[5] += row[5]
+
+    def roll(self, forming_ts: int):
+        """The forming minute moved into a new bucket: the accumulated one is complete"""
+        if self.acc is not None and forming_ts - forming_ts % self.step > self.acc[0]:
+            self.closed.append(self.acc)
+            self.acc = None
+
+    def forming_bar(self, forming: List[float]) -> List[float]:
+        acc = self.acc
+        if acc is None:
+            return [forming[0] - forming[0] % self.step] + forming[1:]
+        return [acc[0], acc[1], max(acc[2], forming[2]), min(acc[3], forming[3]), forming[4], acc[5] + forming[5]]
+
+
+class _SymbolState:
+    __slots__ = ('closed_1m', 'forming', 'frames', 'refreshed_at')
+
+    def __init__(self, max_candles: int):
+        self.closed_1m = deque(maxlen=max_candles)
+        self.forming: Optional[List[float]] = None
+        self.frames: Dict[str, _TimeframeState] = {}
+        self.refreshed_at = 0.0
+
+
+class TimeframeAggregator:
+    """
+    🕯️ One 1m stream per symbol, every higher timeframe derived locally
+    """
+
+    def __init__(self, config: Optional[Dict] = None, clock: Optional[Callable[[], float]] = None):
+        self.config = dict(DEFAULT_AGGREGATOR_CONFIG)
+        self.config.update(config or {})
+        self.clock = clock or (lambda: time.time())   # Looked up per call so replay's virtual clock applies
+        self.symbols: Dict[str, _SymbolState] = {}
+        self.fetches = 0
+        self.lock = threading.Lock()
+
+    # ------------------------------------------------------------ ingestion
+
+    def _fetch(self, exchange, symbol: str, timeframe: str, limit: int) -> List[List[float]]:
+        self.fetches += 1
+        return [[float(v) for v in row[:6]] for row in exchange.fetch_ohlcv(symbol, timeframe, limit=limit) or []]
+
+    def _ingest(self, state: _SymbolState, rows: Iterable[List[float]]) -> bool:
+        """Apply 1m rows in time order; False if they leave a hole after our forming minute"""
+        rows = [row for row in rows if state.forming is None or row[0] >= state.forming[0]]
+        if rows and state.forming is not None and rows[0][0] > state.forming[0] + MINUTE_MS:
+            return False
+
+        for row in rows:
+            if state.forming is None or row[0] == state.forming[0]:
+                state.forming = row
+                continue
+            closed = state.forming
+            state.closed_1m.append(closed)
+            for frame in state.frames.values():
+                frame.fold(closed)
+                frame.roll(int(row[0]))
+            state.forming = row
+        return True
+
+    def _seed_symbol(self, exchange, symbol: str) -> _SymbolState:
+        state = _SymbolState(int(self.config['max_candles']))
+        self._ingest(state, self._fetch(exchange, symbol, '1m', int(self.config['seed_1m_candles'])))
+        state.refreshed_at = self.clock()
+        self.symbols[symbol] = state
+        return state
+
+    def _seed_timeframe(self, exchange, symbol: str, state: _SymbolState, timeframe: str):
+        step = TIMEFRAME_MS[timeframe]
+        frame = _TimeframeState(step, int(self.config['max_candles']))
+        current = state.forming[0] - state.forming[0] % step
+        partial = None
+        for row in self._fetch(exchange, symbol, timeframe, int(self.config['seed_candles'])):
+            if row[0] < current:
+                frame.closed.append(row)
+            elif row[0] == current:
+                partial = row
+
+        in_bucket = [row for row in state.closed_1m if row[0] >= current]
+        if partial is not None:
+            # Exchange prefix of the bucket; local minutes are added back by fold()
+            local_volume = sum(row[5] for row in in_bucket) + state.forming[5]
+            frame.acc = partial[:5] + [max(0.0, partial[5] - local_volume)]
+        for row in in_bucket:
+            frame.fold(row)
+        state.frames[timeframe] = frame
+
+    def ingest_frame(self, symbol: str, df) -> bool:
+        """
+        Feed a 1m OHLCV DataFrame the caller already fetched (fetch_ohlcv
+        format). Ignored until the symbol has been seeded; a frame that does
+        not reach back to our forming minute drops the symbol for reseeding.
+        """
+        if df is None or len(df) == 0:
+            return False
+        timestamps = df['timestamp'].values
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+        values = np.column_stack([timestamps.astype(np.float64)] +
+                                 [df[name].values.astype(np.float64) for name in COLUMNS[1:]])
+        with self.lock:
+            state = self.symbols.get(symbol)
+            if state is None:
+                return False
+            if not self._ingest(state, values.tolist()):
+                del self.symbols[symbol]
+                return False
+            state.refreshed_at = self.clock()
+            return True
+
+    def refresh(self, exchange, symbol: str, force: bool = False) -> _SymbolState:
+        """Bring the symbol's 1m stream up to date with at most one request"""
+        state = self.symbols.get(symbol)
+        if state is None or state.forming is None:
+            return self._seed_symbol(exchange, symbol)
+
+        now = self.clock()
+        if not force and now - state.refreshed_at < float(self.config['min_refresh_seconds']):
+            return state
+        missing = int((now * 1000 - state.forming[0]) // MINUTE_MS) + 2
+        if missing > int(self.config['max_refresh_candles']) or \
+                not self._ingest(state, self._fetch(exchange, symbol, '1m', max(2, missing))):
+            return self._seed_symbol(exchange, symbol)
+        state.refreshed_at = now
+        return state
+
+    # -------------------------------------------------------------- queries
+
+    def _rows(self, state: _SymbolState, timeframe: str, limit: int) -> List[List[float]]:
+        if timeframe == '1m':
+            closed = list(state.closed_1m)[-(limit - 1):] if limit > 1 else []
+            return closed + [list(state.forming)]
+        frame = state.frames[timeframe]
+        closed = list(frame.closed)[-(limit - 1):] if limit > 1 else []
+        return closed + [frame.forming_bar(state.forming)]
+
+    def get_rows(self, exchange, symbol: str, timeframes: Iterable[str], limit: int) -> Dict[str, List[List[float]]]:
+        """ccxt-style [[ts, o, h, l, c, v], ...] per timeframe; the last row is the forming candle"""
+        with self.lock:
+            state = self.refresh(exchange, symbol)
+            if state.forming is None:
+                return {timeframe: [] for timeframe in timeframes}
+            result = {}
+            for timeframe in timeframes:
+                if timeframe != '1m' and timeframe not in state.frames:
+                    self._seed_timeframe(exchange, symbol, state, timeframe)
+                result[timeframe] = self._rows(state, timeframe, limit)
+            return result
+
+    def get_frames(self, exchange, symbol: str, timeframes: Iterable[str], limit: int) -> Dict[str, pd.DataFrame]:
+        """Same DataFrames strategies.ma_crossover.fetch_ohlcv returns, one per timeframe"""
+        frames = {}
+        for timeframe, rows in self.get_rows(exchange, symbol, timeframes, limit).items():
+            df = pd.DataFrame(rows, columns=list(COLUMNS))
+            df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+            frames[timeframe] = df
+        return frames
+
+
+# Global aggregator instance
+_timeframe_aggregator = None
+
+
+def get_timeframe_aggregator(config: Optional[Dict] = None) -> TimeframeAggregator:
+    """Get the process-wide timeframe aggregator shared by all detectors"""
+    global _timeframe_aggregator
+    if _timeframe_aggregator is None:
+        _timeframe_aggregator = TimeframeAggregator(config)
+    return _timeframe_aggregator
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+🛡️ TRAILING STOP ENGINE
+=======================
+
+Trails STOP_LOSS_LIMIT sell orders behind the highest price seen, in its own
+thread, independently of the strategy loop.
+
+- Price feed: attach_feed() subscribes to the local order book stream, so
+  every depth update folds the mid price in and wakes the engine as soon
+  as a ratchet is queued. Symbols whose stream price is older than
+  stale_feed_seconds (stream down, book resyncing, no feed attached) fall
+  back to one batched fetch_tickers() per poll (default 2 s). Callers that
+  already have a price push it with on_price().
+- Highest price per protected position is updated on every price. The stop
+  only ratchets when the new stop beats the working one by min_improvement
+  (hysteresis), and at most once per min_replace_seconds per symbol. Between
+  replaces the high keeps moving, so the next replace uses the latest high.
+- Replacements are queued and executed as one batch per tick (cancel +
+  create per symbol, latest target wins), then state is persisted once.
+  The exchange calls run outside the engine lock, so on_price/get/protect/
+  release from the strategy thread never wait on the network.
+- State is written atomically (temp file + os.replace) and reloaded at start.
+
+on_update(symbol, data) receives the same dict shape the bot has always
+stored as trading_state['trailing_stop_data'].
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from log_utils import log_message
+
+DEFAULT_TRAILING_ENGINE_CONFIG = {
+    'poll_interval_seconds': 2.0,
+    'stale_feed_seconds': 5.0,      # Stream prices older than this fall back to fetch_tickers
+    'min_improvement': 0.001,       # Ratchet only when the stop rises by at least 0.1%
+    'min_replace_seconds': 5.0,     # At most one cancel/replace per symbol in this window
+    'limit_offset': 0.005,          # Limit price = stop * (1 - limit_offset)
+    'state_file': 'trailing_stop_state.json'
+}
+
+
+class ProtectedPosition:
+    """One trailed stop order"""
+
+    __slots__ = ('symbol', 'order_id', 'amount', 'entry_price', 'highest_price', 'stop_price',
+                 'trailing_percent', 'last_replaced', 'target_stop', 'replacing')
+
+    def __init__(self, symbol: str, order_id: Optional[str], amount: float, entry_price: float,
+                 highest_price: float, stop_price: float, trailing_percent: float, last_replaced: float = 0.0):
+        self.symbol = symbol
+        self.order_id = order_id
+        self.amount = amount
+        self.entry_price = entry_price
+        self.highest_price = highest_price
+        self.stop_price = stop_price
+        self.trailing_percent = trailing_percent
+        self.last_replaced = last_replaced
+        self.target_stop: Optional[float] = None    # Queued ratchet, not yet on the exchange
+        self.replacing = False                      # Cancel/create in flight (outside the lock)
+
+    def to_dict(self) -> Dict:
+        """trading_state['trailing_stop_data'] format"""
+        return {
+            'order_id': self.order_id,
+            'symbol': self.symbol,
+            'amount': self.amount,
+            'entry_price': self.entry_price,
+            'highest_price': self.highest_price,
+            'current_stop_price': self.stop_price,
+            'trailing_percent': self.trailing_percent,
+            'last_updated': self.last_replaced,
+            'active': True
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProtectedPosition':
+        return cls(data['symbol'], data.get('order_id'), float(data['amount']), float(data['entry_price']),
+                   float(data['highest_price']), float(data['current_stop_price']),
+                   float(data['trailing_percent']), float(data.get('last_updated', 0.0)))
+
+
+class TrailingStopEngine:
+    """
+    🛡️ Event-driven trailing stops, decoupled from the strategy loop
+    """
+
+    def __init__(self, exchange, config: Optional[Dict] = None,
+                 api_call: Optional[Callable] = None,
+                 on_update: Optional[Callable[[str, Dict], None]] = None,
+                 clock: Optional[Callable[[], float]] = None,
+                 market_metadata=None):
+        self.exchange = exchange
+        self.market_metadata = market_metadata
+        self.config = dict(DEFAULT_TRAILING_ENGINE_CONFIG)
+        self.config.update(config or {})
+        self.api_call = api_call or (lambda func, *args, **kwargs: func(*args, **kwargs))
+        self.on_update = on_update
+        self.clock = clock or (lambda: time.time())
+        self.positions: Dict[str, ProtectedPosition] = {}
+        self.lock = threading.RLock()
+        self.replacements = 0
+        self.order_books = None
+        self.fed_at: Dict[str, float] = {}          # Last stream price per symbol
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load_state()
+
+    # ------------------------------------------------------------ positions
+
+    def protect(self, symbol: str, order_id: str, amount: float, entry_price: float, stop_price: float,
+                trailing_percent: float, highest_price: Optional[float] = None):
+        """Start trailing an already-placed stop order"""
+        with self.lock:
+            self.positions[symbol] = ProtectedPosition(
+                symbol, order_id, amount, entry_price, highest_price or entry_price, stop_price,
+                trailing_percent, self.clock())
+            self._persist()
+        self._track(symbol)
+
+    def adopt(self, data: Dict) -> bool:
+        """Pick up a trailing stop recorded in bot state (e.g. placed before a restart)"""
+        if not data or not data.get('active') or not data.get('symbol'):
+            return False
+        with self.lock:
+            if data['symbol'] in self.positions:
+                return False
+            self.positions[data['symbol']] = ProtectedPosition.from_dict(data)
+            self._persist()
+        self._track(data['symbol'])
+        return True
+
+    def release(self, symbol: str):
+        """Stop trailing (stop filled, position closed or protection removed)"""
+        with self.lock:
+            if self.positions.pop(symbol, None) is not None:
+                self._persist()
+            self.fed_at.pop(symbol, None)
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        with self.lock:
+            position = self.positions.get(symbol)
+            return position.to_dict() if position else None
+
+    # -------------------------------------------------------------- prices
+
+    def attach_feed(self, order_books):
+        """Take prices from a local order book manager; every protected symbol is tracked on it"""
+        self.order_books = order_books
+        order_books.add_listener(self.on_stream_price)
+        with self.lock:
+            symbols = list(self.positions)
+        for symbol in symbols:
+            self._track(symbol)
+
+    def _track(self, symbol: str):
+        if self.order_books is not None:
+            self.order_books.track(symbol)
+
+    def on_stream_price(self, symbol: str, price: float):
+        """Order book listener: fold the mid and wake the engine when a ratchet was queued"""
+        if symbol not in self.positions:
+            return
+        self.fed_at[symbol] = self.clock()
+        if self.on_price(symbol, price):
+            self._wake.set()
+
+    def on_price(self, symbol: str, price: float) -> bool:
+        """Fold one price; returns True when a stop ratchet was queued"""
+        with self.lock:
+            position = self.positions.get(symbol)
+            if position is None or not price or price <= position.highest_price:
+                return False
+            position.highest_price = price
+            new_stop = price * (1 - position.trailing_percent)
+            working = position.target_stop or position.stop_price
+            if (new_stop - working) / working < float(self.config['min_improvement']):
+                return False
+            position.target_stop = new_stop
+            return True
+
+    def poll_prices(self) -> int:
+        """One batched ticker request for every protected symbol without a fresh stream price"""
+        now = self.clock()
+        stale_after = float(self.config['stale_feed_seconds'])
+        with self.lock:
+            symbols = [symbol for symbol in self.positions
+                       if symbol not in self.fed_at or now - self.fed_at[symbol] > stale_after]
+        if not symbols:
+            return 0
+        try:
+            tickers = self.api_call(self.exchange.fetch_tickers, symbols) or {}
+        except Exception as e:
+            log_message(f"⚠️ Trailing stop price poll failed: {e}")
+            return 0
+        queued = 0
+        for symbol in symbols:
+            ticker = tickers.get(symbol)
+            if ticker and ticker.get('last'):
+                queued += int(self.on_price(symbol, float(ticker['last'])))
+        return queued
+
+    # -------------------------------------------------------------- orders
+
+    def process_pending(self) -> int:
+        """Execute every due ratchet as one batch; returns how many stops were replaced"""
+        now = self.clock()
+        with self.lock:
+            due = [p for p in self.positions.values()
+                   if p.target_stop is not None and not p.replacing and
+                   now - p.last_replaced >= float(self.config['min_replace_seconds'])]
+            jobs = []
+            for position in due:
+                position.replacing = True
+                jobs.append((position, position.order_id, position.target_stop))
+
+        # Network I/O without the lock: prices keep folding in while orders are replaced
+        results = [(position, target) + self._replace(position, order_id, target)
+                   for position, order_id, target in jobs]
+
+        notifications = []
+        orphans = []
+        replaced = 0
+        with self.lock:
+            for position, target, cancelled, order, placed_stop in results:
+                position.replacing = False
+                tracked = self.positions.get(position.symbol) is position
+                if not cancelled:
+                    # Usually the stop already triggered; the bot's fill check takes over from here
+                    if tracked:
+                        del self.positions[position.symbol]
+                    notifications.append((position.symbol, dict(position.to_dict(), active=False)))
+                    continue
+                position.order_id = order['id'] if order else None
+                position.last_replaced = now
+                if not tracked:
+                    if order:
+                        orphans.append(position)    # Released while replacing: don't leave a stray stop
+                    continue
+                if order:
+                    position.stop_price = placed_stop
+                    if position.target_stop == target:
+                        position.target_stop = None     # A higher target queued meanwhile stays queued
+                    self.replacements += 1
+                    replaced += 1
+                    log_message(f"✅ TRAILING STOP UPDATED: {position.symbol} order {order['id']} "
+                                f"stop ${placed_stop:.4f}")
+                else:
+                    # Old order is gone: retry on the next tick rather than leaving the position bare
+                    log_message(f"⚠️ {position.symbol} has no working stop - retrying next tick")
+                notifications.append((position.symbol, position.to_dict()))
+            if jobs:
+                self._persist()
+
+        for position in orphans:
+            try:
+                self.api_call(self.exchange.cancel_order, position.order_id, position.symbol)
+            except Exception as e:
+                log_message(f"⚠️ Could not cancel stop {position.order_id} for released {position.symbol}: {e}")
+        for symbol, data in notifications:
+            self._notify(symbol, data)
+        return replaced
+
+    def _replace(self, position: ProtectedPosition, order_id: Optional[str], target: float):
+        """
+        Cancel `order_id` and place a stop at `target`; exchange calls only, no engine state touched.
+        Returns (cancelled, new order or None, stop price on the exchange grid); cancelled is False
+        when the old order could not be cancelled.
+        """
+        symbol = position.symbol
+        new_stop = target
+        limit_price = new_stop * (1 - float(self.config['limit_offset']))
+        amount = position.amount
+        if self.market_metadata is not None:
+            # Exchange grid: both prices round down so the stop never lands above the trail
+            new_stop = self.market_metadata.price_to_precision(symbol, new_stop, 'floor')
+            limit_price = self.market_metadata.price_to_precision(symbol, limit_price, 'floor')
+            amount = self.market_metadata.amount_to_precision(symbol, amount)
+        log_message(f"📈 TRAILING STOP RATCHET {symbol}: high ${position.highest_price:.4f} | "
+                    f"stop ${position.stop_price:.4f} -> ${new_stop:.4f}")
+
+        if order_id:
+            try:
+                self.api_call(self.exchange.cancel_order, order_id, symbol)
+            except Exception as e:
+                log_message(f"❌ Could not cancel stop {order_id} for {symbol}: {e} - releasing")
+                return False, None, new_stop
+
+        try:
+            order = self.api_call(lambda: self.exchange.create_order(
+                symbol, 'STOP_LOSS_LIMIT', 'sell', amount, limit_price,
+                {'stopPrice': str(new_stop), 'timeInForce': 'GTC'}))
+        except Exception as e:
+            order = None
+            log_message(f"❌ Failed to place trailing stop for {symbol}: {e}")
+        return True, (order if order and order.get('id') else None), new_stop
+
+    def tick(self) -> int:
+        self.poll_prices()
+        return self.process_pending()
+
+    # ------------------------------------------------------------- thread
+
+    def start(self):
+        """Run poll + ratchet in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='trailing-stop-engine', daemon=True)
+        self._thread.start()
+        log_message(f"🛡️ Trailing stop engine started ({self.config['poll_interval_seconds']}s poll)")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        interval = float(self.config['poll_interval_seconds'])
+        while not self._stop_event.is_set():
+            self._wake.clear()
+            try:
+                self.tick()
+            except Exception as e:
+                log_message(f"⚠️ Trailing stop engine error: {e}")
+            self._wake.wait(interval)       # Stream ratchets cut the wait short
+
+    # -------------------------------------------------------- persistence
+
+    def _notify(self, symbol: str, data: Dict):
+        if self.on_update:
+            try:
+                self.on_update(symbol, data)
+            except Exception as e:
+                log_message(f"⚠️ Trailing stop state callback failed: {e}")
+
+    def _persist(self):
+        path = self.config['state_file']
+        if not path:
+            return
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({s: p.to_dict() for s, p in self.positions.items()}, f, indent=2)
+            os.replace(tmp, path)
+        except Exception as e:
+            log_message(f"⚠️ Failed to persist trailing stop state: {e}")
+
+    def _load_state(self):
+        path = self.config['state_file']
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                for symbol, data in json.load(f).items():
+                    self.positions[symbol] = ProtectedPosition.from_dict(data)
+        except Exception as e:
+            log_message(f"⚠️ Ignoring unreadable trailing stop state {path}: {e}")
+
+
+# Global engine instance
+_trailing_engine = None
+
+
+def get_trailing_stop_engine(exchange, config: Optional[Dict] = None, **kwargs) -> TrailingStopEngine:
+    """Get the process-wide trailing stop engine"""
+    global _trailing_engine
+    if _trailing_engine is None:
+        _trailing_engine = TrailingStopEngine(exchange, config, **kwargs)
+    return _trailing_engine